@@ -0,0 +1,320 @@
+"""
+Consultas analíticas (tendencias históricas) con DuckDB sobre instantáneas Parquet de la base.
+
+Las preguntas de tendencia (boletines por mes y titular, éxito de envíos por importancia,
+demora de clasificación e informe) recorren toda la historia. Para que no compitan con las
+escrituras de la aplicación no se ejecutan sobre SQLite:
+
+- actualizar_instantanea() lee una vez las columnas necesarias de boletines, envios_log,
+  clientes y los resúmenes mensuales (ver rollups.py) con una conexión de solo lectura y
+  las escribe como Parquet (zstd) en
+  <data>/analitica (ver paths.get_analitica_dir). La instantánea se renueva cuando la base
+  cambió y la anterior tiene más de INTERVALO_INSTANTANEA_SEGUNDOS.
+- MotorAnalitico expone vistas DuckDB sobre esos archivos y las consultas, que se resuelven
+  con agregaciones vectorizadas y devuelven DataFrames listos para dashboard_charts.
+
+No se usa la extensión sqlite_scanner de DuckDB: se descarga la primera vez que se usa y la
+aplicación se instala también en equipos sin acceso a internet.
+
+Si duckdb o pyarrow no están instalados, DUCKDB_DISPONIBLE es False y las consultas fallan
+con RuntimeError (la página de analítica lo informa).
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.request import pathname2url
+
+from paths import get_analitica_dir, get_db_path
+
+try:
+    import duckdb
+    import pyarrow
+    import pyarrow.parquet
+    DUCKDB_DISPONIBLE = True
+except ImportError:
+    DUCKDB_DISPONIBLE = False
+
+INTERVALO_INSTANTANEA_SEGUNDOS = int(os.getenv('ANALITICA_INTERVALO_SEGUNDOS', '300'))
+FILAS_POR_LOTE = 50_000
+ARCHIVO_MANIFIESTO = 'instantanea.json'
+
+# Columnas de cada tabla que se copian a la instantánea, con su tipo en Parquet.
+# Las fechas quedan como texto (igual que en SQLite) y se interpretan en las consultas.
+COLUMNAS_INSTANTANEA = {
+    'boletines': {
+        'id': 'int64', 'titular': 'string', 'numero_boletin': 'string', 'fecha_boletin': 'string',
+        'importancia': 'string', 'reporte_generado': 'int64', 'reporte_enviado': 'int64', 'fecha_alta': 'string',
+        'fecha_creacion_reporte': 'string', 'fecha_envio_reporte': 'string',
+    },
+    'envios_log': {
+        'id': 'int64', 'titular': 'string', 'fecha_envio': 'string', 'estado': 'string', 'importancia': 'string',
+        'numero_boletin': 'string',
+    },
+    'clientes': {
+        'id': 'int64', 'titular': 'string',
+    },
+    'resumen_boletines_mensual': {
+        'mes': 'string', 'titular': 'string', 'importancia': 'string', 'cantidad': 'int64', 'generados': 'int64',
+        'enviados': 'int64',
+    },
+    'resumen_envios_mensual': {
+        'mes': 'string', 'titular': 'string', 'importancia': 'string', 'estado': 'string', 'cantidad': 'int64',
+    },
+}
+
+# Fecha de publicación del boletín (DD/MM/AAAA); si falta o no es válida, la fecha de alta
+_FECHA_BOLETIN = "COALESCE(try_strptime(fecha_boletin, '%d/%m/%Y'), TRY_CAST(fecha_alta AS TIMESTAMP))"
+
+# Primer mes ('AAAA-MM') de los últimos $meses meses, para filtrar los resúmenes mensuales
+_DESDE_MES = "strftime(date_trunc('month', current_date) - to_months($meses - 1), '%Y-%m')"
+
+_lock = threading.Lock()
+
+def _sql_columna(nombre, tipo):
+    if tipo == 'int64':
+        return f"CAST(COALESCE({nombre}, 0) AS INTEGER)" if nombre.startswith('reporte_') else f"CAST({nombre} AS INTEGER)"
+    return f"CAST({nombre} AS TEXT)"
+
+def _firma_base(ruta_db):
+    """Cambia con cada escritura en la base (o en su WAL)."""
+    firma = []
+    for ruta in (ruta_db, f"{ruta_db}-wal"):
+        try:
+            estado = os.stat(ruta)
+            firma.extend((estado.st_mtime_ns, estado.st_size))
+        except FileNotFoundError:
+            firma.extend((None, None))
+    return firma
+
+def _leer_manifiesto(directorio):
+    try:
+        with open(os.path.join(directorio, ARCHIVO_MANIFIESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _exportar_tabla(conn, tabla, columnas, ruta):
+    """Copia las columnas de una tabla a un Parquet, por lotes; si la tabla no existe queda vacío."""
+    esquema = pyarrow.schema([(nombre, getattr(pyarrow, tipo)()) for nombre, tipo in columnas.items()])
+    existe = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)).fetchone()
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    filas = 0
+    try:
+        with pyarrow.parquet.ParquetWriter(temporal, esquema, compression='zstd') as escritor:
+            if existe:
+                cursor = conn.execute(
+                    f"SELECT {', '.join(_sql_columna(nombre, tipo) for nombre, tipo in columnas.items())} FROM {tabla}")
+                while True:
+                    lote = cursor.fetchmany(FILAS_POR_LOTE)
+                    if not lote:
+                        break
+                    escritor.write_table(pyarrow.Table.from_arrays(
+                        [pyarrow.array(valores, type=campo.type) for valores, campo in zip(zip(*lote), esquema)],
+                        schema=esquema))
+                    filas += len(lote)
+            else:
+                escritor.write_table(esquema.empty_table())
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return filas
+
+def actualizar_instantanea(ruta_db=None, directorio=None, max_edad=INTERVALO_INSTANTANEA_SEGUNDOS):
+    """
+    Renueva la instantánea Parquet si la base cambió y la actual tiene más de max_edad segundos.
+
+    Args:
+        ruta_db: Base SQLite (por defecto get_db_path())
+        directorio: Directorio de la instantánea (por defecto get_analitica_dir())
+        max_edad: Antigüedad mínima en segundos para renovar una instantánea desactualizada
+                  (0 = renovar en cuanto cambie la base)
+
+    Returns:
+        dict: Manifiesto de la instantánea vigente: firma, fecha, marca de tiempo y filas por tabla
+    """
+    if not DUCKDB_DISPONIBLE:
+        raise RuntimeError("La analítica necesita duckdb y pyarrow")
+    ruta_db = ruta_db or get_db_path()
+    directorio = directorio or get_analitica_dir()
+    os.makedirs(directorio, exist_ok=True)
+    with _lock:
+        manifiesto = _leer_manifiesto(directorio)
+        firma = _firma_base(ruta_db)
+        if manifiesto is not None and (manifiesto['firma'] == firma or time.time() - manifiesto['marca'] < max_edad):
+            return manifiesto
+
+        inicio = time.perf_counter()
+        # Solo lectura: la exportación nunca toma el bloqueo de escritura
+        conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(ruta_db))}?mode=ro", uri=True)
+        try:
+            filas = {tabla: _exportar_tabla(conn, tabla, columnas, os.path.join(directorio, f"{tabla}.parquet"))
+                     for tabla, columnas in COLUMNAS_INSTANTANEA.items()}
+        except sqlite3.Error as e:
+            logging.error(f"Error al exportar la instantánea analítica: {e}")
+            raise Exception(f"Error al exportar la instantánea analítica: {e}")
+        finally:
+            conn.close()
+        manifiesto = {'firma': firma, 'marca': time.time(), 'fecha': datetime.now().isoformat(timespec='seconds'),
+                      'filas': filas}
+        with open(os.path.join(directorio, ARCHIVO_MANIFIESTO), 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f)
+        logging.info(f"Instantánea analítica actualizada en {time.perf_counter() - inicio:.2f}s: {filas}")
+        return manifiesto
+
+class MotorAnalitico:
+    """Consultas de tendencias con DuckDB sobre la instantánea Parquet de la base."""
+
+    def __init__(self, ruta_db=None, directorio=None, max_edad=INTERVALO_INSTANTANEA_SEGUNDOS):
+        if not DUCKDB_DISPONIBLE:
+            raise RuntimeError("La analítica necesita duckdb y pyarrow")
+        self.ruta_db = ruta_db or get_db_path()
+        self.directorio = directorio or get_analitica_dir()
+        self.max_edad = max_edad
+        self.manifiesto = actualizar_instantanea(self.ruta_db, self.directorio, max_edad)
+        self.conn = duckdb.connect()
+        for tabla in COLUMNAS_INSTANTANEA:
+            ruta = os.path.join(self.directorio, f"{tabla}.parquet").replace("'", "''")
+            self.conn.execute(f"CREATE VIEW {tabla} AS SELECT * FROM read_parquet('{ruta}')")
+
+    def _consultar(self, sql, parametros=None):
+        """Ejecuta una consulta sobre la instantánea vigente y devuelve un DataFrame."""
+        self.manifiesto = actualizar_instantanea(self.ruta_db, self.directorio, self.max_edad)
+        # Un cursor por consulta: la conexión se comparte entre las sesiones (hilos) de Streamlit
+        cursor = self.conn.cursor()
+        try:
+            return cursor.execute(sql, parametros or []).df()
+        except duckdb.Error as e:
+            logging.error(f"Error en consulta analítica: {e}")
+            raise Exception(f"Error en consulta analítica: {e}")
+        finally:
+            cursor.close()
+
+    def boletines_por_mes_y_titular(self, meses=36, top_titulares=10):
+        """
+        Boletines publicados por mes y titular; los titulares fuera de los top_titulares con más
+        boletines del período se agrupan como 'Otros'.
+
+        Args:
+            meses: Meses hacia atrás desde el actual (None = toda la historia)
+            top_titulares: Titulares que se muestran por separado
+
+        Returns:
+            DataFrame: columnas mes, titular, boletines
+        """
+        return self._consultar(f"""
+            WITH periodo AS (
+                SELECT CAST(strptime(mes, '%Y-%m') AS DATE) AS mes, titular, cantidad
+                FROM resumen_boletines_mensual
+                WHERE mes != '' AND ($meses IS NULL OR mes >= {_DESDE_MES})
+            ),
+            ranking AS (
+                SELECT titular FROM periodo GROUP BY titular ORDER BY SUM(cantidad) DESC, titular LIMIT $top
+            )
+            SELECT p.mes, COALESCE(NULLIF(r.titular, ''), 'Otros') AS titular, SUM(p.cantidad)::BIGINT AS boletines
+            FROM periodo p LEFT JOIN ranking r ON p.titular = r.titular
+            GROUP BY ALL
+            ORDER BY p.mes, boletines DESC, titular
+        """, {'meses': meses, 'top': top_titulares})
+
+    def tendencia_mensual(self, meses=12):
+        """
+        Boletines publicados por mes con cuántos ya tienen informe generado y enviado.
+
+        Args:
+            meses: Meses hacia atrás desde el actual (None = toda la historia)
+
+        Returns:
+            DataFrame: columnas mes, boletines, generados, enviados
+        """
+        return self._consultar(f"""
+            SELECT CAST(strptime(mes, '%Y-%m') AS DATE) AS mes,
+                   SUM(cantidad)::BIGINT AS boletines,
+                   SUM(generados)::BIGINT AS generados,
+                   SUM(enviados)::BIGINT AS enviados
+            FROM resumen_boletines_mensual
+            WHERE mes != '' AND ($meses IS NULL OR mes >= {_DESDE_MES})
+            GROUP BY 1
+            ORDER BY 1
+        """, {'meses': meses})
+
+    def tasa_exito_envios(self, meses=None):
+        """
+        Resultado de los envíos por importancia, desde el resumen mensual (incluye los envíos
+        ya purgados de envios_log).
+
+        Args:
+            meses: Meses hacia atrás desde el actual (None = toda la historia)
+
+        Returns:
+            DataFrame: columnas importancia, envios, exitosos, fallidos, sin_email, sin_archivo y
+                       tasa_exito (proporción entre 0 y 1)
+        """
+        return self._consultar(f"""
+            SELECT COALESCE(NULLIF(importancia, ''), 'Sin importancia') AS importancia,
+                   SUM(cantidad)::BIGINT AS envios,
+                   COALESCE(SUM(cantidad) FILTER (WHERE estado = 'exitoso'), 0)::BIGINT AS exitosos,
+                   COALESCE(SUM(cantidad) FILTER (WHERE estado = 'fallido'), 0)::BIGINT AS fallidos,
+                   COALESCE(SUM(cantidad) FILTER (WHERE estado = 'sin_email'), 0)::BIGINT AS sin_email,
+                   COALESCE(SUM(cantidad) FILTER (WHERE estado = 'sin_archivo'), 0)::BIGINT AS sin_archivo,
+                   round(COALESCE(SUM(cantidad) FILTER (WHERE estado = 'exitoso'), 0) / SUM(cantidad), 4) AS tasa_exito
+            FROM resumen_envios_mensual
+            WHERE $meses IS NULL OR mes >= {_DESDE_MES}
+            GROUP BY ALL
+            ORDER BY envios DESC
+        """, {'meses': meses})
+
+    def demora_clasificacion(self, meses=12):
+        """
+        Días desde la publicación del boletín hasta el informe y hasta el envío, por importancia
+        (solo boletines ya clasificados).
+
+        Args:
+            meses: Meses hacia atrás desde el actual (None = toda la historia)
+
+        Returns:
+            DataFrame: columnas importancia, boletines, informados, mediana_dias_informe,
+                       p90_dias_informe, enviados, mediana_dias_envio, p90_dias_envio
+        """
+        return self._consultar(f"""
+            WITH base AS (
+                SELECT importancia,
+                       {_FECHA_BOLETIN} AS fecha,
+                       date_diff('day', {_FECHA_BOLETIN}, TRY_CAST(fecha_creacion_reporte AS TIMESTAMP)) AS dias_informe,
+                       date_diff('day', {_FECHA_BOLETIN}, TRY_CAST(fecha_envio_reporte AS TIMESTAMP)) AS dias_envio
+                FROM boletines
+                WHERE importancia != 'Pendiente'
+            )
+            SELECT importancia,
+                   COUNT(*) AS boletines,
+                   COUNT(dias_informe) AS informados,
+                   median(dias_informe) AS mediana_dias_informe,
+                   quantile_cont(dias_informe, 0.9) AS p90_dias_informe,
+                   COUNT(dias_envio) AS enviados,
+                   median(dias_envio) AS mediana_dias_envio,
+                   quantile_cont(dias_envio, 0.9) AS p90_dias_envio
+            FROM base
+            WHERE fecha IS NOT NULL AND ($meses IS NULL OR fecha >= date_trunc('month', current_date) - to_months($meses - 1))
+            GROUP BY importancia
+            ORDER BY importancia
+        """, {'meses': meses})
+
+_motores = {}
+# Propio del registro: MotorAnalitico() toma _lock al actualizar la instantánea
+_lock_motores = threading.Lock()
+
+def obtener_motor_analitico(ruta_db=None, directorio=None):
+    """
+    Devuelve el MotorAnalitico compartido de una base (uno por proceso, para no reabrir
+    DuckDB en cada recarga de la página).
+    """
+    clave = (ruta_db or get_db_path(), directorio or get_analitica_dir())
+    with _lock_motores:
+        motor = _motores.get(clave)
+        if motor is None:
+            motor = _motores[clave] = MotorAnalitico(*clave)
+        return motor
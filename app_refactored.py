@@ -24,24 +24,13 @@ st.set_page_config(
 # Agregar el directorio src al path para importaciones
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from datetime import datetime
-import pandas as pd
-
 # Importar módulos refactorizados
 # from src.config.settings import app_settings
+# Solo lo necesario para la primera pintura (login); las páginas, la base de datos y la
+# navegación se importan al usarse (ver src/ui/router.py)
 from src.ui.styles import AppStyles
-from src.ui.navigation import NavigationManager
-from src.ui.components import UIComponents
+from src.ui.router import PageRouter
 from src.utils.session_manager import SessionManager
-
-# Importar páginas
-from src.ui.pages.dashboard import show_dashboard
-from src.ui.pages.marcas import show_marcas_page
-# La página email_config se importará dinámicamente para mejorar el rendimiento
-
-# Importar módulos existentes (mantenemos la funcionalidad actual)
-from auth_manager_simple import handle_authentication
-from database import crear_conexion, limpieza_automatica_logs
 #from verificador_programado import inicializar_verificador_en_app, mostrar_panel_verificacion
 
 
@@ -62,6 +51,7 @@ class MarcasApp:
         """Inicializar el sistema una sola vez por sesión"""
         if not SessionManager.get('sistema_inicializado', False):
             try:
+                from database import crear_conexion, limpieza_automatica_logs
                 conn = crear_conexion()
                 if conn:
                     try:
@@ -89,6 +79,8 @@ class MarcasApp:
     
     def _handle_navigation(self):
         """Manejar la navegación de la aplicación"""
+        from src.ui.navigation import NavigationManager
+        
         # Crear menú de navegación
         selected_tab = NavigationManager.create_navigation_menu()
         
@@ -99,6 +91,8 @@ class MarcasApp:
     
     def _route_to_page(self):
         """Enrutar a la página correspondiente según el estado actual"""
+        from src.ui.navigation import NavigationManager
+        
         current_page = NavigationManager.get_current_page()
         
         # Debug para navegación
@@ -120,6 +114,8 @@ class MarcasApp:
             self._show_marcas_page()
         elif current_page == 'emails' and NavigationManager.is_section_active('email'):
             self._show_emails_page()
+        elif current_page == 'analitica':
+            self._show_analitica_page()
         elif current_page == 'config':
             self._show_settings_page()
         else:
@@ -128,36 +124,35 @@ class MarcasApp:
     
     def _show_dashboard(self):
         """Mostrar la página de dashboard"""
-        show_dashboard()
+        PageRouter.show('dashboard')
     
     def _show_upload_page(self):
         """Mostrar la página de carga de datos"""
-        from src.ui.pages.upload import show_upload_page
-        show_upload_page()
+        PageRouter.show('upload')
     
     def _show_historial_page(self):
         """Mostrar la página de historial"""
-        from src.ui.pages.historial import show_historial_page
-        show_historial_page()
+        PageRouter.show('historial')
     
     def _show_clientes_page(self):
         """Mostrar la página de clientes"""
-        from src.ui.pages.clientes import show_clientes_page
-        show_clientes_page()
+        PageRouter.show('clientes')
     
     def _show_informes_page(self):
         """Mostrar la página de informes"""
-        from src.ui.pages.informes import show_informes_page
-        show_informes_page()
+        PageRouter.show('informes')
     
     def _show_emails_page(self):
         """Mostrar la página de emails"""
-        from src.ui.pages.emails import show_emails_page
-        show_emails_page()
+        PageRouter.show('emails')
     
     def _show_marcas_page(self):
         """Mostrar la página de marcas"""
-        show_marcas_page()
+        PageRouter.show('marcas')
+    
+    def _show_analitica_page(self):
+        """Mostrar la página de analítica"""
+        PageRouter.show('analitica')
     
     def _show_settings_page(self):
         """Mostrar la página de configuración"""
@@ -169,8 +164,7 @@ class MarcasApp:
         
         # Tab de configuración de email
         with tabs[0]:
-            from src.ui.pages.email_config import show_email_config_page
-            show_email_config_page()
+            PageRouter.show('email_config')
             
         
     
@@ -179,6 +173,8 @@ class MarcasApp:
         # Inicializar verificador programado (ejecuta verificaciones automáticas)
         #inicializar_verificador_en_app()
         
+        from auth_manager_simple import handle_authentication
+        
         # Verificar autenticación
         if not handle_authentication():
             st.stop()
@@ -226,6 +222,10 @@ class MarcasApp:
 def main():
     """Función principal de la aplicación"""
     try:
+        from metrics import iniciar_servidor_metricas
+        
+        # Servidor de métricas Prometheus (una sola vez por proceso)
+        iniciar_servidor_metricas()
         app = MarcasApp()
         app.run()
     except Exception as e:
@@ -0,0 +1,17 @@
+"""
+Benchmarks de la capa de base de datos.
+
+- datos_sinteticos: arma bases SQLite temporales de tamaño configurable (clientes, Marcas,
+  boletines, envios_log, emails_enviados, catálogo de informes) con datos de Faker y la
+  distribución despareja de los datos reales (pocos titulares con muchos boletines).
+- casos: un caso por cada función pública de database.py, database_extensions.py y de las
+  consultas de email_sender; las que no se miden figuran en EXCLUIDAS con el motivo.
+- medicion: corre los casos, compara contra una línea base JSON y marca las regresiones.
+- carga: prueba de carga con sesiones concurrentes que repiten las secuencias de acceso a
+  datos de las páginas; informa percentiles de latencia, bloqueos y operaciones por segundo.
+
+Uso:
+    python -m benchmarks --escala 1 --guardar-baseline   # medir y guardar la línea base
+    python -m benchmarks --escala 1                      # medir y comparar contra ella
+    python -m benchmarks.carga --sesiones 5 --duracion 30  # prueba de carga concurrente
+"""
@@ -0,0 +1,74 @@
+"""
+python -m benchmarks [--escala N] [--repeticiones N] [--solo PATRON] [--guardar-baseline]
+
+Mide los casos de benchmarks.casos sobre una base sintética y los compara contra la línea
+base (benchmarks/baseline.json por defecto). Sale con código 1 si hay regresiones (más lento
+que la tolerancia, o con error cuando en la línea base funcionaba) y 2 si falta cobertura de
+alguna función pública.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.casos import verificar_cobertura
+from benchmarks.medicion import (RUTA_BASELINE, TOLERANCIA_POR_DEFECTO, cargar_resultado, comparar,
+                                 guardar_resultado, medir)
+
+def _parsear_argumentos(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Benchmarks de la capa de base de datos sobre datos sintéticos")
+    parser.add_argument('--escala', type=float, default=1.0, help="Multiplicador del tamaño de la base (1 = 20000 boletines)")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Mediciones por caso")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos sintéticos")
+    parser.add_argument('--solo', metavar='PATRON', help="Medir solo los casos cuyo nombre coincida con la regex")
+    parser.add_argument('--baseline', default=RUTA_BASELINE, help="Archivo JSON de la línea base")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_POR_DEFECTO,
+                        help="Aumento relativo de la mediana tolerado antes de marcar regresión")
+    parser.add_argument('--guardar-baseline', action='store_true', help="Guardar el resultado como nueva línea base")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado completo como JSON")
+    return parser.parse_args(argv)
+
+def _progreso(actual, total, mensaje=None):
+    if mensaje:
+        print(f"[{actual + 1}/{total}] {mensaje}", file=sys.stderr)
+
+def main(argv=None):
+    opciones = _parsear_argumentos(argv)
+    sin_caso, sobrantes = verificar_cobertura()
+    if sin_caso or sobrantes:
+        for nombre in sin_caso:
+            print(f"Función sin caso de benchmark ni exclusión: {nombre}", file=sys.stderr)
+        for nombre in sobrantes:
+            print(f"Caso o exclusión de una función que ya no existe: {nombre}", file=sys.stderr)
+        return 2
+
+    resultado = medir(opciones.escala, opciones.repeticiones, patron=opciones.solo, semilla=opciones.semilla,
+                      progreso=_progreso)
+    base = cargar_resultado(opciones.baseline)
+    filas = comparar(resultado, base, opciones.tolerancia) if base else None
+
+    if opciones.json:
+        print(json.dumps({'resultado': resultado, 'comparacion': filas}, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'caso':<50} {'base ms':>10} {'actual ms':>10} {'var':>8}  estado")
+        for fila in filas or [{'nombre': nombre, 'base_ms': None, 'actual_ms': r.get('mediana_ms'),
+                               'variacion': None, 'estado': 'error' if 'error' in r else '-'}
+                              for nombre, r in sorted(resultado['casos'].items())]:
+            base_ms = f"{fila['base_ms']:.3f}" if fila['base_ms'] is not None else '-'
+            actual_ms = f"{fila['actual_ms']:.3f}" if fila['actual_ms'] is not None else '-'
+            variacion = f"{fila['variacion']:+.0%}" if fila['variacion'] is not None else '-'
+            print(f"{fila['nombre']:<50} {base_ms:>10} {actual_ms:>10} {variacion:>8}  {fila['estado']}")
+        if base is None and not opciones.guardar_baseline:
+            print(f"\nNo hay línea base en {opciones.baseline}; usar --guardar-baseline para crearla.")
+
+    if opciones.guardar_baseline:
+        guardar_resultado(resultado, opciones.baseline)
+        print(f"Línea base guardada en {opciones.baseline}", file=sys.stderr)
+
+    # Un caso que ya fallaba en la línea base no frena: solo lo nuevo
+    regresiones = [fila['nombre'] for fila in filas or []
+                   if fila['estado'] == 'regresion' or (fila['estado'] == 'error' and fila['base_ms'] is not None)]
+    return 1 if regresiones else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
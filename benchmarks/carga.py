@@ -0,0 +1,337 @@
+"""
+Prueba de carga: varias sesiones concurrentes sobre una copia de la base.
+
+Cada sesión es un hilo que repite, como lo haría un usuario de Streamlit, las secuencias de
+acceso a datos de las páginas (SECUENCIAS): cada recarga abre su conexión con
+database.crear_conexion(), así que intervienen la caché de consultas, la instrumentación y la
+verificación de esquema igual que en la aplicación. Las secuencias se eligen al azar según
+los pesos de MEZCLA_POR_DEFECTO, con una pausa entre recargas.
+
+La base es una copia: sintética (datos_sinteticos) o de un archivo existente (--base). Mientras
+corre la prueba, paths.get_db_path apunta a la copia (BOLETINES_DB_PATH); la base real no se toca.
+
+El resultado informa por secuencia los percentiles de latencia, los errores 'database is
+locked', los informes rechazados por haber otro en curso (TrabajoEnCurso) y el resto de los
+errores, más el rendimiento total en operaciones por segundo.
+
+Uso:
+    python -m benchmarks.carga --sesiones 5 --duracion 30 --escala 0.25
+    python -m benchmarks.carga --sesiones 5 --wal --sin-cache     # comparar configuraciones
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import database
+import query_cache
+from benchmarks.datos_sinteticos import crear_base_sintetica
+from jobs import TrabajoEnCurso, ejecutar_trabajo, obtener_trabajo, reservar_trabajo
+from report_generator import ReportGenerator
+from src.services.dashboard_service import DashboardService
+
+PERCENTILES = (50, 90, 95, 99)
+IMPORTANCIAS_EDICION = ('Baja', 'Media', 'Alta')
+# Boletines por edición de importancia (lo que cambia un usuario antes de guardar en el grid)
+BOLETINES_POR_EDICION = 20
+BLOQUE_GRID = 100
+
+def _dashboard(conn, contexto, aleatorio):
+    database.crear_tabla(conn)
+    DashboardService.get_dashboard_data(conn)
+    for tramo in ('vencidos', 'proximos_vencer', 'en_curso'):
+        DashboardService.get_deadline_details(conn, tramo)
+
+def _historial(conn, contexto, aleatorio):
+    database.crear_tabla(conn)
+    database.contar_boletines_por_importancia(conn)
+    filtro = {'titular': {'filterType': 'text', 'type': 'contains', 'filter': aleatorio.choice('AEIOU')}}
+    if aleatorio.random() < 0.5:
+        filtro['importancia'] = {'filterType': 'set', 'values': aleatorio.sample(IMPORTANCIAS_EDICION, 2)}
+    database.contar_boletines_por_importancia(conn, filtro)
+    database.obtener_bloque_boletines(conn, 0, BLOQUE_GRID, filtro, [{'colId': 'fecha_alta', 'sort': 'desc'}])
+
+def _importancia(conn, contexto, aleatorio):
+    ids = aleatorio.sample(contexto['boletin_ids'], min(BOLETINES_POR_EDICION, len(contexto['boletin_ids'])))
+    database.actualizar_importancias_lote(conn, {boletin_id: aleatorio.choice(IMPORTANCIAS_EDICION)
+                                                 for boletin_id in ids})
+
+def _clientes(conn, contexto, aleatorio):
+    filas, columnas = database.obtener_clientes(conn, force_refresh=True)
+    if not filas:
+        return
+    cambios = []
+    for fila in aleatorio.sample(filas, min(3, len(filas))):
+        # La columna del CUIT se llama 'CUIT' en el esquema; actualizar_clientes_lote espera 'cuit'
+        cliente = dict(zip((columna.lower() for columna in columnas), fila))
+        cliente['telefono'] = f"+54 11 {aleatorio.randint(1000, 9999)} {aleatorio.randint(1000, 9999)}"
+        cambios.append(cliente)
+    database.actualizar_clientes_lote(conn, cambios)
+
+def _informes(conn, contexto, aleatorio):
+    # Igual que la página de informes: un trabajo 'generar_informes' por base a la vez
+    trabajo_id = reservar_trabajo(conn, 'generar_informes', 'Prueba de carga')
+    ejecutar_trabajo(trabajo_id, lambda conn_trabajo, progreso: ReportGenerator(
+        output_dir=contexto['directorio_informes']).generate_reports(conn_trabajo, progreso))
+    trabajo = obtener_trabajo(conn, trabajo_id)
+    if trabajo['estado'] == 'error':
+        raise Exception(trabajo['error'])
+
+# Secuencias de acceso a datos de cada página: nombre -> funcion(conn, contexto, aleatorio)
+SECUENCIAS = {
+    'dashboard': _dashboard,
+    'historial_filtro': _historial,
+    'edicion_importancia': _importancia,
+    'edicion_clientes': _clientes,
+    'generar_informes': _informes,
+}
+
+# Peso relativo de cada secuencia: se navega y filtra mucho más de lo que se edita
+MEZCLA_POR_DEFECTO = {
+    'dashboard': 4,
+    'historial_filtro': 4,
+    'edicion_importancia': 2,
+    'edicion_clientes': 1,
+    'generar_informes': 1,
+}
+
+def es_bloqueo(error):
+    """True si el error es un 'database is locked' de SQLite, directo o envuelto por la capa de datos."""
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
+
+@contextlib.contextmanager
+def base_redirigida(ruta_db, con_cache=True):
+    """
+    Hace que paths.get_db_path() devuelva ruta_db mientras dure el bloque (variable de entorno
+    BOLETINES_DB_PATH), así database.crear_conexion() y los módulos que importan get_db_path
+    directamente (analytics, auth_manager_simple, utilidades_reportes, ...) abren la copia.
+
+    Args:
+        ruta_db: Base sobre la que corre la prueba
+        con_cache: Si es False, query_cache no guarda resultados (cada lectura va a la base)
+    """
+    ruta_original = os.environ.get('BOLETINES_DB_PATH')
+    max_entradas_original = query_cache.MAX_ENTRADAS_CACHE
+    os.environ['BOLETINES_DB_PATH'] = ruta_db
+    if not con_cache:
+        query_cache.MAX_ENTRADAS_CACHE = 0
+    try:
+        yield
+    finally:
+        if ruta_original is None:
+            os.environ.pop('BOLETINES_DB_PATH', None)
+        else:
+            os.environ['BOLETINES_DB_PATH'] = ruta_original
+        query_cache.MAX_ENTRADAS_CACHE = max_entradas_original
+        database._esquemas_verificados.discard(ruta_db)
+
+def _preparar_contexto(ruta_db, directorio):
+    """Lee de la copia los ids que editan las secuencias."""
+    conn = sqlite3.connect(ruta_db)
+    try:
+        boletin_ids = [fila[0] for fila in conn.execute(
+            "SELECT id FROM boletines WHERE importancia = 'Pendiente' ORDER BY id")]
+        if not boletin_ids:
+            boletin_ids = [fila[0] for fila in conn.execute("SELECT id FROM boletines ORDER BY id")]
+    finally:
+        conn.close()
+    return {'boletin_ids': boletin_ids, 'directorio_informes': os.path.join(directorio, 'informes')}
+
+def _sesion(numero, contexto, mezcla, fin, pausa, semilla, registros):
+    aleatorio = random.Random(semilla * 1000 + numero)
+    nombres = list(mezcla)
+    pesos = [mezcla[nombre] for nombre in nombres]
+    while time.perf_counter() < fin:
+        nombre = aleatorio.choices(nombres, pesos)[0]
+        inicio = time.perf_counter()
+        resultado, error = 'ok', None
+        conn = None
+        try:
+            conn = database.crear_conexion()
+            SECUENCIAS[nombre](conn, contexto, aleatorio)
+        except TrabajoEnCurso:
+            resultado = 'rechazada'
+        except Exception as e:
+            resultado, error = ('bloqueo' if es_bloqueo(e) else 'error'), str(e)
+        finally:
+            if conn is not None:
+                conn.close()
+        registros.append((nombre, (time.perf_counter() - inicio) * 1000, resultado, error))
+        if pausa:
+            time.sleep(aleatorio.uniform(0, 2 * pausa))
+
+def _percentil(ordenados, percentil):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    indice = max(0, -(-len(ordenados) * percentil // 100) - 1)
+    return ordenados[min(indice, len(ordenados) - 1)]
+
+def resumir(registros, segundos):
+    """
+    Resume los registros de las sesiones.
+
+    Args:
+        registros: Lista de (secuencia, milisegundos, resultado, error)
+        segundos: Duración real de la prueba
+
+    Returns:
+        dict: {'total': {...}, 'secuencias': {nombre: {...}}} con operaciones, ok, bloqueos,
+              rechazadas, errores, operaciones_por_segundo y p50_ms..p99_ms y max_ms de las
+              operaciones terminadas sin error
+    """
+    por_secuencia = defaultdict(list)
+    for registro in registros:
+        por_secuencia[registro[0]].append(registro)
+
+    def _estadisticas(filas):
+        conteo = defaultdict(int)
+        for _, _, resultado, _ in filas:
+            conteo[resultado] += 1
+        resumen = {
+            'operaciones': len(filas),
+            'ok': conteo['ok'],
+            'bloqueos': conteo['bloqueo'],
+            'rechazadas': conteo['rechazada'],
+            'errores': conteo['error'],
+            'operaciones_por_segundo': round(len(filas) / segundos, 2) if segundos else 0.0,
+        }
+        tiempos = sorted(ms for _, ms, resultado, _ in filas if resultado == 'ok')
+        if tiempos:
+            for percentil in PERCENTILES:
+                resumen[f"p{percentil}_ms"] = round(_percentil(tiempos, percentil), 3)
+            resumen['max_ms'] = round(tiempos[-1], 3)
+        errores = sorted({error for _, _, resultado, error in filas if resultado == 'error'})
+        if errores:
+            resumen['ejemplos_error'] = errores[:5]
+        return resumen
+
+    return {
+        'total': _estadisticas(registros),
+        'secuencias': {nombre: _estadisticas(filas) for nombre, filas in sorted(por_secuencia.items())},
+    }
+
+def ejecutar_carga(sesiones=5, duracion=30.0, escala=0.25, semilla=0, pausa=0.1, mezcla=None,
+                   ruta_base=None, wal=False, con_cache=True):
+    """
+    Corre la prueba de carga sobre una copia temporal de la base.
+
+    Args:
+        sesiones: Sesiones (hilos) concurrentes
+        duracion: Segundos que corre cada sesión
+        escala: Escala de la base sintética (ignorada si se pasa ruta_base)
+        semilla: Semilla de los datos y de la elección de secuencias
+        pausa: Pausa media en segundos entre recargas de una sesión
+        mezcla: {secuencia: peso}; por defecto MEZCLA_POR_DEFECTO
+        ruta_base: Base existente a copiar en lugar de generar una sintética
+        wal: Pasar la copia a journal_mode=WAL antes de empezar
+        con_cache: Si es False, se desactiva query_cache durante la prueba
+
+    Returns:
+        dict: {'metadatos': {...}, 'total': {...}, 'secuencias': {...}} (ver resumir)
+    """
+    mezcla = dict(mezcla or MEZCLA_POR_DEFECTO)
+    desconocidas = set(mezcla) - set(SECUENCIAS)
+    if desconocidas:
+        raise ValueError(f"Secuencias desconocidas: {', '.join(sorted(desconocidas))}")
+
+    with tempfile.TemporaryDirectory(prefix='carga_boletines_') as directorio:
+        ruta_db = os.path.join(directorio, 'boletines.db')
+        if ruta_base:
+            shutil.copyfile(ruta_base, ruta_db)
+        else:
+            crear_base_sintetica(ruta_db, escala, semilla)
+        if wal:
+            conn = sqlite3.connect(ruta_db)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        contexto = _preparar_contexto(ruta_db, directorio)
+
+        registros = []
+        with base_redirigida(ruta_db, con_cache):
+            inicio = time.perf_counter()
+            fin = inicio + duracion
+            hilos = [threading.Thread(target=_sesion, name=f"sesion-{numero}",
+                                      args=(numero, contexto, mezcla, fin, pausa, semilla, registros))
+                     for numero in range(sesiones)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            segundos = time.perf_counter() - inicio
+
+    return {
+        'metadatos': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'sesiones': sesiones,
+            'duracion_s': round(segundos, 2),
+            'escala': None if ruta_base else escala,
+            'base': ruta_base,
+            'semilla': semilla,
+            'pausa_s': pausa,
+            'mezcla': mezcla,
+            'wal': wal,
+            'cache': con_cache,
+            'sqlite': sqlite3.sqlite_version,
+        },
+        **resumir(registros, segundos),
+    }
+
+def _parsear_mezcla(texto):
+    mezcla = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        mezcla[nombre.strip()] = float(peso) if peso else 1.0
+    return mezcla
+
+def _parsear_argumentos(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.carga',
+                                     description="Prueba de carga con sesiones concurrentes sobre una copia de la base")
+    parser.add_argument('--sesiones', type=int, default=5, help="Sesiones concurrentes")
+    parser.add_argument('--duracion', type=float, default=30.0, help="Segundos de prueba")
+    parser.add_argument('--escala', type=float, default=0.25, help="Escala de la base sintética (1 = 20000 boletines)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos y de las sesiones")
+    parser.add_argument('--pausa', type=float, default=0.1, help="Pausa media en segundos entre recargas")
+    parser.add_argument('--mezcla', type=_parsear_mezcla,
+                        help="Pesos por secuencia, p. ej. 'dashboard=3,edicion_importancia=1' "
+                             f"(secuencias: {', '.join(SECUENCIAS)})")
+    parser.add_argument('--base', help="Copiar esta base en lugar de generar una sintética")
+    parser.add_argument('--wal', action='store_true', help="Usar journal_mode=WAL en la copia")
+    parser.add_argument('--sin-cache', action='store_true', help="Desactivar la caché de consultas")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado completo como JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    opciones = _parsear_argumentos(argv)
+    resultado = ejecutar_carga(opciones.sesiones, opciones.duracion, opciones.escala, opciones.semilla,
+                               opciones.pausa, opciones.mezcla, opciones.base, opciones.wal,
+                               not opciones.sin_cache)
+    if opciones.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    else:
+        columnas = ('operaciones', 'bloqueos', 'rechazadas', 'errores', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+        print(f"{'secuencia':<22}" + ''.join(f"{columna:>12}" for columna in columnas))
+        for nombre, fila in [*resultado['secuencias'].items(), ('TOTAL', resultado['total'])]:
+            valores = [fila.get(columna) for columna in columnas]
+            print(f"{nombre:<22}" + ''.join(f"{'-' if valor is None else valor:>12}" for valor in valores))
+        metadatos = resultado['metadatos']
+        print(f"\n{metadatos['sesiones']} sesiones, {metadatos['duracion_s']} s: "
+              f"{resultado['total']['operaciones_por_segundo']} operaciones/s "
+              f"(WAL: {'sí' if metadatos['wal'] else 'no'}, caché: {'sí' if metadatos['cache'] else 'no'})")
+        for nombre, fila in resultado['secuencias'].items():
+            for error in fila.get('ejemplos_error', []):
+                print(f"Error en {nombre}: {error}", file=sys.stderr)
+    # Los bloqueos son parte de lo que se mide; otros errores indican que la prueba está rota
+    return 1 if resultado['total']['errores'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Casos de benchmark: uno por función pública de database.py y database_extensions.py, y por
+cada consulta de email_sender (funciones que reciben conn).
+
+Cada caso es ejecutar(conn, contexto), donde contexto es lo que devuelve
+datos_sinteticos.crear_base_sintetica(). Los casos con escribe=True modifican la base y se
+corren sobre una copia nueva en cada repetición (ver medicion.medir_caso).
+
+Las conexiones de los benchmarks son sqlite3 simples, sin el atributo ruta_db, así que
+query_cache no interviene: se mide siempre la consulta, no un acierto de caché.
+
+Las funciones que no se pueden medir aisladas figuran en EXCLUIDAS con el motivo;
+verificar_cobertura() falla si aparece una función pública nueva sin caso ni exclusión.
+"""
+import inspect
+from typing import Callable, NamedTuple
+
+import database
+import database_extensions
+import email_sender
+from records import Boletin
+
+MODULOS = (database, database_extensions, email_sender)
+
+class Caso(NamedTuple):
+    nombre: str
+    ejecutar: Callable
+    escribe: bool = False
+
+EXCLUIDAS = {
+    'database.configurar_logging': "Configura handlers de logging, no toca la base",
+    'database.crear_conexion': "Abre la base real de get_db_path(); su costo es el de crear_tabla, que se mide",
+    'database.obtener_ruta_reporte_pdf': "Abre su propia conexión a la base real con crear_conexion()",
+    'database.optimizar_archivo_log': "Trabaja sobre archivos de log, no sobre la base",
+    'database.limpieza_automatica_logs': "Escribe log_config.txt en el directorio actual",
+    'database.configurar_limpieza_logs': "Solo lee tamaños de archivos de log",
+    'email_sender.procesar_envio_emails': "Necesita credenciales SMTP; sus consultas se miden por separado",
+}
+
+def _filtro_grid():
+    return {'importancia': {'filterType': 'set', 'values': ['Alta', 'Media']},
+            'titular': {'filterType': 'text', 'type': 'contains', 'filter': 'S'}}
+
+def _orden_grid():
+    return [{'colId': 'fecha_alta', 'sort': 'desc'}]
+
+def _datos_a_insertar(contexto):
+    """Un boletín nuevo de 200 registros más 200 ya cargados (para medir también los duplicados)."""
+    existentes = {}
+    for fila in contexto['muestra_boletines'][:200]:
+        existentes.setdefault(fila.titular, []).append(fila)
+    nuevos = {}
+    for i in range(200):
+        titular = contexto['titulares'][i % len(contexto['titulares'])]
+        nuevos.setdefault(titular, []).append(Boletin(
+            titular, '9999', '08/10/2026', str(i + 1), 'Solicitante', 'Agente', str(7_000_000 + i), '35',
+            'MARCA BENCH', 'MARCA BENCH', '35'))
+    for titular, registros in existentes.items():
+        nuevos.setdefault(titular, []).extend(registros)
+    return nuevos
+
+def _registro_para_actualizar(contexto):
+    fila = contexto['muestra_boletines'][0]
+    return (fila.id, fila.numero_boletin, fila.fecha_boletin, fila.numero_orden, fila.solicitante, fila.agente,
+            fila.numero_expediente, fila.clase, fila.marca_custodia, 'MARCA EDITADA', fila.clases_acta, 0,
+            fila.titular, 0, 'Alta')
+
+def _cambios_clientes(conn, contexto):
+    filas = conn.execute("""
+        SELECT id, titular, email, telefono, direccion, ciudad, provincia, CUIT FROM clientes ORDER BY id LIMIT 50
+    """).fetchall()
+    campos = ('id', 'titular', 'email', 'telefono', 'direccion', 'ciudad', 'provincia', 'cuit')
+    return [{**dict(zip(campos, fila)), 'telefono': '+54 11 0000 0000'} for fila in filas]
+
+def _primer_cliente(conn):
+    return conn.execute("SELECT id, titular, email, telefono, direccion, ciudad, provincia, CUIT FROM clientes "
+                        "ORDER BY id LIMIT 1").fetchone()
+
+CASOS = [
+    # database.py: esquema e inserción
+    Caso('database.crear_tabla', lambda conn, ctx: database.crear_tabla(conn)),
+    Caso('database.insertar_datos', lambda conn, ctx: database.insertar_datos(conn, ctx['datos_a_insertar']),
+         escribe=True),
+    # database.py: listado de boletines
+    Caso('database.obtener_datos', lambda conn, ctx: database.obtener_datos(conn)),
+    Caso('database.compilar_modelo_grid', lambda conn, ctx: database.compilar_modelo_grid(_filtro_grid(), _orden_grid())),
+    Caso('database.obtener_bloque_boletines',
+         lambda conn, ctx: database.obtener_bloque_boletines(conn, 100, 200, _filtro_grid(), _orden_grid())),
+    Caso('database.contar_boletines_por_importancia',
+         lambda conn, ctx: database.contar_boletines_por_importancia(conn, _filtro_grid())),
+    Caso('database.obtener_boletines_para_clasificar', lambda conn, ctx: database.obtener_boletines_para_clasificar(conn)),
+    # database.py: edición de boletines
+    Caso('database.actualizar_registro',
+         lambda conn, ctx: database.actualizar_registro(conn, *_registro_para_actualizar(ctx)), escribe=True),
+    Caso('database.actualizar_importancia_boletin',
+         lambda conn, ctx: database.actualizar_importancia_boletin(conn, ctx['boletin_ids'][0], 'Alta'), escribe=True),
+    Caso('database.actualizar_importancias_lote',
+         lambda conn, ctx: database.actualizar_importancias_lote(
+             conn, {boletin_id: ('Baja', 'Media', 'Alta')[i % 3] for i, boletin_id in enumerate(ctx['boletin_ids'][:500])}),
+         escribe=True),
+    Caso('database.eliminar_registro', lambda conn, ctx: database.eliminar_registro(conn, ctx['boletin_ids'][-1]),
+         escribe=True),
+    # database.py: clientes
+    Caso('database.obtener_clientes', lambda conn, ctx: database.obtener_clientes(conn)),
+    Caso('database.cliente_tiene_marcas', lambda conn, ctx: database.cliente_tiene_marcas(conn, cuit=ctx['cuits'][0])),
+    Caso('database.insertar_cliente',
+         lambda conn, ctx: database.insertar_cliente(conn, 'CLIENTE BENCH SA', 'bench@example.com', '+54 11 0000 0000',
+                                                     'Calle 1', 'Rosario', 'Santa Fe', 30_999_999_990), escribe=True),
+    Caso('database.actualizar_cliente',
+         lambda conn, ctx: database.actualizar_cliente(conn, *_primer_cliente(conn)), escribe=True),
+    Caso('database.actualizar_clientes_lote',
+         lambda conn, ctx: database.actualizar_clientes_lote(conn, _cambios_clientes(conn, ctx)), escribe=True),
+    Caso('database.eliminar_cliente', lambda conn, ctx: database.eliminar_cliente(conn, _primer_cliente(conn)[0]),
+         escribe=True),
+    # database.py: marcas
+    Caso('database.obtener_marcas', lambda conn, ctx: database.obtener_marcas(conn)),
+    Caso('database.obtener_marcas_por_cliente', lambda conn, ctx: database.obtener_marcas_por_cliente(conn, 1)),
+    Caso('database.insertar_marca',
+         lambda conn, ctx: database.insertar_marca(conn, 'MARCA BENCH', 'M9999999', 35, cuit=str(ctx['cuits'][0]),
+                                                   titular=ctx['clientes'][0]), escribe=True),
+    Caso('database.actualizar_marca',
+         lambda conn, ctx: database.actualizar_marca(conn, ctx['marca_ids'][0], 'MARCA EDITADA', 'M0000001', 35,
+                                                     cuit=str(ctx['cuits'][0]), titular=ctx['clientes'][0]),
+         escribe=True),
+    Caso('database.eliminar_marca', lambda conn, ctx: database.eliminar_marca(conn, ctx['marca_ids'][-1]), escribe=True),
+    # database.py: historial de envíos
+    Caso('database.insertar_log_envio',
+         lambda conn, ctx: database.insertar_log_envio(conn, ctx['clientes'][0], 'bench@example.com', 'exitoso',
+                                                       numero_boletin='9999', importancia='Alta'), escribe=True),
+    Caso('database.registrar_envios_lote',
+         lambda conn, ctx: database.registrar_envios_lote(
+             conn, [('2026-10-08 10:00:00', boletin_id) for boletin_id in ctx['boletin_ids'][:100]],
+             [(ctx['clientes'][0], 'bench@example.com', '2026-10-08 10:00:00', 'exitoso', None, '9999', 'Alta')] * 10),
+         escribe=True),
+    Caso('database.obtener_logs_envios', lambda conn, ctx: database.obtener_logs_envios(conn, limite=500)),
+    Caso('database.obtener_estadisticas_logs', lambda conn, ctx: database.obtener_estadisticas_logs(conn)),
+    Caso('database.limpiar_logs_antiguos', lambda conn, ctx: database.limpiar_logs_antiguos(conn, dias=90),
+         escribe=True),
+    Caso('database.obtener_emails_enviados', lambda conn, ctx: database.obtener_emails_enviados(conn, limite=500)),
+    # database.py: usuarios
+    Caso('database.obtener_usuarios', lambda conn, ctx: database.obtener_usuarios(conn)),
+    Caso('database.insertar_usuario',
+         lambda conn, ctx: database.insertar_usuario(conn, 'bench', 'bench@example.com', 'user', 1), escribe=True),
+    Caso('database.actualizar_usuario',
+         lambda conn, ctx: database.actualizar_usuario(conn, 1, 'usuario0', 'bench@example.com', 'admin', 1),
+         escribe=True),
+    Caso('database.eliminar_usuario', lambda conn, ctx: database.eliminar_usuario(conn, 1), escribe=True),
+    # database_extensions.py
+    Caso('database_extensions.obtener_emails_enviados',
+         lambda conn, ctx: database_extensions.obtener_emails_enviados(conn, limite=500)),
+    Caso('database_extensions.obtener_estadisticas_logs',
+         lambda conn, ctx: database_extensions.obtener_estadisticas_logs(conn)),
+    Caso('database_extensions.obtener_logs_envios',
+         lambda conn, ctx: database_extensions.obtener_logs_envios(conn, limite=500)),
+    Caso('database_extensions.limpiar_logs_antiguos',
+         lambda conn, ctx: database_extensions.limpiar_logs_antiguos(conn, dias=90), escribe=True),
+    # email_sender.py: consultas
+    Caso('email_sender.obtener_info_reportes_pendientes',
+         lambda conn, ctx: email_sender.obtener_info_reportes_pendientes(conn)),
+    Caso('email_sender.obtener_registros_pendientes_envio',
+         lambda conn, ctx: email_sender.obtener_registros_pendientes_envio(conn)),
+    Caso('email_sender.validar_clientes_para_envio', lambda conn, ctx: email_sender.validar_clientes_para_envio(conn)),
+    Caso('email_sender.obtener_estadisticas_envios', lambda conn, ctx: email_sender.obtener_estadisticas_envios(conn)),
+    Caso('email_sender.actualizar_estado_envio',
+         lambda conn, ctx: email_sender.actualizar_estado_envio(conn, ctx['boletin_ids'][:100]), escribe=True),
+]
+
+def preparar_contexto(conn, contexto):
+    """
+    Completa el contexto con lo que necesitan los casos y que conviene leer una sola vez.
+
+    Args:
+        conn: Conexión a la base sintética
+        contexto: Lo que devolvió crear_base_sintetica()
+    """
+    cursor = conn.execute("""
+        SELECT titular, numero_boletin, fecha_boletin, numero_orden, solicitante, agente, numero_expediente,
+               clase, marca_custodia, marca_publicada, clases_acta, importancia, id
+        FROM boletines ORDER BY id LIMIT 200
+    """)
+    contexto['muestra_boletines'] = [Boletin(*fila) for fila in cursor.fetchall()]
+    contexto['datos_a_insertar'] = _datos_a_insertar(contexto)
+    return contexto
+
+def funciones_publicas():
+    """
+    Funciones que tienen que tener caso o exclusión.
+
+    Returns:
+        set: 'modulo.funcion' de las funciones públicas de database y database_extensions, y de
+             las de email_sender que reciben conn
+    """
+    nombres = set()
+    for modulo in MODULOS:
+        for nombre, funcion in inspect.getmembers(modulo, inspect.isfunction):
+            if funcion.__module__ != modulo.__name__ or nombre.startswith('_'):
+                continue
+            if modulo is email_sender and next(iter(inspect.signature(funcion).parameters), None) != 'conn':
+                continue
+            nombres.add(f"{modulo.__name__}.{nombre}")
+    return nombres
+
+def verificar_cobertura():
+    """
+    Returns:
+        tuple: (funciones sin caso ni exclusión, casos o exclusiones de funciones que ya no existen)
+    """
+    cubiertas = {caso.nombre for caso in CASOS} | set(EXCLUIDAS)
+    publicas = funciones_publicas()
+    return sorted(publicas - cubiertas), sorted(cubiertas - publicas)
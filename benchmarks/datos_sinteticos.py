@@ -0,0 +1,252 @@
+"""
+Bases SQLite sintéticas para los benchmarks.
+
+crear_base_sintetica() escribe una base nueva con el esquema de la aplicación
+(database.crear_tabla, el catálogo de informes y las tablas Marcas, emails_enviados y users)
+y la llena con datos de Faker. Los tamaños se escalan desde CANTIDADES_BASE y la distribución
+imita la de producción:
+
+- Los boletines se reparten entre titulares con una ley de Zipf: pocos titulares concentran
+  la mayoría de las publicaciones.
+- Parte de los titulares de boletines no son clientes y parte de los clientes no tiene email.
+- Los boletines más viejos ya tienen informe y envío; los recientes están pendientes, y los
+  'Pendiente' nunca tienen informe generado (igual que en el flujo real).
+- envios_log es mayormente 'exitoso', con algunos fallidos, sin email y sin archivo.
+"""
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from faker import Faker
+
+from database import crear_tabla
+from report_catalog import asegurar_tabla_reportes, registrar_reporte
+
+# Filas por tabla con escala 1
+CANTIDADES_BASE = {
+    'clientes': 500,
+    'marcas': 2000,
+    'boletines': 20000,
+    'envios_log': 10000,
+    'emails_enviados': 3000,
+}
+
+# Fracción de titulares con boletines que no están en clientes
+FRACCION_TITULARES_SIN_CLIENTE = 0.15
+FRACCION_CLIENTES_SIN_EMAIL = 0.05
+EXPONENTE_ZIPF = 1.1
+
+IMPORTANCIAS = ('Pendiente', 'Baja', 'Media', 'Alta')
+PESOS_IMPORTANCIA = (20, 40, 25, 15)
+ESTADOS_ENVIO = ('exitoso', 'fallido', 'sin_email', 'sin_archivo')
+PESOS_ESTADO_ENVIO = (85, 8, 4, 3)
+
+def cantidades(escala=1.0):
+    """
+    Filas por tabla para una escala dada (al menos una por tabla).
+
+    Returns:
+        dict: {tabla: cantidad}
+    """
+    return {tabla: max(1, int(cantidad * escala)) for tabla, cantidad in CANTIDADES_BASE.items()}
+
+def _crear_tablas_auxiliares(conn):
+    """Tablas que la aplicación crea fuera de database.crear_tabla (db_utils, páginas, auth)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS Marcas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codtit INTEGER,
+            titular TEXT,
+            codigo_marca TEXT,
+            marca TEXT,
+            clase INTEGER,
+            acta TEXT,
+            nrocon TEXT,
+            custodia TEXT,
+            cuit TEXT,
+            email TEXT,
+            cliente_id INTEGER,
+            FOREIGN KEY (cliente_id) REFERENCES Clientes(id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_marcas_titular ON Marcas (titular);
+        CREATE TABLE IF NOT EXISTS emails_enviados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            destinatario TEXT NOT NULL,
+            asunto TEXT,
+            mensaje TEXT,
+            fecha_envio TEXT,
+            status TEXT,
+            mensaje_error TEXT,
+            tipo_email TEXT DEFAULT 'general',
+            titular TEXT,
+            periodo_notificacion TEXT,
+            marcas_sin_reportes TEXT
+        );
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT,
+            password_hash TEXT NOT NULL,
+            role TEXT DEFAULT 'user',
+            is_active INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            failed_login_attempts INTEGER DEFAULT 0,
+            locked_until TIMESTAMP
+        );
+    """)
+
+def _pesos_zipf(cantidad):
+    return [1 / (rango ** EXPONENTE_ZIPF) for rango in range(1, cantidad + 1)]
+
+def _unicos(generador, cantidad):
+    """Genera `cantidad` valores distintos con un generador de Faker."""
+    valores = set()
+    while len(valores) < cantidad:
+        valores.add(generador())
+    return list(valores)
+
+def crear_base_sintetica(ruta_db, escala=1.0, semilla=0):
+    """
+    Crea una base sintética en ruta_db (que no debe existir).
+
+    Args:
+        ruta_db: Ruta del archivo SQLite a crear
+        escala: Multiplicador de CANTIDADES_BASE
+        semilla: Semilla de random y Faker; la misma semilla da la misma base
+
+    Returns:
+        dict: Contexto para los casos: 'cantidades', 'titulares', 'clientes', 'cuits',
+              'boletin_ids', 'marca_ids', 'numeros_boletin', 'directorio_informes'
+    """
+    if os.path.exists(ruta_db):
+        raise FileExistsError(f"La base sintética ya existe: {ruta_db}")
+    aleatorio = random.Random(semilla)
+    faker = Faker('es_AR')
+    faker.seed_instance(semilla)
+    n = cantidades(escala)
+
+    conn = sqlite3.connect(ruta_db)
+    try:
+        crear_tabla(conn)
+        asegurar_tabla_reportes(conn)
+        _crear_tablas_auxiliares(conn)
+
+        # Titulares: los primeros son clientes, el resto aparece solo en boletines
+        total_titulares = n['clientes'] + max(1, int(n['clientes'] * FRACCION_TITULARES_SIN_CLIENTE))
+        titulares = _unicos(lambda: faker.company().upper(), total_titulares)
+        aleatorio.shuffle(titulares)
+        clientes = titulares[:n['clientes']]
+        cuits = _unicos(lambda: aleatorio.randrange(20_000_000_000, 34_000_000_000), n['clientes'])
+        conn.executemany("""
+            INSERT INTO clientes (titular, email, telefono, direccion, ciudad, provincia, CUIT)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (titular, None if aleatorio.random() < FRACCION_CLIENTES_SIN_EMAIL else faker.company_email(),
+             faker.phone_number(), faker.street_address(), faker.city(), faker.province(), cuit)
+            for titular, cuit in zip(clientes, cuits)
+        ])
+
+        # Marcas: repartidas con la misma asimetría; algunas sin cliente vinculado
+        nombres_marca = _unicos(lambda: faker.word().upper() + ' ' + faker.word().upper(), min(n['marcas'], 5000))
+        pesos_clientes = _pesos_zipf(n['clientes'])
+        indices = aleatorio.choices(range(n['clientes']), weights=pesos_clientes, k=n['marcas'])
+        conn.executemany("""
+            INSERT INTO Marcas (codtit, titular, codigo_marca, marca, clase, acta, nrocon, custodia, cuit, email, cliente_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (i + 1, clientes[i], f"M{numero:07d}", aleatorio.choice(nombres_marca), aleatorio.randint(1, 45),
+             str(aleatorio.randrange(1_000_000, 9_999_999)), str(numero), aleatorio.choice(('S', 'N')),
+             str(cuits[i]), None, None if aleatorio.random() < 0.1 else i + 1)
+            for numero, i in enumerate(indices, 1)
+        ])
+
+        # Boletines: uno por semana hacia atrás, cada publicación con su número de orden
+        personas = _unicos(faker.name, 200)
+        pesos_titulares = _pesos_zipf(total_titulares)
+        asignados = aleatorio.choices(titulares, weights=pesos_titulares, k=n['boletines'])
+        por_boletin = 400
+        cantidad_boletines = max(1, -(-n['boletines'] // por_boletin))
+        hoy = datetime(2026, 10, 1)
+        filas = []
+        for i, titular in enumerate(asignados):
+            semana = i // por_boletin
+            numero_boletin = str(5000 + cantidad_boletines - semana)
+            fecha = hoy - timedelta(weeks=semana)
+            # Lo de las últimas dos semanas sigue en curso; lo anterior ya se informó y envió
+            reciente = semana < 2
+            importancia = aleatorio.choices(IMPORTANCIAS, weights=PESOS_IMPORTANCIA)[0] if reciente else \
+                aleatorio.choices(IMPORTANCIAS[1:], weights=PESOS_IMPORTANCIA[1:])[0]
+            generado = importancia != 'Pendiente' and (not reciente or aleatorio.random() < 0.5)
+            enviado = generado and not reciente
+            marca = aleatorio.choice(nombres_marca)
+            filas.append((
+                numero_boletin, fecha.strftime('%d/%m/%Y'), str(i % por_boletin + 1),
+                aleatorio.choice(personas), aleatorio.choice(personas), str(aleatorio.randrange(3_000_000, 4_500_000)),
+                str(aleatorio.randint(1, 45)), marca, marca, str(aleatorio.randint(1, 45)),
+                int(enviado), fecha.strftime('%Y-%m-%d') if enviado else None, int(generado), titular,
+                fecha.strftime('%Y-%m-%d %H:%M:%S'), importancia,
+            ))
+        conn.executemany("""
+            INSERT INTO boletines (numero_boletin, fecha_boletin, numero_orden, solicitante, agente, numero_expediente,
+                                   clase, marca_custodia, marca_publicada, clases_acta, reporte_enviado,
+                                   fecha_envio_reporte, reporte_generado, titular, fecha_alta, importancia)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, filas)
+
+        # Catálogo de informes: uno por (titular, importancia) de lo generado
+        directorio_informes = os.path.join(os.path.dirname(os.path.abspath(ruta_db)), 'informes')
+        grupos = {}
+        for boletin_id, titular, importancia in conn.execute(
+                "SELECT id, titular, importancia FROM boletines WHERE reporte_generado = 1"):
+            grupos.setdefault((titular, importancia), []).append(boletin_id)
+        actualizaciones = []
+        for indice, ((titular, importancia), ids) in enumerate(grupos.items()):
+            nombre = f"Septiembre-2026 - Informe {indice} - {importancia} - {indice:06d}.pdf"
+            ruta = os.path.join(directorio_informes, nombre)
+            registrar_reporte(conn, ruta, titular, importancia, nombre_archivo=nombre, boletin_ids=ids,
+                              tamano_bytes=aleatorio.randint(20_000, 400_000), confirmar=False)
+            actualizaciones.extend((nombre, ruta, boletin_id) for boletin_id in ids)
+        conn.executemany("UPDATE boletines SET nombre_reporte = ?, ruta_reporte = ? WHERE id = ?", actualizaciones)
+
+        # Historial de envíos
+        conn.executemany("""
+            INSERT INTO envios_log (titular, email, fecha_envio, estado, error, numero_boletin, importancia)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (titular, faker.company_email(), (hoy - timedelta(minutes=aleatorio.randrange(0, 365 * 24 * 60))
+                                              ).strftime('%Y-%m-%d %H:%M:%S'),
+             estado, None if estado == 'exitoso' else faker.sentence(), str(aleatorio.randrange(4000, 5000)),
+             aleatorio.choice(IMPORTANCIAS[1:]))
+            for titular, estado in zip(
+                aleatorio.choices(clientes, weights=pesos_clientes, k=n['envios_log']),
+                aleatorio.choices(ESTADOS_ENVIO, weights=PESOS_ESTADO_ENVIO, k=n['envios_log']))
+        ])
+        conn.executemany("""
+            INSERT INTO emails_enviados (destinatario, asunto, mensaje, fecha_envio, status, tipo_email, titular)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (faker.company_email(), faker.sentence(), faker.paragraph(),
+             (hoy - timedelta(days=aleatorio.randrange(0, 365))).strftime('%Y-%m-%d %H:%M:%S'),
+             aleatorio.choices(('enviado', 'error'), weights=(95, 5))[0],
+             aleatorio.choice(('notificacion', 'reporte', 'general')), titular)
+            for titular in aleatorio.choices(clientes, weights=pesos_clientes, k=n['emails_enviados'])
+        ])
+        conn.executemany("INSERT INTO users (username, name, email, password_hash, role) VALUES (?, ?, ?, ?, ?)",
+                         [(f"usuario{i}", faker.name(), faker.email(), 'x', 'user') for i in range(20)])
+        conn.commit()
+
+        return {
+            'cantidades': n,
+            'titulares': titulares,
+            'clientes': clientes,
+            'cuits': cuits,
+            'boletin_ids': [fila[0] for fila in conn.execute("SELECT id FROM boletines ORDER BY id")],
+            'marca_ids': [fila[0] for fila in conn.execute("SELECT id FROM Marcas ORDER BY id")],
+            'numeros_boletin': sorted({fila[0] for fila in filas}),
+            'directorio_informes': directorio_informes,
+        }
+    finally:
+        conn.close()
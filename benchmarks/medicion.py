@@ -0,0 +1,185 @@
+"""
+Ejecución de los casos de benchmark y comparación contra una línea base.
+
+medir() arma una base sintética en un directorio temporal, corre cada caso varias veces y
+devuelve la mediana, el mínimo y el máximo en milisegundos. Los casos que escriben se corren
+sobre una copia nueva de la base en cada repetición; la copia no entra en el tiempo.
+
+La línea base es el JSON que devuelve medir() (ver guardar_resultado). comparar() marca como
+regresión todo caso cuya mediana supere la de la línea base en más de la tolerancia. Un caso
+que falla se informa como 'error'; solo cuenta como regresión si en la línea base funcionaba.
+"""
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.casos import CASOS, preparar_contexto
+from benchmarks.datos_sinteticos import crear_base_sintetica
+
+RUTA_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+TOLERANCIA_POR_DEFECTO = 0.25
+# Por debajo de este tiempo las diferencias son ruido del reloj, no regresiones
+MINIMO_COMPARABLE_MS = 0.5
+
+def _tiempo(caso, conn, contexto):
+    inicio = time.perf_counter()
+    caso.ejecutar(conn, contexto)
+    return (time.perf_counter() - inicio) * 1000
+
+def medir_caso(caso, ruta_plantilla, contexto, repeticiones=5, calentamiento=1):
+    """
+    Mide un caso.
+
+    Args:
+        caso: casos.Caso
+        ruta_plantilla: Base sintética de partida (no se modifica)
+        contexto: Contexto de la base (ver casos.preparar_contexto)
+        repeticiones: Mediciones a tomar
+        calentamiento: Ejecuciones previas que no se cuentan (solo casos de lectura)
+
+    Returns:
+        dict: {'mediana_ms', 'min_ms', 'max_ms', 'repeticiones'} o {'error'} si el caso falló
+    """
+    tiempos = []
+    try:
+        if caso.escribe:
+            ruta_copia = f"{ruta_plantilla}.{caso.nombre}"
+            for _ in range(repeticiones):
+                shutil.copyfile(ruta_plantilla, ruta_copia)
+                conn = sqlite3.connect(ruta_copia)
+                try:
+                    tiempos.append(_tiempo(caso, conn, contexto))
+                finally:
+                    conn.close()
+                    os.remove(ruta_copia)
+        else:
+            conn = sqlite3.connect(ruta_plantilla)
+            try:
+                for _ in range(calentamiento):
+                    caso.ejecutar(conn, contexto)
+                tiempos = [_tiempo(caso, conn, contexto) for _ in range(repeticiones)]
+            finally:
+                conn.close()
+    except Exception as e:
+        logging.error(f"Benchmark {caso.nombre} falló: {e}")
+        return {'error': str(e)}
+    return {
+        'mediana_ms': round(statistics.median(tiempos), 3),
+        'min_ms': round(min(tiempos), 3),
+        'max_ms': round(max(tiempos), 3),
+        'repeticiones': len(tiempos),
+    }
+
+def medir(escala=1.0, repeticiones=5, calentamiento=1, patron=None, semilla=0, progreso=None):
+    """
+    Crea una base sintética temporal y mide todos los casos.
+
+    Args:
+        escala: Escala de la base (ver datos_sinteticos.cantidades)
+        repeticiones: Mediciones por caso
+        calentamiento: Ejecuciones previas descartadas en los casos de lectura
+        patron: Expresión regular; solo se miden los casos cuyo nombre coincida
+        semilla: Semilla de los datos sintéticos
+        progreso: Callable opcional progreso(actual, total, mensaje)
+
+    Returns:
+        dict: {'metadatos': {...}, 'casos': {nombre: resultado de medir_caso}}
+    """
+    casos = [caso for caso in CASOS if not patron or re.search(patron, caso.nombre)]
+    with tempfile.TemporaryDirectory(prefix='bench_boletines_') as directorio:
+        ruta_plantilla = os.path.join(directorio, 'plantilla.db')
+        inicio = time.perf_counter()
+        contexto = crear_base_sintetica(ruta_plantilla, escala, semilla)
+        segundos_datos = time.perf_counter() - inicio
+        conn = sqlite3.connect(ruta_plantilla)
+        try:
+            preparar_contexto(conn, contexto)
+        finally:
+            conn.close()
+
+        resultados = {}
+        for indice, caso in enumerate(casos):
+            if progreso:
+                progreso(indice, len(casos), caso.nombre)
+            resultados[caso.nombre] = medir_caso(caso, ruta_plantilla, contexto, repeticiones, calentamiento)
+        if progreso:
+            progreso(len(casos), len(casos))
+
+    return {
+        'metadatos': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'escala': escala,
+            'semilla': semilla,
+            'repeticiones': repeticiones,
+            'cantidades': contexto['cantidades'],
+            'segundos_datos': round(segundos_datos, 2),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+        },
+        'casos': resultados,
+    }
+
+def guardar_resultado(resultado, ruta=RUTA_BASELINE):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+def cargar_resultado(ruta=RUTA_BASELINE):
+    """Devuelve el resultado guardado en ruta, o None si no existe."""
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+def comparar(actual, base, tolerancia=TOLERANCIA_POR_DEFECTO):
+    """
+    Compara las medianas de dos resultados de medir().
+
+    Args:
+        actual: Resultado recién medido
+        base: Línea base
+        tolerancia: Aumento relativo de la mediana que se tolera (0.25 = 25 %)
+
+    Returns:
+        list[dict]: Por caso: nombre, base_ms, actual_ms, variacion (relativa) y estado
+                    ('regresion', 'mejora', 'igual', 'nuevo' o 'error')
+
+    Raises:
+        ValueError: Si las bases no son comparables (otra escala o semilla)
+    """
+    for clave in ('escala', 'semilla'):
+        if actual['metadatos'][clave] != base['metadatos'][clave]:
+            raise ValueError(f"La línea base es de otra {clave}: {base['metadatos'][clave]} "
+                             f"(actual {actual['metadatos'][clave]})")
+    filas = []
+    for nombre, resultado in sorted(actual['casos'].items()):
+        anterior = base['casos'].get(nombre)
+        fila = {'nombre': nombre, 'base_ms': None, 'actual_ms': resultado.get('mediana_ms'), 'variacion': None}
+        if 'error' in resultado:
+            # Con base_ms es un caso que antes funcionaba: cuenta como regresión (ver __main__)
+            fila['base_ms'] = (anterior or {}).get('mediana_ms')
+            fila['estado'] = 'error'
+        elif anterior is None or 'mediana_ms' not in anterior:
+            fila['estado'] = 'nuevo'
+        else:
+            fila['base_ms'] = anterior['mediana_ms']
+            variacion = (fila['actual_ms'] - fila['base_ms']) / fila['base_ms'] if fila['base_ms'] else 0.0
+            fila['variacion'] = round(variacion, 3)
+            if max(fila['actual_ms'], fila['base_ms']) < MINIMO_COMPARABLE_MS:
+                fila['estado'] = 'igual'
+            elif variacion > tolerancia:
+                fila['estado'] = 'regresion'
+            elif variacion < -tolerancia:
+                fila['estado'] = 'mejora'
+            else:
+                fila['estado'] = 'igual'
+        filas.append(fila)
+    return filas
@@ -113,13 +113,17 @@ def create_urgency_gauge_chart(data):
     
     return fig
 
-def create_timeline_chart(data):
-    """Crea un gráfico de línea temporal para mostrar tendencias"""
+def create_timeline_chart(tendencia):
+    """
+    Crea un gráfico de línea temporal con los reportes generados y enviados de los boletines de cada mes
+
+    Args:
+        tendencia: DataFrame con columnas mes, generados y enviados (analytics.MotorAnalitico.tendencia_mensual)
+    """
     
-    # Datos simulados para demostración (en una implementación real vendría de la BD)
-    dates = pd.date_range(start='2024-01-01', periods=12, freq='M')
-    reportes_mes = [45, 52, 38, 61, 47, 55, 42, 58, 63, 49, 56, data['total_boletines']]
-    enviados_mes = [43, 50, 36, 59, 45, 53, 40, 56, 61, 47, 54, data['reportes_enviados']]
+    dates = tendencia['mes']
+    reportes_mes = tendencia['generados'].tolist()
+    enviados_mes = tendencia['enviados'].tolist()
     
     fig = go.Figure()
     
@@ -238,3 +242,100 @@ def create_compliance_bar_chart(data):
     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(0,0,0,0.1)')
     
     return fig
+
+def _layout_analitica(fig, titulo, yaxis_title, height=350):
+    """Aplica el estilo común de los gráficos de la página de analítica"""
+    fig.update_layout(
+        title={
+            'text': titulo,
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 18, 'color': '#495057', 'family': 'Inter'}
+        },
+        yaxis_title=yaxis_title,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.3,
+            xanchor="center",
+            x=0.5
+        ),
+        margin=dict(t=50, b=80, l=50, r=50),
+        plot_bgcolor='rgba(248, 249, 250, 0.8)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=height,
+        font=dict(family='Inter', color='#495057')
+    )
+    fig.update_xaxes(showgrid=False)
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(0,0,0,0.1)')
+    return fig
+
+def create_titular_month_chart(por_titular):
+    """
+    Crea un gráfico de barras apiladas con los boletines de cada mes por titular
+
+    Args:
+        por_titular: DataFrame con columnas mes, titular y boletines
+                     (analytics.MotorAnalitico.boletines_por_mes_y_titular)
+    """
+    fig = px.bar(por_titular, x='mes', y='boletines', color='titular',
+                 labels={'mes': 'Mes', 'boletines': 'Boletines', 'titular': 'Titular'})
+    fig.update_traces(hovertemplate='<b>%{fullData.name}</b><br>Mes: %{x|%m/%Y}<br>Boletines: %{y}<extra></extra>')
+    fig.update_layout(barmode='stack', xaxis_title="Mes")
+    return _layout_analitica(fig, "🏷️ Boletines por Mes y Titular", "Boletines", height=450)
+
+def create_send_success_chart(envios):
+    """
+    Crea un gráfico de barras apiladas con el resultado de los envíos por importancia
+
+    Args:
+        envios: DataFrame con columnas importancia, exitosos, fallidos, sin_email, sin_archivo y tasa_exito
+                (analytics.MotorAnalitico.tasa_exito_envios)
+    """
+    estados = [('exitosos', 'Exitosos', '#28a745'), ('fallidos', 'Fallidos', '#dc3545'),
+               ('sin_email', 'Sin email', '#ffc107'), ('sin_archivo', 'Sin archivo', '#6c757d')]
+    fig = go.Figure()
+    for columna, nombre, color in estados:
+        fig.add_trace(go.Bar(
+            x=envios['importancia'],
+            y=envios[columna],
+            name=nombre,
+            marker_color=color,
+            hovertemplate=f'<b>{nombre}</b><br>Importancia: %{{x}}<br>Envíos: %{{y}}<extra></extra>'
+        ))
+    
+    # Tasa de éxito sobre cada barra
+    for importancia, envios_totales, tasa in zip(envios['importancia'], envios['envios'], envios['tasa_exito']):
+        fig.add_annotation(x=importancia, y=envios_totales, text=f"{tasa:.1%}", showarrow=False, yshift=12,
+                           font=dict(size=13, color='#495057', family='Inter'))
+    fig.update_layout(barmode='stack', xaxis_title="Importancia")
+    return _layout_analitica(fig, "📧 Éxito de Envíos por Importancia", "Envíos")
+
+def create_turnaround_chart(demoras, plazo_dias=30):
+    """
+    Crea un gráfico de barras agrupadas con los días hasta el informe y hasta el envío por importancia
+
+    Args:
+        demoras: DataFrame con columnas importancia, mediana_dias_informe, p90_dias_informe,
+                 mediana_dias_envio y p90_dias_envio (analytics.MotorAnalitico.demora_clasificacion)
+        plazo_dias: Plazo legal de envío, que se marca como referencia
+    """
+    series = [('mediana_dias_informe', 'Informe (mediana)', '#667eea'),
+              ('p90_dias_informe', 'Informe (p90)', '#a3b1f5'),
+              ('mediana_dias_envio', 'Envío (mediana)', '#28a745'),
+              ('p90_dias_envio', 'Envío (p90)', '#8fd19e')]
+    fig = go.Figure()
+    for columna, nombre, color in series:
+        fig.add_trace(go.Bar(
+            x=demoras['importancia'],
+            y=demoras[columna],
+            name=nombre,
+            marker_color=color,
+            hovertemplate=f'<b>{nombre}</b><br>Importancia: %{{x}}<br>Días: %{{y:.1f}}<extra></extra>'
+        ))
+    fig.update_layout(barmode='group', xaxis_title="Importancia")
+    
+    # Plazo legal de envío como referencia
+    fig.add_hline(y=plazo_dias, line_dash="dash", line_color="red", opacity=0.7,
+                  annotation_text=f"Plazo legal: {plazo_dias} días", annotation_position="top right")
+    return _layout_analitica(fig, "⏱️ Demora desde la Publicación", "Días")
@@ -3,38 +3,63 @@
 import sqlite3
 import logging
 import os
+import time
 from datetime import datetime, timedelta
-from paths import get_db_path, get_logs_dir
-
-# Configuración del logging optimizado
-log_file = os.path.join(get_logs_dir(), 'boletines.log')
-logging.basicConfig(
-    level=logging.WARNING,  # Solo registrar WARNING y ERROR por defecto
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+from paths import get_db_path, get_logs_dir, get_temp_dir
+from query_cache import consulta_cacheada, invalidar_tablas
+from report_catalog import asegurar_tabla_reportes
+from rollups import asegurar_resumenes
+from metrics import ConexionInstrumentada, INSERCION_SEGUNDOS, INSERCION_REGISTROS, INSERCION_RATIO_DUPLICADOS
+from records import CAMPOS_LOTE
 
 # Logger específico para eventos críticos del sistema
 critical_logger = logging.getLogger('critical_events')
 critical_logger.setLevel(logging.INFO)
+critical_logger.propagate = False
 
-# Verificar si ya tiene handlers para evitar duplicados
-if not critical_logger.handlers:
-    critical_handler = logging.FileHandler(log_file)
-    critical_handler.setFormatter(logging.Formatter('%(asctime)s - CRITICAL - %(message)s'))
-    critical_logger.addHandler(critical_handler)
+_logging_configurado = False
 
-critical_logger.propagate = False
+def configurar_logging():
+    """
+    Configura el logging a archivo (boletines.log) la primera vez que se llama.
+    Se invoca desde crear_conexion() para no crear directorios ni archivos al importar el módulo.
+    """
+    global _logging_configurado
+    if _logging_configurado:
+        return
+    _logging_configurado = True
+    
+    # Configuración del logging optimizado
+    log_file = os.path.join(get_logs_dir(), 'boletines.log')
+    logging.basicConfig(
+        level=logging.WARNING,  # Solo registrar WARNING y ERROR por defecto
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+    
+    # Verificar si ya tiene handlers para evitar duplicados
+    if not critical_logger.handlers:
+        critical_handler = logging.FileHandler(log_file)
+        critical_handler.setFormatter(logging.Formatter('%(asctime)s - CRITICAL - %(message)s'))
+        critical_logger.addHandler(critical_handler)
+
+# Bases cuyo esquema ya fue verificado por crear_tabla() en este proceso
+_esquemas_verificados = set()
 
 def crear_conexion():
     """Crea y devuelve una conexión a la base de datos SQLite."""
+    configurar_logging()
     try:
-        conn = sqlite3.connect(get_db_path())
+        # ConexionInstrumentada registra la latencia de cada sentencia (ver metrics.py)
+        conn = sqlite3.connect(get_db_path(), factory=ConexionInstrumentada)
+        # Identifica la base para la caché de consultas (ver query_cache.py)
+        conn.ruta_db = get_db_path()
         # Habilitar soporte de foreign keys
         conn.execute("PRAGMA foreign_keys = ON")
+        _registrar_funciones_texto(conn)
         # Solo log en caso de problemas - no en uso normal
         return conn
     except sqlite3.Error as e:
@@ -43,6 +68,10 @@ def crear_conexion():
 
 def crear_tabla(conn):
     """Crea las tablas 'boletines' y 'clientes' con índices si no existen."""
+    # Las páginas llaman a esta función en cada recarga: verificar una sola vez por base
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is not None and ruta_db in _esquemas_verificados:
+        return
     cursor = None
     try:
         cursor = conn.cursor()
@@ -134,11 +163,39 @@ def crear_tabla(conn):
         if not tabla_clientes_existe:
             critical_logger.info("Tabla 'clientes' creada exitosamente.")
 
+        # Índice para el JOIN de boletines con clientes por titular sin distinguir mayúsculas
+        # (LOWER(b.titular) = LOWER(c.titular)): sin él cada boletín recorre todos los clientes
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_clientes_titular_lower
+            ON clientes (LOWER(titular))
+        ''')
+        conn.commit()
+
         # Crear índice en boletines (solo log si es necesario)
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_boletines
             ON boletines (numero_boletin, numero_orden, titular)
         ''')
+        # Índice para los filtros por periodo y estado de reporte (verificación mensual)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_boletines_fecha_reporte
+            ON boletines (fecha_alta, reporte_generado)
+        ''')
+        # Índices para los filtros de igualdad del historial (importancia, estado, fecha de boletín)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_boletines_importancia
+            ON boletines (importancia, reporte_enviado, reporte_generado)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_boletines_fecha_boletin
+            ON boletines (fecha_boletin)
+        ''')
+        # Índice parcial de lo pendiente de envío (tramos de vencimiento del dashboard):
+        # crece con lo que falta enviar, no con la historia
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_boletines_pendientes
+            ON boletines (fecha_boletin) WHERE reporte_enviado = 0
+        ''')
         conn.commit()
         
         # Crear tabla envios_log
@@ -189,6 +246,12 @@ def crear_tabla(conn):
         ''')
         conn.commit()
 
+        # Resúmenes diarios y mensuales que leen el dashboard y los gráficos
+        asegurar_resumenes(conn)
+        
+        if ruta_db is not None:
+            _esquemas_verificados.add(ruta_db)
+
     except sqlite3.Error as e:
         logging.error(f"Error al crear tablas o índice: {e}")
         raise Exception(f"Error al crear tablas o índice: {e}")
@@ -196,47 +259,95 @@ def crear_tabla(conn):
         if cursor:
             cursor.close()
 
-def insertar_datos(conn, datos_agrupados):
-    """Inserta los datos agrupados en la tabla 'boletines', verificando duplicados."""
+def _clave_boletin(numero_boletin, numero_orden, titular):
+    """
+    Clave de duplicado (boletín, orden, titular) tal como la compara SQLite en columnas TEXT.
+    Devuelve None si falta alguna parte: en SQL NULL nunca es igual, así que no hay duplicado.
+    """
+    partes = (numero_boletin, numero_orden, titular)
+    if any(parte is None or parte != parte for parte in partes):
+        return None
+    return tuple(str(parte) for parte in partes)
+
+def _numeros_boletin(datos_agrupados):
+    """Números de boletín del lote, para buscar sus registros ya cargados."""
+    return sorted({str(registro.numero_boletin)
+                   for registros in datos_agrupados.values() for registro in registros
+                   if registro.numero_boletin is not None})
+
+def _filas_nuevas(datos_agrupados, existentes, progreso=None):
+    """
+    Separa los registros nuevos de los ya cargados (ver _clave_boletin). Los repetidos dentro
+    del mismo lote también se omiten.
+    
+    Args:
+        datos_agrupados: {titular: [records.Boletin]}
+        existentes: Claves de los boletines ya cargados (se agregan las de los nuevos)
+        progreso: Callable opcional progreso(actual, total, mensaje), por titular
+        
+    Returns:
+        tuple: (filas nuevas con los valores de CAMPOS_LOTE e importancia 'Pendiente', omitidos)
+    """
+    existentes.discard(None)
+    nuevos = []
+    omitidos = 0
+    for indice, (titular, registros) in enumerate(datos_agrupados.items()):
+        if progreso:
+            progreso(indice, len(datos_agrupados), titular)
+        for registro in registros:
+            clave = _clave_boletin(registro.numero_boletin, registro.numero_orden, titular)
+            if clave is not None and clave in existentes:
+                omitidos += 1
+                continue
+            if clave is not None:
+                existentes.add(clave)
+            # Importancia 'Pendiente' por defecto
+            nuevos.append((titular, *registro[1:len(CAMPOS_LOTE)], 'Pendiente'))
+    return nuevos, omitidos
+
+def insertar_datos(conn, datos_agrupados, progreso=None):
+    """
+    Inserta los datos agrupados en la tabla 'boletines', verificando duplicados.
+    
+    Los registros ya existentes (mismo boletín, orden y titular) se buscan con una consulta
+    por lote en lugar de una por registro, y los nuevos se insertan con executemany.
+    datos_agrupados es {titular: [records.Boletin]}; los campos de Boletin están en el
+    orden de las columnas del INSERT, así que cada registro se pasa sin reordenar.
+    
+    progreso es un callable opcional progreso(actual, total, mensaje) que se llama por titular.
+    """
+    inicio = time.perf_counter()
+    cursor = None
     try:
         cursor = conn.cursor()
-        insertados = 0
-        omitidos = 0
-        
-        for titular, registros in datos_agrupados.items():
-            for registro in registros:
-                # Verificar si el registro ya existe
-                cursor.execute('''
-                    SELECT COUNT(*) FROM boletines
-                    WHERE numero_boletin = ? AND numero_orden = ? AND titular = ?
-                ''', (
-                    registro["Número de Boletín"],
-                    registro["Número de Orden"],
-                    titular
-                ))
-                if cursor.fetchone()[0] == 0:  # Si no existe, insertar
-                    cursor.execute('''
-                        INSERT INTO boletines (numero_boletin, titular, fecha_boletin, numero_orden, solicitante, agente, numero_expediente, clase, marca_custodia, marca_publicada, clases_acta, importancia)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        registro["Número de Boletín"],
-                        titular,
-                        registro["Fecha de Boletín"],
-                        registro["Número de Orden"],
-                        registro["Solicitante"],
-                        registro["Agente"],
-                        registro["Expediente"],
-                        registro["Clase"],
-                        registro["Marca en Custodia"],
-                        registro["Marca Publicada"],
-                        registro["Clases/Acta"],
-                        'Pendiente'  # Valor por defecto para importancia
-                    ))
-                    insertados += 1
-                else:
-                    omitidos += 1
+        
+        # Claves ya cargadas para los boletines del lote
+        numeros_boletin = _numeros_boletin(datos_agrupados)
+        existentes = set()
+        for i in range(0, len(numeros_boletin), 500):
+            lote = numeros_boletin[i:i + 500]
+            cursor.execute(f"""
+                SELECT numero_boletin, numero_orden, titular FROM boletines
+                WHERE numero_boletin IN ({','.join('?' for _ in lote)})
+            """, lote)
+            existentes.update(_clave_boletin(*fila) for fila in cursor.fetchall())
+        
+        nuevos, omitidos = _filas_nuevas(datos_agrupados, existentes, progreso)
+        insertados = len(nuevos)
+        
+        cursor.executemany('''
+            INSERT INTO boletines (titular, numero_boletin, fecha_boletin, numero_orden, solicitante, agente, numero_expediente, clase, marca_custodia, marca_publicada, clases_acta, importancia)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', nuevos)
                     
         conn.commit()
+        invalidar_tablas(conn, 'boletines')
+        
+        INSERCION_SEGUNDOS.observe(time.perf_counter() - inicio)
+        INSERCION_REGISTROS.labels('insertado').inc(insertados)
+        INSERCION_REGISTROS.labels('omitido').inc(omitidos)
+        if insertados + omitidos:
+            INSERCION_RATIO_DUPLICADOS.set(omitidos / (insertados + omitidos))
         
         # Solo log si hubo inserción significativa
         if insertados > 0:
@@ -268,10 +379,18 @@ def insertar_datos(conn, datos_agrupados):
             'mensaje': f"Error inesperado: {e}"
         }
     finally:
-        cursor.close()
+        if cursor is not None:
+            cursor.close()
 
 def obtener_datos(conn):
-    """Obtiene todos los registros de boletines con datos de clientes mediante LEFT JOIN."""
+    """
+    Obtiene todos los registros de boletines con datos de clientes mediante LEFT JOIN.
+    El resultado se comparte entre sesiones mediante la caché de consultas.
+    """
+    return consulta_cacheada(conn, ('boletines', 'clientes'), ('obtener_datos',), _consultar_datos)
+
+def _consultar_datos(conn):
+    """Consulta sin caché de obtener_datos()."""
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -295,6 +414,266 @@ def obtener_datos(conn):
     finally:
         cursor.close()
 
+# Columnas del listado de boletines que el grid puede ordenar y filtrar (lista blanca para el SQL)
+COLUMNAS_GRID_BOLETINES = {
+    'id': 'b.id', 'titular': 'b.titular', 'marca_custodia': 'b.marca_custodia',
+    'marca_publicada': 'b.marca_publicada', 'numero_boletin': 'b.numero_boletin',
+    'fecha_boletin': 'b.fecha_boletin', 'numero_orden': 'b.numero_orden',
+    'solicitante': 'b.solicitante', 'agente': 'b.agente', 'numero_expediente': 'b.numero_expediente',
+    'clase': 'b.clase', 'clases_acta': 'b.clases_acta', 'reporte_enviado': 'b.reporte_enviado',
+    'reporte_generado': 'b.reporte_generado', 'fecha_alta': 'b.fecha_alta', 'importancia': 'b.importancia',
+    'email': 'c.email', 'telefono': 'c.telefono', 'direccion': 'c.direccion', 'ciudad': 'c.ciudad',
+    # Informe más reciente del boletín según el catálogo (índice por boletin_id, ver report_catalog.py)
+    'informe': '(SELECT r.nombre_archivo FROM reportes r WHERE r.id = '
+               '(SELECT MAX(rb.reporte_id) FROM reportes_boletines rb WHERE rb.boletin_id = b.id))',
+}
+
+# JOIN del listado con clientes (usa el índice idx_clientes_titular_lower)
+_JOIN_CLIENTES = "LEFT JOIN clientes c ON LOWER(b.titular) = LOWER(c.titular)"
+
+def _join_clientes_del_filtro(filter_model):
+    """JOIN con clientes para los conteos: solo hace falta si algún filtro usa columnas de clientes."""
+    if any(COLUMNAS_GRID_BOLETINES.get(columna, '').startswith('c.') for columna in (filter_model or {})):
+        return _JOIN_CLIENTES
+    return ''
+
+# Los filtros de texto comparan normalizar_texto(columna) con el valor ya normalizado en Python:
+# LIKE y LOWER de SQLite solo ignoran mayúsculas en ASCII ('muñoz' no encontraría 'MUÑOZ')
+_OPERADORES_TEXTO = {
+    'contains': ("normalizar_texto({col}) LIKE ? ESCAPE '\\'", '%{}%'),
+    'notContains': ("({col} IS NULL OR normalizar_texto({col}) NOT LIKE ? ESCAPE '\\')", '%{}%'),
+    'startsWith': ("normalizar_texto({col}) LIKE ? ESCAPE '\\'", '{}%'),
+    'endsWith': ("normalizar_texto({col}) LIKE ? ESCAPE '\\'", '%{}'),
+    'equals': ("normalizar_texto({col}) = ?", '{}'),
+    'notEqual': ("({col} IS NULL OR normalizar_texto({col}) != ?)", '{}'),
+}
+
+def _normalizar_texto(valor):
+    """Minúsculas con Unicode completo (Ñ, Á, É...); None se mantiene."""
+    return None if valor is None else str(valor).lower()
+
+def _registrar_funciones_texto(conn):
+    """Registra normalizar_texto() en la conexión (la usan los filtros de texto del grid)."""
+    conn.create_function('normalizar_texto', 1, _normalizar_texto, deterministic=True)
+
+_OPERADORES_NUMERO = {
+    'equals': '{col} = ?', 'notEqual': '{col} != ?',
+    'lessThan': '{col} < ?', 'lessThanOrEqual': '{col} <= ?',
+    'greaterThan': '{col} > ?', 'greaterThanOrEqual': '{col} >= ?',
+}
+
+def _escapar_like(valor):
+    """Escapa los comodines de LIKE para buscar el texto literal."""
+    return str(valor).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _desarmar_filtro(filtro):
+    """
+    Valida el filtro de una columna (formato filterModel de AG Grid) y lo reduce a
+    (tipo de filtro, operador, valores), sin armar SQL. Los textos se devuelven normalizados
+    (ver _normalizar_texto) y sin escapar.
+    
+    Returns:
+        tuple: ('vacio', 'blank'|'notBlank', []), ('set', 'in', valores),
+               ('text', operador de _OPERADORES_TEXTO, [texto]) o
+               ('number', operador de _OPERADORES_NUMERO o 'inRange', valores)
+    """
+    tipo = filtro.get('type')
+    if tipo in ('blank', 'notBlank'):
+        return 'vacio', tipo, []
+    
+    tipo_filtro = filtro.get('filterType', 'text')
+    if tipo_filtro == 'set':
+        return 'set', 'in', list(filtro.get('values') or [])
+    if tipo_filtro == 'text':
+        if tipo not in _OPERADORES_TEXTO:
+            raise ValueError(f"Operador de texto no soportado: {tipo}")
+        return 'text', tipo, [_normalizar_texto(filtro.get('filter', ''))]
+    if tipo_filtro == 'number':
+        if tipo == 'inRange':
+            return 'number', tipo, [filtro.get('filter'), filtro.get('filterTo')]
+        if tipo not in _OPERADORES_NUMERO:
+            raise ValueError(f"Operador numérico no soportado: {tipo}")
+        return 'number', tipo, [filtro.get('filter')]
+    raise ValueError(f"Tipo de filtro no soportado: {tipo_filtro}")
+
+def _desarmar_modelo_grid(filter_model, sort_model, columnas):
+    """
+    Valida los modelos de filtro y orden de AG Grid contra la lista blanca de columnas.
+    Lo comparten compilar_modelo_grid y storage.compilar_modelo_grid, que solo arman la
+    expresión de cada filtro.
+    
+    Returns:
+        tuple: (filtros, ordenes) con filtros = [(expresión, 'AND'|'OR', [_desarmar_filtro()])],
+               uno por columna, y ordenes = [(expresión, descendente)]
+    """
+    filtros = []
+    for columna, filtro in (filter_model or {}).items():
+        if columna not in columnas:
+            raise ValueError(f"Columna no filtrable: {columna}")
+        # Filtros combinados (condition1/condition2 con operator AND/OR)
+        if 'conditions' in filtro or 'condition1' in filtro:
+            partes = [dict(parte, filterType=parte.get('filterType', filtro.get('filterType', 'text')))
+                      for parte in filtro.get('conditions') or [filtro['condition1'], filtro['condition2']]]
+            operador = 'OR' if filtro.get('operator', 'AND').upper() == 'OR' else 'AND'
+        else:
+            partes, operador = [filtro], 'AND'
+        filtros.append((columnas[columna], operador, [_desarmar_filtro(parte) for parte in partes]))
+    
+    ordenes = []
+    for orden in sort_model or []:
+        columna = orden.get('colId')
+        if columna not in columnas:
+            raise ValueError(f"Columna no ordenable: {columna}")
+        ordenes.append((columnas[columna], str(orden.get('sort', 'asc')).lower() == 'desc'))
+    return filtros, ordenes
+
+def _compilar_filtro_columna(columna_sql, filtro):
+    """Traduce un filtro ya desarmado (ver _desarmar_filtro) a SQL y parámetros."""
+    tipo_filtro, tipo, valores = filtro
+    if tipo == 'blank':
+        return f"({columna_sql} IS NULL OR {columna_sql} = '')", []
+    if tipo == 'notBlank':
+        return f"({columna_sql} IS NOT NULL AND {columna_sql} != '')", []
+    if tipo_filtro == 'set':
+        if not valores:
+            return '0', []
+        return f"{columna_sql} IN ({','.join('?' for _ in valores)})", valores
+    if tipo_filtro == 'text':
+        plantilla, patron = _OPERADORES_TEXTO[tipo]
+        valor = valores[0]
+        if tipo != 'equals' and tipo != 'notEqual':
+            valor = _escapar_like(valor)
+        return plantilla.format(col=columna_sql), [patron.format(valor)]
+    if tipo == 'inRange':
+        return f"{columna_sql} BETWEEN ? AND ?", valores
+    return _OPERADORES_NUMERO[tipo].format(col=columna_sql), valores
+
+def compilar_modelo_grid(filter_model=None, sort_model=None, columnas=None):
+    """
+    Traduce los modelos de filtro y orden de AG Grid a una cláusula WHERE parametrizada y un ORDER BY.
+    Solo se aceptan columnas de la lista blanca; las condiciones se combinan con AND.
+    
+    Args:
+        filter_model: {columna: {'filterType': 'text'|'number'|'set', 'type': ..., 'filter': ...}}
+        sort_model: Lista de {'colId': columna, 'sort': 'asc'|'desc'}
+        columnas: Mapa {columna del grid: expresión SQL} (por defecto COLUMNAS_GRID_BOLETINES)
+        
+    Returns:
+        tuple: (where_sql, parametros, order_sql); where_sql y order_sql vacíos si no aplican
+    """
+    filtros, ordenes = _desarmar_modelo_grid(filter_model, sort_model, columnas or COLUMNAS_GRID_BOLETINES)
+    condiciones = []
+    parametros = []
+    for columna_sql, operador, partes in filtros:
+        sqls = []
+        for parte in partes:
+            sql, params = _compilar_filtro_columna(columna_sql, parte)
+            sqls.append(sql)
+            parametros.extend(params)
+        condiciones.append(sqls[0] if len(sqls) == 1 else f"({f' {operador} '.join(sqls)})")
+    
+    where_sql = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    ordenes_sql = [f"{columna_sql} {'DESC' if descendente else 'ASC'}" for columna_sql, descendente in ordenes]
+    order_sql = f"ORDER BY {', '.join(ordenes_sql)}" if ordenes_sql else ''
+    return where_sql, parametros, order_sql
+
+def obtener_bloque_boletines(conn, inicio, fin, filter_model=None, sort_model=None):
+    """
+    Obtiene un bloque de filas del listado de boletines (mismas columnas que obtener_datos más
+    el informe del catálogo) para el modelo de filas paginado del grid. El resultado se comparte
+    mediante la caché de consultas.
+    
+    Args:
+        conn: Conexión a la base de datos
+        inicio: Índice de la primera fila del bloque
+        fin: Índice siguiente a la última fila del bloque
+        filter_model: Modelo de filtros de AG Grid
+        sort_model: Modelo de orden de AG Grid
+        
+    Returns:
+        tuple: (filas, columnas, total de filas que cumplen el filtro)
+    """
+    inicio = max(int(inicio), 0)
+    limite = max(int(fin) - inicio, 0)
+    asegurar_tabla_reportes(conn)
+    where_sql, parametros, order_sql = compilar_modelo_grid(filter_model, sort_model)
+    # El id desempata para que las páginas sean estables
+    order_sql = f"{order_sql}, b.id" if order_sql else "ORDER BY b.id"
+    clave = ('obtener_bloque_boletines', where_sql, tuple(parametros), order_sql, inicio, limite)
+    
+    def cargar(conn):
+        cursor = None
+        try:
+            _registrar_funciones_texto(conn)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT COUNT(*)
+                FROM boletines b
+                {_join_clientes_del_filtro(filter_model)}
+                {where_sql}
+            """, parametros)
+            total = cursor.fetchone()[0]
+            cursor.execute(f"""
+                SELECT {', '.join(f'{sql} AS {nombre}' for nombre, sql in COLUMNAS_GRID_BOLETINES.items())}
+                FROM boletines b
+                {_JOIN_CLIENTES}
+                {where_sql}
+                {order_sql}
+                LIMIT ? OFFSET ?
+            """, parametros + [limite, inicio])
+            filas = cursor.fetchall()
+            columnas = [description[0] for description in cursor.description]
+            return filas, columnas, total
+        except sqlite3.Error as e:
+            logging.error(f"Error al consultar bloque de boletines: {e}")
+            raise Exception(f"Error al consultar bloque de boletines: {e}")
+        finally:
+            if cursor:
+                cursor.close()
+    
+    return consulta_cacheada(conn, ('boletines', 'clientes', 'reportes', 'reportes_boletines'), clave, cargar)
+
+def contar_boletines_por_importancia(conn, filter_model=None):
+    """
+    Cuenta los boletines que cumplen el filtro agrupados por importancia, con una sola consulta.
+    El resultado se comparte mediante la caché de consultas.
+    
+    Args:
+        conn: Conexión a la base de datos
+        filter_model: Modelo de filtros de AG Grid (el mismo que usa obtener_bloque_boletines)
+        
+    Returns:
+        dict: {importancia: cantidad}, incluye la clave 'Total'
+    """
+    asegurar_tabla_reportes(conn)
+    where_sql, parametros, _ = compilar_modelo_grid(filter_model)
+    clave = ('contar_boletines_por_importancia', where_sql, tuple(parametros))
+    
+    def cargar(conn):
+        cursor = None
+        try:
+            _registrar_funciones_texto(conn)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT b.importancia, COUNT(*)
+                FROM boletines b
+                {_join_clientes_del_filtro(filter_model)}
+                {where_sql}
+                GROUP BY b.importancia
+            """, parametros)
+            conteos = {'Pendiente': 0, 'Baja': 0, 'Media': 0, 'Alta': 0}
+            conteos.update(cursor.fetchall())
+            conteos['Total'] = sum(conteos.values())
+            return conteos
+        except sqlite3.Error as e:
+            logging.error(f"Error al contar boletines por importancia: {e}")
+            raise Exception(f"Error al contar boletines por importancia: {e}")
+        finally:
+            if cursor:
+                cursor.close()
+    
+    return consulta_cacheada(conn, ('boletines', 'clientes', 'reportes', 'reportes_boletines'), clave, cargar)
+
 def actualizar_registro(conn, id, numero_boletin, fecha_boletin, numero_orden, solicitante, 
                        agente, numero_expediente, clase, marca_custodia, marca_publicada, 
                        clases_acta, reporte_enviado, titular, reporte_generado, importancia=None):
@@ -330,6 +709,7 @@ def actualizar_registro(conn, id, numero_boletin, fecha_boletin, numero_orden, s
                 id
             ))
         conn.commit()
+        invalidar_tablas(conn, 'boletines')
         # Solo log actualizaciones importantes (cambios de estado o importancia)
         if importancia is not None or reporte_enviado or reporte_generado:
             critical_logger.info(f"Registro actualizado (crítico): ID {id} - Importancia: {importancia}, Enviado: {reporte_enviado}, Generado: {reporte_generado}")
@@ -351,6 +731,7 @@ def actualizar_importancia_boletin(conn, boletin_id, importancia):
         
         if cursor.rowcount > 0:
             conn.commit()
+            invalidar_tablas(conn, 'boletines')
             # Solo log cambios de importancia significativos
             if importancia in ['Alta', 'Media']:
                 critical_logger.info(f"Importancia actualizada a {importancia} para boletín ID {boletin_id}")
@@ -364,6 +745,52 @@ def actualizar_importancia_boletin(conn, boletin_id, importancia):
     finally:
         cursor.close()
 
+def actualizar_importancias_lote(conn, cambios):
+    """
+    Actualiza la importancia de varios boletines en una única transacción,
+    con un UPDATE ... WHERE id IN (...) por cada valor de importancia.
+    
+    Args:
+        conn: Conexión a la base de datos
+        cambios: Diccionario {boletin_id: importancia}
+        
+    Returns:
+        int: Cantidad de registros actualizados
+    """
+    if not cambios:
+        return 0
+    
+    ids_por_importancia = {}
+    for boletin_id, importancia in cambios.items():
+        ids_por_importancia.setdefault(importancia, []).append(int(boletin_id))
+    
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        actualizados = 0
+        for importancia, ids in ids_por_importancia.items():
+            # Lotes acotados para no superar el límite de parámetros de SQLite
+            for inicio in range(0, len(ids), 500):
+                lote = ids[inicio:inicio + 500]
+                placeholders = ','.join('?' for _ in lote)
+                cursor.execute(f"""
+                    UPDATE boletines
+                    SET importancia = ?
+                    WHERE id IN ({placeholders})
+                """, [importancia] + lote)
+                actualizados += cursor.rowcount
+        conn.commit()
+        invalidar_tablas(conn, 'boletines')
+        critical_logger.info(f"Importancia actualizada en lote: {actualizados} registros")
+        return actualizados
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al actualizar importancias: {e}")
+        raise Exception(f"Error al actualizar importancias: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+
 def obtener_boletines_para_clasificar(conn):
     """Obtiene boletines con reporte generado pero no enviado para clasificar."""
     try:
@@ -398,6 +825,7 @@ def eliminar_registro(conn, id):
         
         cursor.execute("DELETE FROM boletines WHERE id = ?", (id,))
         conn.commit()
+        invalidar_tablas(conn, 'boletines')
         
         # Log solo eliminaciones importantes
         if registro_info:
@@ -460,6 +888,7 @@ def insertar_cliente(conn, titular, email, telefono, direccion, ciudad, provinci
         ''', (nombre_titular_final, email, telefono, direccion, ciudad, provincia, cuit))
         
         conn.commit()
+        invalidar_tablas(conn, 'clientes', 'Marcas')
         
         # Obtener el ID del cliente recién insertado
         cursor.execute("SELECT last_insert_rowid()")
@@ -544,13 +973,21 @@ def obtener_clientes(conn, force_refresh=True):
     Obtiene todos los registros de la tabla 'clientes' incluyendo un indicador 
     de si tienen marcas asociadas.
     
+    El resultado se comparte entre sesiones mediante la caché de consultas, que se
+    invalida con cada escritura en clientes o Marcas, por lo que siempre está actualizado.
+    
     Args:
         conn: Conexión a la base de datos
-        force_refresh: Si es True, fuerza un PRAGMA query_only=0 para asegurar datos actualizados
+        force_refresh: Si es True, fuerza un PRAGMA query_only=0 al consultar la base
         
     Returns:
         tuple: (list de filas, list de nombres de columnas)
     """
+    return consulta_cacheada(conn, ('clientes', 'Marcas'), ('obtener_clientes',),
+                             lambda c: _consultar_clientes(c, force_refresh))
+
+def _consultar_clientes(conn, force_refresh=True):
+    """Consulta sin caché de obtener_clientes()."""
     try:
         cursor = conn.cursor()
         
@@ -671,6 +1108,7 @@ def actualizar_cliente(conn, cliente_id, titular, email, telefono, direccion, ci
         """, (nombre_titular_final, email, telefono, direccion, ciudad, provincia, cuit, cliente_id))
         
         conn.commit()
+        invalidar_tablas(conn, 'clientes', 'Marcas')
         logging.info(f"Cliente actualizado: ID {cliente_id}, Titular: {nombre_titular_final}")
         
         # Si el CUIT cambió o existe, debemos vincular marcas que coincidan con ese CUIT
@@ -711,6 +1149,7 @@ def actualizar_cliente(conn, cliente_id, titular, email, telefono, direccion, ci
                         marcas_vinculadas += 1
             
             conn.commit()
+            invalidar_tablas(conn, 'clientes', 'Marcas')
             logging.info(f"Total: Se vincularon {marcas_vinculadas} marcas al cliente '{nombre_titular_final}' (ID: {cliente_id}) con CUIT {cuit}")
             
             # Verificar que las vinculaciones funcionaron
@@ -750,6 +1189,7 @@ def actualizar_cliente(conn, cliente_id, titular, email, telefono, direccion, ci
                 logging.info(f"No se encontraron marcas sin vincular con CUIT {cuit} (en ningún formato)")
         
         conn.commit()
+        invalidar_tablas(conn, 'clientes', 'Marcas')
         return True
         
     except sqlite3.Error as e:
@@ -760,6 +1200,132 @@ def actualizar_cliente(conn, cliente_id, titular, email, telefono, direccion, ci
         if 'cursor' in locals():
             cursor.close()
 
+def _limpiar_cuit(cuit):
+    """Normaliza un CUIT quitando guiones y espacios para comparar entre tablas."""
+    return str(cuit).replace('-', '').replace(' ', '').strip() if cuit else ""
+
+def _cuits_nuevos(cambios_por_id, cuits_antiguos):
+    """CUIT que cambian en la edición en lote (se busca su titular en Marcas)."""
+    return sorted({
+        str(cambio['cuit']) for cliente_id, cambio in cambios_por_id.items()
+        if cliente_id in cuits_antiguos and cambio['cuit'] and str(cambio['cuit']) != cuits_antiguos[cliente_id]
+    })
+
+def _planificar_clientes(cambios_por_id, cuits_antiguos, titulares_marcas):
+    """
+    Decide qué escribir en una edición de clientes en lote: si el CUIT cambió y existe en
+    Marcas, se usa el titular de Marcas. Los ids que no existen se omiten.
+    
+    Args:
+        cambios_por_id: {cliente_id: cambio}
+        cuits_antiguos: {cliente_id: CUIT actual como texto} de los clientes existentes
+        titulares_marcas: {CUIT: titular en Marcas} de los CUIT nuevos
+        
+    Returns:
+        tuple: ([(cliente_id, titular, cambio)], {CUIT limpio: cliente_id} para vincular marcas)
+    """
+    actualizaciones = []
+    clientes_por_cuit = {}
+    for cliente_id, cambio in cambios_por_id.items():
+        if cliente_id not in cuits_antiguos:
+            logging.warning(f"Cliente con ID {cliente_id} no existe")
+            continue
+        titular = cambio['titular']
+        titular_en_marcas = titulares_marcas.get(str(cambio['cuit']))
+        if str(cambio['cuit']) != cuits_antiguos[cliente_id] and titular_en_marcas and titular_en_marcas.strip() != titular.strip():
+            logging.info(f"Actualizando nombre del cliente de '{titular}' a '{titular_en_marcas}' según tabla Marcas")
+            titular = titular_en_marcas
+        actualizaciones.append((cliente_id, titular, cambio))
+        cuit_clean = _limpiar_cuit(cambio['cuit'])
+        if cuit_clean:
+            clientes_por_cuit[cuit_clean] = cliente_id
+    return actualizaciones, clientes_por_cuit
+
+def _vincular_marcas(marcas_sin_asignar, clientes_por_cuit):
+    """Pares (cliente_id, marca_id) de las marcas sin asignar cuyo CUIT es el de un cliente editado."""
+    vinculaciones = []
+    for marca_id, marca_cuit in marcas_sin_asignar:
+        cliente_id = clientes_por_cuit.get(_limpiar_cuit(marca_cuit))
+        if cliente_id is not None:
+            vinculaciones.append((cliente_id, marca_id))
+    return vinculaciones
+
+def actualizar_clientes_lote(conn, cambios):
+    """
+    Actualiza varios clientes en una única transacción y vincula, en una sola pasada
+    sobre las marcas sin asignar, las marcas cuyos CUIT coinciden con los clientes editados.
+    Igual que actualizar_cliente, si el CUIT cambió y existe en Marcas se usa el titular de Marcas.
+    
+    Args:
+        conn: Conexión a la base de datos
+        cambios: Lista de diccionarios con id, titular, email, telefono, direccion,
+                 ciudad, provincia y cuit de cada cliente modificado
+        
+    Returns:
+        dict: {'actualizados': clientes actualizados, 'marcas_vinculadas': marcas vinculadas}
+    """
+    if not cambios:
+        return {'actualizados': 0, 'marcas_vinculadas': 0}
+    
+    cambios_por_id = {int(cambio['id']): cambio for cambio in cambios}
+    ids = list(cambios_por_id)
+    
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        
+        # CUIT actual de cada cliente, para saber cuáles cambian
+        cuits_antiguos = {}
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            placeholders = ','.join('?' for _ in lote)
+            cursor.execute(f"SELECT id, cuit FROM clientes WHERE id IN ({placeholders})", lote)
+            cuits_antiguos.update((cliente_id, '' if cuit is None else str(cuit)) for cliente_id, cuit in cursor.fetchall())
+        
+        # Titular registrado en Marcas para los CUIT nuevos
+        cuits_nuevos = _cuits_nuevos(cambios_por_id, cuits_antiguos)
+        titulares_marcas = {}
+        for inicio in range(0, len(cuits_nuevos), 500):
+            lote = cuits_nuevos[inicio:inicio + 500]
+            placeholders = ','.join('?' for _ in lote)
+            cursor.execute(f"""
+                SELECT cuit, titular FROM Marcas
+                WHERE cuit IN ({placeholders}) AND titular IS NOT NULL AND titular != ''
+            """, lote)
+            for cuit, titular in cursor.fetchall():
+                titulares_marcas.setdefault(str(cuit), titular)
+        
+        actualizaciones, clientes_por_cuit = _planificar_clientes(cambios_por_id, cuits_antiguos, titulares_marcas)
+        filas = [(titular, cambio['email'], cambio['telefono'], cambio['direccion'],
+                  cambio['ciudad'], cambio['provincia'], cambio['cuit'], cliente_id)
+                 for cliente_id, titular, cambio in actualizaciones]
+        
+        cursor.executemany("""
+            UPDATE clientes 
+            SET titular = ?, email = ?, telefono = ?, direccion = ?, ciudad = ?, provincia = ?, 
+                cuit = ?, fecha_modificacion = datetime('now', 'localtime')
+            WHERE id = ?
+        """, filas)
+        
+        # Una sola pasada por las marcas sin asignar para todos los CUIT afectados
+        vinculaciones = []
+        if clientes_por_cuit:
+            cursor.execute("SELECT id, cuit FROM Marcas WHERE cliente_id IS NULL AND cuit IS NOT NULL")
+            vinculaciones = _vincular_marcas(cursor.fetchall(), clientes_por_cuit)
+            cursor.executemany("UPDATE Marcas SET cliente_id = ? WHERE id = ?", vinculaciones)
+        
+        conn.commit()
+        invalidar_tablas(conn, 'clientes', 'Marcas')
+        logging.info(f"Clientes actualizados en lote: {len(filas)}, marcas vinculadas: {len(vinculaciones)}")
+        return {'actualizados': len(filas), 'marcas_vinculadas': len(vinculaciones)}
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al actualizar clientes: {e}")
+        raise Exception(f"Error al actualizar clientes: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+
 def eliminar_cliente(conn, id):
     """
     Elimina un registro de la tabla 'clientes' y desvincula sus marcas asociadas.
@@ -801,6 +1367,7 @@ def eliminar_cliente(conn, id):
         # 4. Eliminar el cliente
         cursor.execute("DELETE FROM clientes WHERE id = ?", (id,))
         conn.commit()
+        invalidar_tablas(conn, 'clientes', 'Marcas')
         
         logging.info(f"Cliente eliminado: '{titular}' (ID: {id}) con {marcas_count} marcas desvinculadas")
         
@@ -843,6 +1410,7 @@ def insertar_log_envio(conn, titular, email, estado, error=None, numero_boletin=
         """, (titular, email, estado, error, numero_boletin, importancia))
         
         conn.commit()
+        invalidar_tablas(conn, 'envios_log')
         
         # Log crítico para todos los envíos de email (exitosos y fallidos)
         if estado == 'exitoso':
@@ -859,6 +1427,49 @@ def insertar_log_envio(conn, titular, email, estado, error=None, numero_boletin=
         if cursor:
             cursor.close()
 
+def registrar_envios_lote(conn, actualizaciones, logs):
+    """
+    Registra en una única transacción un lote de envíos: marca los boletines como enviados
+    e inserta las filas correspondientes en envios_log. Si algo falla no se aplica nada.
+
+    Args:
+        conn: Conexión a la base de datos
+        actualizaciones: Lista de tuplas (fecha_envio, boletin_id)
+        logs: Lista de tuplas (titular, email, fecha_envio, estado, error, numero_boletin, importancia)
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        if actualizaciones:
+            cursor.executemany("""
+                UPDATE boletines
+                SET reporte_enviado = 1, fecha_envio_reporte = ?
+                WHERE id = ?
+            """, actualizaciones)
+        if logs:
+            cursor.executemany("""
+                INSERT INTO envios_log (titular, email, fecha_envio, estado, error, numero_boletin, importancia)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, logs)
+        conn.commit()
+        invalidar_tablas(conn, 'boletines', 'envios_log')
+
+        for titular, email, _, estado, error, _, importancia in logs:
+            if estado == 'exitoso':
+                critical_logger.info(f"📧 EMAIL ENVIADO: {titular} ({importancia}) → {email}")
+            elif estado == 'fallido':
+                critical_logger.error(f"❌ EMAIL FALLIDO: {titular} → {email} | Error: {error}")
+            elif estado in ['sin_email', 'sin_archivo']:
+                critical_logger.warning(f"⚠️ EMAIL OMITIDO: {titular} - {estado.replace('_', ' ').title()}")
+
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al registrar lote de envíos: {e}")
+        raise Exception(f"Error al registrar lote de envíos: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+
 def obtener_logs_envios(conn, limite=100, filtro_estado=None, filtro_titular=None):
     """
     Obtiene los logs de envíos con filtros opcionales.
@@ -986,6 +1597,7 @@ def limpiar_logs_antiguos(conn, dias=30):
         
         eliminados = cursor.rowcount
         conn.commit()
+        invalidar_tablas(conn, 'envios_log')
         
         logging.info(f"Logs antiguos eliminados: {eliminados} registros")
         return eliminados
@@ -1085,6 +1697,10 @@ def obtener_ruta_reporte_pdf(titular, fecha_envio=None):
     """
     Obtiene la ruta del archivo PDF del reporte para un titular específico.
     
+    Usa el catálogo de informes (ver report_catalog.py) en lugar de recorrer el directorio.
+    Los informes archivados en un zip mensual se extraen al directorio temporal de la
+    aplicación y se devuelve esa copia.
+    
     Args:
         titular: Nombre del titular
         fecha_envio: Fecha de envío para ubicar el archivo correcto
@@ -1092,55 +1708,37 @@ def obtener_ruta_reporte_pdf(titular, fecha_envio=None):
     Returns:
         str: Ruta del archivo PDF o None si no se encuentra
     """
-    import os
-    import glob
-    from datetime import datetime
+    from report_catalog import buscar_reporte_titular, leer_reporte
     
+    conn = None
     try:
-        # Directorio donde se almacenan los informes
-        informes_dir = "informes"
-        
-        if not os.path.exists(informes_dir):
+        conn = crear_conexion()
+        reporte = buscar_reporte_titular(conn, titular, fecha_envio)
+        if reporte is None and fecha_envio:
+            # Sin informe anterior a la fecha: usar el más reciente
+            reporte = buscar_reporte_titular(conn, titular)
+        if reporte is None:
             return None
-        
-        # Buscar archivos PDF que contengan el nombre del titular
-        # Formato típico: "Month-Year - Informe TITULAR - ID.pdf"
-        patron_busqueda = f"*{titular.replace(' ', '*')}*.pdf"
-        archivos_encontrados = glob.glob(os.path.join(informes_dir, patron_busqueda))
-        
-        if not archivos_encontrados:
-            # Búsqueda más amplia si no se encuentra exacto
-            patron_busqueda = f"*Informe*{titular.split()[0]}*.pdf"
-            archivos_encontrados = glob.glob(os.path.join(informes_dir, patron_busqueda))
-        
-        if archivos_encontrados:
-            # Si hay fecha de envío, buscar el archivo más reciente a esa fecha
-            if fecha_envio:
-                try:
-                    fecha_ref = datetime.strptime(fecha_envio.split()[0], '%Y-%m-%d')
-                    # Filtrar archivos por fecha de modificación
-                    archivos_validos = []
-                    for archivo in archivos_encontrados:
-                        fecha_mod = datetime.fromtimestamp(os.path.getmtime(archivo))
-                        if fecha_mod <= fecha_ref + timedelta(days=1):  # Permitir 1 día de margen
-                            archivos_validos.append((archivo, fecha_mod))
-                    
-                    if archivos_validos:
-                        # Retornar el más reciente
-                        archivo_mas_reciente = max(archivos_validos, key=lambda x: x[1])
-                        return archivo_mas_reciente[0]
-                except:
-                    pass
-            
-            # Retornar el archivo más reciente si no hay filtro de fecha específico
-            archivo_mas_reciente = max(archivos_encontrados, key=os.path.getmtime)
-            return archivo_mas_reciente
-        
-        return None
+        if not reporte.get('archivo'):
+            return reporte['ruta']
+        
+        # La ruta original ya no existe: extraer el miembro del archivo mensual
+        directorio = os.path.join(get_temp_dir(), 'informes_archivados', str(reporte['id']))
+        ruta = os.path.join(directorio, reporte['nombre_archivo'])
+        if not os.path.exists(ruta):
+            os.makedirs(directorio, exist_ok=True)
+            temporal = f"{ruta}.tmp"
+            with open(temporal, 'wb') as f:
+                f.write(leer_reporte(reporte))
+            os.replace(temporal, ruta)
+        return ruta
         
     except Exception as e:
         logging.error(f"Error al buscar archivo PDF para {titular}: {e}")
         return None
+    finally:
+        if conn:
+            conn.close()
 
 def limpiar_logs_antiguos(conn, dias=30):
     """
@@ -1165,6 +1763,7 @@ def limpiar_logs_antiguos(conn, dias=30):
                 WHERE fecha_envio < ? AND estado = 'exitoso'
             """, (fecha_limite,))
             conn.commit()
+            invalidar_tablas(conn, 'envios_log')
             
             critical_logger.info(f"🧹 Limpieza de logs: {registros_a_eliminar} registros antiguos eliminados (conservando errores)")
             return registros_a_eliminar
@@ -1466,6 +2065,7 @@ def _vincular_marcas_con_cliente(conn, cliente_id, cuit):
                     marcas_vinculadas += 1
         
         conn.commit()
+        invalidar_tablas(conn, 'Marcas')
         logging.info(f"Total: Se vincularon {marcas_vinculadas} marcas al cliente '{titular}' (ID: {cliente_id}) con CUIT {cuit}")
         
         # Verificar que las vinculaciones funcionaron - contar TODAS las marcas vinculadas al cliente
@@ -1478,6 +2078,7 @@ def _vincular_marcas_con_cliente(conn, cliente_id, cuit):
         
         filas_afectadas = cursor.rowcount
         conn.commit()
+        invalidar_tablas(conn, 'Marcas')
         
         if filas_afectadas > 0:
             logging.info(f"Se vincularon {filas_afectadas} marcas al cliente '{titular}' (ID: {cliente_id}) con CUIT {cuit}")
@@ -1548,6 +2149,7 @@ def insertar_marca(conn, marca, codigo_marca, clase, acta=None, custodia=None, c
         marca_id = cursor.fetchone()[0]
         
         conn.commit()
+        invalidar_tablas(conn, 'Marcas')
         
         # Después de insertar la marca, verificamos de nuevo si existe un cliente con el mismo CUIT
         # Este paso es necesario en caso de que el cliente haya sido insertado entre nuestra verificación y nuestra inserción
@@ -1571,6 +2173,7 @@ def insertar_marca(conn, marca, codigo_marca, clase, acta=None, custodia=None, c
                     UPDATE Marcas SET cliente_id = ? WHERE id = ?
                 """, (cliente_id_reciente, marca_id))
                 conn.commit()
+                invalidar_tablas(conn, 'Marcas')
                 logging.info(f"Marca ID {marca_id} vinculada automáticamente con cliente ID {cliente_id_reciente} (el más reciente)")
             else:
                 logging.info(f"No se encontró cliente con CUIT {cuit} para vincular con marca ID {marca_id}")
@@ -1644,6 +2247,7 @@ def actualizar_marca(conn, marca_id, marca, codigo_marca, clase, acta=None, cust
               nrocon, email, cliente_id, marca_id))
         
         conn.commit()
+        invalidar_tablas(conn, 'Marcas')
         logging.info(f"Marca ID {marca_id} actualizada")
         
         return True
@@ -1668,6 +2272,11 @@ def obtener_marcas(conn, filtro_cuit=None, filtro_cliente_id=None):
     Returns:
         tuple: (filas, columnas) con los datos y nombres de columnas
     """
+    return consulta_cacheada(conn, ('Marcas', 'clientes'), ('obtener_marcas', filtro_cuit, filtro_cliente_id),
+                             lambda c: _consultar_marcas(c, filtro_cuit, filtro_cliente_id))
+
+def _consultar_marcas(conn, filtro_cuit=None, filtro_cliente_id=None):
+    """Consulta sin caché de obtener_marcas()."""
     try:
         cursor = conn.cursor()
         
@@ -1757,6 +2366,7 @@ def eliminar_marca(conn, marca_id):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM Marcas WHERE id = ?", (marca_id,))
         conn.commit()
+        invalidar_tablas(conn, 'Marcas')
         
         filas_afectadas = cursor.rowcount
         if filas_afectadas > 0:
@@ -2,13 +2,21 @@
 # ejecucion_programada.py
 
 """
-Script para la ejecución programada de la verificación de titulares sin reportes.
+Script para la ejecución programada de las tareas periódicas (verificación de titulares
+sin reportes, archivo de informes). Ejecuta las tareas vencidas según la tabla
+scheduled_jobs (ver scheduler.py), incluidas las que no se ejecutaron por estar apagado;
+si la aplicación u otro cron ya la está ejecutando, no se repite.
 Ideal para ser ejecutado por cron o cualquier otro programador de tareas.
 
-Ejemplo de configuración cron para ejecutar el primer día de cada mes a las 8 AM:
-0 8 1 * * cd /ruta/al/proyecto && python3 ejecucion_programada.py >> verificacion_log.txt 2>&1
+Ejemplo de configuración cron (cada hora; las tareas definen su propio calendario):
+0 * * * * cd /ruta/al/proyecto && python3 ejecucion_programada.py >> verificacion_log.txt 2>&1
+
+Opciones:
+  --tarea NOMBRE   Ejecuta esa tarea ahora aunque no esté vencida
+  --listar         Muestra las tareas con su última y próxima ejecución
 """
 
+import argparse
 import os
 import sys
 from datetime import datetime
@@ -26,10 +34,15 @@ logging.basicConfig(
 
 logger = logging.getLogger('ejecucion_programada')
 
-def main():
+def main(argv=None):
     """Función principal para la ejecución programada"""
+    parser = argparse.ArgumentParser(description="Ejecuta las tareas programadas vencidas")
+    parser.add_argument('--tarea', help="Ejecutar esta tarea ahora aunque no esté vencida")
+    parser.add_argument('--listar', action='store_true', help="Listar las tareas programadas")
+    args = parser.parse_args(argv)
+
     logger.info("=" * 80)
-    logger.info(f"INICIANDO VERIFICACIÓN AUTOMÁTICA - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info(f"INICIANDO EJECUCIÓN PROGRAMADA - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("=" * 80)
     
     try:
@@ -38,27 +51,46 @@ def main():
         os.chdir(script_dir)
         logger.info(f"Directorio de trabajo: {os.getcwd()}")
         
-        # Importar la función de verificación
-        from verificar_titulares_sin_reportes import ejecutar_verificacion_periodica
-        
-        # Ejecutar la verificación
-        resultado = ejecutar_verificacion_periodica()
+        import scheduler
+        from database import crear_conexion
+
+        scheduler.registrar_tareas_predeterminadas()
+        conn = crear_conexion()
+        try:
+            if args.listar:
+                scheduler.sincronizar_tareas(conn)
+                for tarea in scheduler.listar_tareas(conn):
+                    logger.info(f"{tarea['nombre']} [{tarea['spec']}]: última {tarea['ultima_ejecucion'] or '-'} "
+                                f"({tarea['ultimo_estado'] or '-'}), próxima {tarea['proxima_ejecucion']}")
+                return
+
+            # Exponer métricas mientras dure la ejecución (puerto en METRICS_PORT)
+            from metrics import iniciar_servidor_metricas
+            iniciar_servidor_metricas()
+
+            if args.tarea:
+                scheduler.sincronizar_tareas(conn)
+                resultados = [scheduler.ejecutar_tarea(conn, args.tarea, forzar=True)]
+            else:
+                resultados = scheduler.ejecutar_pendientes(conn)
+        finally:
+            conn.close()
         
         # Registrar resultados
-        logger.info(f"Resultado de la verificación: {resultado}")
-        logger.info(f"Titulares con marcas sin reportes: {resultado.get('titulares_con_marcas_sin_reportes', 'N/A')}")
-        logger.info(f"Emails enviados: {resultado.get('emails_enviados', 'N/A')}")
-        logger.info(f"Errores: {resultado.get('errores', 'N/A')}")
+        if not any(resultados):
+            logger.info("No hay tareas vencidas (o ya las está ejecutando otro proceso)")
+        for resultado in filter(None, resultados):
+            logger.info(f"Tarea {resultado['nombre']}: {resultado['estado']} (trabajo {resultado['trabajo_id']})")
         
         # Indicar finalización exitosa
-        logger.info("Verificación automática completada exitosamente")
+        logger.info("Ejecución programada completada")
         
     except Exception as e:
         logger.error(f"Error durante la ejecución programada: {e}", exc_info=True)
     
     finally:
         logger.info("=" * 80)
-        logger.info(f"FIN DE VERIFICACIÓN AUTOMÁTICA - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(f"FIN DE EJECUCIÓN PROGRAMADA - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 80)
 
 if __name__ == "__main__":
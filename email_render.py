@@ -0,0 +1,90 @@
+"""
+Renderizado de emails a archivos .eml sin conexión SMTP.
+
+Permite previsualizar exactamente lo que recibiría cada cliente: cada mensaje se
+construye completo (con adjuntos) y se escribe como .eml en una carpeta con marca de
+tiempo, junto con un manifest.csv que resume los archivos generados.
+"""
+import csv
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from paths import get_emails_render_dir
+
+COLUMNAS_MANIFEST = [
+    'archivo', 'titular', 'importancia', 'destinatario', 'asunto',
+    'adjunto', 'tamano_bytes', 'estado', 'error'
+]
+
+def crear_directorio_render(prefijo, directorio_base=None):
+    """
+    Crea una carpeta nueva con marca de tiempo para una ejecución de renderizado.
+
+    Args:
+        prefijo: Prefijo del nombre de la carpeta (p. ej. 'envios' o 'notificaciones')
+        directorio_base: Directorio donde crearla. Por defecto get_emails_render_dir()
+
+    Returns:
+        str: Ruta absoluta a la carpeta creada
+    """
+    base = directorio_base or get_emails_render_dir()
+    directorio = os.path.join(base, f"{prefijo}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+def nombre_archivo_eml(indice, *partes):
+    """Genera un nombre de archivo .eml seguro y único dentro de la ejecución."""
+    texto = ' - '.join(str(p) for p in partes if p)
+    texto = re.sub(r'[^\w\s.-]', '_', texto).strip()
+    return f"{indice:04d} - {texto[:120]}.eml"
+
+def _escribir_eml(directorio, trabajo):
+    """Construye el mensaje de un trabajo y lo escribe en disco. Devuelve la fila del manifest."""
+    fila = {columna: trabajo.get(columna, '') for columna in COLUMNAS_MANIFEST}
+    try:
+        mensaje = trabajo['construir']()
+        contenido = mensaje.as_bytes()
+        with open(os.path.join(directorio, trabajo['archivo']), 'wb') as f:
+            f.write(contenido)
+        fila['tamano_bytes'] = len(contenido)
+        fila['estado'] = 'renderizado'
+    except Exception as e:
+        logging.error(f"Error al renderizar {trabajo['archivo']}: {e}")
+        fila['estado'] = 'error'
+        fila['error'] = str(e)
+    return fila
+
+def renderizar_emails(trabajos, directorio, max_workers=None):
+    """
+    Construye y escribe en paralelo los mensajes indicados y genera el manifest.csv.
+
+    Args:
+        trabajos: Lista de dicts con 'archivo' (nombre del .eml), 'construir' (callable que
+            devuelve el mensaje MIME) y los datos del manifest (titular, importancia,
+            destinatario, asunto, adjunto)
+        directorio: Carpeta de salida (ver crear_directorio_render)
+        max_workers: Cantidad de hilos de escritura. Por defecto el de ThreadPoolExecutor
+
+    Returns:
+        dict: {'directorio', 'manifest', 'renderizados', 'errores'}
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        filas = list(executor.map(lambda trabajo: _escribir_eml(directorio, trabajo), trabajos))
+
+    manifest = os.path.join(directorio, 'manifest.csv')
+    with open(manifest, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNAS_MANIFEST)
+        writer.writeheader()
+        writer.writerows(filas)
+
+    errores = sum(1 for fila in filas if fila['estado'] == 'error')
+    logging.info(f"Renderizados {len(filas) - errores} emails en {directorio} ({errores} errores)")
+    return {
+        'directorio': directorio,
+        'manifest': manifest,
+        'renderizados': len(filas) - errores,
+        'errores': errores
+    }
@@ -3,6 +3,7 @@ import sqlite3
 import logging
 import os
 import re
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
@@ -10,12 +11,17 @@ from email.mime.image import MIMEImage
 import mimetypes
 from email import encoders
 from datetime import datetime
+from functools import partial
 from typing import List, Dict, Tuple, Optional
 
 # Importar funciones de logs desde database.py y paths.py
-from database import insertar_log_envio
+from database import insertar_log_envio, registrar_envios_lote
 from paths import get_logs_dir
 from email_utils import obtener_credenciales
+from metrics import SMTP_CONEXION_SEGUNDOS, SMTP_ENVIO_SEGUNDOS, SMTP_FALLOS
+from records import BoletinEnvio, fabrica_de_filas
+from report_catalog import asegurar_tabla_reportes
+from email_render import crear_directorio_render, nombre_archivo_eml, renderizar_emails
 
 # Configuración de logging optimizado para emails
 logging.basicConfig(
@@ -35,6 +41,10 @@ email_handler.setFormatter(logging.Formatter('%(asctime)s - EMAIL - %(message)s'
 email_logger.addHandler(email_handler)
 email_logger.propagate = False
 
+# Registro de envíos por lotes: cantidad de envíos y segundos máximos entre escrituras
+TAMANO_LOTE_REGISTRO_ENVIOS = 10
+INTERVALO_FLUSH_REGISTRO_ENVIOS = 5.0
+
 # La configuración de email se obtiene dinámicamente con obtener_credenciales()
 # en lugar de usar valores hardcodeados
 
@@ -158,6 +168,9 @@ def obtener_registros_pendientes_envio(conn):
     También verifica si hay reportes con importancia 'Pendiente' que bloquean el envío.
     
     NUEVA LÓGICA: Un titular con múltiples importancias recibirá múltiples emails separados.
+    
+    Cada grupo lleva sus boletines en 'boletines' como records.BoletinEnvio, armados
+    directamente por el cursor.
     """
     try:
         cursor = conn.cursor()
@@ -181,16 +194,25 @@ def obtener_registros_pendientes_envio(conn):
             logging.warning(f"Titulares afectados: {', '.join(titulares_list)}")
             raise Exception(f"No se pueden enviar emails: hay {pendientes_count} reportes con importancia 'Pendiente' que requieren revisión manual. Titulares: {', '.join(titulares_list)}")
         
-        # Si no hay pendientes, proceder con la consulta normal
+        # Si no hay pendientes, proceder con la consulta normal.
+        # El informe de cada boletín se resuelve en el catálogo (índice por boletin_id);
+        # las columnas de boletines quedan como respaldo para informes sin catalogar.
+        asegurar_tabla_reportes(conn)
+        cursor.row_factory = fabrica_de_filas(BoletinEnvio)
         cursor.execute("""
             SELECT 
                 b.id, b.titular, b.numero_boletin, b.fecha_boletin, 
                 b.numero_orden, b.solicitante, b.agente, b.numero_expediente, 
                 b.clase, b.marca_custodia, b.marca_publicada, b.clases_acta,
-                b.observaciones, b.nombre_reporte, b.ruta_reporte, b.importancia,
-                c.email, c.telefono, c.direccion, c.ciudad
+                b.observaciones, COALESCE(r.nombre_archivo, b.nombre_reporte) AS nombre_reporte,
+                COALESCE(r.ruta, b.ruta_reporte) AS ruta_reporte,
+                b.importancia,
+                c.email, c.telefono, c.direccion, c.ciudad, r.id AS reporte_id
             FROM boletines b
             LEFT JOIN clientes c ON b.titular = c.titular
+            LEFT JOIN reportes r ON r.id = (
+                SELECT MAX(rb.reporte_id) FROM reportes_boletines rb WHERE rb.boletin_id = b.id
+            )
             WHERE b.reporte_generado = 1 AND b.reporte_enviado = 0 
             AND b.importancia IN ('Baja', 'Media', 'Alta')
             ORDER BY b.titular, b.importancia, b.numero_boletin
@@ -208,35 +230,17 @@ def obtener_registros_pendientes_envio(conn):
             'boletines': []
         })
         
-        for row in rows:
-            titular = row[1]  # b.titular
-            importancia = row[15]  # b.importancia
-            clave_grupo = (titular, importancia)
+        for boletin in rows:
+            grupo = registros_por_grupo[(boletin.titular, boletin.importancia)]
             
             # Asignar datos del cliente (solo la primera vez)
-            if not registros_por_grupo[clave_grupo]['email']:
-                registros_por_grupo[clave_grupo]['email'] = row[16]  # c.email
-                registros_por_grupo[clave_grupo]['telefono'] = row[17]  # c.telefono
-                registros_por_grupo[clave_grupo]['direccion'] = row[18]  # c.direccion
-                registros_por_grupo[clave_grupo]['ciudad'] = row[19]  # c.ciudad
+            if not grupo['email']:
+                grupo['email'] = boletin.email
+                grupo['telefono'] = boletin.telefono
+                grupo['direccion'] = boletin.direccion
+                grupo['ciudad'] = boletin.ciudad
             
-            registros_por_grupo[clave_grupo]['boletines'].append({
-                'id': row[0],
-                'numero_boletin': row[2],
-                'fecha_boletin': row[3],
-                'numero_orden': row[4],
-                'solicitante': row[5],
-                'agente': row[6],
-                'numero_expediente': row[7],
-                'clase': row[8],
-                'marca_custodia': row[9],
-                'marca_publicada': row[10],
-                'clases_acta': row[11],
-                'observaciones': row[12],
-                'nombre_reporte': row[13],
-                'ruta_reporte': row[14],
-                'importancia': row[15]
-            })
+            grupo['boletines'].append(boletin)
         
         # Convertir a diccionario normal con claves string
         registros_por_cliente_importancia = {}
@@ -272,7 +276,7 @@ def determinar_importancia_principal(boletines_data):
     max_prioridad = -1
     
     for boletin in boletines_data:
-        importancia = boletin.get('importancia', 'Baja')
+        importancia = boletin.importancia
         if importancia in prioridad and prioridad[importancia] > max_prioridad:
             max_prioridad = prioridad[importancia]
             max_importancia = importancia
@@ -307,20 +311,106 @@ def crear_mensaje_email(titular, importancia, boletines_data):
 def obtener_archivo_reporte(boletines_data):
     """
     Obtiene la ruta del archivo de reporte a adjuntar.
-    Usa el primer boletín que tenga archivo de reporte.
+    Usa el primer boletín que tenga archivo de reporte; los boletines de un grupo comparten
+    informe, así que cada ruta distinta se verifica en disco una sola vez.
     """
+    verificadas = set()
     for boletin in boletines_data:
-        if boletin.get('ruta_reporte') and boletin.get('nombre_reporte'):
-            ruta_completa = boletin['ruta_reporte']
-            if os.path.exists(ruta_completa):
-                return ruta_completa, boletin['nombre_reporte']
-            else:
-                # Solo log archivos faltantes críticos
-                if not archivo_adjunto:
-                    email_logger.warning(f"⚠️ Archivo de reporte faltante para {titular} ({importancia})")
+        ruta_completa = boletin.ruta_reporte
+        if not ruta_completa or not boletin.nombre_reporte or ruta_completa in verificadas:
+            continue
+        verificadas.add(ruta_completa)
+        if os.path.exists(ruta_completa):
+            return ruta_completa, boletin.nombre_reporte
+        # Solo log archivos faltantes críticos
+        email_logger.warning(f"⚠️ Archivo de reporte faltante: {ruta_completa}")
     
     return None, None
 
+def construir_mensaje(destinatario, asunto, mensaje, archivo_adjunto=None, nombre_archivo=None,
+                      email_usuario=None):
+    """
+    Construye el mensaje MIME completo (texto, html, logo y adjunto) sin enviarlo.
+    
+    Returns:
+        MIMEMultipart: Mensaje multipart/related listo para enviar o guardar como .eml
+    """
+    # Crear mensaje con estructura multipart/related -> multipart/alternative (texto + html)
+    msg_root = MIMEMultipart('related')
+    msg_alternative = MIMEMultipart('alternative')
+    msg_root['From'] = f"Estudio de Marcas y Patentes <{email_usuario}>"
+    msg_root['To'] = destinatario
+    msg_root['Subject'] = asunto
+
+    # Adjuntar texto y html al alternative
+    if isinstance(mensaje, dict) and 'texto' in mensaje and 'html' in mensaje:
+        msg_alternative.attach(MIMEText(mensaje['texto'], 'plain', 'utf-8'))
+        msg_alternative.attach(MIMEText(mensaje['html'], 'html', 'utf-8'))
+    else:
+        msg_alternative.attach(MIMEText(mensaje, 'plain', 'utf-8'))
+
+    # Adjuntar alternative al root
+    msg_root.attach(msg_alternative)
+
+    # Agregar logo si existe (mismo comportamiento que verificar_titulares_sin_reportes.py)
+    from paths import get_assets_dir
+    logo_path = os.path.join(get_assets_dir(), 'Logo.png')
+    # Buscar también en otras ubicaciones posibles si no existe en assets
+    if not os.path.exists(logo_path):
+        alt_paths = [
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo.png'),
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo1.png'),
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Logo.png')
+        ]
+        for path in alt_paths:
+            if os.path.exists(path):
+                logo_path = path
+                break
+
+    if os.path.exists(logo_path):
+        try:
+            with open(logo_path, 'rb') as img_file:
+                img_data = img_file.read()
+                # Intentar detectar tipo MIME por extensión
+                mime_type, _ = mimetypes.guess_type(logo_path)
+                if mime_type and mime_type.startswith('image/'):
+                    subtype = mime_type.split('/')[1]
+                else:
+                    ext = os.path.splitext(logo_path)[1].lstrip('.').lower()
+                    subtype = ext if ext else 'png'
+                img = MIMEImage(img_data, _subtype=subtype)
+                # Asegurarse de que el Content-ID coincida exactamente con cid:logo usado en la plantilla
+                img.add_header('Content-ID', '<logo>')
+                img.add_header('Content-Disposition', 'inline; filename="Logo.png"')
+                msg_root.attach(img)
+                logging.info(f"Logo adjuntado desde {logo_path} con Content-ID <logo>")
+        except Exception as e:
+            logging.warning(f"Error al adjuntar logo: {e}")
+    else:
+        logging.warning(f"No se encontró el archivo de logo en ninguna ruta esperada. Buscado: {logo_path}")
+    
+    # Agregar archivo adjunto si existe
+    if archivo_adjunto and os.path.exists(archivo_adjunto):
+        try:
+            with open(archivo_adjunto, "rb") as attachment:
+                part = MIMEBase('application', 'octet-stream')
+                part.set_payload(attachment.read())
+            
+            encoders.encode_base64(part)
+            part.add_header(
+                'Content-Disposition',
+                f'attachment; filename= {nombre_archivo or os.path.basename(archivo_adjunto)}'
+            )
+            msg_root.attach(part)
+            logging.info(f"Archivo adjunto agregado: {nombre_archivo}")
+        except Exception as e:
+            logging.warning(f"Error al adjuntar archivo: {e}")
+            # Continuar sin archivo adjunto
+    elif archivo_adjunto:
+        logging.warning(f"Archivo adjunto no encontrado: {archivo_adjunto}")
+    
+    return msg_root
+
 def enviar_email(destinatario, asunto, mensaje, archivo_adjunto=None, nombre_archivo=None, 
                 email_usuario=None, password_usuario=None):
     """
@@ -329,6 +419,9 @@ def enviar_email(destinatario, asunto, mensaje, archivo_adjunto=None, nombre_arc
     Incluye validaciones mejoradas.
     """
     try:
+        # Etapa en curso, para clasificar los fallos en las métricas
+        etapa = 'mensaje'
+        
         # Validar email del destinatario
         if not validar_email(destinatario):
             raise Exception(f"Email del destinatario no válido: {destinatario}")
@@ -337,79 +430,7 @@ def enviar_email(destinatario, asunto, mensaje, archivo_adjunto=None, nombre_arc
         if not validar_email(email_usuario):
             raise Exception(f"Email del remitente no válido: {email_usuario}")
         
-        # Crear mensaje con estructura multipart/related -> multipart/alternative (texto + html)
-        msg_root = MIMEMultipart('related')
-        msg_alternative = MIMEMultipart('alternative')
-        msg_root['From'] = f"Estudio de Marcas y Patentes <{email_usuario}>"
-        msg_root['To'] = destinatario
-        msg_root['Subject'] = asunto
-
-        # Adjuntar texto y html al alternative
-        if isinstance(mensaje, dict) and 'texto' in mensaje and 'html' in mensaje:
-            msg_alternative.attach(MIMEText(mensaje['texto'], 'plain', 'utf-8'))
-            msg_alternative.attach(MIMEText(mensaje['html'], 'html', 'utf-8'))
-        else:
-            msg_alternative.attach(MIMEText(mensaje, 'plain', 'utf-8'))
-
-        # Adjuntar alternative al root
-        msg_root.attach(msg_alternative)
-
-        # Agregar logo si existe (mismo comportamiento que verificar_titulares_sin_reportes.py)
-        from paths import get_assets_dir
-        logo_path = os.path.join(get_assets_dir(), 'Logo.png')
-        # Buscar también en otras ubicaciones posibles si no existe en assets
-        if not os.path.exists(logo_path):
-            alt_paths = [
-                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo.png'),
-                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo1.png'),
-                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Logo.png')
-            ]
-            for path in alt_paths:
-                if os.path.exists(path):
-                    logo_path = path
-                    break
-
-        if os.path.exists(logo_path):
-            try:
-                with open(logo_path, 'rb') as img_file:
-                    img_data = img_file.read()
-                    # Intentar detectar tipo MIME por extensión
-                    mime_type, _ = mimetypes.guess_type(logo_path)
-                    if mime_type and mime_type.startswith('image/'):
-                        subtype = mime_type.split('/')[1]
-                    else:
-                        ext = os.path.splitext(logo_path)[1].lstrip('.').lower()
-                        subtype = ext if ext else 'png'
-                    img = MIMEImage(img_data, _subtype=subtype)
-                    # Asegurarse de que el Content-ID coincida exactamente con cid:logo usado en la plantilla
-                    img.add_header('Content-ID', '<logo>')
-                    img.add_header('Content-Disposition', 'inline; filename="Logo.png"')
-                    msg_root.attach(img)
-                    logger.info(f"Logo adjuntado desde {logo_path} con Content-ID <logo>")
-            except Exception as e:
-                logging.warning(f"Error al adjuntar logo: {e}")
-        else:
-            logging.warning(f"No se encontró el archivo de logo en ninguna ruta esperada. Buscado: {logo_path}")
-        
-        # Agregar archivo adjunto si existe
-        if archivo_adjunto and os.path.exists(archivo_adjunto):
-            try:
-                with open(archivo_adjunto, "rb") as attachment:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(attachment.read())
-                
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {nombre_archivo or os.path.basename(archivo_adjunto)}'
-                )
-                msg_root.attach(part)
-                logging.info(f"Archivo adjunto agregado: {nombre_archivo}")
-            except Exception as e:
-                logging.warning(f"Error al adjuntar archivo: {e}")
-                # Continuar sin archivo adjunto
-        elif archivo_adjunto:
-            logging.warning(f"Archivo adjunto no encontrado: {archivo_adjunto}")
+        msg_root = construir_mensaje(destinatario, asunto, mensaje, archivo_adjunto, nombre_archivo, email_usuario)
         
         # Obtener la configuración de SMTP desde email_utils
         credenciales = obtener_credenciales()
@@ -420,25 +441,25 @@ def enviar_email(destinatario, asunto, mensaje, archivo_adjunto=None, nombre_arc
         smtp_port = credenciales.get('smtp_port', 587)  # Valor por defecto como fallback
         
         # Conectar al servidor SMTP
+        etapa = 'conexion'
+        inicio = time.perf_counter()
         server = smtplib.SMTP(smtp_host, smtp_port)
         server.starttls()
         server.login(email_usuario, password_usuario)
+        SMTP_CONEXION_SEGUNDOS.observe(time.perf_counter() - inicio)
         
-        # Enviar email (usar msg_root si existe, sino msg para compatibilidad)
-        if 'msg_root' in locals():
-            text = msg_root.as_string()
-        elif 'msg' in locals():
-            text = msg.as_string()
-        else:
-            raise Exception("No se encontró el mensaje para enviar (msg_root/msg)")
-
+        etapa = 'envio'
+        text = msg_root.as_string()
+        inicio = time.perf_counter()
         server.sendmail(email_usuario, destinatario, text)
+        SMTP_ENVIO_SEGUNDOS.observe(time.perf_counter() - inicio)
         server.quit()
         
         email_logger.info(f"📧 Email enviado exitosamente: {destinatario}")
         return True
         
     except Exception as e:
+        SMTP_FALLOS.labels(etapa).inc()
         email_logger.error(f"❌ Error al enviar email a {destinatario}: {e}")
         return False
 
@@ -465,6 +486,87 @@ def actualizar_estado_envio(conn, boletines_ids):
     finally:
         cursor.close()
 
+class BufferRegistroEnvios:
+    """
+    Buffer de escritura diferida para el registro de envíos.
+
+    Acumula las actualizaciones de boletines enviados y las filas de envios_log y las
+    escribe en una sola transacción cada `max_envios` envíos, cuando pasan más de
+    `intervalo_segundos` desde la última escritura y al cerrar el procesamiento.
+    La actualización de estado y el log de un mismo envío viajan siempre en el mismo
+    lote, de modo que nunca queda uno sin el otro. Ante una caída se pierden a lo sumo los
+    envíos del lote en curso, que siguen pendientes y se reenvían en la próxima ejecución:
+    es el costo de no hacer un commit por email.
+    Si una escritura falla, el lote se conserva y se reintenta en la próxima escritura (y en
+    la final); el error se informa en el log y no se propaga al envío que ya salió.
+    """
+
+    def __init__(self, conn, max_envios=TAMANO_LOTE_REGISTRO_ENVIOS,
+                 intervalo_segundos=INTERVALO_FLUSH_REGISTRO_ENVIOS):
+        self.conn = conn
+        self.max_envios = max_envios
+        self.intervalo_segundos = intervalo_segundos
+        self._actualizaciones = []
+        self._logs = []
+        self._envios_pendientes = 0
+        # Envíos agregados desde el último intento de escritura (exitoso o no)
+        self._envios_desde_flush = 0
+        self._ultimo_flush = time.monotonic()
+
+    def registrar(self, titular, email, estado, error=None, numero_boletin=None, importancia=None,
+                  boletines_ids=None):
+        """
+        Agrega un envío al buffer. Si se indican boletines_ids se marcan como enviados
+        junto con el log en el mismo lote.
+
+        Returns:
+            bool: False si se intentó escribir el lote y falló (queda pendiente)
+        """
+        fecha_envio = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if boletines_ids:
+            self._actualizaciones.extend((fecha_envio, boletin_id) for boletin_id in boletines_ids)
+        self._logs.append((titular, email, fecha_envio, estado, error, numero_boletin, importancia))
+        self._envios_pendientes += 1
+        self._envios_desde_flush += 1
+
+        if (self._envios_desde_flush >= self.max_envios or
+                time.monotonic() - self._ultimo_flush >= self.intervalo_segundos):
+            return self.flush()
+        return True
+
+    def flush(self, final=False):
+        """
+        Escribe el contenido del buffer en una única transacción. Si falla, el lote queda en
+        el buffer para el próximo intento.
+
+        Args:
+            final: Último intento (cierre del procesamiento): si falla, se informan en el log
+                   los emails que salieron y quedaron sin registrar
+
+        Returns:
+            bool: True si se escribió (o no había nada pendiente), False si falló
+        """
+        if not self._logs and not self._actualizaciones:
+            return True
+        self._envios_desde_flush = 0
+        self._ultimo_flush = time.monotonic()
+        try:
+            registrar_envios_lote(self.conn, self._actualizaciones, self._logs)
+        except Exception as e:
+            logging.error(f"Registro de envíos: no se pudo escribir el lote de {self._envios_pendientes} envíos"
+                          f"{'' if final else ' (se reintenta en la próxima escritura)'}: {e}")
+            if final:
+                for titular, email, _, estado, _, _, importancia in self._logs:
+                    if estado == 'exitoso':
+                        # El email salió pero sus boletines siguen pendientes: se reenviaría
+                        email_logger.error(f"❗ EMAIL ENVIADO SIN REGISTRAR: {titular} ({importancia}) → {email}")
+            return False
+        logging.info(f"Registro de envíos: {self._envios_pendientes} envíos escritos en lote.")
+        self._actualizaciones = []
+        self._logs = []
+        self._envios_pendientes = 0
+        return True
+
 def validar_clientes_para_envio(conn):
     """
     Valida los grupos (titular + importancia) antes del envío de emails y retorna un reporte de validación.
@@ -539,10 +641,80 @@ def validar_clientes_para_envio(conn):
     
     return validacion
 
-def procesar_envio_emails(conn, email_usuario=None, password_usuario=None):
+def obtener_asunto_envio(importancia):
+    """Asunto del email de reporte según la importancia, referido al mes anterior."""
+    # Formatear mes en español (no depender de locale del sistema)
+    now = datetime.now()
+    meses_es = [
+        'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+        'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'
+    ]
+    mes_anterior = f"{meses_es[now.month - 2].capitalize()} {now.year}" if now.month > 1 else f"Diciembre {now.year - 1}"
+    
+    # Personalizar el asunto según la importancia
+    if importancia.lower() == 'baja':
+        return f"Custodia de Marcas con deteccion de similares  - {mes_anterior}"
+    return f"Custodia de Marcas con deteccion de similitudes relevantes - {mes_anterior}"
+
+def renderizar_envios(registros_por_cliente, email_usuario=None, directorio_render=None, max_workers=None):
+    """
+    Construye los emails de cada grupo (titular + importancia), con el reporte adjunto,
+    y los escribe como .eml en una carpeta con marca de tiempo junto con un manifest.csv.
+    No abre conexiones SMTP ni modifica la base de datos.
+    
+    Args:
+        registros_por_cliente: Grupos devueltos por obtener_registros_pendientes_envio()
+        email_usuario: Email remitente que figurará en los mensajes
+        directorio_render: Directorio base de salida. Por defecto get_emails_render_dir()
+        max_workers: Cantidad de hilos de escritura
+    
+    Returns:
+        dict: {'sin_email', 'sin_archivo', 'render'} donde render es el resultado de renderizar_emails()
+    """
+    resultado = {'sin_email': [], 'sin_archivo': [], 'render': None}
+    trabajos = []
+    
+    for datos_grupo in registros_por_cliente.values():
+        titular = datos_grupo['titular']
+        importancia = datos_grupo['importancia']
+        
+        if not datos_grupo['email']:
+            resultado['sin_email'].append(f"{titular} ({importancia})")
+            continue
+        
+        archivo_reporte, nombre_reporte = obtener_archivo_reporte(datos_grupo['boletines'])
+        if not archivo_reporte:
+            resultado['sin_archivo'].append(f"{titular} ({importancia})")
+            continue
+        
+        asunto = obtener_asunto_envio(importancia)
+        mensaje = crear_mensaje_email(titular, importancia, datos_grupo['boletines'])
+        trabajos.append({
+            'archivo': nombre_archivo_eml(len(trabajos) + 1, titular, importancia),
+            'construir': partial(construir_mensaje, datos_grupo['email'], asunto, mensaje,
+                                 archivo_reporte, nombre_reporte, email_usuario),
+            'titular': titular,
+            'importancia': importancia,
+            'destinatario': datos_grupo['email'],
+            'asunto': asunto,
+            'adjunto': nombre_reporte
+        })
+    
+    directorio = crear_directorio_render('envios', directorio_render)
+    resultado['render'] = renderizar_emails(trabajos, directorio, max_workers)
+    return resultado
+
+def procesar_envio_emails(conn, email_usuario=None, password_usuario=None, solo_renderizar=False,
+                          directorio_render=None, progreso=None):
     """
     Función principal para procesar y enviar todos los emails pendientes.
     Incluye validación de reportes con importancia 'Pendiente'.
+    
+    Con solo_renderizar=True no se envía nada: los mensajes se escriben como .eml
+    (ver renderizar_envios) y el resultado incluye la clave 'render'.
+    
+    progreso es un callable opcional progreso(actual, total, mensaje) que se llama por
+    cada grupo (titular + importancia) procesado (ver jobs.ProgresoTrabajo).
     """
     # Obtener credenciales desde email_utils si no se proporcionan
     if email_usuario is None or password_usuario is None:
@@ -577,142 +749,137 @@ def procesar_envio_emails(conn, email_usuario=None, password_usuario=None):
             logging.info("No hay reportes pendientes de envío.")
             return resultados
         
+        if solo_renderizar:
+            render = renderizar_envios(registros_por_cliente, email_usuario, directorio_render)
+            resultados.update(render)
+            return resultados
+        
         # Validar credenciales de email antes de procesar
         if not validar_credenciales_email(email_usuario, password_usuario):
             raise Exception("Credenciales de email inválidas. Verifique su email y contraseña.")
         
+        # Los registros de envío se escriben por lotes (ver BufferRegistroEnvios)
+        buffer_registro = BufferRegistroEnvios(conn)
+        
         # NUEVA LÓGICA: Procesar cada grupo (titular + importancia)
-        for clave_grupo, datos_grupo in registros_por_cliente.items():
-            try:
-                titular = datos_grupo['titular']
-                importancia = datos_grupo['importancia']
+        try:
+            total_grupos = len(registros_por_cliente)
+            for indice, (clave_grupo, datos_grupo) in enumerate(registros_por_cliente.items()):
+                try:
+                    titular = datos_grupo['titular']
+                    importancia = datos_grupo['importancia']
+                    if progreso:
+                        progreso(indice, total_grupos, f"{titular} ({importancia})")
                 
-                # Verificar si tiene email
-                if not datos_grupo['email']:
-                    logging.warning(f"Grupo {titular} ({importancia}) no tiene email registrado.")
-                    resultados['sin_email'].append(f"{titular} ({importancia})")
+                    # Verificar si tiene email
+                    if not datos_grupo['email']:
+                        logging.warning(f"Grupo {titular} ({importancia}) no tiene email registrado.")
+                        resultados['sin_email'].append(f"{titular} ({importancia})")
                     
-                    # Registrar en logs
-                    try:
-                        insertar_log_envio(conn, titular, 'N/A', 'sin_email', 'Cliente sin email registrado', 'N/A', importancia)
-                    except Exception as log_error:
-                        logging.error(f"Error registrando log: {log_error}")
+                        # Registrar en logs
+                        try:
+                            buffer_registro.registrar(titular, 'N/A', 'sin_email', 'Cliente sin email registrado', 'N/A', importancia)
+                        except Exception as log_error:
+                            logging.error(f"Error registrando log: {log_error}")
                     
-                    continue
+                        continue
                 
-                # Obtener archivo de reporte específico para esta importancia
-                archivo_reporte, nombre_reporte = obtener_archivo_reporte(datos_grupo['boletines'])
+                    # Obtener archivo de reporte específico para esta importancia
+                    archivo_reporte, nombre_reporte = obtener_archivo_reporte(datos_grupo['boletines'])
                 
-                if not archivo_reporte:
-                    logging.warning(f"No se encontró archivo de reporte para {titular} ({importancia}).")
-                    resultados['sin_archivo'].append(f"{titular} ({importancia})")
+                    if not archivo_reporte:
+                        logging.warning(f"No se encontró archivo de reporte para {titular} ({importancia}).")
+                        resultados['sin_archivo'].append(f"{titular} ({importancia})")
                     
-                    # Registrar en logs
-                    try:
-                        insertar_log_envio(conn, titular, datos_grupo['email'], 'sin_archivo', 'Archivo de reporte no encontrado', 'N/A', importancia)
-                    except Exception as log_error:
-                        logging.error(f"Error registrando log: {log_error}")
+                        # Registrar en logs
+                        try:
+                            buffer_registro.registrar(titular, datos_grupo['email'], 'sin_archivo', 'Archivo de reporte no encontrado', 'N/A', importancia)
+                        except Exception as log_error:
+                            logging.error(f"Error registrando log: {log_error}")
                     
-                    continue
+                        continue
                 
-                # Crear mensaje específico para esta importancia
-                # Formatear mes en español (no depender de locale del sistema)
-                now = datetime.now()
-                meses_es = [
-                    'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
-                    'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'
-                ]
-                mes_anterior = f"{meses_es[now.month - 2].capitalize()} {now.year}" if now.month > 1 else f"Diciembre {now.year - 1}"
+                    # Crear mensaje específico para esta importancia
+                    asunto = obtener_asunto_envio(importancia)
+                    mensaje = crear_mensaje_email(titular, importancia, datos_grupo['boletines'])
                 
-                # Personalizar el asunto según la importancia
-                if importancia.lower() == 'baja':
-                    asunto = f"Custodia de Marcas con deteccion de similares  - {mes_anterior}"
-                else:
-                    asunto = f"Custodia de Marcas con deteccion de similitudes relevantes - {mes_anterior}"
-            
-                mensaje = crear_mensaje_email(titular, importancia, datos_grupo['boletines'])
-                
-                # Enviar email
-                if enviar_email(
-                    destinatario=datos_grupo['email'],
-                    asunto=asunto,
-                    mensaje=mensaje,
-                    archivo_adjunto=archivo_reporte,
-                    nombre_archivo=nombre_reporte,
-                    email_usuario=email_usuario,
-                    password_usuario=password_usuario
-                ):
-                    # Actualizar estado en base de datos
-                    boletines_ids = [b['id'] for b in datos_grupo['boletines']]
-                    actualizar_estado_envio(conn, boletines_ids)
-                    
-                    # Registrar envío exitoso en logs
-                    try:
+                    # Enviar email
+                    if enviar_email(
+                        destinatario=datos_grupo['email'],
+                        asunto=asunto,
+                        mensaje=mensaje,
+                        archivo_adjunto=archivo_reporte,
+                        nombre_archivo=nombre_reporte,
+                        email_usuario=email_usuario,
+                        password_usuario=password_usuario
+                    ):
+                        # Actualizar estado y registrar envío exitoso (en el mismo lote)
+                        boletines_ids = [b.id for b in datos_grupo['boletines']]
                         # Obtener información del primer boletín para los logs
-                        primer_boletin = datos_grupo['boletines'][0] if datos_grupo['boletines'] else {}
-                        numero_boletin = primer_boletin.get('numero_boletin', 'N/A')
-                        
-                        insertar_log_envio(
-                            conn, 
+                        numero_boletin = datos_grupo['boletines'][0].numero_boletin if datos_grupo['boletines'] else 'N/A'
+                    
+                        buffer_registro.registrar(
                             titular, 
                             datos_grupo['email'], 
                             'exitoso', 
                             None, 
                             numero_boletin, 
-                            importancia
+                            importancia,
+                            boletines_ids=boletines_ids
                         )
-                    except Exception as log_error:
-                        logging.error(f"Error registrando log exitoso: {log_error}")
                     
-                    resultados['exitosos'].append({
-                        'titular': titular,
-                        'importancia': importancia,
-                        'email': datos_grupo['email'],
-                        'cantidad_boletines': len(datos_grupo['boletines'])
-                    })
-                else:
-                    # Registrar envío fallido en logs
-                    try:
-                        primer_boletin = datos_grupo['boletines'][0] if datos_grupo['boletines'] else {}
-                        numero_boletin = primer_boletin.get('numero_boletin', 'N/A')
+                        resultados['exitosos'].append({
+                            'titular': titular,
+                            'importancia': importancia,
+                            'email': datos_grupo['email'],
+                            'cantidad_boletines': len(datos_grupo['boletines'])
+                        })
+                    else:
+                        # Registrar envío fallido en logs
+                        try:
+                            numero_boletin = datos_grupo['boletines'][0].numero_boletin if datos_grupo['boletines'] else 'N/A'
                         
-                        insertar_log_envio(
-                            conn, 
-                            titular, 
-                            datos_grupo['email'], 
-                            'fallido', 
-                            'Error en envío de email', 
-                            numero_boletin, 
-                            importancia
-                        )
-                    except Exception as log_error:
-                        logging.error(f"Error registrando log fallido: {log_error}")
+                            buffer_registro.registrar(
+                                titular, 
+                                datos_grupo['email'], 
+                                'fallido', 
+                                'Error en envío de email', 
+                                numero_boletin, 
+                                importancia
+                            )
+                        except Exception as log_error:
+                            logging.error(f"Error registrando log fallido: {log_error}")
                     
+                        resultados['fallidos'].append({
+                            'titular': titular,
+                            'importancia': importancia,
+                            'email': datos_grupo['email'],
+                            'error': 'Error en envío de email'
+                        })
+            
+                except Exception as e:
+                    titular = datos_grupo.get('titular', 'N/A')
+                    importancia = datos_grupo.get('importancia', 'N/A')
+                    logging.error(f"Error procesando grupo {titular} ({importancia}): {e}")
                     resultados['fallidos'].append({
                         'titular': titular,
                         'importancia': importancia,
-                        'email': datos_grupo['email'],
-                        'error': 'Error en envío de email'
+                        'email': datos_grupo.get('email', 'N/A'),
+                        'error': str(e)
                     })
             
-            except Exception as e:
-                titular = datos_grupo.get('titular', 'N/A')
-                importancia = datos_grupo.get('importancia', 'N/A')
-                logging.error(f"Error procesando grupo {titular} ({importancia}): {e}")
-                resultados['fallidos'].append({
-                    'titular': titular,
-                    'importancia': importancia,
-                    'email': datos_grupo.get('email', 'N/A'),
-                    'error': str(e)
-                })
-            
-            except Exception as e:
-                logging.error(f"Error procesando cliente Compose a response in Spanish: {titular}: {e}")
-                resultados['fallidos'].append({
-                    'titular': titular,
-                    'email': datos_cliente.get('email', 'N/A'),
-                    'error': str(e)
-                })
+                except Exception as e:
+                    logging.error(f"Error procesando cliente Compose a response in Spanish: {titular}: {e}")
+                    resultados['fallidos'].append({
+                        'titular': titular,
+                        'email': datos_cliente.get('email', 'N/A'),
+                        'error': str(e)
+                    })
+            if progreso:
+                progreso(total_grupos, total_grupos)
+        finally:
+            # Escribir lo que quede en el buffer, también si el procesamiento se interrumpe
+            buffer_registro.flush(final=True)
     
     except Exception as e:
         logging.error(f"Error general en procesamiento de emails: {e}")
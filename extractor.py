@@ -1,8 +1,11 @@
 # extractor.py
 from collections import defaultdict
 
+from metrics import FILAS_EXTRAIDAS
+from records import Boletin
+
 def extraer_datos_agrupados(df):
-    """Extrae y agrupa los datos del DataFrame por titular."""
+    """Extrae y agrupa los datos del DataFrame por titular ({titular: [Boletin]})."""
     agrupados = defaultdict(list)
 
     for i in range(len(df)):
@@ -34,19 +37,12 @@ def extraer_datos_agrupados(df):
             marca_publicada = df.iloc[i - 1, 4] if i >= 1 else ""
             clases_acta = df.iloc[i - 1, 5] if i >= 1 else ""
 
-            agrupados[nombre_titular].append({
-                "Número de Boletín": numero_boletin,
-                "Fecha de Boletín": fecha_boletin,
-                "Número de Orden": numero_orden,
-                "Solicitante": solicitante,
-                "Agente": agente,
-                "Expediente": numero_expediente,
-                "Clase": clase,
-                "Marca en Custodia": marca_custodia,
-                "Marca Publicada": marca_publicada,
-                "Clases/Acta": clases_acta
-            })
+            agrupados[nombre_titular].append(Boletin(
+                nombre_titular, numero_boletin, fecha_boletin, numero_orden, solicitante, agente,
+                numero_expediente, clase, marca_custodia, marca_publicada, clases_acta
+            ))
 
+    FILAS_EXTRAIDAS.observe(sum(len(registros) for registros in agrupados.values()))
     return agrupados
 
 def _fetch_pending_records(self, conn):
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# ingestion.py
+
+"""
+Importación automática de boletines desde una bandeja de entrada (ver
+paths.get_bandeja_boletines_dir y la variable BOLETINES_BANDEJA_DIR).
+
+- Se sondea el directorio; un XLSX se toma recién cuando su tamaño y fecha de modificación no
+  cambiaron entre dos sondeos y pasaron ESTABILIDAD_SEGUNDOS desde la última escritura, para no
+  leer archivos que se están copiando.
+- Los archivos nuevos se leen en paralelo en un pool de procesos (pipeline.leer_boletin) y se
+  insertan de a uno desde un único escritor (la conexión del trabajo), así no hay escrituras
+  concurrentes sobre SQLite.
+- Cada archivo procesado se mueve a <bandeja>/procesados/<fecha>/<hash>-<nombre>; el hash del
+  contenido queda en la tabla archivos_ingeridos y un archivo ya importado que vuelva a llegar
+  se aparta a <bandeja>/duplicados/ sin leerlo. Los que fallan van a <bandeja>/errores/.
+- El lote corre como trabajo 'importar_boletines' (el mismo que la carga manual desde la
+  interfaz), así que se ve su progreso y no se solapa con una importación manual.
+
+Uso:
+    python ingestion.py               # vigila la bandeja indefinidamente
+    python ingestion.py --una-vez     # procesa lo que haya y termina (para cron)
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import jobs
+from database import crear_conexion, crear_tabla, insertar_datos
+from paths import get_bandeja_boletines_dir
+from pipeline import leer_boletin
+
+INTERVALO_SONDEO_SEGUNDOS = int(os.getenv('BOLETINES_BANDEJA_INTERVALO', '30'))
+# Segundos sin modificaciones para considerar que un archivo terminó de copiarse
+ESTABILIDAD_SEGUNDOS = 5
+EXTENSIONES = ('.xlsx',)
+DIRECTORIO_PROCESADOS = 'procesados'
+DIRECTORIO_DUPLICADOS = 'duplicados'
+DIRECTORIO_ERRORES = 'errores'
+TIPO_TRABAJO = 'importar_boletines'
+
+logger = logging.getLogger('ingestion')
+
+_esquemas_verificados = set()
+
+def _asegurar_tabla_archivos_ingeridos(conn):
+    """Crea el registro de archivos importados si no existe (una vez por base y proceso)."""
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is not None and ruta_db in _esquemas_verificados:
+        return
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archivos_ingeridos (
+                sha256 TEXT PRIMARY KEY,
+                nombre_archivo TEXT NOT NULL,
+                ruta_archivo TEXT,
+                tamano_bytes INTEGER,
+                registros INTEGER,
+                insertados INTEGER,
+                omitidos INTEGER,
+                fecha_ingesta TEXT DEFAULT (datetime('now', 'localtime'))
+            )
+        """)
+        conn.commit()
+    except sqlite3.Error as e:
+        logging.error(f"Error al crear la tabla archivos_ingeridos: {e}")
+        raise Exception(f"Error al crear la tabla archivos_ingeridos: {e}")
+    if ruta_db is not None:
+        _esquemas_verificados.add(ruta_db)
+
+def hash_archivo(ruta):
+    """Devuelve el sha256 (hexadecimal) del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+def buscar_archivos_estables(directorio, observaciones=None, ahora=None):
+    """
+    Lista los XLSX de la bandeja que ya terminaron de escribirse.
+
+    Args:
+        directorio: Bandeja de entrada
+        observaciones: dict {ruta: (tamaño, mtime)} del sondeo anterior; si se pasa, un archivo
+            solo es estable si no cambió desde entonces (el dict se actualiza)
+        ahora: Marca de tiempo de referencia (por defecto time.time())
+
+    Returns:
+        list[str]: Rutas ordenadas por fecha de modificación
+    """
+    ahora = ahora or time.time()
+    estables = []
+    vistos = {}
+    for entrada in os.scandir(directorio):
+        nombre = entrada.name
+        # Los archivos de bloqueo de Excel (~$...) y los ocultos no son boletines
+        if not entrada.is_file() or nombre.startswith(('~$', '.')) or not nombre.lower().endswith(EXTENSIONES):
+            continue
+        estado = entrada.stat()
+        firma = (estado.st_size, estado.st_mtime)
+        vistos[entrada.path] = firma
+        if estado.st_size == 0 or ahora - estado.st_mtime < ESTABILIDAD_SEGUNDOS:
+            continue
+        if observaciones is not None and observaciones.get(entrada.path) != firma:
+            continue
+        estables.append((estado.st_mtime, entrada.path))
+    if observaciones is not None:
+        observaciones.clear()
+        observaciones.update(vistos)
+    return [ruta for _, ruta in sorted(estables)]
+
+def _destino(ruta, directorio, subdirectorio, sha256=None):
+    """Ruta de archivo para un XLSX de la bandeja: <directorio>/<subdirectorio>/<fecha>/[<hash>-]<nombre>."""
+    nombre = os.path.basename(ruta)
+    if sha256:
+        nombre = f"{sha256[:12]}-{nombre}"
+    return os.path.join(directorio, subdirectorio, datetime.now().strftime('%Y-%m-%d'), nombre)
+
+def _mover(ruta, destino):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    os.replace(ruta, destino)
+    return destino
+
+def obtener_archivo_ingerido(conn, sha256):
+    """
+    Busca un archivo en el registro de importaciones por el hash de su contenido.
+
+    Returns:
+        dict | None: {'nombre_archivo', 'registros', 'insertados', 'omitidos', 'fecha_ingesta'}
+    """
+    _asegurar_tabla_archivos_ingeridos(conn)
+    try:
+        fila = conn.execute("""
+            SELECT nombre_archivo, registros, insertados, omitidos, fecha_ingesta
+            FROM archivos_ingeridos WHERE sha256 = ?
+        """, (sha256,)).fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"Error al consultar archivos importados: {e}")
+        raise Exception(f"Error al consultar archivos importados: {e}")
+    if fila is None:
+        return None
+    return dict(zip(('nombre_archivo', 'registros', 'insertados', 'omitidos', 'fecha_ingesta'), fila))
+
+def importar_boletin(conn, datos_agrupados, sha256, nombre_archivo, ruta_archivo=None, tamano_bytes=None,
+                     progreso=None):
+    """
+    Inserta los registros de un archivo y lo anota en el registro de importaciones. Si el
+    mismo contenido ya se importó completo, no se toca la base.
+
+    Args:
+        conn: Conexión a la base de datos
+        datos_agrupados: {titular: [Boletin]} del archivo
+        sha256: Hash del contenido del archivo
+        nombre_archivo: Nombre original del archivo
+        ruta_archivo: Dónde quedó guardado el archivo, si se conserva
+        tamano_bytes: Tamaño del archivo
+        progreso: Callable opcional progreso(actual, total, mensaje)
+
+    Returns:
+        dict: El resultado de insertar_datos() ('ya_importado': True si se omitió por completo)
+    """
+    previo = obtener_archivo_ingerido(conn, sha256)
+    if previo is not None:
+        return {
+            'success': True,
+            'ya_importado': True,
+            'mensaje': (f"El archivo ya se importó el {previo['fecha_ingesta']} ({previo['nombre_archivo']}): "
+                        f"no hay registros nuevos"),
+            'estadisticas': {'total_procesados': previo['registros'], 'insertados': 0,
+                             'omitidos': previo['registros']},
+        }
+
+    resultado = insertar_datos(conn, datos_agrupados, progreso=progreso)
+    if not resultado.get('success'):
+        return resultado
+    estadisticas = resultado['estadisticas']
+    try:
+        conn.execute("""
+            INSERT OR REPLACE INTO archivos_ingeridos (sha256, nombre_archivo, ruta_archivo, tamano_bytes,
+                                                       registros, insertados, omitidos)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (sha256, nombre_archivo, ruta_archivo, tamano_bytes, estadisticas['total_procesados'],
+              estadisticas['insertados'], estadisticas['omitidos']))
+        conn.commit()
+    except sqlite3.Error as e:
+        # Los boletines ya quedaron (y un reintento los omitiría como duplicados)
+        logging.error(f"Error al registrar el archivo importado {nombre_archivo}: {e}")
+    return resultado
+
+def importar_archivos(conn, archivos, directorio, workers=None, progreso=None):
+    """
+    Importa un lote de XLSX: descarta los ya importados, lee el resto en paralelo e inserta
+    cada uno desde esta conexión (único escritor).
+
+    Args:
+        conn: Conexión a la base de datos (la única que escribe)
+        archivos: Rutas de los XLSX estables
+        directorio: Bandeja de entrada (para mover los archivos procesados)
+        workers: Procesos de lectura (por defecto uno por CPU)
+        progreso: Callable opcional progreso(actual, total, mensaje)
+
+    Returns:
+        dict: {'importados', 'duplicados' (nombres), 'errores' ({'archivo', 'error'}),
+               'insertados', 'omitidos'}
+    """
+    crear_tabla(conn)
+    _asegurar_tabla_archivos_ingeridos(conn)
+    resumen = {'importados': [], 'duplicados': [], 'errores': [], 'insertados': 0, 'omitidos': 0}
+
+    nuevos = {}
+    for ruta in archivos:
+        sha256 = hash_archivo(ruta)
+        previo = obtener_archivo_ingerido(conn, sha256)
+        if previo is not None or sha256 in nuevos.values():
+            logger.info(f"{os.path.basename(ruta)} ya fue importado "
+                        f"({previo['nombre_archivo'] if previo else 'en este lote'}); se omite")
+            _mover(ruta, _destino(ruta, directorio, DIRECTORIO_DUPLICADOS, sha256))
+            resumen['duplicados'].append(os.path.basename(ruta))
+        else:
+            nuevos[ruta] = sha256
+
+    total = len(nuevos)
+    if not total:
+        return resumen
+    workers = max(1, min(workers or os.cpu_count() or 1, total))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = {executor.submit(leer_boletin, ruta, sha256): ruta for ruta, sha256 in nuevos.items()}
+        for indice, futuro in enumerate(as_completed(futuros)):
+            ruta = futuros[futuro]
+            nombre = os.path.basename(ruta)
+            sha256 = nuevos[ruta]
+            destino = _destino(ruta, directorio, DIRECTORIO_PROCESADOS, sha256)
+            if progreso:
+                progreso(indice, total, nombre)
+            try:
+                datos = futuro.result()
+                if not datos:
+                    raise ValueError("No se pudieron extraer datos válidos del archivo")
+                resultado = importar_boletin(conn, datos, sha256, nombre, destino, os.path.getsize(ruta))
+                if not resultado.get('success'):
+                    raise Exception(resultado.get('mensaje'))
+            except Exception as e:
+                logger.error(f"Error al importar {nombre}: {e}")
+                _mover(ruta, _destino(ruta, directorio, DIRECTORIO_ERRORES, sha256))
+                resumen['errores'].append({'archivo': nombre, 'error': str(e)})
+                continue
+
+            _mover(ruta, destino)
+            estadisticas = resultado['estadisticas']
+            resumen['importados'].append(nombre)
+            resumen['insertados'] += estadisticas['insertados']
+            resumen['omitidos'] += estadisticas['omitidos']
+            logger.info(f"{nombre}: {estadisticas['insertados']} insertados, {estadisticas['omitidos']} omitidos")
+    if progreso and total:
+        progreso(total, total)
+    return resumen
+
+def procesar_bandeja(directorio=None, workers=None, observaciones=None):
+    """
+    Importa los archivos estables de la bandeja como trabajo 'importar_boletines'.
+
+    Args:
+        directorio: Bandeja de entrada (por defecto get_bandeja_boletines_dir())
+        workers: Procesos de lectura
+        observaciones: dict de sondeos anteriores (ver buscar_archivos_estables)
+
+    Returns:
+        dict | None: Resumen de importar_archivos(), o None si no había nada que importar o si
+        ya había una importación en curso (los archivos quedan para el siguiente sondeo)
+    """
+    directorio = directorio or get_bandeja_boletines_dir()
+    archivos = buscar_archivos_estables(directorio, observaciones)
+    if not archivos:
+        return None
+
+    conn = crear_conexion()
+    try:
+        trabajo_id = jobs.reservar_trabajo(conn, TIPO_TRABAJO, f"Bandeja de entrada ({len(archivos)} archivos)")
+    except jobs.TrabajoEnCurso as e:
+        logger.info(f"Importación pospuesta: {e}")
+        return None
+    finally:
+        conn.close()
+    return jobs.ejecutar_trabajo(
+        trabajo_id,
+        lambda conn, progreso: importar_archivos(conn, archivos, directorio, workers, progreso)
+    )
+
+def vigilar_bandeja(directorio=None, intervalo=INTERVALO_SONDEO_SEGUNDOS, workers=None, detener=None):
+    """
+    Sondea la bandeja cada intervalo segundos e importa los archivos nuevos.
+
+    Args:
+        directorio: Bandeja de entrada
+        intervalo: Segundos entre sondeos
+        workers: Procesos de lectura
+        detener: threading.Event opcional para terminar el bucle
+    """
+    directorio = directorio or get_bandeja_boletines_dir()
+    detener = detener or threading.Event()
+    observaciones = {}
+    logger.info(f"Vigilando la bandeja {directorio} cada {intervalo} s")
+    while not detener.is_set():
+        try:
+            resumen = procesar_bandeja(directorio, workers, observaciones)
+            if resumen:
+                logger.info(f"Lote importado: {len(resumen['importados'])} archivos, "
+                            f"{resumen['insertados']} registros nuevos, {len(resumen['duplicados'])} duplicados, "
+                            f"{len(resumen['errores'])} con error")
+        except Exception as e:
+            logger.error(f"Error al procesar la bandeja: {e}", exc_info=True)
+        detener.wait(intervalo)
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Importa automáticamente los boletines de la bandeja de entrada")
+    parser.add_argument('--directorio', default=None, help="Bandeja de entrada (por defecto BOLETINES_BANDEJA_DIR)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de lectura (por defecto, uno por CPU)")
+    parser.add_argument('--intervalo', type=int, default=INTERVALO_SONDEO_SEGUNDOS, help="Segundos entre sondeos")
+    parser.add_argument('--una-vez', action='store_true',
+                        help="Procesar los archivos estables y terminar (sin esperar un segundo sondeo)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.una_vez:
+        resumen = procesar_bandeja(args.directorio, args.workers)
+        print(resumen or "Sin archivos nuevos")
+        return 0 if not resumen or not resumen['errores'] else 1
+    try:
+        vigilar_bandeja(args.directorio, args.intervalo, args.workers)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Ejecución de operaciones largas en segundo plano (generación de informes, envío masivo,
+importación de boletines, verificación mensual) con seguimiento en la tabla jobs.
+
+- encolar_trabajo() registra el trabajo y lo ejecuta en un pool de hilos del proceso, de modo
+  que sigue corriendo aunque la página de Streamlit se recargue; las páginas consultan el
+  progreso con obtener_trabajo() / obtener_trabajo_activo().
+- Solo puede haber un trabajo activo (en_cola o ejecutando) de cada tipo por base de datos:
+  lo garantiza un índice único parcial, así que vale también entre procesos.
+- Los trabajos en ejecución, y los encolados en el pool que esperan un hilo libre, actualizan
+  su latido; si el proceso que los ejecutaba muere, pasado TIEMPO_ABANDONO_SEGUNDOS se marcan
+  como abandonados y el tipo queda libre.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import crear_conexion
+
+ESTADOS_ACTIVOS = ('en_cola', 'ejecutando')
+MAX_TRABAJOS_SIMULTANEOS = 2
+INTERVALO_LATIDO_SEGUNDOS = 30
+TIEMPO_ABANDONO_SEGUNDOS = 300
+# Mínimo entre escrituras de progreso (la última siempre se escribe)
+INTERVALO_PROGRESO_SEGUNDOS = 0.5
+
+COLUMNAS_TRABAJO = ('id', 'tipo', 'estado', 'descripcion', 'progreso_actual', 'progreso_total',
+                    'mensaje', 'resultado', 'error', 'propietario', 'fecha_creacion',
+                    'fecha_inicio', 'fecha_fin', 'latido')
+
+_lock = threading.Lock()
+_executor = None
+_hilo_latido = None
+# Ids de trabajos que se están ejecutando en este proceso o esperan en su pool
+_trabajos_locales = set()
+# Bases en las que ya se verificó la tabla jobs
+_esquemas_verificados = set()
+
+class TrabajoEnCurso(Exception):
+    """Ya hay un trabajo activo del mismo tipo en la base de datos."""
+
+    def __init__(self, trabajo):
+        self.trabajo = trabajo
+        super().__init__(f"Ya hay un trabajo '{trabajo['tipo']}' en curso (id {trabajo['id']}, {trabajo['estado']})")
+
+def _asegurar_tabla_jobs(conn):
+    """Crea la tabla jobs y su índice de unicidad si no existen (una vez por base y proceso)."""
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is not None and ruta_db in _esquemas_verificados:
+        return
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL,
+                estado TEXT NOT NULL DEFAULT 'en_cola'
+                    CHECK (estado IN ('en_cola', 'ejecutando', 'completado', 'error')),
+                descripcion TEXT,
+                progreso_actual INTEGER DEFAULT 0,
+                progreso_total INTEGER,
+                mensaje TEXT,
+                resultado TEXT,
+                error TEXT,
+                propietario TEXT,
+                fecha_creacion TEXT DEFAULT (datetime('now', 'localtime')),
+                fecha_inicio TEXT,
+                fecha_fin TEXT,
+                latido TEXT DEFAULT (datetime('now'))
+            )
+        """)
+        # Un solo trabajo activo por tipo
+        conn.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_tipo_activo
+            ON jobs (tipo) WHERE estado IN ('en_cola', 'ejecutando')
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_tipo_fecha ON jobs (tipo, id)")
+        conn.commit()
+    except sqlite3.Error as e:
+        logging.error(f"Error al crear la tabla jobs: {e}")
+        raise Exception(f"Error al crear la tabla jobs: {e}")
+    if ruta_db is not None:
+        _esquemas_verificados.add(ruta_db)
+
+def _fila_a_trabajo(fila):
+    if fila is None:
+        return None
+    trabajo = dict(zip(COLUMNAS_TRABAJO, fila))
+    if trabajo['resultado']:
+        trabajo['resultado'] = json.loads(trabajo['resultado'])
+    return trabajo
+
+def _consultar_trabajo(conn, where, parametros):
+    _asegurar_tabla_jobs(conn)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNAS_TRABAJO)} FROM jobs {where}", parametros)
+        return _fila_a_trabajo(cursor.fetchone())
+    except sqlite3.Error as e:
+        logging.error(f"Error al consultar trabajos: {e}")
+        raise Exception(f"Error al consultar trabajos: {e}")
+
+def obtener_trabajo(conn, trabajo_id):
+    """
+    Obtiene un trabajo por id.
+
+    Returns:
+        dict | None: Columnas de la tabla jobs; 'resultado' ya decodificado desde JSON
+    """
+    return _consultar_trabajo(conn, "WHERE id = ?", (trabajo_id,))
+
+def obtener_trabajo_activo(conn, tipo):
+    """Obtiene el trabajo en cola o en ejecución del tipo indicado, si lo hay."""
+    return _consultar_trabajo(conn, "WHERE tipo = ? AND estado IN ('en_cola', 'ejecutando')", (tipo,))
+
+def obtener_ultimo_trabajo(conn, tipo):
+    """Obtiene el trabajo más reciente del tipo indicado (en cualquier estado)."""
+    return _consultar_trabajo(conn, "WHERE tipo = ? ORDER BY id DESC LIMIT 1", (tipo,))
+
+def _liberar_abandonados(conn, tipo):
+    """Marca como error los trabajos activos del tipo cuyo proceso dejó de dar señales."""
+    cursor = conn.execute(f"""
+        UPDATE jobs
+        SET estado = 'error', error = 'Trabajo abandonado (el proceso que lo ejecutaba se detuvo)',
+            fecha_fin = datetime('now', 'localtime')
+        WHERE tipo = ? AND estado IN ('en_cola', 'ejecutando')
+          AND latido < datetime('now', '-{TIEMPO_ABANDONO_SEGUNDOS} seconds')
+    """, (tipo,))
+    if cursor.rowcount:
+        logging.warning(f"Se liberaron {cursor.rowcount} trabajos '{tipo}' abandonados")
+
+def reservar_trabajo(conn, tipo, descripcion=None):
+    """
+    Registra un trabajo nuevo en estado 'en_cola'.
+
+    Args:
+        conn: Conexión a la base de datos
+        tipo: Tipo de trabajo (solo uno activo por tipo)
+        descripcion: Texto descriptivo opcional
+
+    Returns:
+        int: Id del trabajo
+
+    Raises:
+        TrabajoEnCurso: Si ya hay un trabajo activo del mismo tipo
+    """
+    _asegurar_tabla_jobs(conn)
+    propietario = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        _liberar_abandonados(conn, tipo)
+        cursor = conn.execute("""
+            INSERT INTO jobs (tipo, estado, descripcion, propietario, latido)
+            VALUES (?, 'en_cola', ?, ?, datetime('now'))
+        """, (tipo, descripcion, propietario))
+        conn.commit()
+        return cursor.lastrowid
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        activo = obtener_trabajo_activo(conn, tipo)
+        if activo is None:
+            # Terminó entre el INSERT y la consulta: reintentar una vez
+            return reservar_trabajo(conn, tipo, descripcion)
+        raise TrabajoEnCurso(activo)
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al registrar trabajo: {e}")
+        raise Exception(f"Error al registrar trabajo: {e}")
+
+class ProgresoTrabajo:
+    """
+    Callback de progreso que reciben las funciones de los trabajos: progreso(actual, total, mensaje).
+    Las escrituras en la tabla se espacian INTERVALO_PROGRESO_SEGUNDOS salvo la del final.
+    """
+
+    def __init__(self, conn, trabajo_id):
+        self.conn = conn
+        self.trabajo_id = trabajo_id
+        self._ultima_escritura = 0.0
+
+    def __call__(self, actual, total=None, mensaje=None):
+        ahora = time.monotonic()
+        if ahora - self._ultima_escritura < INTERVALO_PROGRESO_SEGUNDOS and (total is None or actual < total):
+            return
+        self._ultima_escritura = ahora
+        try:
+            self.conn.execute("""
+                UPDATE jobs
+                SET progreso_actual = ?, progreso_total = COALESCE(?, progreso_total),
+                    mensaje = COALESCE(?, mensaje), latido = datetime('now')
+                WHERE id = ?
+            """, (actual, total, mensaje, self.trabajo_id))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            # El progreso es informativo: no debe interrumpir el trabajo
+            logging.warning(f"No se pudo registrar el progreso del trabajo {self.trabajo_id}: {e}")
+
+def ejecutar_trabajo(trabajo_id, funcion):
+    """
+    Ejecuta un trabajo reservado en el hilo actual y registra su resultado.
+
+    Args:
+        trabajo_id: Id devuelto por reservar_trabajo()
+        funcion: Callable funcion(conn, progreso) que devuelve un resultado serializable a JSON
+
+    Returns:
+        El resultado de funcion (None si falló)
+    """
+    # También los trabajos ejecutados fuera del pool (planificador, cron) necesitan latido
+    _asegurar_latido()
+    conn = crear_conexion()
+    _trabajos_locales.add(trabajo_id)
+    try:
+        conn.execute("""
+            UPDATE jobs SET estado = 'ejecutando', fecha_inicio = datetime('now', 'localtime'),
+                            latido = datetime('now')
+            WHERE id = ?
+        """, (trabajo_id,))
+        conn.commit()
+        try:
+            resultado = funcion(conn, ProgresoTrabajo(conn, trabajo_id))
+        except Exception as e:
+            logging.error(f"Error en el trabajo {trabajo_id}: {e}", exc_info=True)
+            conn.rollback()
+            conn.execute("""
+                UPDATE jobs SET estado = 'error', error = ?, fecha_fin = datetime('now', 'localtime')
+                WHERE id = ?
+            """, (str(e), trabajo_id))
+            conn.commit()
+            return None
+        conn.execute("""
+            UPDATE jobs SET estado = 'completado', resultado = ?, fecha_fin = datetime('now', 'localtime'),
+                            progreso_actual = COALESCE(progreso_total, progreso_actual)
+            WHERE id = ?
+        """, (json.dumps(resultado, default=str, ensure_ascii=False), trabajo_id))
+        conn.commit()
+        return resultado
+    finally:
+        _trabajos_locales.discard(trabajo_id)
+        conn.close()
+
+def _actualizar_latidos():
+    """Actualiza el latido de los trabajos de este proceso (en ejecución o esperando en el pool)."""
+    ids = list(_trabajos_locales)
+    if not ids:
+        return
+    try:
+        conn = crear_conexion()
+        try:
+            conn.execute(f"UPDATE jobs SET latido = datetime('now') WHERE id IN ({','.join('?' for _ in ids)})", ids)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logging.warning(f"No se pudo actualizar el latido de los trabajos: {e}")
+
+def _latido():
+    """Actualiza periódicamente el latido de los trabajos que corren en este proceso."""
+    while True:
+        time.sleep(INTERVALO_LATIDO_SEGUNDOS)
+        _actualizar_latidos()
+
+def _marcar_error(trabajo_id, error):
+    """Deja en error un trabajo activo que falló fuera de su función (p. ej. al arrancar)."""
+    try:
+        conn = crear_conexion()
+        try:
+            conn.execute("""
+                UPDATE jobs SET estado = 'error', error = ?, fecha_fin = datetime('now', 'localtime')
+                WHERE id = ? AND estado IN ('en_cola', 'ejecutando')
+            """, (error, trabajo_id))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logging.warning(f"No se pudo marcar el trabajo {trabajo_id} con error: {e}")
+
+def _al_terminar(trabajo_id):
+    """Callback del Future del pool: registra los errores que ejecutar_trabajo() no capturó."""
+    def callback(futuro):
+        if futuro.cancelled() or futuro.exception() is None:
+            return
+        error = futuro.exception()
+        logging.error(f"El trabajo {trabajo_id} falló antes de terminar: {error}", exc_info=error)
+        _trabajos_locales.discard(trabajo_id)
+        _marcar_error(trabajo_id, str(error))
+    return callback
+
+def _asegurar_latido():
+    global _hilo_latido
+    with _lock:
+        if _hilo_latido is None:
+            _hilo_latido = threading.Thread(target=_latido, name='latido-trabajos', daemon=True)
+            _hilo_latido.start()
+
+def _obtener_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_TRABAJOS_SIMULTANEOS, thread_name_prefix='trabajo')
+        return _executor
+
+def encolar_trabajo(tipo, funcion, descripcion=None):
+    """
+    Registra un trabajo y lo ejecuta en segundo plano.
+
+    Args:
+        tipo: Tipo de trabajo (solo uno activo por tipo y base de datos)
+        funcion: Callable funcion(conn, progreso) que recibe una conexión propia del hilo
+        descripcion: Texto descriptivo opcional
+
+    Returns:
+        int: Id del trabajo, para consultar su estado con obtener_trabajo()
+
+    Raises:
+        TrabajoEnCurso: Si ya hay un trabajo activo del mismo tipo
+    """
+    conn = crear_conexion()
+    try:
+        trabajo_id = reservar_trabajo(conn, tipo, descripcion)
+    finally:
+        conn.close()
+    # Latido desde ahora: si espera en el pool detrás de otros trabajos no debe darse por abandonado
+    _asegurar_latido()
+    _trabajos_locales.add(trabajo_id)
+    try:
+        futuro = _obtener_executor().submit(ejecutar_trabajo, trabajo_id, funcion)
+    except RuntimeError as e:
+        _trabajos_locales.discard(trabajo_id)
+        _marcar_error(trabajo_id, str(e))
+        raise
+    futuro.add_done_callback(_al_terminar(trabajo_id))
+    logging.info(f"Trabajo '{tipo}' encolado (id {trabajo_id})")
+    return trabajo_id
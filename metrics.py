@@ -0,0 +1,164 @@
+"""
+Métricas Prometheus del pipeline (carga, inserción, informes, envío de emails y base de datos).
+
+Las métricas se exponen por HTTP en un puerto local mediante iniciar_servidor_metricas(),
+que se llama desde la app Streamlit y desde las ejecuciones por línea de comandos.
+El puerto se configura con la variable de entorno METRICS_PORT (0 desactiva el servidor).
+Si prometheus_client no está instalado, todas las métricas son no-op.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from prometheus_client import REGISTRY, Counter, Gauge, Histogram, start_http_server
+    PROMETHEUS_DISPONIBLE = True
+except ImportError:
+    PROMETHEUS_DISPONIBLE = False
+
+PUERTO_METRICAS_POR_DEFECTO = 9464
+HOST_METRICAS = '127.0.0.1'
+
+class _MetricaNula:
+    """Sustituto sin efecto cuando prometheus_client no está disponible."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    def set(self, *args, **kwargs):
+        pass
+
+    def observe(self, *args, **kwargs):
+        pass
+
+def _metrica(tipo, nombre, descripcion, **kwargs):
+    """Crea una métrica del tipo indicado ('counter', 'gauge' o 'histogram')."""
+    if not PROMETHEUS_DISPONIBLE:
+        return _MetricaNula()
+    clase = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}[tipo]
+    try:
+        return clase(nombre, descripcion, **kwargs)
+    except ValueError:
+        # Ya registrada (recarga del módulo, p. ej. por el watcher de Streamlit)
+        return REGISTRY._names_to_collectors[nombre]
+
+_BUCKETS_FILAS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+_BUCKETS_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Carga de boletines
+FILAS_EXTRAIDAS = _metrica(
+    'histogram', 'boletines_filas_extraidas',
+    'Filas extraídas por archivo subido', buckets=_BUCKETS_FILAS)
+INSERCION_SEGUNDOS = _metrica(
+    'histogram', 'boletines_insercion_segundos',
+    'Duración de insertar_datos')
+INSERCION_REGISTROS = _metrica(
+    'counter', 'boletines_insercion_registros_total',
+    'Registros procesados por insertar_datos', labelnames=['resultado'])
+INSERCION_RATIO_DUPLICADOS = _metrica(
+    'gauge', 'boletines_insercion_ratio_duplicados',
+    'Proporción de registros omitidos por duplicados en la última inserción')
+
+# Informes PDF
+INFORMES_GENERADOS = _metrica(
+    'counter', 'informes_pdf_total',
+    'Informes PDF generados', labelnames=['resultado'])
+INFORMES_SEGUNDOS = _metrica(
+    'histogram', 'informes_pdf_segundos',
+    'Duración de la generación de cada informe PDF')
+
+# Envío de emails
+SMTP_CONEXION_SEGUNDOS = _metrica(
+    'histogram', 'smtp_conexion_segundos',
+    'Duración de la conexión y autenticación SMTP')
+SMTP_ENVIO_SEGUNDOS = _metrica(
+    'histogram', 'smtp_envio_segundos',
+    'Duración del envío de un mensaje por SMTP')
+SMTP_FALLOS = _metrica(
+    'counter', 'smtp_fallos_total',
+    'Fallos de envío de email', labelnames=['etapa'])
+
+# Base de datos
+DB_CONSULTA_SEGUNDOS = _metrica(
+    'histogram', 'db_consulta_segundos',
+    'Duración de las sentencias SQL', labelnames=['operacion'], buckets=_BUCKETS_DB)
+
+def _operacion_sql(sql):
+    """Primera palabra de la sentencia (SELECT, INSERT, ...) para etiquetar sin alta cardinalidad."""
+    palabras = sql.lstrip().split(None, 1)
+    operacion = palabras[0].upper() if palabras else ''
+    if operacion in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'PRAGMA'):
+        return operacion
+    return 'OTRA'
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que registra la duración de execute/executemany en DB_CONSULTA_SEGUNDOS."""
+
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            DB_CONSULTA_SEGUNDOS.labels(_operacion_sql(sql)).observe(time.perf_counter() - inicio)
+
+    def executemany(self, sql, parametros):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            DB_CONSULTA_SEGUNDOS.labels(_operacion_sql(sql)).observe(time.perf_counter() - inicio)
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """Conexión cuyos cursores (y conn.execute) se miden con CursorInstrumentado."""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+_servidor_lock = threading.Lock()
+_servidor_iniciado = False
+
+def iniciar_servidor_metricas(puerto=None):
+    """
+    Inicia (una sola vez por proceso) el servidor HTTP de métricas en HOST_METRICAS.
+
+    Args:
+        puerto: Puerto a usar. Por defecto METRICS_PORT o PUERTO_METRICAS_POR_DEFECTO
+
+    Returns:
+        bool: True si el servidor está activo en este proceso
+    """
+    global _servidor_iniciado
+    if not PROMETHEUS_DISPONIBLE:
+        return False
+
+    if puerto is None:
+        try:
+            puerto = int(os.getenv('METRICS_PORT', PUERTO_METRICAS_POR_DEFECTO))
+        except ValueError:
+            logging.warning("METRICS_PORT no es un número válido; métricas desactivadas")
+            return False
+    if puerto <= 0:
+        return False
+
+    with _servidor_lock:
+        if _servidor_iniciado:
+            return True
+        try:
+            start_http_server(puerto, addr=HOST_METRICAS)
+            _servidor_iniciado = True
+            logging.info(f"Métricas disponibles en http://{HOST_METRICAS}:{puerto}/metrics")
+        except OSError as e:
+            # Puerto ocupado (por ejemplo, la app y una ejecución programada a la vez)
+            logging.warning(f"No se pudo iniciar el servidor de métricas en el puerto {puerto}: {e}")
+    return _servidor_iniciado
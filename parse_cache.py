@@ -0,0 +1,166 @@
+"""
+Caché en disco de boletines ya leídos, por sha256 del contenido del XLSX.
+
+- Volver a subir el mismo archivo no repite pd.read_excel + extraer_datos_agrupados: los
+  registros se guardan en <data>/cache_boletines/<sha256>.v<VERSION_CACHE>.parquet (una fila por registro,
+  columnas records.CAMPOS_LOTE, todas texto, comprimido con zstd). La tabla se arma y se lee
+  por columnas (records.LoteBoletines), sin pasar por un objeto por registro.
+- Los valores se normalizan a texto (o None) tanto al leer el XLSX como al servir desde la
+  caché, para que una lectura y un acierto den exactamente los mismos datos. Las columnas de
+  boletines son TEXT, así que lo que termina en la base no cambia.
+- VERSION_CACHE forma parte del nombre: al cambiar el extractor o CAMPOS_LOTE se incrementa
+  y las entradas anteriores dejan de usarse (se descartan como las menos recientes).
+- Si pyarrow no está instalado la caché se desactiva y se lee siempre el XLSX.
+- Se conservan los MAX_ARCHIVOS_CACHE archivos usados más recientemente.
+"""
+import hashlib
+import io
+import logging
+import os
+
+from paths import get_cache_boletines_dir
+from records import CAMPOS_LOTE, LoteBoletines
+
+MAX_ARCHIVOS_CACHE = 200
+# Versión del extractor y del esquema de la caché; incrementarla invalida lo guardado
+VERSION_CACHE = 1
+
+def hash_contenido(contenido):
+    """Devuelve el sha256 (hexadecimal) de un contenido en bytes."""
+    return hashlib.sha256(contenido).hexdigest()
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        return None
+
+def _a_texto(valor):
+    """Normaliza un valor de celda: None/NaN/NaT quedan en None, el resto pasa a str."""
+    # NaN y NaT son los únicos valores distintos de sí mismos
+    if valor is None or valor != valor:
+        return None
+    return str(valor)
+
+def normalizar(datos_agrupados):
+    """
+    Convierte los registros extraídos a texto.
+
+    Returns:
+        dict: {titular: [Boletin con valores str o None]}
+    """
+    return {
+        titular: [registro._make(map(_a_texto, registro)) for registro in registros]
+        for titular, registros in datos_agrupados.items()
+    }
+
+def _ruta(sha256, directorio=None):
+    return os.path.join(directorio or get_cache_boletines_dir(), f"{sha256}.v{VERSION_CACHE}.parquet")
+
+def obtener(sha256, directorio=None):
+    """
+    Devuelve los registros cacheados de un archivo.
+
+    Returns:
+        LoteBoletines | None: Los registros en el orden original, o None si no está en caché
+    """
+    pa = _pyarrow()
+    ruta = _ruta(sha256, directorio)
+    if pa is None or not os.path.exists(ruta):
+        return None
+    try:
+        columnas = pa.parquet.read_table(ruta, columns=list(CAMPOS_LOTE)).to_pydict()
+    except Exception as e:
+        logging.warning(f"Caché de boletín ilegible, se descarta: {ruta}: {e}")
+        os.remove(ruta)
+        return None
+    # Marca de uso para el descarte de los menos recientes
+    os.utime(ruta)
+    return LoteBoletines(columnas)
+
+def guardar(sha256, lote, directorio=None):
+    """
+    Guarda los registros (ya normalizados) de un archivo en la caché.
+
+    Args:
+        sha256: Hash del contenido del XLSX
+        lote: LoteBoletines con los registros ya normalizados (ver normalizar())
+        directorio: Directorio de la caché (por defecto get_cache_boletines_dir())
+    """
+    pa = _pyarrow()
+    if pa is None:
+        return
+    tabla = pa.table({campo: pa.array(lote.columnas[campo], type=pa.string()) for campo in CAMPOS_LOTE})
+    ruta = _ruta(sha256, directorio)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        pa.parquet.write_table(tabla, temporal, compression='zstd')
+        os.replace(temporal, ruta)
+    except Exception as e:
+        # La caché es una optimización: si no se puede escribir se sigue sin ella
+        logging.warning(f"No se pudo guardar la caché del boletín {sha256}: {e}")
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    _descartar_antiguos(directorio)
+
+def _descartar_antiguos(directorio=None):
+    directorio = directorio or get_cache_boletines_dir()
+    archivos = [entrada for entrada in os.scandir(directorio) if entrada.name.endswith('.parquet')]
+    if len(archivos) <= MAX_ARCHIVOS_CACHE:
+        return
+    archivos.sort(key=lambda entrada: entrada.stat().st_mtime)
+    for entrada in archivos[:len(archivos) - MAX_ARCHIVOS_CACHE]:
+        try:
+            os.remove(entrada.path)
+        except OSError:
+            pass
+
+def leer_lote_cacheado(origen, sha256=None, directorio=None, escribir_cache=True):
+    """
+    Lee un XLSX de boletín usando la caché por contenido.
+
+    Args:
+        origen: Ruta del archivo o su contenido en bytes
+        sha256: Hash del contenido, si ya se calculó
+        directorio: Directorio de la caché
+        escribir_cache: Si es False, un archivo que no está en caché se lee sin guardarlo
+                        (ni descartar otros); los aciertos se sirven igual
+
+    Returns:
+        tuple: (sha256, LoteBoletines con los registros normalizados)
+    """
+    if sha256 is not None:
+        lote = obtener(sha256, directorio)
+        if lote is not None:
+            return sha256, lote
+    if isinstance(origen, (bytes, bytearray)):
+        contenido = bytes(origen)
+    else:
+        with open(origen, 'rb') as f:
+            contenido = f.read()
+    if sha256 is None:
+        sha256 = hash_contenido(contenido)
+        lote = obtener(sha256, directorio)
+        if lote is not None:
+            return sha256, lote
+
+    import pandas as pd
+    from extractor import extraer_datos_agrupados
+
+    lote = LoteBoletines.desde_agrupados(normalizar(extraer_datos_agrupados(pd.read_excel(io.BytesIO(contenido)))))
+    if len(lote) and escribir_cache:
+        guardar(sha256, lote, directorio)
+    return sha256, lote
+
+def leer_boletin_cacheado(origen, sha256=None, directorio=None, escribir_cache=True):
+    """
+    Como leer_lote_cacheado, pero con los registros agrupados por titular.
+
+    Returns:
+        tuple: (sha256, {titular: [Boletin normalizados]})
+    """
+    sha256, lote = leer_lote_cacheado(origen, sha256, directorio, escribir_cache)
+    return sha256, lote.agrupados()
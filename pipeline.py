@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# pipeline.py
+
+"""
+Procesamiento de fin de mes sin interfaz: importación de boletines, generación de informes,
+envío de emails y verificación de titulares sin reportes, con las mismas funciones que usa
+la aplicación.
+
+Uso:
+    python pipeline.py ingest boletin1.xlsx boletin2.xlsx generate send verify
+    python pipeline.py --dry-run --json generate send
+
+Las etapas se ejecutan en el orden indicado y la primera que falla detiene las siguientes
+(código de salida 1). Cada etapa corre como trabajo de jobs.py del mismo tipo que en la
+interfaz, así que se ve su progreso desde la aplicación y no se solapa con un lanzamiento
+manual. Con --dry-run nada se escribe: ingest solo lee los archivos (sin guardarlos en la
+caché de lectura de parse_cache), generate cuenta los grupos listos, send y verify escriben los mensajes como .eml sin enviarlos.
+--workers indica cuántos archivos XLSX se leen en paralelo (procesos).
+--json imprime en stdout el resumen con la duración y las filas de cada etapa.
+Mientras corre expone las métricas de metrics.py (puerto en METRICS_PORT).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import jobs
+from database import crear_conexion, crear_tabla
+
+ETAPAS = ('ingest', 'generate', 'send', 'verify')
+# Tipo de trabajo de cada etapa (los mismos que usan las páginas)
+TIPOS_TRABAJO = {
+    'ingest': 'importar_boletines',
+    'generate': 'generar_informes',
+    'send': 'envio_emails',
+    'verify': 'verificacion_mensual',
+}
+DESCRIPCIONES = {
+    'ingest': "Importación de boletines (pipeline)",
+    'generate': "Generación de informes (pipeline)",
+    'send': "Envío de emails (pipeline)",
+    'verify': "Verificación de titulares sin reportes (pipeline)",
+}
+
+logger = logging.getLogger('pipeline')
+
+def leer_boletin(ruta, sha256=None):
+    """
+    Lee un XLSX de boletín y extrae sus registros agrupados por titular (con la caché por
+    contenido de parse_cache, así un archivo repetido no se vuelve a leer).
+
+    Args:
+        ruta: Ruta del XLSX
+        sha256: Hash del contenido, si ya se calculó
+
+    Returns:
+        dict: {titular: [Boletin]}
+    """
+    return _leer_con_hash(ruta, sha256)[1].agrupados()
+
+def _leer_con_hash(ruta, sha256=None, escribir_cache=True):
+    # Devuelve el lote por columnas: es lo que viaja de vuelta desde los procesos de lectura
+    from parse_cache import leer_lote_cacheado
+
+    return leer_lote_cacheado(ruta, sha256, escribir_cache=escribir_cache)
+
+def leer_boletines_por_archivo(archivos, workers=1, escribir_cache=True):
+    """
+    Lee varios XLSX, en paralelo si workers > 1.
+
+    Args:
+        archivos: Rutas de los XLSX
+        workers: Cantidad de procesos para la lectura
+        escribir_cache: Si es False, los archivos leídos no se guardan en la caché de lectura
+
+    Returns:
+        list[tuple]: (ruta, sha256 del contenido, {titular: [Boletin]}) en el orden de archivos
+    """
+    if workers > 1 and len(archivos) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(archivos))) as executor:
+            leidos = list(executor.map(partial(_leer_con_hash, escribir_cache=escribir_cache), archivos))
+    else:
+        leidos = [_leer_con_hash(archivo, escribir_cache=escribir_cache) for archivo in archivos]
+    return [(archivo, sha256, lote.agrupados()) for archivo, (sha256, lote) in zip(archivos, leidos)]
+
+def leer_boletines(archivos, workers=1):
+    """
+    Lee varios XLSX (en paralelo si workers > 1) y combina sus registros por titular.
+
+    Returns:
+        dict: {titular: [Boletin]} con los registros de todos los archivos
+    """
+    combinados = defaultdict(list)
+    for _, _, datos in leer_boletines_por_archivo(archivos, workers):
+        for titular, registros in datos.items():
+            combinados[titular].extend(registros)
+    return dict(combinados)
+
+def _etapa_ingest(opciones):
+    def funcion(conn, progreso):
+        from ingestion import importar_boletin
+
+        leidos = leer_boletines_por_archivo(opciones.archivos, opciones.workers,
+                                            escribir_cache=not opciones.dry_run)
+        vacios = [os.path.basename(ruta) for ruta, _, datos in leidos if not datos]
+        if vacios:
+            return {'success': False, 'mensaje': f"No se pudieron extraer datos válidos de: {', '.join(vacios)}"}
+        registros = sum(len(r) for _, _, datos in leidos for r in datos.values())
+        if opciones.dry_run:
+            titulares = len({titular for _, _, datos in leidos for titular in datos})
+            return {'success': True, 'mensaje': f"{registros} registros de {titulares} titulares leídos",
+                    'estadisticas': {'total_procesados': registros, 'titulares': titulares}}
+
+        # Un archivo por vez: el registro de importaciones evita reinsertar uno ya cargado
+        estadisticas = {'total_procesados': 0, 'insertados': 0, 'omitidos': 0, 'ya_importados': 0}
+        for indice, (ruta, sha256, datos) in enumerate(leidos):
+            if progreso:
+                progreso(indice, len(leidos), os.path.basename(ruta))
+            resultado = importar_boletin(conn, datos, sha256, os.path.basename(ruta), ruta, os.path.getsize(ruta))
+            if not resultado.get('success'):
+                return resultado
+            for clave in ('total_procesados', 'insertados', 'omitidos'):
+                estadisticas[clave] += resultado['estadisticas'][clave]
+            estadisticas['ya_importados'] += bool(resultado.get('ya_importado'))
+        return {'success': True,
+                'mensaje': (f"Importación completada: {estadisticas['insertados']} registros nuevos, "
+                            f"{estadisticas['omitidos']} omitidos"),
+                'estadisticas': estadisticas}
+
+    def resumen(resultado):
+        return resultado.get('success', False), resultado.get('estadisticas', {}).get('total_procesados', 0)
+
+    return funcion, resumen
+
+def _etapa_generate(opciones):
+    def funcion(conn, progreso):
+        if opciones.dry_run:
+            registros, grupos = conn.execute("""
+                SELECT COUNT(*), COUNT(DISTINCT titular || '|' || importancia) FROM boletines
+                WHERE reporte_generado = 0 AND importancia != 'Pendiente'
+            """).fetchone()
+            return {'success': True, 'message': 'dry_run', 'registros_procesados': registros,
+                    'total_titulares': grupos, 'reportes_generados': 0}
+        from report_generator import generar_informe_pdf
+        return generar_informe_pdf(conn, progreso=progreso)
+
+    def resumen(resultado):
+        return resultado.get('message') != 'error', resultado.get('registros_procesados', 0)
+
+    return funcion, resumen
+
+def _etapa_send(opciones):
+    def funcion(conn, progreso):
+        from email_sender import procesar_envio_emails
+        return procesar_envio_emails(conn, solo_renderizar=opciones.dry_run,
+                                     directorio_render=opciones.directorio_render, progreso=progreso)
+
+    def resumen(resultado):
+        if resultado.get('render'):
+            return not resultado['render']['errores'], resultado['render']['renderizados']
+        ok = not resultado.get('bloqueado_por_pendientes') and not resultado.get('fallidos')
+        return ok, sum(envio['cantidad_boletines'] for envio in resultado.get('exitosos', []))
+
+    return funcion, resumen
+
+def _etapa_verify(opciones):
+    def funcion(conn, progreso):
+        from verificar_titulares_sin_reportes import verificar_titulares_sin_reportes
+        return verificar_titulares_sin_reportes(conn, solo_renderizar=opciones.dry_run,
+                                                directorio_render=opciones.directorio_render,
+                                                progreso=progreso)
+
+    def resumen(resultado):
+        return resultado.get('estado') == 'completado', resultado.get('titulares_con_marcas_sin_reportes', 0)
+
+    return funcion, resumen
+
+_CONSTRUCTORES = {
+    'ingest': _etapa_ingest,
+    'generate': _etapa_generate,
+    'send': _etapa_send,
+    'verify': _etapa_verify,
+}
+
+def ejecutar_etapa(etapa, opciones):
+    """
+    Ejecuta una etapa y mide su duración.
+
+    Args:
+        etapa: Nombre de la etapa (ver ETAPAS)
+        opciones: Namespace con archivos, workers, dry_run y directorio_render
+
+    Returns:
+        dict: {'etapa', 'ok', 'segundos', 'filas', 'trabajo_id', 'resultado', 'error'}
+    """
+    funcion, resumen = _CONSTRUCTORES[etapa](opciones)
+    salida = {'etapa': etapa, 'ok': False, 'segundos': 0.0, 'filas': 0,
+              'trabajo_id': None, 'resultado': None, 'error': None}
+    inicio = time.perf_counter()
+    conn = crear_conexion()
+    try:
+        if opciones.dry_run:
+            resultado = funcion(conn, None)
+        else:
+            trabajo_id = jobs.reservar_trabajo(conn, TIPOS_TRABAJO[etapa], DESCRIPCIONES[etapa])
+            salida['trabajo_id'] = trabajo_id
+            jobs.ejecutar_trabajo(trabajo_id, funcion)
+            trabajo = jobs.obtener_trabajo(conn, trabajo_id)
+            if trabajo['estado'] == 'error':
+                raise Exception(trabajo['error'])
+            resultado = trabajo['resultado']
+        salida['ok'], salida['filas'] = resumen(resultado or {})
+        salida['resultado'] = resultado
+    except Exception as e:
+        logger.error(f"Error en la etapa {etapa}: {e}")
+        salida['error'] = str(e)
+    finally:
+        conn.close()
+        salida['segundos'] = round(time.perf_counter() - inicio, 3)
+    return salida
+
+def ejecutar_pipeline(etapas, opciones):
+    """
+    Ejecuta las etapas en orden, deteniéndose en la primera que falla. Sin dry_run crea
+    antes las tablas que falten.
+
+    Returns:
+        dict: {'ok', 'segundos', 'dry_run', 'etapas': [resultado de ejecutar_etapa()]}
+    """
+    inicio = time.perf_counter()
+    # Con dry_run tampoco se crea el esquema: se trabaja con la base tal como está
+    if not opciones.dry_run:
+        conn = crear_conexion()
+        try:
+            crear_tabla(conn)
+        finally:
+            conn.close()
+    resultados = []
+    for etapa in etapas:
+        logger.info(f"Etapa {etapa}{' (dry-run)' if opciones.dry_run else ''}")
+        resultado = ejecutar_etapa(etapa, opciones)
+        resultados.append(resultado)
+        logger.info(f"Etapa {etapa}: {'ok' if resultado['ok'] else 'ERROR'} en {resultado['segundos']} s, "
+                    f"{resultado['filas']} filas")
+        if not resultado['ok']:
+            break
+    return {
+        'ok': len(resultados) == len(etapas) and all(r['ok'] for r in resultados),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'dry_run': opciones.dry_run,
+        'etapas': resultados,
+    }
+
+def _parsear_argumentos(argv):
+    parser = argparse.ArgumentParser(
+        description="Procesamiento de boletines sin interfaz",
+        usage="%(prog)s [opciones] [ingest ARCHIVO.xlsx ...] [generate] [send] [verify]")
+    parser.add_argument('etapas', nargs='+', metavar='ETAPA',
+                        help="Etapas en orden; 'ingest' va seguida de los archivos XLSX")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Procesos para leer los XLSX en paralelo (por defecto, uno por CPU)")
+    parser.add_argument('--dry-run', action='store_true', help="No escribir en la base ni enviar emails")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resumen como JSON")
+    parser.add_argument('--directorio-render', default=None,
+                        help="Directorio de los .eml de --dry-run (send y verify)")
+    opciones = parser.parse_args(argv)
+
+    etapas, archivos = [], []
+    for token in opciones.etapas:
+        if token in ETAPAS:
+            if token in etapas:
+                parser.error(f"La etapa '{token}' está repetida")
+            etapas.append(token)
+        elif etapas and etapas[-1] == 'ingest':
+            archivos.append(token)
+        else:
+            parser.error(f"Etapa desconocida: '{token}' (válidas: {', '.join(ETAPAS)})")
+    if 'ingest' in etapas and not archivos:
+        parser.error("'ingest' necesita al menos un archivo XLSX")
+    faltantes = [archivo for archivo in archivos if not os.path.isfile(archivo)]
+    if faltantes:
+        parser.error(f"No existe: {', '.join(faltantes)}")
+    if opciones.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    opciones.archivos = archivos
+    return etapas, opciones
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    etapas, opciones = _parsear_argumentos(argv)
+    # Los logs van a stderr para que --json deje stdout limpio
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+
+    # Exponer métricas mientras dure la ejecución (puerto en METRICS_PORT)
+    from metrics import iniciar_servidor_metricas
+    iniciar_servidor_metricas()
+
+    resumen = ejecutar_pipeline(etapas, opciones)
+    if opciones.json:
+        print(json.dumps(resumen, default=str, ensure_ascii=False, indent=2))
+    else:
+        for etapa in resumen['etapas']:
+            estado = 'ok' if etapa['ok'] else f"ERROR {etapa['error'] or ''}".strip()
+            print(f"{etapa['etapa']:<10} {etapa['segundos']:>9.3f} s {etapa['filas']:>8} filas  {estado}")
+        print(f"{'total':<10} {resumen['segundos']:>9.3f} s")
+    return 0 if resumen['ok'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
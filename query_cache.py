@@ -0,0 +1,119 @@
+"""
+Caché de resultados de consultas compartida por todo el proceso.
+
+Las entradas se guardan por (base de datos, clave de la consulta) en un LRU acotado y se
+validan contra contadores de versión por tabla:
+
+- Las funciones de escritura de database.py llaman a invalidar_tablas() después del commit.
+- Las escrituras hechas por fuera de esas funciones (otros módulos, otros procesos como
+  ejecucion_programada.py) se detectan con PRAGMA data_version sobre una conexión
+  vigía propia, y en ese caso se invalidan todas las tablas de esa base.
+
+Solo se cachean consultas sobre conexiones creadas con database.crear_conexion()
+(que llevan el atributo ruta_db); con cualquier otra conexión se consulta directamente.
+Los resultados se comparten entre sesiones: quien los reciba no debe modificarlos.
+"""
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+MAX_ENTRADAS_CACHE = 64
+
+_lock = threading.RLock()
+_entradas = OrderedDict()
+# {ruta_db: {tabla: version}}
+_versiones = {}
+# {ruta_db: epoch} - se incrementa ante escrituras no notificadas
+_epocas = {}
+# {ruta_db: (conexion_vigia, ultimo_data_version)}
+_vigias = {}
+
+def _data_version(ruta_db):
+    """Lee PRAGMA data_version en la conexión vigía de la base (creándola si hace falta)."""
+    vigia = _vigias.get(ruta_db)
+    if vigia is None:
+        conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        vigia = [conexion, None]
+        _vigias[ruta_db] = vigia
+    return vigia, vigia[0].execute("PRAGMA data_version").fetchone()[0]
+
+def _sincronizar_escrituras_externas(ruta_db):
+    """Invalida toda la base si hubo commits que no pasaron por invalidar_tablas()."""
+    try:
+        vigia, version = _data_version(ruta_db)
+    except sqlite3.Error as e:
+        logging.warning(f"No se pudo leer data_version de {ruta_db}: {e}")
+        _epocas[ruta_db] = _epocas.get(ruta_db, 0) + 1
+        return
+    if vigia[1] is not None and vigia[1] != version:
+        _epocas[ruta_db] = _epocas.get(ruta_db, 0) + 1
+    vigia[1] = version
+
+def _firma(ruta_db, tablas):
+    versiones = _versiones.get(ruta_db, {})
+    return (_epocas.get(ruta_db, 0),) + tuple(versiones.get(tabla, 0) for tabla in tablas)
+
+def invalidar_tablas(conn, *tablas):
+    """
+    Marca como modificadas las tablas indicadas para la base de la conexión.
+
+    Debe llamarse después del commit de la escritura.
+    """
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is None:
+        return
+    with _lock:
+        versiones = _versiones.setdefault(ruta_db, {})
+        for tabla in tablas:
+            versiones[tabla] = versiones.get(tabla, 0) + 1
+        # La escritura propia ya está contabilizada: no debe disparar la invalidación global
+        vigia = _vigias.get(ruta_db)
+        if vigia is not None:
+            try:
+                vigia[1] = vigia[0].execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                vigia[1] = None
+
+def consulta_cacheada(conn, tablas, clave, cargar):
+    """
+    Devuelve el resultado cacheado de una consulta o lo calcula con cargar(conn).
+
+    Args:
+        conn: Conexión a la base de datos
+        tablas: Tablas de las que depende el resultado
+        clave: Clave hashable que identifica la consulta y sus parámetros
+        cargar: Función que recibe la conexión y devuelve el resultado
+
+    Returns:
+        El resultado de la consulta (compartido, no modificar)
+    """
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is None:
+        return cargar(conn)
+
+    clave_completa = (ruta_db, clave)
+    with _lock:
+        _sincronizar_escrituras_externas(ruta_db)
+        firma = _firma(ruta_db, tablas)
+        entrada = _entradas.get(clave_completa)
+        if entrada is not None and entrada[0] == firma:
+            _entradas.move_to_end(clave_completa)
+            return entrada[1]
+
+    resultado = cargar(conn)
+
+    with _lock:
+        # Guardar solo si nada cambió mientras se consultaba
+        _sincronizar_escrituras_externas(ruta_db)
+        if _firma(ruta_db, tablas) == firma:
+            _entradas[clave_completa] = (firma, resultado)
+            _entradas.move_to_end(clave_completa)
+            while len(_entradas) > MAX_ENTRADAS_CACHE:
+                _entradas.popitem(last=False)
+    return resultado
+
+def limpiar_cache():
+    """Vacía la caché (las versiones de tablas se conservan)."""
+    with _lock:
+        _entradas.clear()
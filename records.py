@@ -0,0 +1,159 @@
+"""
+Registros tipados de boletines que recorren el pipeline (extracción → caché → inserción →
+informes → envío).
+
+- Boletin: un registro de boletín como NamedTuple (tupla compacta, sin dict por registro).
+  extractor.extraer_datos_agrupados los produce, insertar_datos los inserta tal cual y
+  report_generator los recibe directo del cursor.
+- BoletinEnvio: el registro que arma la consulta de envíos (boletín + informe + cliente).
+- LoteBoletines: los registros de un archivo en columnas (una lista por campo); es el formato
+  de la caché Parquet y de la lectura desde otros procesos.
+- fabrica_de_filas(tipo): row_factory de sqlite3 que devuelve registros del tipo pedido, así
+  no hace falta indexar filas por posición (fila[11], row[15], ...).
+"""
+from itertools import starmap
+from typing import NamedTuple, Optional
+
+# Campos que vienen del XLSX (sin titular) y su nombre para mostrar
+ETIQUETAS_CAMPOS = {
+    'numero_boletin': "Número de Boletín",
+    'fecha_boletin': "Fecha de Boletín",
+    'numero_orden': "Número de Orden",
+    'solicitante': "Solicitante",
+    'agente': "Agente",
+    'numero_expediente': "Expediente",
+    'clase': "Clase",
+    'marca_custodia': "Marca en Custodia",
+    'marca_publicada': "Marca Publicada",
+    'clases_acta': "Clases/Acta",
+}
+
+class Boletin(NamedTuple):
+    """Registro de un boletín. Los nombres coinciden con las columnas de la tabla boletines."""
+    titular: Optional[str]
+    numero_boletin: Optional[str]
+    fecha_boletin: Optional[str]
+    numero_orden: Optional[str]
+    solicitante: Optional[str]
+    agente: Optional[str]
+    numero_expediente: Optional[str]
+    clase: Optional[str]
+    marca_custodia: Optional[str]
+    marca_publicada: Optional[str]
+    clases_acta: Optional[str]
+    importancia: Optional[str] = None
+    id: Optional[int] = None
+
+    @property
+    def boletin_texto(self):
+        """'BOLETÍN NRO. <número> DEL <fecha>' o '' si falta alguno de los dos."""
+        if self.numero_boletin and self.fecha_boletin:
+            return f"BOLETÍN NRO. {self.numero_boletin} DEL {self.fecha_boletin}"
+        return ""
+
+    @property
+    def boletin_corto(self):
+        """'Nº <número>' o '' si falta el número o la fecha."""
+        if self.numero_boletin and self.fecha_boletin:
+            return f"Nº {self.numero_boletin}"
+        return ""
+
+    def como_registro(self):
+        """Devuelve el registro como dict con los nombres para mostrar (ver ETIQUETAS_CAMPOS)."""
+        return {etiqueta: getattr(self, campo) for campo, etiqueta in ETIQUETAS_CAMPOS.items()}
+
+# Columnas que se guardan por registro en un lote: titular + campos del XLSX
+CAMPOS_LOTE = Boletin._fields[:len(ETIQUETAS_CAMPOS) + 1]
+
+class BoletinEnvio(NamedTuple):
+    """Boletín listo para enviar, con su informe y los datos de contacto del titular."""
+    id: int
+    titular: str
+    numero_boletin: Optional[str]
+    fecha_boletin: Optional[str]
+    numero_orden: Optional[str]
+    solicitante: Optional[str]
+    agente: Optional[str]
+    numero_expediente: Optional[str]
+    clase: Optional[str]
+    marca_custodia: Optional[str]
+    marca_publicada: Optional[str]
+    clases_acta: Optional[str]
+    observaciones: Optional[str]
+    nombre_reporte: Optional[str]
+    ruta_reporte: Optional[str]
+    importancia: str
+    email: Optional[str] = None
+    telefono: Optional[str] = None
+    direccion: Optional[str] = None
+    ciudad: Optional[str] = None
+    reporte_id: Optional[int] = None
+
+class LoteBoletines:
+    """
+    Registros de boletines guardados por columnas (una lista por campo de CAMPOS_LOTE).
+
+    Es la forma en que se serializan (Parquet, pickle entre procesos) sin armar un objeto por
+    registro; agrupados() devuelve la vista {titular: [Boletin]} que usa el resto del código.
+    """
+    __slots__ = ('columnas',)
+
+    def __init__(self, columnas=None):
+        self.columnas = columnas if columnas is not None else {campo: [] for campo in CAMPOS_LOTE}
+
+    @classmethod
+    def desde_agrupados(cls, datos_agrupados):
+        """
+        Args:
+            datos_agrupados: {titular: [Boletin]}
+        """
+        filas = [registro for registros in datos_agrupados.values() for registro in registros]
+        columnas = list(zip(*filas)) or [()] * len(CAMPOS_LOTE)
+        return cls({campo: list(columnas[i]) for i, campo in enumerate(CAMPOS_LOTE)})
+
+    def __len__(self):
+        return len(self.columnas['titular'])
+
+    def __eq__(self, otro):
+        return isinstance(otro, LoteBoletines) and self.columnas == otro.columnas
+
+    def filas(self):
+        """Itera los registros como Boletin."""
+        return starmap(Boletin, zip(*(self.columnas[campo] for campo in CAMPOS_LOTE)))
+
+    def agrupados(self):
+        """
+        Returns:
+            dict: {titular: [Boletin]} en el orden original
+        """
+        datos = {}
+        for registro in self.filas():
+            datos.setdefault(registro.titular, []).append(registro)
+        return datos
+
+def fabrica_de_filas(tipo):
+    """
+    Crea una row_factory de sqlite3 que devuelve cada fila como un registro `tipo`.
+
+    Las columnas del SELECT tienen que ser, en orden, los primeros campos de `tipo` (con AS
+    donde el nombre no coincida); los campos opcionales que falten quedan en None. Los
+    nombres se verifican una vez por consulta, no por fila.
+
+    Args:
+        tipo: Clase NamedTuple (Boletin, BoletinEnvio)
+
+    Returns:
+        callable: Para asignar a cursor.row_factory o conn.row_factory
+    """
+    verificada = [None]
+
+    def fabrica(cursor, fila):
+        descripcion = cursor.description
+        if descripcion is not verificada[0]:
+            columnas = tuple(columna[0] for columna in descripcion)
+            if columnas != tipo._fields[:len(columnas)]:
+                raise ValueError(f"Las columnas {columnas} no coinciden con los campos de {tipo.__name__}")
+            verificada[0] = descripcion
+        return tipo(*fila)
+
+    return fabrica
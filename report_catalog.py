@@ -0,0 +1,437 @@
+"""
+Catálogo de informes PDF generados (tablas reportes y reportes_boletines).
+
+- Cada informe se registra al generarse (registrar_reporte) con su grupo (titular +
+  importancia), período, ruta, tamaño, sha256, fecha de modificación y los boletines que
+  incluye, así que listar y ubicar informes (por titular o por boletín) es una consulta
+  indexada y no un recorrido del directorio de informes.
+- Los informes anteriores al catálogo se incorporan una sola vez a partir de las rutas
+  guardadas en boletines (sin recorrer el directorio).
+- leer_reporte() carga el PDF solo cuando se pide la descarga y guarda los últimos servidos
+  en un LRU acotado por bytes.
+- archivar_informes() mueve los informes que superan la retención a los archivos mensuales
+  comprimidos (ver report_storage.py); siguen disponibles a través del catálogo.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from query_cache import consulta_cacheada, invalidar_tablas
+from report_storage import (DIAS_RETENCION_INFORMES, agregar_a_archivo, eliminar_informe_suelto,
+                            leer_de_archivo, nombre_miembro, ruta_archivo_mensual)
+
+# Tope de la caché de descargas (suma de tamaños de los PDF guardados)
+MAX_BYTES_CACHE_DESCARGAS = 32 * 1024 * 1024
+
+COLUMNAS_REPORTE = ('id', 'nombre_archivo', 'ruta', 'titular', 'importancia', 'clave_grupo', 'periodo',
+                    'tamano_bytes', 'sha256', 'fecha_modificacion', 'fecha_creacion', 'archivo', 'miembro')
+
+# Columnas agregadas después de la primera versión de la tabla
+_COLUMNAS_MIGRACION = {'clave_grupo': 'TEXT', 'sha256': 'TEXT', 'archivo': 'TEXT', 'miembro': 'TEXT'}
+
+_lock = threading.Lock()
+# {(ruta, fecha_modificacion): bytes}
+_descargas = OrderedDict()
+_bytes_descargas = 0
+# Bases en las que ya se verificó la tabla reportes
+_esquemas_verificados = set()
+
+def clave_grupo(titular, importancia):
+    """Clave del grupo de boletines de un informe: 'titular|importancia'."""
+    return f"{titular}|{importancia}"
+
+def _periodo_desde_nombre(nombre_archivo):
+    """Extrae el período ('Octubre-2026') del nombre '<Mes-Año> - Informe <titular> - ...pdf'."""
+    if nombre_archivo and ' - ' in nombre_archivo:
+        return nombre_archivo.split(' - ', 1)[0]
+    return None
+
+def _datos_archivo(ruta):
+    """Devuelve (tamaño, fecha de modificación ISO) del archivo, o (None, None) si no existe."""
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None, None
+    return estado.st_size, datetime.fromtimestamp(estado.st_mtime).isoformat(sep=' ', timespec='seconds')
+
+def _incorporar_reportes_existentes(conn):
+    """Registra los informes de boletines que todavía no están en el catálogo y sus vínculos."""
+    filas = conn.execute("""
+        SELECT b.ruta_reporte, MIN(b.nombre_reporte), MIN(b.titular), MIN(b.importancia)
+        FROM boletines b
+        WHERE b.ruta_reporte IS NOT NULL AND b.ruta_reporte != ''
+          AND NOT EXISTS (SELECT 1 FROM reportes r WHERE r.ruta = b.ruta_reporte)
+        GROUP BY b.ruta_reporte
+    """).fetchall()
+    registros = []
+    for ruta, nombre, titular, importancia in filas:
+        tamano, fecha_modificacion = _datos_archivo(ruta)
+        if tamano is None:
+            continue
+        nombre = nombre or os.path.basename(ruta)
+        registros.append((nombre, ruta, titular, importancia, clave_grupo(titular, importancia),
+                          _periodo_desde_nombre(nombre), tamano, fecha_modificacion))
+    if registros:
+        conn.executemany("""
+            INSERT INTO reportes (nombre_archivo, ruta, titular, importancia, clave_grupo, periodo, tamano_bytes, fecha_modificacion)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, registros)
+        logging.info(f"Catálogo de informes: {len(registros)} informes existentes incorporados")
+    # Vincular por ruta los boletines de informes ya catalogados que no tengan vínculo
+    vinculados = conn.execute("""
+        INSERT OR IGNORE INTO reportes_boletines (reporte_id, boletin_id)
+        SELECT r.id, b.id
+        FROM boletines b
+        JOIN reportes r ON r.ruta = b.ruta_reporte
+        WHERE NOT EXISTS (SELECT 1 FROM reportes_boletines rb WHERE rb.boletin_id = b.id)
+    """).rowcount
+    return len(registros) + max(vinculados, 0)
+
+def asegurar_tabla_reportes(conn):
+    """Crea las tablas del catálogo e incorpora los informes previos (una vez por base y proceso)."""
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is not None and ruta_db in _esquemas_verificados:
+        return
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reportes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre_archivo TEXT NOT NULL,
+                ruta TEXT NOT NULL UNIQUE,
+                titular TEXT,
+                importancia TEXT,
+                clave_grupo TEXT,
+                periodo TEXT,
+                tamano_bytes INTEGER,
+                sha256 TEXT,
+                fecha_modificacion TEXT,
+                fecha_creacion TEXT DEFAULT (datetime('now', 'localtime')),
+                archivo TEXT,
+                miembro TEXT
+            )
+        """)
+        existentes = {fila[1] for fila in conn.execute("PRAGMA table_info(reportes)")}
+        for columna, tipo in _COLUMNAS_MIGRACION.items():
+            if columna not in existentes:
+                conn.execute(f"ALTER TABLE reportes ADD COLUMN {columna} {tipo}")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reportes_boletines (
+                reporte_id INTEGER NOT NULL REFERENCES reportes (id) ON DELETE CASCADE,
+                boletin_id INTEGER NOT NULL,
+                PRIMARY KEY (reporte_id, boletin_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reportes_boletines_boletin ON reportes_boletines (boletin_id, reporte_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reportes_titular ON reportes (titular, fecha_modificacion)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reportes_grupo ON reportes (clave_grupo, periodo)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reportes_fecha ON reportes (fecha_modificacion)")
+        tiene_boletines = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'boletines'"
+        ).fetchone()
+        if tiene_boletines and _incorporar_reportes_existentes(conn):
+            conn.commit()
+            invalidar_tablas(conn, 'reportes', 'reportes_boletines')
+        else:
+            conn.commit()
+    except sqlite3.Error as e:
+        logging.error(f"Error al crear la tabla reportes: {e}")
+        raise Exception(f"Error al crear la tabla reportes: {e}")
+    if ruta_db is not None:
+        _esquemas_verificados.add(ruta_db)
+
+def registrar_reporte(conn, ruta, titular, importancia=None, periodo=None, nombre_archivo=None,
+                      boletin_ids=(), sha256=None, tamano_bytes=None, confirmar=True):
+    """
+    Registra (o actualiza) un informe recién escrito en el catálogo.
+
+    Args:
+        conn: Conexión a la base de datos
+        ruta: Ruta del PDF
+        titular: Titular del informe
+        importancia: Importancia del grupo de boletines
+        periodo: Período del informe ('Octubre-2026'); por defecto se toma del nombre
+        nombre_archivo: Nombre del archivo; por defecto el de la ruta
+        boletin_ids: Ids de los boletines incluidos en el informe
+        sha256: Hash del contenido, si ya se calculó al escribirlo
+        tamano_bytes: Tamaño del archivo, si ya se conoce (si no, se lee del disco)
+        confirmar: Si es False no se hace commit, para registrar el informe en la misma
+            transacción que la escritura que lo acompaña (ver ReportGenerator)
+
+    Returns:
+        int: Id del informe en el catálogo
+    """
+    asegurar_tabla_reportes(conn)
+    nombre_archivo = nombre_archivo or os.path.basename(ruta)
+    tamano, fecha_modificacion = _datos_archivo(ruta)
+    try:
+        conn.execute("""
+            INSERT INTO reportes (nombre_archivo, ruta, titular, importancia, clave_grupo, periodo,
+                                  tamano_bytes, sha256, fecha_modificacion)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (ruta) DO UPDATE SET
+                nombre_archivo = excluded.nombre_archivo, titular = excluded.titular,
+                importancia = excluded.importancia, clave_grupo = excluded.clave_grupo,
+                periodo = excluded.periodo, tamano_bytes = excluded.tamano_bytes,
+                sha256 = COALESCE(excluded.sha256, sha256), fecha_modificacion = excluded.fecha_modificacion
+        """, (nombre_archivo, ruta, titular, importancia, clave_grupo(titular, importancia),
+              periodo or _periodo_desde_nombre(nombre_archivo), tamano_bytes if tamano_bytes is not None else tamano,
+              sha256, fecha_modificacion))
+        reporte_id = conn.execute("SELECT id FROM reportes WHERE ruta = ?", (ruta,)).fetchone()[0]
+        if boletin_ids:
+            conn.executemany("INSERT OR IGNORE INTO reportes_boletines (reporte_id, boletin_id) VALUES (?, ?)",
+                             [(reporte_id, boletin_id) for boletin_id in boletin_ids])
+        if confirmar:
+            conn.commit()
+            invalidar_tablas(conn, 'reportes', 'reportes_boletines')
+        return reporte_id
+    except sqlite3.Error as e:
+        if confirmar:
+            conn.rollback()
+        logging.error(f"Error al registrar el informe {ruta}: {e}")
+        raise Exception(f"Error al registrar el informe: {e}")
+
+def _filas_a_reportes(filas):
+    return [dict(zip(COLUMNAS_REPORTE, fila)) for fila in filas]
+
+def listar_reportes(conn, limite=10, titular=None):
+    """
+    Lista los informes más recientes del catálogo.
+
+    Args:
+        conn: Conexión a la base de datos
+        limite: Cantidad máxima de informes
+        titular: Si se indica, solo los informes de ese titular
+
+    Returns:
+        list[dict]: Informes (columnas de la tabla reportes), del más reciente al más antiguo
+    """
+    asegurar_tabla_reportes(conn)
+
+    def cargar(conn):
+        condicion = "WHERE titular = ?" if titular is not None else ""
+        parametros = (titular, limite) if titular is not None else (limite,)
+        try:
+            filas = conn.execute(f"""
+                SELECT {', '.join(COLUMNAS_REPORTE)} FROM reportes
+                {condicion}
+                ORDER BY fecha_modificacion DESC, id DESC
+                LIMIT ?
+            """, parametros).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Error al listar informes: {e}")
+            raise Exception(f"Error al listar informes: {e}")
+        return _filas_a_reportes(filas)
+
+    return consulta_cacheada(conn, ('reportes',), ('reportes_recientes', limite, titular), cargar)
+
+def obtener_reporte(conn, reporte_id):
+    """Obtiene un informe del catálogo por id (o None)."""
+    asegurar_tabla_reportes(conn)
+    try:
+        fila = conn.execute(f"SELECT {', '.join(COLUMNAS_REPORTE)} FROM reportes WHERE id = ?",
+                            (reporte_id,)).fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"Error al obtener el informe {reporte_id}: {e}")
+        raise Exception(f"Error al obtener el informe: {e}")
+    return _filas_a_reportes([fila])[0] if fila else None
+
+def buscar_reporte_titular(conn, titular, fecha_referencia=None):
+    """
+    Busca el informe más reciente de un titular.
+
+    Args:
+        conn: Conexión a la base de datos
+        titular: Nombre del titular
+        fecha_referencia: Fecha 'YYYY-MM-DD[ ...]'; si se indica, el más reciente modificado
+            hasta un día después de esa fecha
+
+    Returns:
+        dict | None: Informe del catálogo
+    """
+    asegurar_tabla_reportes(conn)
+    condicion = ""
+    parametros = [titular]
+    if fecha_referencia:
+        try:
+            limite = datetime.strptime(fecha_referencia.split()[0], '%Y-%m-%d') + timedelta(days=2)
+            condicion = "AND fecha_modificacion < ?"
+            parametros.append(limite.strftime('%Y-%m-%d'))
+        except ValueError:
+            pass
+    try:
+        fila = conn.execute(f"""
+            SELECT {', '.join(COLUMNAS_REPORTE)} FROM reportes
+            WHERE titular = ? {condicion}
+            ORDER BY fecha_modificacion DESC, id DESC
+            LIMIT 1
+        """, parametros).fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"Error al buscar el informe de {titular}: {e}")
+        raise Exception(f"Error al buscar el informe: {e}")
+    return _filas_a_reportes([fila])[0] if fila else None
+
+def obtener_reporte_de_boletines(conn, boletin_ids):
+    """
+    Obtiene el informe más reciente que incluye alguno de los boletines indicados.
+
+    Args:
+        conn: Conexión a la base de datos
+        boletin_ids: Ids de boletines (normalmente los de un grupo titular + importancia)
+
+    Returns:
+        dict | None: Informe del catálogo
+    """
+    boletin_ids = list(boletin_ids)
+    if not boletin_ids:
+        return None
+    asegurar_tabla_reportes(conn)
+    try:
+        fila = conn.execute(f"""
+            SELECT {', '.join(f'r.{columna}' for columna in COLUMNAS_REPORTE)}
+            FROM reportes_boletines rb
+            JOIN reportes r ON r.id = rb.reporte_id
+            WHERE rb.boletin_id IN ({','.join('?' for _ in boletin_ids)})
+            ORDER BY r.id DESC
+            LIMIT 1
+        """, boletin_ids).fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"Error al buscar el informe de los boletines: {e}")
+        raise Exception(f"Error al buscar el informe de los boletines: {e}")
+    return _filas_a_reportes([fila])[0] if fila else None
+
+def leer_reporte(reporte):
+    """
+    Devuelve el contenido del PDF de un informe, usando la caché de descargas recientes.
+    Los informes archivados se leen de su archivo mensual.
+
+    Args:
+        reporte: Informe del catálogo (dict con 'ruta', 'fecha_modificacion', 'archivo' y 'miembro')
+
+    Returns:
+        bytes: Contenido del archivo
+
+    Raises:
+        OSError: Si el archivo no se puede leer
+    """
+    global _bytes_descargas
+    clave = (reporte['ruta'], reporte['fecha_modificacion'])
+    with _lock:
+        datos = _descargas.get(clave)
+        if datos is not None:
+            _descargas.move_to_end(clave)
+            return datos
+    if reporte.get('archivo'):
+        try:
+            datos = leer_de_archivo(reporte['archivo'], reporte['miembro'])
+        except (KeyError, zipfile.BadZipFile) as e:
+            raise OSError(f"No se pudo leer {reporte['miembro']} de {reporte['archivo']}: {e}")
+    else:
+        with open(reporte['ruta'], 'rb') as f:
+            datos = f.read()
+    if len(datos) > MAX_BYTES_CACHE_DESCARGAS:
+        return datos
+    with _lock:
+        if clave not in _descargas:
+            _descargas[clave] = datos
+            _bytes_descargas += len(datos)
+        while _bytes_descargas > MAX_BYTES_CACHE_DESCARGAS:
+            _, descartado = _descargas.popitem(last=False)
+            _bytes_descargas -= len(descartado)
+    return datos
+
+def limpiar_cache_descargas():
+    """Vacía la caché de descargas (útil en tests)."""
+    global _bytes_descargas
+    with _lock:
+        _descargas.clear()
+        _bytes_descargas = 0
+
+def archivar_informes(conn, dias_retencion=DIAS_RETENCION_INFORMES, base_dir=None):
+    """
+    Mueve a los archivos mensuales comprimidos los informes con más de dias_retencion días
+    cuyos boletines ya fueron enviados. Los informes siguen en el catálogo (columnas archivo
+    y miembro) y leer_reporte() los sirve desde el archivo.
+
+    Args:
+        conn: Conexión a la base de datos
+        dias_retencion: Antigüedad mínima (por fecha de modificación) para archivar
+        base_dir: Directorio base de informes (por defecto get_informes_dir())
+
+    Returns:
+        dict: {'archivados', 'faltantes', 'bytes_liberados', 'archivos'}
+    """
+    asegurar_tabla_reportes(conn)
+    try:
+        candidatos = conn.execute("""
+            SELECT r.id, r.ruta, r.fecha_modificacion, r.tamano_bytes
+            FROM reportes r
+            WHERE r.archivo IS NULL
+              AND r.fecha_modificacion < datetime('now', 'localtime', ?)
+              AND NOT EXISTS (
+                  SELECT 1 FROM reportes_boletines rb
+                  JOIN boletines b ON b.id = rb.boletin_id
+                  WHERE rb.reporte_id = r.id AND b.reporte_enviado = 0
+              )
+            ORDER BY r.fecha_modificacion
+        """, (f"-{int(dias_retencion)} days",)).fetchall()
+    except sqlite3.Error as e:
+        logging.error(f"Error al buscar informes para archivar: {e}")
+        raise Exception(f"Error al buscar informes para archivar: {e}")
+
+    # Agrupar por mes de generación
+    por_mes = {}
+    faltantes = 0
+    for reporte_id, ruta, fecha_modificacion, tamano in candidatos:
+        if not os.path.exists(ruta):
+            logging.warning(f"Informe a archivar no encontrado: {ruta}")
+            faltantes += 1
+            continue
+        fecha = datetime.fromisoformat(fecha_modificacion)
+        por_mes.setdefault((fecha.year, fecha.month), []).append((reporte_id, ruta, tamano or 0))
+
+    archivados = 0
+    bytes_liberados = 0
+    archivos = []
+    for (anio, mes), reportes in sorted(por_mes.items()):
+        archivo = ruta_archivo_mensual(anio, mes, base_dir)
+        miembros = [(ruta, nombre_miembro(ruta, base_dir)) for _, ruta, _ in reportes]
+        agregar_a_archivo(archivo, miembros)
+        try:
+            conn.executemany("UPDATE reportes SET archivo = ?, miembro = ? WHERE id = ?",
+                             [(archivo, miembro, reporte_id)
+                              for (reporte_id, _, _), (_, miembro) in zip(reportes, miembros)])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error al registrar el archivo {archivo}: {e}")
+            raise Exception(f"Error al registrar el archivo de informes: {e}")
+        invalidar_tablas(conn, 'reportes')
+        # Los PDF sueltos se borran recién cuando el catálogo apunta al archivo
+        for _, ruta, tamano in reportes:
+            eliminar_informe_suelto(ruta, base_dir)
+            bytes_liberados += tamano
+        archivados += len(reportes)
+        archivos.append(archivo)
+        logging.info(f"Archivo de informes {archivo}: {len(reportes)} informes agregados")
+
+    return {'archivados': archivados, 'faltantes': faltantes, 'bytes_liberados': bytes_liberados,
+            'archivos': archivos}
+
+if __name__ == "__main__":
+    import argparse
+    from database import crear_conexion
+
+    parser = argparse.ArgumentParser(description="Archiva los informes que superan la retención")
+    parser.add_argument('--dias', type=int, default=DIAS_RETENCION_INFORMES,
+                        help=f"Días de retención (por defecto {DIAS_RETENCION_INFORMES})")
+    args = parser.parse_args()
+
+    conn = crear_conexion()
+    try:
+        print(archivar_informes(conn, args.dias))
+    finally:
+        conn.close()
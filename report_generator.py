@@ -1,13 +1,20 @@
 # report_generator_optimized.py
 import os
+import hashlib
 import logging
+import time
 import secrets  
 from fpdf import FPDF
 from datetime import datetime
 from collections import defaultdict
 from typing import List, Tuple, Optional
 from professional_theme import ProfessionalTheme
+from metrics import INFORMES_GENERADOS, INFORMES_SEGUNDOS
 from paths import get_logs_dir, get_informes_dir, get_config_file_path, get_logo_path, inicializar_assets
+from query_cache import invalidar_tablas
+from records import Boletin, fabrica_de_filas
+from report_catalog import asegurar_tabla_reportes, registrar_reporte
+from report_storage import eliminar_informe_suelto, ruta_informe
 
 # Configurar logging
 log_file = os.path.join(get_logs_dir(), 'boletines.log')
@@ -219,9 +226,9 @@ class ProfessionalReportPDF(FPDF):
             self.cell(width, self.theme.TABLE['row_height'], text, 1, 0, 'L', True)
         self.ln()
     
-    def add_records_table(self, records_data: List[dict]):
+    def add_records_table(self, records: List[Boletin]):
         """Agrega tabla completa de registros con diseño profesional"""
-        if not records_data:
+        if not records:
             return
         
         # Verificar espacio para tabla
@@ -236,7 +243,7 @@ class ProfessionalReportPDF(FPDF):
         self.add_table_header(headers, col_widths)
         
         # Agregar filas
-        for i, record in enumerate(records_data):
+        for i, record in enumerate(records):
             # Verificar espacio para nueva fila
             if self.get_y() > 260:
                 self.add_page()
@@ -245,11 +252,11 @@ class ProfessionalReportPDF(FPDF):
             # Preparar datos de la fila
             row_data = [
                 str(i + 1),
-                record.get('boletin_corto', ''),
-                record.get('numero_orden', ''),
-                record.get('solicitante', ''),
-                record.get('marca_publicada', ''),
-                record.get('clase', '')
+                record.boletin_corto,
+                record.numero_orden,
+                record.solicitante,
+                record.marca_publicada,
+                record.clase
             ]
             
             # Agregar fila con estilo zebra
@@ -257,7 +264,7 @@ class ProfessionalReportPDF(FPDF):
         
         self.ln(10)
     
-    def add_detailed_record(self, record_data: dict, record_number: int):
+    def add_detailed_record(self, record: Boletin, record_number: int):
         """Agrega registro detallado con formato profesional"""
         # Verificar espacio
         if self.get_y() > 240:
@@ -279,15 +286,15 @@ class ProfessionalReportPDF(FPDF):
         
         # Campos principales
         fields = [
-            ("Boletín", record_data.get('boletin', '')),
-            ("Número de Orden", record_data.get('numero_orden', '')),
-            ("Solicitante", record_data.get('solicitante', '')),
-            ("Agente", record_data.get('agente', '')),
-            ("Número de Expediente", record_data.get('numero_expediente', '')),
-            ("Clase", record_data.get('clase', '')),
-            ("Marca en Custodia", record_data.get('marca_custodia', '')),
-            ("Marca Publicada", record_data.get('marca_publicada', '')),
-            ("Clases/Acta", record_data.get('clases_acta', ''))
+            ("Boletín", record.boletin_texto),
+            ("Número de Orden", record.numero_orden),
+            ("Solicitante", record.solicitante),
+            ("Agente", record.agente),
+            ("Número de Expediente", record.numero_expediente),
+            ("Clase", record.clase),
+            ("Marca en Custodia", record.marca_custodia),
+            ("Marca Publicada", record.marca_publicada),
+            ("Clases/Acta", record.clases_acta)
         ]
         
         for label, value in fields:
@@ -362,13 +369,14 @@ class ReportGenerator:
         logger.warning("No se pudo encontrar la imagen del logo en ninguna ubicación")
         return False
     
-    def _fetch_pending_records(self, conn):
+    def _fetch_pending_records(self, conn) -> List[Boletin]:
         """Obtiene los registros pendientes de procesamiento para generar informes."""
         try:
             cursor = conn.cursor()
+            cursor.row_factory = fabrica_de_filas(Boletin)
             cursor.execute('''
                 SELECT titular, numero_boletin, fecha_boletin, numero_orden, solicitante, agente, 
-                       numero_expediente, clase, marca_custodia, marca_publicada, clases_acta, importancia
+                       numero_expediente, clase, marca_custodia, marca_publicada, clases_acta, importancia, id
                 FROM boletines
                 WHERE reporte_generado = 0 
                 AND importancia != 'Pendiente'  -- ← NUEVA CONDICIÓN
@@ -379,55 +387,59 @@ class ReportGenerator:
             logger.error(f"Error al consultar la base de datos: {e}")
             raise
     
-    def _format_record_data(self, record: Tuple) -> dict:
-        """Formatea los datos del registro para el PDF."""
-        boletin_texto = ""
-        boletin_corto = ""
-        if record[1] and record[2]:  # numero_boletin y fecha_boletin
-            boletin_texto = f"BOLETÍN NRO. {record[1]} DEL {record[2]}"
-            boletin_corto = f"Nº {record[1]}"
-        
-        return {
-            'boletin': boletin_texto,
-            'boletin_corto': boletin_corto,
-            'numero_orden': record[3],
-            'solicitante': record[4],
-            'agente': record[5],
-            'numero_expediente': record[6],
-            'clase': record[7],
-            'marca_custodia': record[8],
-            'marca_publicada': record[9],
-            'clases_acta': record[10],
-            'importancia': record[11]
-        }
+    def _hash_file(self, ruta: str) -> Tuple[int, str]:
+        """Calcula el tamaño y el sha256 de un archivo."""
+        digest = hashlib.sha256()
+        tamano = 0
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(bloque)
+                tamano += len(bloque)
+        return tamano, digest.hexdigest()
     
     def _clean_filename(self, filename: str) -> str:
         """Limpia el nombre del archivo de caracteres no válidos."""
         return "".join(c for c in filename if c.isalnum() or c in (" ", "-", "_", ".")).strip()
     
-    def _mark_records_as_processed(self, conn, titular: str, importancia: str, nombre_reporte: str, ruta_reporte: str):
-        """Marca los registros como procesados en la base de datos."""
+    def _mark_records_as_processed(self, conn, titular: str, importancia: str, boletin_ids: List[int],
+                                   nombre_reporte: str, ruta_reporte: str,
+                                   tamano_bytes: int = None, sha256: str = None):
+        """
+        Marca los registros como procesados y registra el informe en el catálogo (ver report_catalog.py)
+        en una sola transacción: o quedan ambos escritos o ninguno.
+        
+        Solo se marcan y vinculan boletin_ids, los boletines que entraron en el PDF: lo que se
+        haya importado mientras tanto queda pendiente para el próximo informe.
+        """
+        # Crear el catálogo antes de abrir la transacción (la primera vez hace commit)
+        asegurar_tabla_reportes(conn)
         try:
             cursor = conn.cursor()
-            cursor.execute('''
+            cursor.executemany('''
                 UPDATE boletines 
                 SET reporte_generado = 1, 
                     fecha_creacion_reporte = datetime('now', 'localtime'),
                     nombre_reporte = ?,
                     ruta_reporte = ? 
-                WHERE reporte_enviado = 0 
-                AND titular = ?
-                AND importancia = ?
-                AND importancia != 'Pendiente'
-            ''', (nombre_reporte, ruta_reporte, titular, importancia))
+                WHERE id = ?
+            ''', [(nombre_reporte, ruta_reporte, boletin_id) for boletin_id in boletin_ids])
+            registrar_reporte(conn, ruta_reporte, titular, importancia, nombre_archivo=nombre_reporte,
+                              boletin_ids=boletin_ids, sha256=sha256, tamano_bytes=tamano_bytes, confirmar=False)
             conn.commit()
+            invalidar_tablas(conn, 'boletines', 'reportes', 'reportes_boletines')
             logger.info(f"Registros de {titular} (Importancia: {importancia}) marcados como procesados en la base de datos")
         except Exception as e:
+            conn.rollback()
             logger.error(f"Error al actualizar la base de datos para {titular} (Importancia: {importancia}): {e}")
             raise
     
-    def generate_reports(self, conn):
-        """Genera los informes PDF y retorna información del resultado."""
+    def generate_reports(self, conn, progreso=None):
+        """
+        Genera los informes PDF y retorna información del resultado.
+        
+        progreso es un callable opcional progreso(actual, total, mensaje) que se llama
+        por cada grupo (titular + importancia) (ver jobs.ProgresoTrabajo).
+        """
         try:
             # Obtener registros pendientes
             registros = self._fetch_pending_records(conn)
@@ -479,10 +491,7 @@ class ReportGenerator:
             # Agrupar por titular + importancia (NUEVA LÓGICA)
             agrupados = defaultdict(list)
             for registro in registros:
-                titular = registro[0]
-                importancia = registro[11]  # La importancia está en la posición 11
-                clave_agrupacion = (titular, importancia)
-                agrupados[clave_agrupacion].append(registro)
+                agrupados[(registro.titular, registro.importancia)].append(registro)
             
             # Información del período
             fecha_actual = datetime.now()
@@ -511,23 +520,39 @@ class ReportGenerator:
             
             # Generar PDF por cada grupo (titular + importancia)
             reportes_generados = 0
-            for (titular, importancia), registros_grupo in agrupados.items():
+            for indice, ((titular, importancia), registros_grupo) in enumerate(agrupados.items()):
+                if progreso:
+                    progreso(indice, len(agrupados), f"{titular} ({importancia})")
                 try:
-                    nombre_archivo, ruta_archivo = self._generate_single_report(
+                    inicio = time.perf_counter()
+                    nombre_archivo, ruta_archivo, tamano_bytes, sha256 = self._generate_single_report(
                         titular, registros_grupo, mes_ano, mes_ano_archivo, importancia
                     )
+                    INFORMES_SEGUNDOS.observe(time.perf_counter() - inicio)
                     
-                    # Marcar los registros de este grupo específico como procesados
-                    self._mark_records_as_processed(conn, titular, importancia, nombre_archivo, ruta_archivo)
+                    # Marcar los registros de este grupo específico como procesados y catalogar el PDF;
+                    # si la base falla, el PDF no queda huérfano
+                    try:
+                        self._mark_records_as_processed(conn, titular, importancia,
+                                                        [registro.id for registro in registros_grupo],
+                                                        nombre_archivo, ruta_archivo, tamano_bytes, sha256)
+                    except Exception:
+                        eliminar_informe_suelto(ruta_archivo, self.output_dir)
+                        raise
+                    INFORMES_GENERADOS.labels('ok').inc()
                     reportes_generados += 1
                     
                     logger.info(f"✅ Informe generado para '{titular}' (Importancia: {importancia}) - {len(registros_grupo)} registros")
                     
                 except Exception as e:
+                    INFORMES_GENERADOS.labels('error').inc()
                     logger.error(f"❌ Error al generar informe para '{titular}' (Importancia: {importancia}): {e}")
                     # Continuar con el siguiente grupo en lugar de fallar completamente
                     continue
             
+            if progreso:
+                progreso(len(agrupados), len(agrupados))
+            
             # Resumen final
             logger.info(f"🎉 GENERACIÓN COMPLETADA:")
             logger.info(f"   • Informes generados exitosamente: {reportes_generados}/{len(agrupados)}")
@@ -558,9 +583,17 @@ class ReportGenerator:
                 'reportes_generados': 0
             }
     
-    def _generate_single_report(self, titular: str, registros: List[Tuple], 
-                              mes_ano: str, mes_ano_archivo: str, importancia: str) -> Tuple[str, str]:
-        """Genera un informe individual para un titular con una importancia específica."""
+    def _generate_single_report(self, titular: str, registros: List[Boletin], 
+                              mes_ano: str, mes_ano_archivo: str, importancia: str) -> Tuple[str, str, int, str]:
+        """
+        Genera un informe individual para un titular con una importancia específica.
+        
+        El PDF se escribe en un archivo temporal y se renombra al terminar, así que nunca
+        queda un informe a medio escribir con su nombre definitivo.
+        
+        Returns:
+            (nombre del archivo, ruta, tamaño en bytes, sha256 del contenido)
+        """
         try:
             # Crear PDF con tema profesional
             watermark = self.watermark_path if self._validate_watermark() else None
@@ -578,41 +611,42 @@ class ReportGenerator:
             # Separador para tabla de resumen
             pdf.add_section_separator("RESUMEN DE REGISTROS")
             
-            # Formatear datos para la tabla
-            records_data = []
-            for registro in registros:
-                record_data = self._format_record_data(registro)
-                records_data.append(record_data)
-            
             # Agregar tabla de registros
-            pdf.add_records_table(records_data)
+            pdf.add_records_table(registros)
             
             # Separador para detalles
             pdf.add_section_separator("DETALLE COMPLETO DE REGISTROS")
             
             # Agregar registros detallados
             for i, registro in enumerate(registros, 1):
-                record_data = self._format_record_data(registro)
-                pdf.add_detailed_record(record_data, i)
+                pdf.add_detailed_record(registro, i)
             
             # Guardar PDF con nombre que incluya importancia
             titular_limpio = self._clean_filename(titular)
             digitos_random = ''.join([str(secrets.randbelow(10)) for _ in range(6)])
             nombre_archivo = f"{mes_ano_archivo} - Informe {titular_limpio} - {importancia} - {digitos_random}.pdf"
             
-            ruta_archivo = os.path.join(self.output_dir, nombre_archivo)  
-            pdf.output(ruta_archivo)
+            # Repartido por período y titular (ver report_storage)
+            ruta_archivo = ruta_informe(nombre_archivo, titular, base_dir=self.output_dir)
+            ruta_temporal = f"{ruta_archivo}.tmp"
+            try:
+                pdf.output(ruta_temporal)
+                tamano_bytes, sha256 = self._hash_file(ruta_temporal)
+                os.replace(ruta_temporal, ruta_archivo)
+            finally:
+                if os.path.exists(ruta_temporal):
+                    os.remove(ruta_temporal)
             logger.info(f"Informe generado: {ruta_archivo}")
             
-            return nombre_archivo, ruta_archivo
+            return nombre_archivo, ruta_archivo, tamano_bytes, sha256
             
         except Exception as e:
             logger.error(f"Error al generar informe para {titular} (Importancia: {importancia}): {e}")
             raise
 
 
-def generar_informe_pdf(conn, watermark_image: str = None):
+def generar_informe_pdf(conn, watermark_image: str = None, progreso=None):
     """Función principal para mantener compatibilidad con el código anterior."""
     # Usar siempre la función get_logo_path() para obtener la ruta del logo
     generator = ReportGenerator(None)  # Pasamos None para que ReportGenerator use get_logo_path()
-    return generator.generate_reports(conn)
\ No newline at end of file
+    return generator.generate_reports(conn, progreso)
\ No newline at end of file
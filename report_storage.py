@@ -0,0 +1,114 @@
+"""
+Organización en disco de los informes PDF.
+
+- Los informes nuevos se guardan repartidos por período y titular:
+  <informes>/<año>/<mes>/<hash del titular>/<nombre>.pdf, así ningún directorio crece sin
+  límite y los respaldos pueden trabajar por carpeta.
+- Los informes que superan la retención se mueven a archivos comprimidos mensuales
+  <informes>/archivo/<año>-<mes>.zip (ver report_catalog.archivar_informes); el catálogo
+  guarda el archivo y el miembro para seguir sirviéndolos.
+"""
+import hashlib
+import os
+import shutil
+import zipfile
+from datetime import datetime
+
+from paths import get_informes_dir
+
+# Días que un informe permanece como PDF suelto antes de archivarse
+DIAS_RETENCION_INFORMES = int(os.getenv('INFORMES_DIAS_RETENCION', '365'))
+DIRECTORIO_ARCHIVO = 'archivo'
+# Caracteres hexadecimales del hash del titular usados como subdirectorio (256 carpetas por mes)
+LARGO_HASH_TITULAR = 2
+
+def ruta_informe(nombre_archivo, titular, base_dir=None, fecha=None):
+    """
+    Devuelve la ruta donde guardar un informe nuevo y crea su directorio.
+
+    Args:
+        nombre_archivo: Nombre del PDF
+        titular: Titular del informe (define el subdirectorio)
+        base_dir: Directorio base de informes (por defecto get_informes_dir())
+        fecha: Fecha del período (por defecto hoy)
+
+    Returns:
+        str: <base>/<año>/<mes>/<hash>/<nombre_archivo>
+    """
+    base_dir = base_dir or get_informes_dir()
+    fecha = fecha or datetime.now()
+    hash_titular = hashlib.sha1((titular or '').encode('utf-8')).hexdigest()[:LARGO_HASH_TITULAR]
+    directorio = os.path.join(base_dir, f"{fecha.year:04d}", f"{fecha.month:02d}", hash_titular)
+    os.makedirs(directorio, exist_ok=True)
+    return os.path.join(directorio, nombre_archivo)
+
+def ruta_archivo_mensual(anio, mes, base_dir=None):
+    """Ruta del archivo comprimido de un mes: <base>/archivo/<año>-<mes>.zip"""
+    base_dir = base_dir or get_informes_dir()
+    return os.path.join(base_dir, DIRECTORIO_ARCHIVO, f"{anio:04d}-{mes:02d}.zip")
+
+def nombre_miembro(ruta, base_dir=None):
+    """Nombre dentro del archivo: la ruta relativa al directorio de informes (o el nombre del PDF)."""
+    base_dir = os.path.abspath(base_dir or get_informes_dir())
+    ruta = os.path.abspath(ruta)
+    if os.path.commonpath([ruta, base_dir]) == base_dir:
+        return os.path.relpath(ruta, base_dir).replace(os.sep, '/')
+    return os.path.basename(ruta)
+
+def agregar_a_archivo(archivo, miembros):
+    """
+    Agrega archivos a un zip mensual sin dejarlo nunca a medio escribir: se trabaja sobre una
+    copia temporal, se verifica el CRC de lo agregado y recién entonces se reemplaza el original.
+
+    Args:
+        archivo: Ruta del .zip (se crea si no existe)
+        miembros: Lista de (ruta del archivo, nombre del miembro); los que ya estén en el zip se omiten
+
+    Returns:
+        list[str]: Nombres de los miembros presentes en el zip tras la operación
+    """
+    os.makedirs(os.path.dirname(archivo), exist_ok=True)
+    temporal = f"{archivo}.tmp"
+    if os.path.exists(archivo):
+        shutil.copyfile(archivo, temporal)
+    try:
+        with zipfile.ZipFile(temporal, 'a', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+            existentes = set(zf.namelist())
+            agregados = []
+            for ruta, miembro in miembros:
+                if miembro in existentes:
+                    continue
+                zf.write(ruta, miembro)
+                existentes.add(miembro)
+                agregados.append(miembro)
+        with zipfile.ZipFile(temporal) as zf:
+            for miembro in agregados:
+                # Leer el miembro completo valida su CRC
+                with zf.open(miembro) as f:
+                    while f.read(1024 * 1024):
+                        pass
+        os.replace(temporal, archivo)
+        return sorted(existentes)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+def leer_de_archivo(archivo, miembro):
+    """Lee un informe guardado dentro de un archivo mensual."""
+    with zipfile.ZipFile(archivo) as zf:
+        return zf.read(miembro)
+
+def eliminar_informe_suelto(ruta, base_dir=None):
+    """Borra un PDF ya archivado y los directorios de período que queden vacíos."""
+    base_dir = os.path.abspath(base_dir or get_informes_dir())
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    while directorio != base_dir and directorio.startswith(base_dir):
+        try:
+            os.rmdir(directorio)
+        except OSError:
+            break
+        directorio = os.path.dirname(directorio)
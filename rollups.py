@@ -0,0 +1,214 @@
+"""
+Tablas de resumen (rollups) diarias y mensuales de boletines y envíos.
+
+- Los gráficos y contadores leen estas tablas en lugar de agrupar boletines y envios_log
+  en cada render, así que su costo depende de la cantidad de días/meses y titulares y no
+  de la historia acumulada.
+- Se mantienen con triggers de SQLite en la misma transacción de cada escritura: la
+  importación de boletines, la generación y el envío de informes, la edición de
+  importancias y las bajas, hagan o no esas escrituras las funciones de database.py.
+- Los envíos purgados de envios_log (limpiar_logs_antiguos) no se descuentan: el resumen
+  conserva la historia completa de envíos aunque el detalle se borre.
+- reconstruir_resumenes() recalcula los resúmenes desde las tablas de origen; se ejecuta
+  sola al crear las tablas en una base existente y a mano con `python rollups.py`.
+"""
+import argparse
+import logging
+import sqlite3
+
+from paths import get_db_path
+from query_cache import invalidar_tablas
+
+# Fecha de publicación (DD/MM/YYYY); si falta o no es válida, la fecha de alta
+_MES_BOLETIN = """COALESCE(CASE WHEN {fila}.fecha_boletin GLOB '[0-3][0-9]/[01][0-9]/[12][0-9][0-9][0-9]'
+                               THEN substr({fila}.fecha_boletin, 7, 4) || '-' || substr({fila}.fecha_boletin, 4, 2) END,
+                          strftime('%Y-%m', {fila}.fecha_alta), '')"""
+
+# Tabla de resumen -> tabla de origen, (columna del período, expresión), dimensiones y
+# medidas (expresiones sobre {fila}, que es NEW/OLD en los triggers y el alias en la reconstrucción)
+RESUMENES = {
+    # Boletines cargados por día de alta (actividad de importación)
+    'resumen_boletines_diario': {
+        'origen': 'boletines',
+        'periodo': ('dia', "COALESCE(date({fila}.fecha_alta), '')"),
+        'dimensiones': ('titular', 'importancia'),
+        'medidas': {'cantidad': '1', 'generados': '{fila}.reporte_generado = 1',
+                    'enviados': '{fila}.reporte_enviado = 1'},
+    },
+    # Boletines por mes de publicación (tendencias)
+    'resumen_boletines_mensual': {
+        'origen': 'boletines',
+        'periodo': ('mes', _MES_BOLETIN),
+        'dimensiones': ('titular', 'importancia'),
+        'medidas': {'cantidad': '1', 'generados': '{fila}.reporte_generado = 1',
+                    'enviados': '{fila}.reporte_enviado = 1'},
+    },
+    'resumen_envios_diario': {
+        'origen': 'envios_log',
+        'periodo': ('dia', "COALESCE(date({fila}.fecha_envio), '')"),
+        'dimensiones': ('titular', 'importancia', 'estado'),
+        'medidas': {'cantidad': '1'},
+    },
+    'resumen_envios_mensual': {
+        'origen': 'envios_log',
+        'periodo': ('mes', "COALESCE(strftime('%Y-%m', {fila}.fecha_envio), '')"),
+        'dimensiones': ('titular', 'importancia', 'estado'),
+        'medidas': {'cantidad': '1'},
+    },
+}
+
+# Columnas de origen que mueven una fila de grupo o de medida (disparan el trigger de UPDATE)
+_COLUMNAS_ORIGEN = {
+    'boletines': ('titular', 'importancia', 'reporte_generado', 'reporte_enviado', 'fecha_alta', 'fecha_boletin'),
+    'envios_log': ('titular', 'importancia', 'estado', 'fecha_envio'),
+}
+# Orígenes cuyos DELETE descuentan del resumen (envios_log se purga por retención y no descuenta)
+_ORIGENES_CON_BAJAS = ('boletines',)
+
+# Bases en las que ya se verificaron los resúmenes
+_esquemas_verificados = set()
+
+def _claves(resumen):
+    """Columnas de la clave primaria del resumen: período y dimensiones."""
+    return (resumen['periodo'][0],) + resumen['dimensiones']
+
+def _expresiones_clave(resumen, fila):
+    """Expresiones SQL de la clave para una fila de origen (los NULL se guardan como '')."""
+    return [resumen['periodo'][1].format(fila=fila)] + \
+        [f"COALESCE({fila}.{dimension}, '')" for dimension in resumen['dimensiones']]
+
+def _sumar_fila(tabla, resumen, fila, signo):
+    """UPSERT que suma (signo '+') o resta (signo '-') una fila de origen al resumen."""
+    claves = _claves(resumen)
+    medidas = list(resumen['medidas'])
+    valores = _expresiones_clave(resumen, fila) + \
+        [f"{signo}({expresion.format(fila=fila)})" for expresion in resumen['medidas'].values()]
+    return f"""
+        INSERT INTO {tabla} ({', '.join(claves + tuple(medidas))})
+        VALUES ({', '.join(valores)})
+        ON CONFLICT ({', '.join(claves)}) DO UPDATE SET
+            {', '.join(f"{medida} = {medida} + excluded.{medida}" for medida in medidas)};"""
+
+def _borrar_vacia(tabla, resumen, fila):
+    """Elimina el grupo de la fila si quedó sin boletines/envíos."""
+    condiciones = [f"{clave} = {expresion}"
+                   for clave, expresion in zip(_claves(resumen), _expresiones_clave(resumen, fila))]
+    return f"""
+        DELETE FROM {tabla} WHERE {' AND '.join(condiciones)} AND cantidad = 0;"""
+
+def _sql_triggers(origen):
+    """Sentencias CREATE TRIGGER de una tabla de origen (INSERT, UPDATE y, si corresponde, DELETE)."""
+    resumenes = [(tabla, resumen) for tabla, resumen in RESUMENES.items() if resumen['origen'] == origen]
+    columnas = _COLUMNAS_ORIGEN[origen]
+    altas = ''.join(_sumar_fila(tabla, resumen, 'NEW', '+') for tabla, resumen in resumenes)
+    bajas = ''.join(_sumar_fila(tabla, resumen, 'OLD', '-') + _borrar_vacia(tabla, resumen, 'OLD')
+                    for tabla, resumen in resumenes)
+    cambio = ' OR '.join(f"OLD.{columna} IS NOT NEW.{columna}" for columna in columnas)
+    sentencias = [
+        f"CREATE TRIGGER IF NOT EXISTS trg_resumen_{origen}_alta AFTER INSERT ON {origen} BEGIN {altas} END",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_resumen_{origen}_cambio AFTER UPDATE OF {', '.join(columnas)} ON {origen}
+            WHEN {cambio} BEGIN {bajas} {altas} END""",
+    ]
+    if origen in _ORIGENES_CON_BAJAS:
+        sentencias.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_resumen_{origen}_baja AFTER DELETE ON {origen} BEGIN {bajas} END")
+    return sentencias
+
+def asegurar_resumenes(conn):
+    """
+    Crea las tablas de resumen y sus triggers (una vez por base y proceso). Si las tablas no
+    existían, las completa con la historia ya cargada.
+
+    Requiere que existan las tablas boletines y envios_log (ver database.crear_tabla).
+    """
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is not None and ruta_db in _esquemas_verificados:
+        return
+    try:
+        existentes = {fila[0] for fila in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' * len(RESUMENES))})",
+            tuple(RESUMENES))}
+        for tabla, resumen in RESUMENES.items():
+            claves = _claves(resumen)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {tabla} (
+                    {', '.join(f"{clave} TEXT NOT NULL" for clave in claves)},
+                    {', '.join(f"{medida} INTEGER NOT NULL DEFAULT 0" for medida in resumen['medidas'])},
+                    PRIMARY KEY ({', '.join(claves)})
+                ) WITHOUT ROWID
+            """)
+        # Los triggers se crean antes de reconstruir: lo que se escriba en el medio queda
+        # contado por la reconstrucción o por el trigger, nunca por los dos
+        for origen in _COLUMNAS_ORIGEN:
+            for sentencia in _sql_triggers(origen):
+                conn.execute(sentencia)
+        conn.commit()
+    except sqlite3.Error as e:
+        logging.error(f"Error al crear las tablas de resumen: {e}")
+        raise Exception(f"Error al crear las tablas de resumen: {e}")
+    if existentes != set(RESUMENES):
+        reconstruir_resumenes(conn)
+    if ruta_db is not None:
+        _esquemas_verificados.add(ruta_db)
+
+def reconstruir_resumenes(conn, completo=False):
+    """
+    Recalcula las tablas de resumen desde boletines y envios_log.
+
+    Args:
+        conn: Conexión a la base de datos
+        completo: Si es True, los resúmenes de envíos se recalculan solo con lo que queda en
+                  envios_log; si es False (por defecto) se conserva lo ya contado de los
+                  envíos purgados (cada grupo queda con el mayor de los dos conteos)
+
+    Returns:
+        dict: Filas de cada tabla de resumen después de la reconstrucción
+    """
+    filas = {}
+    try:
+        for tabla, resumen in RESUMENES.items():
+            claves = _claves(resumen)
+            medidas = resumen['medidas']
+            seleccion = ', '.join(_expresiones_clave(resumen, 'o') +
+                                  [f"SUM({expresion.format(fila='o')})" for expresion in medidas.values()])
+            conservar = resumen['origen'] not in _ORIGENES_CON_BAJAS and not completo
+            if not conservar:
+                conn.execute(f"DELETE FROM {tabla}")
+            # WHERE 1: sin él, SQLite confunde el ON CONFLICT con el ON de un JOIN
+            conn.execute(f"""
+                INSERT INTO {tabla} ({', '.join(claves + tuple(medidas))})
+                SELECT {seleccion}
+                FROM {resumen['origen']} o
+                WHERE 1
+                GROUP BY {', '.join(str(posicion) for posicion in range(1, len(claves) + 1))}
+                ON CONFLICT ({', '.join(claves)}) DO UPDATE SET
+                    {', '.join(f"{medida} = MAX({medida}, excluded.{medida})" for medida in medidas)}
+            """)
+            filas[tabla] = conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al reconstruir las tablas de resumen: {e}")
+        raise Exception(f"Error al reconstruir las tablas de resumen: {e}")
+    invalidar_tablas(conn, *RESUMENES)
+    logging.info(f"Tablas de resumen reconstruidas: {filas}")
+    return filas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstruye las tablas de resumen de boletines y envíos")
+    parser.add_argument('--base', default=None, help="Base SQLite (por defecto la de la aplicación)")
+    parser.add_argument('--completo', action='store_true',
+                        help="Recalcular los envíos solo con envios_log (descarta lo contado de envíos purgados)")
+    args = parser.parse_args(argv)
+
+    import database
+    conn = sqlite3.connect(args.base or get_db_path())
+    try:
+        database.crear_tabla(conn)
+        for tabla, cantidad in reconstruir_resumenes(conn, completo=args.completo).items():
+            print(f"{tabla}: {cantidad} filas")
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
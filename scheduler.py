@@ -0,0 +1,388 @@
+"""
+Planificador persistente de tareas periódicas (verificación mensual, archivo de informes).
+
+- Cada tarea tiene una especificación tipo cron ("min hora día mes día_semana") y su fila en
+  scheduled_jobs guarda la última y la próxima ejecución, así que una ejecución que cayó
+  con la aplicación apagada se recupera (una sola vez) en cuanto vuelve a haber un planificador.
+- Antes de ejecutar, el proceso toma una concesión (lease) sobre la fila con un UPDATE
+  condicional: entre varios procesos de Streamlit y el cron de ejecucion_programada.py solo
+  uno ejecuta cada vencimiento. La concesión se renueva mientras la tarea corre y vence sola
+  si el proceso muere.
+- Las tareas corren como trabajos de jobs.py (mismo tipo que el lanzamiento manual desde la
+  interfaz), de modo que se ven en el seguimiento de progreso y no se solapan con una
+  ejecución manual.
+- iniciar_planificador() lanza un hilo por proceso que duerme hasta el próximo vencimiento;
+  ejecutar_pendientes() sirve para invocarlo desde cron.
+"""
+import logging
+import os
+import socket
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import jobs
+from database import crear_conexion
+
+DURACION_LEASE_SEGUNDOS = 300
+# Si el trabajo del mismo tipo ya está en curso (p. ej. lanzado a mano), reintentar luego
+REINTENTO_SEGUNDOS = 300
+# Tope de espera del hilo entre revisiones, para notar cambios hechos por otros procesos
+ESPERA_MAXIMA_SEGUNDOS = 900
+# Horizonte de búsqueda de la próxima ejecución (cubre especificaciones como 29 de febrero)
+_DIAS_BUSQUEDA = 366 * 8
+
+COLUMNAS_TAREA = ('nombre', 'spec', 'descripcion', 'activo', 'ultima_ejecucion', 'proxima_ejecucion',
+                  'ultimo_estado', 'ultimo_trabajo_id', 'lease_propietario', 'lease_hasta')
+
+_FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+# {nombre: {'spec', 'funcion', 'descripcion'}}
+_tareas = {}
+_lock = threading.Lock()
+_hilo = None
+_detener = threading.Event()
+_esquemas_verificados = set()
+
+def _parsear_campo(campo, minimo, maximo):
+    """Convierte un campo cron (*, n, a-b, */n, a-b/n y listas) en el conjunto de valores."""
+    valores = set()
+    for parte in campo.split(','):
+        rango, _, paso = parte.partition('/')
+        if rango == '*':
+            inicio, fin = minimo, maximo
+        elif '-' in rango:
+            inicio, fin = (int(x) for x in rango.split('-', 1))
+        else:
+            inicio = int(rango)
+            fin = maximo if paso else inicio
+        paso = int(paso) if paso else 1
+        if inicio < minimo or fin > maximo or inicio > fin or paso < 1:
+            raise ValueError(f"Campo cron fuera de rango: {parte}")
+        valores.update(range(inicio, fin + 1, paso))
+    return valores
+
+def parsear_spec(spec):
+    """
+    Interpreta una especificación cron de cinco campos.
+
+    Args:
+        spec: "minuto hora día_del_mes mes día_de_la_semana" (día de la semana 0-7, 0 y 7 = domingo)
+
+    Returns:
+        dict: Conjuntos de valores por campo, y si día del mes / día de la semana están restringidos
+
+    Raises:
+        ValueError: Si la especificación no es válida
+    """
+    campos = spec.split()
+    if len(campos) != 5:
+        raise ValueError(f"La especificación debe tener 5 campos: '{spec}'")
+    dias_semana = _parsear_campo(campos[4], 0, 7)
+    if 7 in dias_semana:
+        dias_semana = (dias_semana - {7}) | {0}
+    return {
+        'minutos': sorted(_parsear_campo(campos[0], 0, 59)),
+        'horas': sorted(_parsear_campo(campos[1], 0, 23)),
+        'dias': _parsear_campo(campos[2], 1, 31),
+        'meses': _parsear_campo(campos[3], 1, 12),
+        'dias_semana': dias_semana,
+        'dia_restringido': campos[2] != '*',
+        'semana_restringida': campos[4] != '*',
+    }
+
+def siguiente_ejecucion(spec, desde):
+    """
+    Calcula la primera ejecución estrictamente posterior a una fecha.
+
+    Args:
+        spec: Especificación cron
+        desde: datetime de referencia
+
+    Returns:
+        datetime: Próximo instante que cumple la especificación
+    """
+    cron = parsear_spec(spec)
+    inicio = desde.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    dia = inicio.date()
+    for _ in range(_DIAS_BUSQUEDA):
+        if dia.month in cron['meses']:
+            coincide_dia = dia.day in cron['dias']
+            # isoweekday: lunes=1 ... domingo=7; cron: domingo=0
+            coincide_semana = dia.isoweekday() % 7 in cron['dias_semana']
+            if cron['dia_restringido'] and cron['semana_restringida']:
+                # Como en cron: si ambos están restringidos alcanza con uno
+                coincide = coincide_dia or coincide_semana
+            else:
+                coincide = coincide_dia and coincide_semana
+            if coincide:
+                for hora in cron['horas']:
+                    for minuto in cron['minutos']:
+                        candidato = datetime(dia.year, dia.month, dia.day, hora, minuto)
+                        if candidato >= inicio:
+                            return candidato
+        dia += timedelta(days=1)
+    raise ValueError(f"La especificación '{spec}' no tiene ejecuciones próximas")
+
+def registrar_tarea(nombre, spec, funcion, descripcion=None):
+    """
+    Registra una tarea periódica en este proceso.
+
+    Args:
+        nombre: Nombre de la tarea; también es el tipo del trabajo en la tabla jobs
+        spec: Especificación cron
+        funcion: Callable funcion(conn, progreso), como en jobs.ejecutar_trabajo()
+        descripcion: Texto descriptivo opcional
+    """
+    parsear_spec(spec)
+    _tareas[nombre] = {'spec': spec, 'funcion': funcion, 'descripcion': descripcion}
+
+def registrar_tareas_predeterminadas():
+    """Registra las tareas periódicas de la aplicación."""
+    def verificacion_mensual(conn, progreso):
+        from verificar_titulares_sin_reportes import verificar_titulares_sin_reportes
+        return verificar_titulares_sin_reportes(conn, progreso=progreso)
+
+    def archivar_informes(conn, progreso):
+        from report_catalog import archivar_informes as archivar
+        return archivar(conn)
+
+    registrar_tarea('verificacion_mensual', '0 8 1 * *', verificacion_mensual,
+                    "Verificación de titulares sin reportes")
+    registrar_tarea('archivar_informes', '30 3 * * *', archivar_informes,
+                    "Archivo de informes fuera de retención")
+
+def _asegurar_tabla_scheduled_jobs(conn):
+    """Crea la tabla scheduled_jobs si no existe (una vez por base y proceso)."""
+    ruta_db = getattr(conn, 'ruta_db', None)
+    if ruta_db is not None and ruta_db in _esquemas_verificados:
+        return
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                nombre TEXT PRIMARY KEY,
+                spec TEXT NOT NULL,
+                descripcion TEXT,
+                activo INTEGER NOT NULL DEFAULT 1,
+                ultima_ejecucion TEXT,
+                proxima_ejecucion TEXT,
+                ultimo_estado TEXT,
+                ultimo_trabajo_id INTEGER,
+                lease_propietario TEXT,
+                lease_hasta TEXT
+            )
+        """)
+        conn.commit()
+    except sqlite3.Error as e:
+        logging.error(f"Error al crear la tabla scheduled_jobs: {e}")
+        raise Exception(f"Error al crear la tabla scheduled_jobs: {e}")
+    if ruta_db is not None:
+        _esquemas_verificados.add(ruta_db)
+
+def _formatear(fecha):
+    return fecha.strftime(_FORMATO_FECHA)
+
+def sincronizar_tareas(conn, ahora=None):
+    """
+    Da de alta en scheduled_jobs las tareas registradas y recalcula la próxima ejecución de
+    las que cambiaron de especificación. Las filas existentes conservan su próxima ejecución,
+    de modo que los vencimientos perdidos siguen pendientes.
+    """
+    _asegurar_tabla_scheduled_jobs(conn)
+    ahora = ahora or datetime.now()
+    try:
+        for nombre, tarea in _tareas.items():
+            proxima = _formatear(siguiente_ejecucion(tarea['spec'], ahora))
+            conn.execute("""
+                INSERT INTO scheduled_jobs (nombre, spec, descripcion, proxima_ejecucion)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(nombre) DO UPDATE SET
+                    descripcion = excluded.descripcion,
+                    proxima_ejecucion = CASE WHEN spec = excluded.spec THEN proxima_ejecucion
+                                             ELSE excluded.proxima_ejecucion END,
+                    spec = excluded.spec
+            """, (nombre, tarea['spec'], tarea['descripcion'], proxima))
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al sincronizar tareas programadas: {e}")
+        raise Exception(f"Error al sincronizar tareas programadas: {e}")
+
+def listar_tareas(conn):
+    """
+    Lista las tareas programadas con su última y próxima ejecución.
+
+    Returns:
+        list[dict]: Filas de scheduled_jobs ordenadas por próxima ejecución
+    """
+    _asegurar_tabla_scheduled_jobs(conn)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNAS_TAREA)} FROM scheduled_jobs ORDER BY proxima_ejecucion")
+        return [dict(zip(COLUMNAS_TAREA, fila)) for fila in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logging.error(f"Error al listar tareas programadas: {e}")
+        raise Exception(f"Error al listar tareas programadas: {e}")
+
+def _propietario():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+def _tomar_lease(conn, nombre, propietario, ahora, forzar):
+    """Toma la concesión de una tarea vencida (o de cualquiera si forzar). True si se obtuvo."""
+    condicion_vencida = "" if forzar else "AND proxima_ejecucion <= ?"
+    parametros = [propietario, _formatear(ahora + timedelta(seconds=DURACION_LEASE_SEGUNDOS)), nombre]
+    if not forzar:
+        parametros.append(_formatear(ahora))
+    parametros.append(_formatear(ahora))
+    cursor = conn.execute(f"""
+        UPDATE scheduled_jobs SET lease_propietario = ?, lease_hasta = ?
+        WHERE nombre = ? AND activo = 1 {condicion_vencida}
+          AND (lease_hasta IS NULL OR lease_hasta < ?)
+    """, parametros)
+    conn.commit()
+    return cursor.rowcount == 1
+
+def _renovar_lease(nombre, propietario, terminado):
+    """Extiende la concesión mientras la tarea sigue corriendo."""
+    while not terminado.wait(DURACION_LEASE_SEGUNDOS / 3):
+        try:
+            conn = crear_conexion()
+            try:
+                hasta = datetime.now() + timedelta(seconds=DURACION_LEASE_SEGUNDOS)
+                conn.execute("UPDATE scheduled_jobs SET lease_hasta = ? WHERE nombre = ? AND lease_propietario = ?",
+                             (_formatear(hasta), nombre, propietario))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.warning(f"No se pudo renovar la concesión de la tarea '{nombre}': {e}")
+
+def _cerrar_ejecucion(conn, nombre, propietario, proxima, estado=None, trabajo_id=None, ultima=None):
+    conn.execute("""
+        UPDATE scheduled_jobs
+        SET proxima_ejecucion = ?, ultimo_estado = COALESCE(?, ultimo_estado),
+            ultimo_trabajo_id = COALESCE(?, ultimo_trabajo_id),
+            ultima_ejecucion = COALESCE(?, ultima_ejecucion),
+            lease_propietario = NULL, lease_hasta = NULL
+        WHERE nombre = ? AND lease_propietario = ?
+    """, (_formatear(proxima), estado, trabajo_id, ultima and _formatear(ultima), nombre, propietario))
+    conn.commit()
+
+def ejecutar_tarea(conn, nombre, ahora=None, forzar=False):
+    """
+    Ejecuta una tarea registrada en el hilo actual si está vencida y este proceso obtiene su
+    concesión; al terminar deja calculada la próxima ejecución.
+
+    Args:
+        conn: Conexión a la base de datos
+        nombre: Nombre de la tarea
+        ahora: Fecha de referencia (por defecto ahora)
+        forzar: Ejecutar aunque no esté vencida
+
+    Returns:
+        dict | None: {'nombre', 'estado', 'trabajo_id'} o None si no correspondía ejecutarla
+    """
+    tarea = _tareas[nombre]
+    ahora = ahora or datetime.now()
+    propietario = _propietario()
+    try:
+        if not _tomar_lease(conn, nombre, propietario, ahora, forzar):
+            return None
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al tomar la tarea programada '{nombre}': {e}")
+        raise Exception(f"Error al tomar la tarea programada: {e}")
+
+    try:
+        try:
+            trabajo_id = jobs.reservar_trabajo(conn, nombre, tarea['descripcion'])
+        except jobs.TrabajoEnCurso as e:
+            logging.info(f"Tarea '{nombre}' pospuesta: {e}")
+            _cerrar_ejecucion(conn, nombre, propietario, ahora + timedelta(seconds=REINTENTO_SEGUNDOS))
+            return {'nombre': nombre, 'estado': 'pospuesta', 'trabajo_id': e.trabajo['id']}
+
+        logging.info(f"Ejecutando tarea programada '{nombre}' (trabajo {trabajo_id})")
+        terminado = threading.Event()
+        threading.Thread(target=_renovar_lease, args=(nombre, propietario, terminado),
+                         name=f'lease-{nombre}', daemon=True).start()
+        try:
+            jobs.ejecutar_trabajo(trabajo_id, tarea['funcion'])
+        finally:
+            terminado.set()
+        estado = jobs.obtener_trabajo(conn, trabajo_id)['estado']
+        fin = max(datetime.now(), ahora)
+        _cerrar_ejecucion(conn, nombre, propietario, siguiente_ejecucion(tarea['spec'], fin),
+                          estado, trabajo_id, ahora)
+        logging.info(f"Tarea programada '{nombre}' terminada: {estado}")
+        return {'nombre': nombre, 'estado': estado, 'trabajo_id': trabajo_id}
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.error(f"Error al registrar la tarea programada '{nombre}': {e}")
+        raise Exception(f"Error al registrar la tarea programada: {e}")
+
+def ejecutar_pendientes(conn=None, ahora=None):
+    """
+    Ejecuta las tareas vencidas (incluidas las que vencieron con la aplicación apagada).
+
+    Args:
+        conn: Conexión a la base de datos (si no se indica se abre una)
+        ahora: Fecha de referencia (por defecto ahora)
+
+    Returns:
+        list[dict]: Resultado de cada tarea ejecutada o pospuesta
+    """
+    propia = conn is None
+    conn = conn or crear_conexion()
+    try:
+        ahora = ahora or datetime.now()
+        sincronizar_tareas(conn, ahora)
+        ejecutadas = []
+        for tarea in listar_tareas(conn):
+            if tarea['nombre'] not in _tareas or not tarea['activo']:
+                continue
+            if tarea['proxima_ejecucion'] and tarea['proxima_ejecucion'] <= _formatear(ahora):
+                resultado = ejecutar_tarea(conn, tarea['nombre'], ahora)
+                if resultado is not None:
+                    ejecutadas.append(resultado)
+        return ejecutadas
+    finally:
+        if propia:
+            conn.close()
+
+def _segundos_hasta_proxima(conn):
+    proximas = [t['proxima_ejecucion'] for t in listar_tareas(conn)
+                if t['nombre'] in _tareas and t['activo'] and t['proxima_ejecucion']]
+    if not proximas:
+        return ESPERA_MAXIMA_SEGUNDOS
+    espera = (datetime.strptime(min(proximas), _FORMATO_FECHA) - datetime.now()).total_seconds()
+    return min(max(espera, 1), ESPERA_MAXIMA_SEGUNDOS)
+
+def _bucle_planificador():
+    logging.info("Planificador de tareas iniciado")
+    while not _detener.is_set():
+        espera = ESPERA_MAXIMA_SEGUNDOS
+        try:
+            conn = crear_conexion()
+            try:
+                ejecutar_pendientes(conn)
+                espera = _segundos_hasta_proxima(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.error(f"Error en el planificador de tareas: {e}", exc_info=True)
+        _detener.wait(espera)
+    logging.info("Planificador de tareas detenido")
+
+def iniciar_planificador():
+    """Inicia el hilo del planificador de este proceso (si no estaba ya en marcha)."""
+    global _hilo
+    with _lock:
+        if _hilo is not None and _hilo.is_alive():
+            return
+        if not _tareas:
+            registrar_tareas_predeterminadas()
+        _detener.clear()
+        _hilo = threading.Thread(target=_bucle_planificador, name='planificador', daemon=True)
+        _hilo.start()
+
+def detener_planificador():
+    """Pide al hilo del planificador que termine."""
+    _detener.set()
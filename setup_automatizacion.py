@@ -154,15 +154,16 @@ def instalar_cron_job():
             # Crear comando con ruta absoluta y cambio de directorio
             command = f'cd {working_dir} && {sys.executable} {script_path} >> {working_dir}/verificacion_log.txt 2>&1'
             
-            # Crear nuevo trabajo cron para ejecutar el primer día de cada mes a las 8:00 AM
-            job = cron.new(command=command, comment='Verificación mensual de titulares sin reportes')
-            job.setall('0 8 1 * *')  # Primer día de cada mes a las 8:00 AM
+            # Crear nuevo trabajo cron cada hora: el calendario de cada tarea lo lleva scheduler.py
+            # y las ejecuciones perdidas se recuperan en la siguiente pasada
+            job = cron.new(command=command, comment='Tareas programadas (verificación mensual, archivo de informes)')
+            job.setall('0 * * * *')
             
             # Guardar crontab
             cron.write()
             
             print(f"✅ Cron job configurado correctamente: {job}")
-            print(f"Se ejecutará automáticamente el primer día de cada mes a las 8:00 AM")
+            print(f"Se ejecutará cada hora; la verificación corre el primer día de cada mes a las 8:00 AM")
             
         except ImportError:
             print("❌ No se pudo importar python-crontab. Intente instalarlo con: pip install python-crontab")
@@ -178,7 +179,7 @@ def instalar_cron_job():
         print(f"   - Programa: {sys.executable}")
         print(f"   - Argumentos: {os.path.abspath('ejecucion_programada.py')}")
         print(f"   - Iniciar en: {os.path.dirname(os.path.abspath('ejecucion_programada.py'))}")
-        print("   - Programar: Mensual, día 1 de cada mes a las 8:00 AM")
+        print("   - Programar: Diariamente, repitiendo la tarea cada 1 hora")
         print("   - Activar la opción de ejecutarse aunque el usuario no haya iniciado sesión")
     else:
         print(f"Sistema operativo no reconocido: {system}")
@@ -16,7 +16,12 @@ GRID_CONFIG = {
     "clients_pagination_page_size": 20,
     "min_column_width": 100,
     "grid_height": 400,
-    "clients_grid_height": 600
+    "clients_grid_height": 600,
+    # Ajuste automático de filas (wrapText/autoHeight): mide cada fila en el navegador
+    "auto_size_columns": False,
+    # Filas por bloque en los grids paginados desde la base de datos
+    "block_size": 100,
+    "block_size_options": [50, 100, 250, 500]
 }
 
 # Columnas del grid de boletines
@@ -32,6 +37,7 @@ BULLETIN_COLUMNS = {
     'marca_publicada': {"width": 200, "header_name": "Marca Publicada"},
     'clases_acta': {"width": 120, "header_name": "Clases"},
     'titular': {"width": 300, "wrapText": True, "autoHeight": True},
+    'informe': {"width": 260, "header_name": "📎 Informe", "editable": False},
     'reporte_enviado': {
         "width": 120, 
         "header_name": "📤 Enviado",
@@ -102,6 +108,7 @@ NAVIGATION_TABS = [
     {"name": "Marcas", "icon": "tags-fill"},
     {"name": "Informes", "icon": "file-earmark-text-fill"},
     {"name": "Emails", "icon": "envelope-fill"},
+    {"name": "Analítica", "icon": "bar-chart-line-fill"},
     {"name": "Configuración", "icon": "gear-fill"}
 ]
 
@@ -136,5 +143,6 @@ NAVIGATION_TABS = [
     {"name": "Marcas", "icon": "building"},
     {"name": "Informes", "icon": "file-earmark-text"},
     {"name": "Emails", "icon": "envelope"},
+    {"name": "Analítica", "icon": "bar-chart-line"},
     {"name": "Configuración", "icon": "gear"}
 ]
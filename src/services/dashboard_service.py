@@ -0,0 +1,181 @@
+"""
+Servicio de datos del dashboard
+"""
+import logging
+import sqlite3
+import sys
+import os
+from datetime import date, datetime, timezone
+from typing import Dict, Any, List, Tuple
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from query_cache import consulta_cacheada
+
+
+# Días transcurridos desde la fecha del boletín (DD/MM/YYYY); NULL si la fecha falta o no es válida
+DIAS_DESDE_BOLETIN = """
+    CAST(julianday(date('now')) - julianday(date(substr(fecha_boletin, 7, 4) || '-' ||
+                                                 substr(fecha_boletin, 4, 2) || '-' ||
+                                                 substr(fecha_boletin, 1, 2))) AS INTEGER)
+"""
+
+# Plazo legal para el envío del reporte y comienzo de la ventana "próximo a vencer"
+PLAZO_LEGAL_DIAS = 30
+INICIO_PROXIMOS_VENCER_DIAS = 23
+LIMITE_TOP_TITULARES = 10
+DIAS_TIMELINE = 30
+# Resúmenes que lee el dashboard (también cambian al reconstruirlos con rollups.py)
+TABLAS_RESUMEN_DASHBOARD = ('resumen_boletines_diario', 'resumen_boletines_mensual')
+
+
+def _hoy_utc() -> date:
+    """Fecha actual en UTC, la misma que usa date('now') en las consultas (clave de la caché)"""
+    return datetime.now(timezone.utc).date()
+
+# Totales, ranking de titulares y línea de tiempo salen de las tablas de resumen (rollups.py);
+# de boletines solo se leen los pendientes de envío (índice parcial idx_boletines_pendientes)
+# para los tramos de vencimiento, que dependen de la fecha actual.
+SQL_RESUMEN_DASHBOARD = f"""
+    WITH totales AS (
+        SELECT COALESCE(SUM(cantidad), 0) AS cantidad, COALESCE(SUM(generados), 0) AS generados,
+               COALESCE(SUM(enviados), 0) AS enviados
+        FROM resumen_boletines_mensual
+    ),
+    pendientes AS (
+        SELECT COALESCE(SUM(dias_pendiente BETWEEN 0 AND {PLAZO_LEGAL_DIAS}), 0) AS en_curso,
+               COALESCE(SUM(dias_pendiente BETWEEN {INICIO_PROXIMOS_VENCER_DIAS} AND {PLAZO_LEGAL_DIAS}), 0) AS proximos_vencer,
+               COALESCE(SUM(dias_pendiente > {PLAZO_LEGAL_DIAS}), 0) AS vencidos
+        FROM (
+            SELECT {DIAS_DESDE_BOLETIN} AS dias_pendiente
+            FROM boletines
+            WHERE reporte_enviado = 0 AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
+        )
+    ),
+    titulares AS (
+        SELECT titular, SUM(cantidad) AS cantidad,
+               ROW_NUMBER() OVER (ORDER BY SUM(cantidad) DESC, titular) AS puesto
+        FROM resumen_boletines_mensual
+        GROUP BY titular
+    )
+    SELECT 'total' AS tipo, NULL AS clave,
+           t.cantidad, t.generados, t.enviados, p.en_curso, p.proximos_vencer, p.vencidos,
+           (SELECT COUNT(DISTINCT titular) FROM clientes) AS total_clientes
+    FROM totales t, pendientes p
+    UNION ALL
+    SELECT 'titular', NULLIF(titular, ''), cantidad, puesto, NULL, NULL, NULL, NULL, NULL
+    FROM titulares
+    WHERE puesto <= {LIMITE_TOP_TITULARES}
+    UNION ALL
+    SELECT 'dia', dia, SUM(cantidad), NULL, NULL, NULL, NULL, NULL, NULL
+    FROM resumen_boletines_diario
+    WHERE dia >= date('now', '-{DIAS_TIMELINE} days')
+    GROUP BY dia
+"""
+
+# Listados de detalle por tramo de vencimiento: (condición sobre dias, valor mostrado, orden, límite)
+_TRAMOS_DETALLE = {
+    'vencidos': (f"dias > {PLAZO_LEGAL_DIAS}", f"dias - {PLAZO_LEGAL_DIAS}", "DESC", 10),
+    'proximos_vencer': (f"dias BETWEEN {INICIO_PROXIMOS_VENCER_DIAS} AND {PLAZO_LEGAL_DIAS}",
+                        f"{PLAZO_LEGAL_DIAS} - dias", "ASC", 10),
+    'en_curso': (f"dias BETWEEN 0 AND {PLAZO_LEGAL_DIAS}", "dias", "ASC", None),
+}
+
+
+class DashboardService:
+    """Servicio de datos agregados del dashboard"""
+
+    @staticmethod
+    def get_dashboard_data(conn) -> Dict[str, Any]:
+        """
+        Obtener contadores, línea de tiempo y top titulares del dashboard
+
+        El resultado se cachea por versión de las tablas y por día UTC (los tramos dependen de date('now')).
+
+        Args:
+            conn: Conexión a la base de datos
+
+        Returns:
+            Diccionario con los datos del dashboard (compartido, no modificar)
+        """
+        return consulta_cacheada(conn, ('boletines', 'clientes') + TABLAS_RESUMEN_DASHBOARD,
+                                 ('dashboard', _hoy_utc()),
+                                 DashboardService._query_dashboard_data)
+
+    @staticmethod
+    def _query_dashboard_data(conn) -> Dict[str, Any]:
+        """Consulta sin caché de get_dashboard_data()"""
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(SQL_RESUMEN_DASHBOARD)
+            filas = cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Error al consultar datos del dashboard: {e}")
+            raise Exception(f"Error al consultar datos del dashboard: {e}")
+        finally:
+            if cursor:
+                cursor.close()
+
+        data = {}
+        top_titulares = []
+        datos_timeline = []
+        for tipo, clave, *valores in filas:
+            if tipo == 'total':
+                (data['total_boletines'], data['reportes_generados'], data['reportes_enviados'],
+                 data['reportes_en_curso'], data['proximos_vencer'], data['reportes_vencidos'],
+                 data['total_clientes']) = valores
+            elif tipo == 'titular':
+                top_titulares.append((valores[1], clave, valores[0]))
+            else:
+                datos_timeline.append((clave, valores[0]))
+
+        data['top_titulares'] = [(titular, cantidad) for _, titular, cantidad in sorted(top_titulares)]
+        data['datos_timeline'] = sorted(datos_timeline)
+        return data
+
+    @staticmethod
+    def get_deadline_details(conn, tramo: str) -> List[Tuple]:
+        """
+        Obtener el listado de boletines pendientes de envío de un tramo de vencimiento
+
+        Args:
+            conn: Conexión a la base de datos
+            tramo: 'vencidos', 'proximos_vencer' o 'en_curso'
+
+        Returns:
+            Lista de (numero_boletin, titular, fecha_boletin, días) donde días es el vencimiento,
+            los días restantes o los días transcurridos según el tramo
+        """
+        if tramo not in _TRAMOS_DETALLE:
+            raise ValueError(f"Tramo desconocido: {tramo}")
+        return consulta_cacheada(conn, ('boletines',), ('dashboard_detalle', tramo, _hoy_utc()),
+                                 lambda conn: DashboardService._query_deadline_details(conn, tramo))
+
+    @staticmethod
+    def _query_deadline_details(conn, tramo: str) -> List[Tuple]:
+        """Consulta sin caché de get_deadline_details()"""
+        condicion, valor, orden, limite = _TRAMOS_DETALLE[tramo]
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                WITH pendientes AS (
+                    SELECT numero_boletin, titular, fecha_boletin, {DIAS_DESDE_BOLETIN} AS dias
+                    FROM boletines
+                    WHERE reporte_enviado = 0 AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
+                )
+                SELECT numero_boletin, titular, fecha_boletin, {valor} AS dias_tramo
+                FROM pendientes
+                WHERE {condicion}
+                ORDER BY dias_tramo {orden}
+                {f'LIMIT {limite}' if limite else ''}
+            """)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Error al consultar detalle del dashboard: {e}")
+            raise Exception(f"Error al consultar detalle del dashboard: {e}")
+        finally:
+            if cursor:
+                cursor.close()
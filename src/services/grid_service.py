@@ -3,7 +3,6 @@ Servicio para manejo de grids y tablas
 """
 import streamlit as st
 import pandas as pd
-import time
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
 from typing import Dict, Any, Optional, Tuple
 import sys
@@ -12,23 +11,39 @@ import os
 # Agregar el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from database import crear_conexion, actualizar_registro
+from database import crear_conexion, actualizar_importancias_lote, obtener_bloque_boletines, COLUMNAS_GRID_BOLETINES
 from src.config.constants import BULLETIN_COLUMNS, CLIENT_COLUMNS, GRID_CONFIG
-from src.utils.session_manager import SessionManager
 
 
 class GridService:
     """Servicio para manejo de grids con ag-Grid"""
     
     @staticmethod
-    def _configure_bulletin_grid(gb: GridOptionsBuilder) -> None:
+    def _auto_size_options(auto_size: Optional[bool] = None) -> Dict[str, bool]:
+        """
+        Opciones de ajuste automático de filas para configure_default_column
+        
+        Args:
+            auto_size: Activar wrapText/autoHeight (por defecto GRID_CONFIG["auto_size_columns"])
+            
+        Returns:
+            Diccionario con wrapText y autoHeight
+        """
+        if auto_size is None:
+            auto_size = GRID_CONFIG.get("auto_size_columns", False)
+        return {"wrapText": auto_size, "autoHeight": auto_size}
+    
+    @staticmethod
+    def _configure_bulletin_grid(gb: GridOptionsBuilder, auto_size: Optional[bool] = None,
+                                 paginate: bool = True) -> None:
         """Configurar grid para boletines"""
         # Configuración base
-        gb.configure_pagination(
-            enabled=True,
-            paginationAutoPageSize=False,
-            paginationPageSize=GRID_CONFIG["pagination_page_size"]
-        )
+        if paginate:
+            gb.configure_pagination(
+                enabled=True,
+                paginationAutoPageSize=False,
+                paginationPageSize=GRID_CONFIG["pagination_page_size"]
+            )
         gb.configure_selection(selection_mode='single', use_checkbox=True)
         
         # Configuración por defecto de columnas
@@ -40,9 +55,8 @@ class GridService:
             sorteable=True,
             filterable=True,
             resizable=True,
-            wrapText=True,
-            autoHeight=True,
-            minWidth=GRID_CONFIG["min_column_width"]
+            minWidth=GRID_CONFIG["min_column_width"],
+            **GridService._auto_size_options(auto_size)
         )
         
         # Configurar columnas específicas
@@ -50,7 +64,7 @@ class GridService:
             gb.configure_column(column, **config)
     
     @staticmethod
-    def _configure_client_grid(gb: GridOptionsBuilder) -> None:
+    def _configure_client_grid(gb: GridOptionsBuilder, auto_size: Optional[bool] = None) -> None:
         """Configurar grid para clientes"""
         # Configuración base
         gb.configure_pagination(
@@ -69,11 +83,10 @@ class GridService:
             sorteable=True,
             filterable=True,
             resizable=True,
-            wrapText=True,
-            autoHeight=True,
             minWidth=GRID_CONFIG["min_column_width"],
             flex=1,
-            singleClickEdit=True
+            singleClickEdit=True,
+            **GridService._auto_size_options(auto_size)
         )
         
         # Configurar columnas específicas
@@ -88,84 +101,106 @@ class GridService:
         )
     
     @staticmethod
-    def _handle_importance_changes(grid_response):
-        """Procesa cambios de importancia en el grid"""
-        # Limpiar el tracking de cambios para permitir procesar todos los cambios en cada edición
-        import streamlit as st
-        if 'cambios_procesados' in st.session_state:
-            st.session_state.cambios_procesados.clear()
+    def _diff_importances(snapshot: pd.DataFrame, current: pd.DataFrame) -> Dict[int, str]:
+        """
+        Comparar la importancia del grid con la del último snapshot cargado
+        
+        Args:
+            snapshot: DataFrame mostrado en el grid (columnas id e importancia)
+            current: Datos devueltos por el grid
+            
+        Returns:
+            Diccionario {id: nueva importancia} solo con las celdas modificadas
+        """
+        columns = ['id', 'importancia']
+        if current.empty or not set(columns).issubset(current.columns) or not set(columns).issubset(snapshot.columns):
+            return {}
+        
+        original = snapshot[columns].astype({'id': int}).set_index('id')
+        edited = current[columns].astype({'id': int}).set_index('id')
+        merged = edited.join(original, rsuffix='_original', how='inner')
+        changed = merged[merged['importancia'].astype(str) != merged['importancia_original'].astype(str)]
+        return changed['importancia'].to_dict()
+    
+    # Columnas editables del grid de clientes
+    CLIENT_EDITABLE_COLUMNS = ['titular', 'email', 'telefono', 'direccion', 'ciudad', 'provincia', 'cuit']
+    
+    @staticmethod
+    def _diff_clients(snapshot: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+        """
+        Comparar los datos del grid de clientes con el último snapshot cargado
+        
+        Args:
+            snapshot: DataFrame mostrado en el grid
+            current: Datos devueltos por el grid
+            
+        Returns:
+            DataFrame con las filas modificadas (id, columnas editables normalizadas a texto
+            y 'campos_cambiados' con la lista de columnas editadas)
+        """
+        columns = ['id'] + GridService.CLIENT_EDITABLE_COLUMNS
+        if current.empty or not set(columns).issubset(current.columns) or not set(columns).issubset(snapshot.columns):
+            return pd.DataFrame(columns=columns + ['campos_cambiados'])
+        
+        # Normalizar valores para comparación (NaN y None como texto vacío)
+        def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+            df = df[columns].astype({'id': int}).set_index('id')
+            return df.where(df.notna(), '').astype(str)
+        
+        edited = _normalize(current)
+        merged = edited.join(_normalize(snapshot), rsuffix='_original', how='inner')
+        original = merged[[f"{column}_original" for column in GridService.CLIENT_EDITABLE_COLUMNS]]
+        original.columns = GridService.CLIENT_EDITABLE_COLUMNS
+        differences = merged[GridService.CLIENT_EDITABLE_COLUMNS].ne(original)
+        changed_rows = differences.any(axis=1)
+        
+        result = merged.loc[changed_rows, GridService.CLIENT_EDITABLE_COLUMNS].copy()
+        result['campos_cambiados'] = [
+            list(differences.columns[mask]) for mask in differences[changed_rows].to_numpy()
+        ]
+        return result.reset_index()
+    
+    @staticmethod
+    def _handle_importance_changes(grid_response, snapshot: pd.DataFrame) -> bool:
+        """Procesa cambios de importancia en el grid aplicándolos en un único lote"""
         if not grid_response or not hasattr(grid_response, 'data'):
             return False
-        from database import crear_conexion as get_db_connection, obtener_datos, actualizar_registro
-        import pandas as pd
         try:
-            current_data = pd.DataFrame(grid_response.data)
-            conn = get_db_connection()
-            original_rows, original_columns = obtener_datos(conn)
-            original_df = pd.DataFrame(original_rows, columns=original_columns)
-            conn.close()
-            cambios_realizados = False
-            for index, row in current_data.iterrows():
-                # Usar un change_id único por registro
-                change_id = f"importance_{row['id']}"
-                if SessionManager.track_change(change_id):
-                    continue
-                original_row = original_df[original_df['id'] == int(row['id'])].iloc[0]
-                # Solo actualizar si la importancia realmente cambió
-                if str(row['importancia']) != str(original_row['importancia']):
-                    conn = None
-                    try:
-                        conn = get_db_connection()
-                        if conn:
-                            actualizar_registro(
-                                conn,
-                                int(row['id']),
-                                row['numero_boletin'],
-                                row['fecha_boletin'],
-                                row['numero_orden'],
-                                row['solicitante'],
-                                row['agente'],
-                                row['numero_expediente'],
-                                row['clase'],
-                                row['marca_custodia'],
-                                row['marca_publicada'],
-                                row['clases_acta'],
-                                bool(original_row['reporte_enviado']),
-                                row['titular'],
-                                bool(original_row['reporte_generado']),
-                                row['importancia']
-                            )
-                            st.success(f"✅ Importancia actualizada a '{row['importancia']}'")
-                            cambios_realizados = True
-                            time.sleep(0.2)
-                    except Exception as e:
-                        st.error(f"Error al actualizar: {e}")
-                        SessionManager.untrack_change(change_id)
-                    finally:
-                        if conn:
-                            conn.close()
-            if cambios_realizados:
-                st.rerun()
-                return True
+            cambios = GridService._diff_importances(snapshot, pd.DataFrame(grid_response.data))
+            if not cambios:
+                return False
+            
+            conn = crear_conexion()
+            try:
+                actualizar_importancias_lote(conn, cambios)
+            finally:
+                conn.close()
+            
+            if len(cambios) == 1:
+                st.success(f"✅ Importancia actualizada a '{next(iter(cambios.values()))}'")
+            else:
+                st.success(f"✅ Importancia actualizada en {len(cambios)} registros")
+            st.rerun()
+            return True
         except Exception as e:
             st.error(f"Error procesando cambios: {e}")
             return False
-        return False
     
     @staticmethod
-    def show_bulletin_grid(df: pd.DataFrame, key: str) -> Dict[str, Any]:
+    def show_bulletin_grid(df: pd.DataFrame, key: str, auto_size: Optional[bool] = None) -> Dict[str, Any]:
         """
         Mostrar grid de boletines con funcionalidad de edición de importancia
         
         Args:
             df: DataFrame con los datos de boletines
             key: Clave única para el grid
+            auto_size: Ajuste automático de filas (por defecto GRID_CONFIG["auto_size_columns"])
             
         Returns:
             Respuesta del grid
         """
         gb = GridOptionsBuilder.from_dataframe(df)
-        GridService._configure_bulletin_grid(gb)
+        GridService._configure_bulletin_grid(gb, auto_size)
         grid_options = gb.build()
         
         # Mostrar el grid
@@ -182,44 +217,226 @@ class GridService:
         )
         
         # Manejar cambios en la importancia
-        GridService._handle_importance_changes(grid_response)
+        GridService._handle_importance_changes(grid_response, df)
         
         return grid_response
     
     @staticmethod
-    def show_client_grid(df: pd.DataFrame, key: str) -> Dict[str, Any]:
+    def _row_model_state(key: str, filter_model: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Estado del modelo de filas paginado (bloque actual y orden) guardado en session_state
+        
+        Args:
+            key: Clave única para el grid
+            filter_model: Modelo de filtros actual; si cambia se vuelve al primer bloque
+            
+        Returns:
+            Diccionario de estado con block, sort_model y filter_key
+        """
+        state = st.session_state.setdefault(f"{key}_row_model", {'block': 0, 'sort_model': [], 'filter_key': None})
+        filter_key = repr(sorted((filter_model or {}).items()))
+        if state['filter_key'] != filter_key:
+            state['block'] = 0
+            state['filter_key'] = filter_key
+        return state
+    
+    @staticmethod
+    def _move_block(key: str, delta: int) -> None:
+        """Callback de navegación entre bloques"""
+        state = st.session_state[f"{key}_row_model"]
+        state['block'] = max(state['block'] + delta, 0)
+    
+    @staticmethod
+    def _show_block_navigation(key: str, state: Dict[str, Any], start: int, block_size: int, total: int) -> None:
+        """Botones de navegación entre bloques y rango de filas visible"""
+        last_block = max((total - 1) // block_size, 0)
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀ Anterior", key=f"{key}_prev", disabled=state['block'] == 0,
+                      on_click=GridService._move_block, args=(key, -1), use_container_width=True)
+        with col2:
+            end = min(start + block_size, total)
+            st.caption(f"Filas {start + 1 if total else 0}–{end} de {total} · bloque {state['block'] + 1} de {last_block + 1}")
+        with col3:
+            st.button("Siguiente ▶", key=f"{key}_next", disabled=state['block'] >= last_block,
+                      on_click=GridService._move_block, args=(key, 1), use_container_width=True)
+    
+    @staticmethod
+    def _disable_block_filters(grid_options: Dict[str, Any]) -> None:
+        """
+        Quitar del grid los filtros, el orden y el agrupamiento de encabezado: en un grid por
+        bloques solo actuarían sobre el bloque visible y no sobre todas las filas
+        """
+        overrides = {'filter': False, 'floatingFilter': False, 'sortable': False, 'enableRowGroup': False}
+        grid_options.setdefault('defaultColDef', {}).update(overrides)
+        for column_def in grid_options.get('columnDefs', []):
+            column_def.update(overrides)
+    
+    @staticmethod
+    def _dataframe_block(df: pd.DataFrame, key: str,
+                         block_size: Optional[int] = None) -> Tuple[pd.DataFrame, Dict[str, Any], int, int]:
+        """
+        Bloque visible de un DataFrame, para no enviar al navegador más filas que las que se muestran
+        
+        Args:
+            df: DataFrame completo (ya filtrado por la página)
+            key: Clave única para el grid
+            block_size: Filas por bloque (por defecto GRID_CONFIG["block_size"])
+            
+        Returns:
+            Tupla (bloque, estado, inicio, filas por bloque)
+        """
+        state = GridService._row_model_state(key, None)
+        block_size = block_size or GRID_CONFIG["block_size"]
+        # Si la página filtró más filas, el bloque guardado puede quedar fuera de rango
+        state['block'] = min(state['block'], max((len(df) - 1) // block_size, 0))
+        start = state['block'] * block_size
+        return df.iloc[start:start + block_size], state, start, block_size
+    
+    @staticmethod
+    def show_bulletin_grid_server_side(conn, key: str,
+                                       filter_model: Optional[Dict[str, Any]] = None,
+                                       block_size: Optional[int] = None,
+                                       auto_size: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Mostrar grid de boletines con modelo de filas paginado desde la base de datos.
+        
+        El navegador solo recibe el bloque visible: el orden y los filtros se envían a
+        obtener_bloque_boletines como modelos de AG Grid y se resuelven en SQL. Por eso el
+        grid no ofrece filtros ni orden en los encabezados: se filtra con filter_model.
+        
+        Args:
+            conn: Conexión a la base de datos
+            key: Clave única para el grid
+            filter_model: Modelo de filtros de AG Grid (por columna)
+            block_size: Filas por bloque (por defecto GRID_CONFIG["block_size"])
+            auto_size: Ajuste automático de filas (por defecto GRID_CONFIG["auto_size_columns"])
+            
+        Returns:
+            Respuesta del grid
+        """
+        state = GridService._row_model_state(key, filter_model)
+        
+        # Controles de orden y tamaño de bloque
+        sort_columns = list(COLUMNAS_GRID_BOLETINES)
+        current_sort = state['sort_model'][0] if state['sort_model'] else {'colId': 'id', 'sort': 'asc'}
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            sort_column = st.selectbox(
+                "Ordenar por", sort_columns,
+                index=sort_columns.index(current_sort['colId']),
+                format_func=lambda column: BULLETIN_COLUMNS.get(column, {}).get("header_name", column),
+                key=f"{key}_sort_column"
+            )
+        with col2:
+            sort_direction = st.selectbox(
+                "Dirección", ['asc', 'desc'],
+                index=0 if current_sort['sort'] == 'asc' else 1,
+                format_func=lambda direction: "Ascendente" if direction == 'asc' else "Descendente",
+                key=f"{key}_sort_direction"
+            )
+        with col3:
+            options = GRID_CONFIG["block_size_options"]
+            default_size = block_size or GRID_CONFIG["block_size"]
+            block_size = st.selectbox(
+                "Filas por bloque", options,
+                index=options.index(default_size) if default_size in options else 0,
+                key=f"{key}_block_size"
+            )
+        
+        sort_model = [{'colId': sort_column, 'sort': sort_direction}]
+        if sort_model != state['sort_model']:
+            state['sort_model'] = sort_model
+            state['block'] = 0
+        
+        start = state['block'] * block_size
+        rows, columns, total = obtener_bloque_boletines(conn, start, start + block_size, filter_model, sort_model)
+        if not rows and total > 0:
+            # El bloque quedó fuera de rango (menos filas tras filtrar o editar)
+            state['block'] = (total - 1) // block_size
+            start = state['block'] * block_size
+            rows, columns, total = obtener_bloque_boletines(conn, start, start + block_size, filter_model, sort_model)
+        
+        df = pd.DataFrame(rows, columns=columns)
+        for column in ('reporte_enviado', 'reporte_generado'):
+            df[column] = df[column].astype(bool).map({True: '●', False: '○'})
+        
+        gb = GridOptionsBuilder.from_dataframe(df)
+        GridService._configure_bulletin_grid(gb, auto_size, paginate=False)
+        grid_options = gb.build()
+        # El orden y los filtros los resuelve la base de datos (controles de arriba): los del
+        # encabezado solo actuarían sobre el bloque
+        GridService._disable_block_filters(grid_options)
+        
+        grid_response = AgGrid(
+            df,
+            gridOptions=grid_options,
+            update_mode=GridUpdateMode.VALUE_CHANGED,
+            data_return_mode=DataReturnMode.AS_INPUT,
+            fit_columns_on_grid_load=False,
+            theme='streamlit',
+            key=f"{key}_{state['block']}_{block_size}",
+            allow_unsafe_jscode=True,
+            height=GRID_CONFIG["grid_height"]
+        )
+        
+        # Navegación entre bloques
+        GridService._show_block_navigation(key, state, start, block_size, total)
+        
+        # Manejar cambios en la importancia del bloque visible
+        GridService._handle_importance_changes(grid_response, df)
+        
+        return grid_response
+    
+    @staticmethod
+    def show_client_grid(df: pd.DataFrame, key: str, auto_size: Optional[bool] = None) -> Dict[str, Any]:
         """
         Mostrar grid de clientes con funcionalidad de edición
         
+        Si hay más clientes que GRID_CONFIG["block_size"], el navegador recibe solo el bloque
+        visible y se navega entre bloques con los botones de abajo; en ese caso los filtros
+        son los de la página (el grid no filtra ni ordena desde los encabezados).
+        
         Args:
             df: DataFrame con los datos de clientes
             key: Clave única para el grid
+            auto_size: Ajuste automático de filas (por defecto GRID_CONFIG["auto_size_columns"])
             
         Returns:
             Respuesta del grid
         """
-        gb = GridOptionsBuilder.from_dataframe(df)
-        GridService._configure_client_grid(gb)
+        block, state, start, block_size = GridService._dataframe_block(df, key)
+        by_blocks = len(df) > block_size
+        
+        gb = GridOptionsBuilder.from_dataframe(block)
+        GridService._configure_client_grid(gb, auto_size)
         grid_options = gb.build()
+        if by_blocks:
+            GridService._disable_block_filters(grid_options)
+            # El bloque ya es la página: no paginar además dentro del grid
+            grid_options['pagination'] = False
         
         # Mostrar el grid
         # Asegurar que tiene_marcas sea un entero
-        if 'tiene_marcas' in df.columns:
-            df['tiene_marcas'] = df['tiene_marcas'].apply(lambda x: '✅' if x == 1 else '❌')
+        if 'tiene_marcas' in block.columns:
+            block = block.assign(tiene_marcas=block['tiene_marcas'].apply(lambda x: '✅' if x == 1 else '❌'))
         
         grid_response = AgGrid(
-            df,
+            block,
             gridOptions=grid_options,
             update_mode=GridUpdateMode.VALUE_CHANGED,
             data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
             fit_columns_on_grid_load=True,
             theme='streamlit',
-            key=key,
+            key=f"{key}_{state['block']}" if by_blocks else key,
             allow_unsafe_jscode=True,
             height=GRID_CONFIG["clients_grid_height"],
             width='100%'
         )
         
+        if by_blocks:
+            GridService._show_block_navigation(key, state, start, block_size, len(df))
+        
         return grid_response
     
     @staticmethod
@@ -296,7 +513,7 @@ class GridService:
         return grid_response
 
     @staticmethod
-    def _configure_user_grid(gb: GridOptionsBuilder) -> None:
+    def _configure_user_grid(gb: GridOptionsBuilder, auto_size: Optional[bool] = None) -> None:
         """Configurar grid para usuarios"""
         gb.configure_pagination(
             enabled=True,
@@ -314,9 +531,8 @@ class GridService:
             sorteable=True,
             filterable=True,
             resizable=True,
-            wrapText=True,
-            autoHeight=True,
-            minWidth=GRID_CONFIG["min_column_width"]
+            minWidth=GRID_CONFIG["min_column_width"],
+            **GridService._auto_size_options(auto_size)
         )
         
     @staticmethod
@@ -325,7 +541,8 @@ class GridService:
                    selection_mode: str = 'single',
                    fit_columns: bool = False,
                    editable: bool = False,
-                   custom_column_defs: list = None) -> Dict[str, Any]:
+                   custom_column_defs: list = None,
+                   auto_size: Optional[bool] = None) -> Dict[str, Any]:
         """
         Crear un grid configurable para datos generales
         
@@ -337,11 +554,18 @@ class GridService:
             fit_columns: Ajustar columnas automáticamente
             editable: Permitir edición de celdas
             custom_column_defs: Lista de definiciones personalizadas para columnas
+            auto_size: Ajuste automático de filas (por defecto GRID_CONFIG["auto_size_columns"])
+            
+        Si df tiene más filas que GRID_CONFIG["block_size"], el navegador recibe solo el bloque
+        visible (ver show_client_grid).
             
         Returns:
             Respuesta del grid
         """
-        gb = GridOptionsBuilder.from_dataframe(df)
+        block, state, start, block_size = GridService._dataframe_block(df, key)
+        by_blocks = len(df) > block_size
+        
+        gb = GridOptionsBuilder.from_dataframe(block)
         
         # Configuración básica
         gb.configure_pagination(
@@ -357,8 +581,7 @@ class GridService:
             sorteable=True,
             filterable=True,
             resizable=True,
-            wrapText=True,
-            autoHeight=True
+            **GridService._auto_size_options(auto_size)
         )
         
         # Aplicar configuraciones personalizadas de columnas si existen
@@ -369,14 +592,21 @@ class GridService:
                 gb.configure_column(field_name, headerName=header_name, **col_def)
         
         grid_options = gb.build()
+        if by_blocks:
+            GridService._disable_block_filters(grid_options)
         
-        return AgGrid(
-            df,
+        grid_response = AgGrid(
+            block,
             gridOptions=grid_options,
             update_mode=GridUpdateMode.MODEL_CHANGED if editable else GridUpdateMode.NO_UPDATE,
             data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
             fit_columns_on_grid_load=fit_columns,
             theme='streamlit',
-            key=key,
+            key=f"{key}_{state['block']}" if by_blocks else key,
             height=height
         )
+        
+        if by_blocks:
+            GridService._show_block_navigation(key, state, start, block_size, len(df))
+        
+        return grid_response
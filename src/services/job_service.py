@@ -0,0 +1,125 @@
+"""
+Servicio de trabajos en segundo plano para las páginas (ver jobs.py)
+"""
+import streamlit as st
+import sys
+import os
+from typing import Any, Callable, Dict, Optional
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from database import crear_conexion
+from jobs import ESTADOS_ACTIVOS, TrabajoEnCurso, encolar_trabajo, obtener_trabajo, obtener_trabajo_activo
+
+
+# Segundos entre consultas de progreso mientras hay un trabajo activo
+POLL_INTERVAL_SECONDS = 2
+
+
+@st.fragment(run_every=POLL_INTERVAL_SECONDS)
+def _job_progress_fragment(job_id: int) -> None:
+    """Barra de progreso que se refresca sola; al terminar el trabajo recarga la página completa"""
+    conn = crear_conexion()
+    try:
+        job = obtener_trabajo(conn, job_id)
+    finally:
+        conn.close()
+    if job is None or job['estado'] not in ESTADOS_ACTIVOS:
+        st.rerun()
+    JobService._render_progress(job)
+
+
+class JobService:
+    """Lanzar operaciones largas como trabajos y seguir su progreso desde la sesión"""
+
+    @staticmethod
+    def _session_key(job_type: str) -> str:
+        return f"job_{job_type}"
+
+    @staticmethod
+    def start(job_type: str, function: Callable, description: str = None) -> Optional[int]:
+        """
+        Lanzar un trabajo en segundo plano y asociarlo a la sesión
+
+        Args:
+            job_type: Tipo de trabajo (solo uno activo por tipo)
+            function: Callable function(conn, progreso) ejecutado con una conexión propia
+            description: Texto descriptivo opcional
+
+        Returns:
+            Id del trabajo, o el del trabajo del mismo tipo que ya estaba en curso
+        """
+        try:
+            job_id = encolar_trabajo(job_type, function, description)
+        except TrabajoEnCurso as e:
+            st.warning(f"⏳ Ya hay una operación de este tipo en curso (iniciada {e.trabajo['fecha_creacion']})")
+            job_id = e.trabajo['id']
+        st.session_state[JobService._session_key(job_type)] = job_id
+        return job_id
+
+    @staticmethod
+    def get_tracked_job(conn, job_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtener el trabajo a mostrar: el activo del tipo (lanzado desde cualquier sesión)
+        o el último lanzado desde esta sesión mientras no se descarte
+
+        Args:
+            conn: Conexión a la base de datos
+            job_type: Tipo de trabajo
+
+        Returns:
+            Diccionario del trabajo (ver jobs.obtener_trabajo) o None
+        """
+        job = obtener_trabajo_activo(conn, job_type)
+        if job is not None:
+            return job
+        job_id = st.session_state.get(JobService._session_key(job_type))
+        return obtener_trabajo(conn, job_id) if job_id is not None else None
+
+    @staticmethod
+    def is_active(job: Optional[Dict[str, Any]]) -> bool:
+        """Indica si el trabajo sigue en cola o ejecutándose"""
+        return job is not None and job['estado'] in ESTADOS_ACTIVOS
+
+    @staticmethod
+    def dismiss(job_type: str) -> None:
+        """Dejar de mostrar el resultado del último trabajo del tipo en esta sesión"""
+        st.session_state.pop(JobService._session_key(job_type), None)
+
+    @staticmethod
+    def _render_progress(job: Dict[str, Any]) -> None:
+        total = job['progreso_total']
+        actual = job['progreso_actual'] or 0
+        etiqueta = job['descripcion'] or job['tipo']
+        if job['estado'] == 'en_cola' or not total:
+            st.progress(0, text=f"⏳ {etiqueta}: en preparación...")
+            return
+        detalle = f" — {job['mensaje']}" if job['mensaje'] else ""
+        st.progress(min(actual / total, 1.0), text=f"🔄 {etiqueta}: {actual}/{total}{detalle}")
+
+    @staticmethod
+    def show_progress(job: Dict[str, Any]) -> None:
+        """
+        Mostrar el progreso de un trabajo activo; se actualiza cada POLL_INTERVAL_SECONDS
+        sin recargar el resto de la página
+
+        Args:
+            job: Trabajo activo devuelto por get_tracked_job()
+        """
+        _job_progress_fragment(job['id'])
+
+    @staticmethod
+    def show_error(job: Dict[str, Any], job_type: str, key: str) -> None:
+        """
+        Mostrar el error de un trabajo terminado con error y un botón para descartarlo
+
+        Args:
+            job: Trabajo en estado 'error'
+            job_type: Tipo de trabajo
+            key: Clave única del botón
+        """
+        st.error(f"❌ La operación falló: {job['error']}")
+        if st.button("Cerrar", key=key):
+            JobService.dismiss(job_type)
+            st.rerun()
@@ -452,22 +452,22 @@ class UIComponents:
         """
     
     @staticmethod
-    def create_data_preview_card(titular: str, registro_count: int, sample_record: dict) -> str:
+    def create_data_preview_card(titular: str, registro_count: int, sample_record) -> str:
         """
         Crear tarjeta de vista previa para un titular y sus datos
         
         Args:
             titular: Nombre del titular
             registro_count: Número de registros del titular
-            sample_record: Registro de muestra
+            sample_record: Registro de muestra (records.Boletin)
             
         Returns:
             HTML de la tarjeta de vista previa
         """
         # Extraer datos del registro con valores por defecto
-        boletin = sample_record.get('Número de Boletín', 'N/A')
-        marca = sample_record.get('Marca en Custodia', 'N/A')
-        clase = sample_record.get('Clase', 'N/A')
+        boletin = sample_record.numero_boletin or 'N/A'
+        marca = sample_record.marca_custodia or 'N/A'
+        clase = sample_record.clase or 'N/A'
         
         # Truncar marca si es muy larga
         marca_display = marca[:40] + '...' if len(str(marca)) > 40 else marca
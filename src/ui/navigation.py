@@ -95,6 +95,7 @@ class NavigationManager:
             'Marcas': ('marcas', {'show_marcas_section': True}),
             'Informes': ('informes', {}),
             'Emails': ('emails', {'show_email_section': True}),
+            'Analítica': ('analitica', {}),
             'Configuración': ('settings', {})
         }
         
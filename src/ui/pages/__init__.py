@@ -1,3 +1,10 @@
 # Pages package
-# Exportar funciones de páginas principales
-from src.ui.pages.dashboard import show_dashboard
+# Exportar funciones de páginas principales (importación diferida: cada página carga
+# sus dependencias pesadas solo cuando se usa)
+
+
+def __getattr__(name):
+    if name == 'show_dashboard':
+        from src.ui.pages.dashboard import show_dashboard
+        return show_dashboard
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,88 @@
+"""
+Página de analítica histórica (tendencias calculadas con DuckDB, ver analytics.py)
+"""
+import streamlit as st
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from analytics import DUCKDB_DISPONIBLE, actualizar_instantanea, obtener_motor_analitico
+from dashboard_charts import (create_send_success_chart, create_timeline_chart, create_titular_month_chart,
+                              create_turnaround_chart)
+from src.services.dashboard_service import PLAZO_LEGAL_DIAS
+from src.ui.components import UIComponents
+
+
+# Período -> meses hacia atrás (None = toda la historia)
+PERIODOS = {
+    "Últimos 12 meses": 12,
+    "Últimos 24 meses": 24,
+    "Últimos 36 meses": 36,
+    "Toda la historia": None,
+}
+
+
+def _show_chart(titulo, crear_grafico, datos, *args):
+    """Mostrar un gráfico, o un aviso si el período no tiene datos"""
+    if datos.empty:
+        st.info(f"Sin datos para {titulo.lower()} en el período elegido")
+        return
+    try:
+        st.plotly_chart(crear_grafico(datos, *args), use_container_width=True)
+    except Exception as e:
+        st.warning(f"Error al cargar el gráfico de {titulo.lower()}: {e}")
+
+
+def show_analitica_page():
+    """Mostrar la página de analítica"""
+    st.title("📈 Analítica")
+
+    if not DUCKDB_DISPONIBLE:
+        st.warning("La analítica necesita los paquetes duckdb y pyarrow, que no están instalados.")
+        return
+
+    col_periodo, col_top, col_actualizar = st.columns([2, 1, 1])
+    with col_periodo:
+        meses = PERIODOS[st.selectbox("Período", list(PERIODOS), key="analitica_periodo")]
+    with col_top:
+        top_titulares = st.number_input("Titulares destacados", min_value=3, max_value=30, value=10,
+                                        key="analitica_top_titulares")
+    with col_actualizar:
+        st.write("")
+        if st.button("🔄 Actualizar datos", key="analitica_actualizar"):
+            actualizar_instantanea(max_edad=0)
+
+    try:
+        motor = obtener_motor_analitico()
+        tendencia = motor.tendencia_mensual(meses)
+        por_titular = motor.boletines_por_mes_y_titular(meses, int(top_titulares))
+        envios = motor.tasa_exito_envios(meses)
+        demoras = motor.demora_clasificacion(meses)
+    except Exception as e:
+        st.error(f"Error al calcular la analítica: {e}")
+        return
+
+    st.caption(f"Datos al {motor.manifiesto['fecha'].replace('T', ' ')} "
+               f"({motor.manifiesto['filas']['boletines']} boletines). "
+               "Se actualizan solos cada pocos minutos si hubo cambios.")
+
+    UIComponents.create_section_header(
+        "📅 Tendencias",
+        "Boletines publicados por mes y avance de sus reportes",
+        "violet-70"
+    )
+    _show_chart("Tendencia mensual", create_timeline_chart, tendencia)
+    _show_chart("Boletines por titular", create_titular_month_chart, por_titular)
+
+    UIComponents.create_section_header(
+        "📬 Envíos y Demoras",
+        "Resultado de los envíos y tiempo hasta el informe y el envío, por importancia",
+        "blue-70"
+    )
+    col_envios, col_demoras = st.columns(2)
+    with col_envios:
+        _show_chart("Éxito de envíos", create_send_success_chart, envios)
+    with col_demoras:
+        _show_chart("Demora de clasificación", create_turnaround_chart, demoras, PLAZO_LEGAL_DIAS)
@@ -11,7 +11,7 @@ import os
 # Agregar el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 
-from database import crear_conexion, obtener_clientes, insertar_cliente, actualizar_cliente, eliminar_cliente
+from database import crear_conexion, obtener_clientes, insertar_cliente, actualizar_clientes_lote, eliminar_cliente
 from src.services.grid_service import GridService
 from src.ui.components import UIComponents
 
@@ -28,6 +28,70 @@ def validate_cuit_format(cuit):
     # Verificar que tenga exactamente 11 dígitos y sean todos números
     return cuit_clean.isdigit() and len(cuit_clean) == 11
 
+
+def validate_client_edit(row):
+    """
+    Validar los valores editados de un cliente
+    
+    Args:
+        row: Fila con las columnas editables normalizadas a texto
+        
+    Returns:
+        Lista de errores (vacía si la fila es válida)
+    """
+    errores = []
+    if not row['titular'].strip():
+        errores.append("el titular es obligatorio")
+    if row['email'] and not validate_email_format(row['email'].strip()):
+        errores.append(f"email inválido '{row['email']}'")
+    if row['cuit'] and not validate_cuit_format(row['cuit']):
+        errores.append(f"CUIT inválido '{row['cuit']}'")
+    return errores
+
+def _process_client_edits(conn, df_modificado, snapshot):
+    """
+    Detectar todas las celdas editadas en el grid, validarlas y aplicarlas en un único lote,
+    con una sola vinculación de marcas y un solo rerun.
+    
+    Args:
+        conn: Conexión a la base de datos
+        df_modificado: Datos devueltos por el grid
+        snapshot: DataFrame mostrado en el grid
+    """
+    cambios = GridService._diff_clients(snapshot, df_modificado)
+    if cambios.empty:
+        return
+    
+    validos = []
+    for fila in cambios.to_dict('records'):
+        errores = validate_client_edit(fila)
+        if errores:
+            st.error(f"❌ Cliente '{fila['titular'] or fila['id']}' no actualizado: {'; '.join(errores)}")
+        else:
+            validos.append(fila)
+    if not validos:
+        return
+    
+    try:
+        resultado = actualizar_clientes_lote(conn, validos)
+    except Exception as e:
+        st.error(f"❌ Error al actualizar clientes: {e}")
+        return
+    
+    if len(validos) == 1:
+        mensaje = f"✅ Cliente '{validos[0]['titular']}' actualizado: {', '.join(validos[0]['campos_cambiados'])}"
+    else:
+        mensaje = f"✅ {resultado['actualizados']} clientes actualizados"
+    if resultado['marcas_vinculadas'] > 0:
+        mensaje += f"\n\n🏷️ Se vincularon {resultado['marcas_vinculadas']} marcas"
+    # El mensaje se muestra tras el rerun
+    st.session_state['clientes_mensaje_edicion'] = mensaje
+    
+    for key in list(st.session_state.keys()):
+        if key.startswith('grid_clientes_'):
+            del st.session_state[key]
+    st.rerun()
+
 def format_cuit_for_display(cuit):
     """Formatea el CUIT para mostrar"""
     if not cuit:
@@ -52,7 +116,6 @@ def show_clientes_page():
             
             if rows:
                 df_clientes = pd.DataFrame(rows, columns=columns)
-                st.session_state.clientes_data = df_clientes
                 
                 # Estilos personalizados para pestañas de clientes
                 st.markdown("""
@@ -229,85 +292,16 @@ def show_clientes_page():
                     if not filtered_clientes.empty:
                         st.markdown(f"📊 **{len(filtered_clientes)}** clientes de **{len(df_clientes)}** totales")
                         
+                        # Resultado de la última edición en lote
+                        if 'clientes_mensaje_edicion' in st.session_state:
+                            st.success(st.session_state.pop('clientes_mensaje_edicion'))
+                        
                         # GRILLA EDITABLE
                         grid_response = GridService.show_client_grid(filtered_clientes, 'grid_clientes_editable')
                         
-                        # PROCESAR CAMBIOS EN TIEMPO REAL
+                        # PROCESAR CAMBIOS EN UN ÚNICO LOTE
                         if grid_response['data'] is not None and len(grid_response['data']) > 0:
-                            df_modificado = pd.DataFrame(grid_response['data'])
-                            
-                            # Comparar con datos originales para encontrar cambios
-                            for index, row in df_modificado.iterrows():
-                                original_row = filtered_clientes[filtered_clientes['id'] == row['id']]
-                                if not original_row.empty:
-                                    original_row = original_row.iloc[0]
-                                    
-                                    # Verificar si hay cambios en cada campo
-                                    cambios = False
-                                    campos_cambiados = []
-                                    
-                                    for column in ['titular', 'email', 'telefono', 'direccion', 'ciudad', 'provincia', 'cuit']:
-                                        # Normalizar valores para comparación (manejar NaN y None)
-                                        valor_nuevo = str(row[column]) if pd.notna(row[column]) else ""
-                                        valor_original = str(original_row[column]) if pd.notna(original_row[column]) else ""
-                                        
-                                        if valor_nuevo != valor_original:
-                                            cambios = True
-                                            campos_cambiados.append(column)
-                                    
-                                    if cambios:
-                                        # Actualizar en la base de datos
-                                        try:
-                                            # Verificar si se está modificando el CUIT (posible vinculación de marcas)
-                                            cuit_modificado = 'cuit' in campos_cambiados
-                                            
-                                            # Crear un contenedor para los mensajes
-                                            mensaje_container = st.empty()
-                                            
-                                            # Si se modificó el CUIT, mostrar un mensaje especial
-                                            if cuit_modificado:
-                                                with mensaje_container.container():
-                                                    st.info("⏳ Actualizando CUIT y vinculaciones de marcas...")
-                                            else:
-                                                with mensaje_container.container():
-                                                    st.info(f"⏳ Actualizando cliente '{row['titular']}'...")
-                                            
-                                            # Aplicar la actualización en la base de datos
-                                            resultado = actualizar_cliente(
-                                                conn, 
-                                                row['id'], 
-                                                row['titular'] if pd.notna(row['titular']) else "", 
-                                                row['email'] if pd.notna(row['email']) else "", 
-                                                row['telefono'] if pd.notna(row['telefono']) else "", 
-                                                row['direccion'] if pd.notna(row['direccion']) else "", 
-                                                row['ciudad'] if pd.notna(row['ciudad']) else "", 
-                                                row['provincia'] if pd.notna(row['provincia']) else "", 
-                                                row['cuit'] if pd.notna(row['cuit']) else ""
-                                            )
-                                            
-                                            mensaje = f"✅ Cliente '{row['titular']}' actualizado: {', '.join(campos_cambiados)}"
-                                            
-                                            # Mensaje especial si se modificó el CUIT (posible vinculación)
-                                            if cuit_modificado:
-                                                mensaje += "\n\n⚠️ Se actualizaron las vinculaciones de marcas"
-                                                # Forzar limpieza del caché de datos
-                                                if 'clientes_data' in st.session_state:
-                                                    del st.session_state['clientes_data']
-                                            
-                                            # Mostrar mensaje de éxito y dar tiempo para que el usuario lo vea
-                                            with mensaje_container.container():
-                                                st.success(mensaje)
-                                                # Limpiar otros cachés relacionados
-                                                for key in list(st.session_state.keys()):
-                                                    if key.startswith('grid_clientes_'):
-                                                        del st.session_state[key]
-                                                # Dar tiempo para que el usuario vea el mensaje
-                                                time.sleep(1.5)
-                                                
-                                            # Forzar recarga completa para mostrar cambios
-                                            st.rerun()
-                                        except Exception as e:
-                                            st.error(f"❌ Error al actualizar '{row['titular']}': {e}")
+                            _process_client_edits(conn, pd.DataFrame(grid_response['data']), filtered_clientes)
                         
                         # Panel de acciones para cliente seleccionado
                         if grid_response['selected_rows']:
@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 
 from database import crear_conexion, crear_tabla
 from dashboard_charts import create_status_donut_chart, create_urgency_gauge_chart
+from src.services.dashboard_service import DashboardService
 from src.ui.components import UIComponents
 from src.utils.helpers import ReportUtils, DateUtils
 
@@ -25,156 +26,8 @@ class DashboardPage:
         self.conn = None
     
     def _get_dashboard_data(self, conn):
-        """Obtiene datos para el dashboard."""
-        cursor = conn.cursor()
-        
-        # Estadísticas generales
-        cursor.execute("SELECT COUNT(*) FROM boletines")
-        total_boletines = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM boletines WHERE reporte_generado = 1")
-        reportes_generados = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM boletines WHERE reporte_enviado = 1")
-        reportes_enviados = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(DISTINCT titular) FROM clientes")
-        total_clientes = cursor.fetchone()[0]
-        
-        # Datos por fecha (últimos 30 días)
-        cursor.execute("""
-            SELECT DATE(fecha_alta) as fecha, COUNT(*) as cantidad
-            FROM boletines 
-            WHERE fecha_alta >= date('now', '-30 days')
-            GROUP BY DATE(fecha_alta)
-            ORDER BY fecha
-        """)
-        datos_timeline = cursor.fetchall()
-        
-        # Top titulares
-        cursor.execute("""
-            SELECT titular, COUNT(*) as cantidad
-            FROM boletines
-            GROUP BY titular
-            ORDER BY cantidad DESC
-            LIMIT 10
-        """)
-        top_titulares = cursor.fetchall()
-        
-        # Reportes próximos a vencer (últimos 7 días de plazo legal)
-        cursor.execute("""
-            SELECT COUNT(*) FROM boletines 
-            WHERE reporte_enviado = 0 
-            AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
-            AND date(substr(fecha_boletin, 7, 4) || '-' || 
-                     substr(fecha_boletin, 4, 2) || '-' || 
-                     substr(fecha_boletin, 1, 2), '+23 days') <= date('now')
-            AND date(substr(fecha_boletin, 7, 4) || '-' || 
-                     substr(fecha_boletin, 4, 2) || '-' || 
-                     substr(fecha_boletin, 1, 2), '+30 days') >= date('now')
-        """)
-        proximos_vencer = cursor.fetchone()[0]
-        
-        # Reportes ya vencidos (más de 30 días)
-        cursor.execute("""
-            SELECT COUNT(*) FROM boletines 
-            WHERE reporte_enviado = 0 
-            AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
-            AND date(substr(fecha_boletin, 7, 4) || '-' || 
-                     substr(fecha_boletin, 4, 2) || '-' || 
-                     substr(fecha_boletin, 1, 2), '+30 days') < date('now')
-        """)
-        reportes_vencidos = cursor.fetchone()[0]
-        
-        # Detalles de reportes próximos a vencer
-        cursor.execute("""
-            SELECT numero_boletin, titular, fecha_boletin,
-                   CAST(julianday(date(substr(fecha_boletin, 7, 4) || '-' || 
-                                      substr(fecha_boletin, 4, 2) || '-' || 
-                                      substr(fecha_boletin, 1, 2), '+30 days')) - 
-                        julianday(date('now')) AS INTEGER) as dias_restantes
-            FROM boletines 
-            WHERE reporte_enviado = 0 
-            AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
-            AND date(substr(fecha_boletin, 7, 4) || '-' || 
-                     substr(fecha_boletin, 4, 2) || '-' || 
-                     substr(fecha_boletin, 1, 2), '+23 days') <= date('now')
-            AND date(substr(fecha_boletin, 7, 4) || '-' || 
-                     substr(fecha_boletin, 4, 2) || '-' || 
-                     substr(fecha_boletin, 1, 2), '+30 days') >= date('now')
-            ORDER BY dias_restantes ASC
-            LIMIT 10
-        """)
-        detalles_proximos_vencer = cursor.fetchall()
-        
-        # Detalles de reportes vencidos
-        cursor.execute("""
-            SELECT numero_boletin, titular, fecha_boletin,
-                   CAST(julianday(date('now')) - 
-                        julianday(date(substr(fecha_boletin, 7, 4) || '-' || 
-                                      substr(fecha_boletin, 4, 2) || '-' || 
-                                      substr(fecha_boletin, 1, 2), '+30 days')) AS INTEGER) as dias_vencido
-            FROM boletines 
-            WHERE reporte_enviado = 0 
-            AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
-            AND date(substr(fecha_boletin, 7, 4) || '-' || 
-                     substr(fecha_boletin, 4, 2) || '-' || 
-                     substr(fecha_boletin, 1, 2), '+30 days') < date('now')
-            ORDER BY dias_vencido DESC
-            LIMIT 10
-        """)
-        detalles_vencidos = cursor.fetchall()
-        
-        # Detalles de reportes en curso (entre 0 y 30 días desde la fecha del boletín)
-        cursor.execute("""
-            SELECT numero_boletin, titular, fecha_boletin,
-                   CAST(julianday(date('now')) - 
-                        julianday(date(substr(fecha_boletin, 7, 4) || '-' || 
-                                      substr(fecha_boletin, 4, 2) || '-' || 
-                                      substr(fecha_boletin, 1, 2))) AS INTEGER) as dias_transcurridos
-            FROM boletines 
-            WHERE reporte_enviado = 0 
-            AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
-            AND julianday(date('now')) - julianday(date(substr(fecha_boletin, 7, 4) || '-' || 
-                                               substr(fecha_boletin, 4, 2) || '-' || 
-                                               substr(fecha_boletin, 1, 2))) <= 30
-            AND julianday(date('now')) - julianday(date(substr(fecha_boletin, 7, 4) || '-' || 
-                                               substr(fecha_boletin, 4, 2) || '-' || 
-                                               substr(fecha_boletin, 1, 2))) >= 0
-            ORDER BY dias_transcurridos ASC
-        """)
-        detalles_en_curso = cursor.fetchall()
-        
-        # Contar total de reportes en curso
-        cursor.execute("""
-            SELECT COUNT(*) FROM boletines 
-            WHERE reporte_enviado = 0 
-            AND fecha_boletin IS NOT NULL AND fecha_boletin != ''
-            AND julianday(date('now')) - julianday(date(substr(fecha_boletin, 7, 4) || '-' || 
-                                               substr(fecha_boletin, 4, 2) || '-' || 
-                                               substr(fecha_boletin, 1, 2))) <= 30
-            AND julianday(date('now')) - julianday(date(substr(fecha_boletin, 7, 4) || '-' || 
-                                               substr(fecha_boletin, 4, 2) || '-' || 
-                                               substr(fecha_boletin, 1, 2))) >= 0
-        """)
-        reportes_en_curso = cursor.fetchone()[0]
-        
-        cursor.close()
-        
-        return {
-            'total_boletines': total_boletines,
-            'reportes_generados': reportes_generados,
-            'reportes_enviados': reportes_enviados,
-            'total_clientes': total_clientes,
-            'datos_timeline': datos_timeline,
-            'top_titulares': top_titulares,
-            'proximos_vencer': proximos_vencer,
-            'reportes_vencidos': reportes_vencidos,
-            'reportes_en_curso': reportes_en_curso,
-            'detalles_proximos_vencer': detalles_proximos_vencer,
-            'detalles_vencidos': detalles_vencidos,
-            'detalles_en_curso': detalles_en_curso
-        }
+        """Obtiene datos para el dashboard (cacheados hasta que cambien las tablas o el día)."""
+        return DashboardService.get_dashboard_data(conn)
     
     def _show_main_header(self):
         """Mostrar header principal del dashboard"""
@@ -288,10 +141,12 @@ class DashboardPage:
     def _show_expired_details(self, data):
         """Mostrar detalles de reportes vencidos"""
         if data['reportes_vencidos'] > 0:
-            with st.expander("🔍 Detalles de Reportes Vencidos", expanded=True):
-                if data['detalles_vencidos']:
+            # El listado solo se consulta si el usuario lo abre
+            if st.toggle("🔍 Detalles de Reportes Vencidos", key="dashboard_detalles_vencidos"):
+                detalles = DashboardService.get_deadline_details(self.conn, 'vencidos')
+                if detalles:
                     st.markdown("### Reportes que requieren atención inmediata:")
-                    for detalle in data['detalles_vencidos']:
+                    for detalle in detalles:
                         dias_vencido = int(detalle[3])
                         
                         st.markdown(f"""
@@ -304,10 +159,11 @@ class DashboardPage:
     def _show_upcoming_details(self, data):
         """Mostrar detalles de reportes próximos a vencer"""
         if data['proximos_vencer'] > 0:
-            with st.expander("📋 Reportes Próximos a Vencer", expanded=True):
-                if data['detalles_proximos_vencer']:
+            if st.toggle("📋 Reportes Próximos a Vencer", key="dashboard_detalles_proximos"):
+                detalles = DashboardService.get_deadline_details(self.conn, 'proximos_vencer')
+                if detalles:
                     st.markdown("### Reportes que requieren atención prioritaria:")
-                    for detalle in data['detalles_proximos_vencer']:
+                    for detalle in detalles:
                         dias_restantes = int(detalle[3])
                         
                         if dias_restantes <= 2:
@@ -333,10 +189,11 @@ class DashboardPage:
     def _show_current_reports_details(self, data):
         """Mostrar detalles de reportes en curso (entre 0 y 30 días)"""
         if data['reportes_en_curso'] > 0:
-            with st.expander("📆 Reportes en Curso (0-30 días)", expanded=True):
-                if data['detalles_en_curso']:
+            if st.toggle("📆 Reportes en Curso (0-30 días)", key="dashboard_detalles_en_curso"):
+                detalles = DashboardService.get_deadline_details(self.conn, 'en_curso')
+                if detalles:
                     st.markdown("### Reportes actualmente en proceso:")
-                    for detalle in data['detalles_en_curso']:
+                    for detalle in detalles:
                         dias_transcurridos = int(detalle[3])
                         dias_restantes = 30 - dias_transcurridos
                         
@@ -415,6 +272,7 @@ class DashboardPage:
                 st.error("No se pudo conectar a la base de datos")
                 return
             
+            self.conn = conn
             try:
                 crear_tabla(conn)
                 data = self._get_dashboard_data(conn)
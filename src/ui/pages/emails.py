@@ -16,6 +16,7 @@ from database import crear_conexion, crear_tabla
 from database_extensions import obtener_logs_envios, obtener_estadisticas_logs, limpiar_logs_antiguos, obtener_emails_enviados
 from email_sender import procesar_envio_emails, generar_reporte_envios, obtener_info_reportes_pendientes, obtener_estadisticas_envios, validar_clientes_para_envio, validar_credenciales_email
 from config import load_email_credentials, save_email_credentials, validate_email_format
+from src.services.job_service import JobService
 from src.ui.components import UIComponents
 from src.utils.session_manager import SessionManager
 
@@ -300,6 +301,10 @@ class EmailsPage:
     
     def _show_envio_masivo_tab(self, conn, stats):
         """Mostrar tab de envío masivo de reportes"""
+        # Envío en curso o resultado del último; las estadísticas se recalculan
+        # al terminar porque el trabajo recarga la página
+        if self._show_sending_job(conn):
+            return
         if stats['pendientes_revision'] == 0 and stats['listos_envio'] > 0:
             st.markdown("### 📧 Envío Masivo de Reportes")
             
@@ -442,6 +447,10 @@ class EmailsPage:
                     st.rerun()
                 else:
                     st.error("❌ No se puede continuar debido a los problemas de validación")
+            
+            # Vista previa: genera los .eml sin enviar nada
+            if st.button("👁️ Previsualizar Emails (.eml)", use_container_width=True):
+                self._process_email_render(conn)
         else:
             #st.error("❌ No hay grupos listos para recibir emails")
             st.info("Revisa que los clientes tengan email registrado y reportes generados")
@@ -488,41 +497,70 @@ class EmailsPage:
         self._show_sending_results()
     
     def _process_email_sending(self, conn, credenciales):
-        """Procesar el envío real de emails"""
-        # EJECUTAR EL ENVÍO AQUÍ
-        with st.spinner("📤 Enviando emails..."):
+        """Lanzar el envío real de emails como trabajo en segundo plano"""
+        email_usuario = credenciales['email']
+        password_usuario = credenciales['password']
+        JobService.start(
+            'envio_emails',
+            lambda conn, progreso: procesar_envio_emails(conn, email_usuario, password_usuario, progreso=progreso),
+            "Envío de emails"
+        )
+        # Resetear confirmación
+        st.session_state.confirmar_envio_emails = False
+        st.rerun()
+    
+    def _show_sending_job(self, conn):
+        """
+        Mostrar el progreso del envío en curso o el resultado del último lanzado
+        
+        Returns:
+            bool: True si hay un envío en curso
+        """
+        trabajo = JobService.get_tracked_job(conn, 'envio_emails')
+        if trabajo is None:
+            return False
+        if JobService.is_active(trabajo):
+            JobService.show_progress(trabajo)
+            return True
+        if trabajo['estado'] == 'error':
+            error = trabajo['error']
+            JobService.show_error(trabajo, 'envio_emails', key='cerrar_error_envio')
+            # Mostrar detalles del error si es por reportes pendientes
+            if "Pendiente" in error:
+                st.info("💡 Ve a la sección 'Historial' para cambiar la importancia de los reportes pendientes.")
+            return False
+        
+        resultados = trabajo['resultado']
+        if resultados.get('bloqueado_por_pendientes', False):
+            st.error("❌ Envío bloqueado por reportes pendientes")
+            info_pendientes = resultados.get('info_pendientes')
+            if info_pendientes:
+                st.markdown(f"**{info_pendientes['total_reportes']}** reportes requieren revisión de **{info_pendientes['total_titulares']}** titulares")
+        else:
+            # Guardar resultados en session_state para mostrarlos
+            st.session_state.resultados_envio = resultados
+            self._show_sending_results()
+        
+        if st.button("Cerrar", key='cerrar_resultado_envio'):
+            JobService.dismiss('envio_emails')
+            st.rerun()
+        return False
+    
+    def _process_email_render(self, conn):
+        """Generar los emails como archivos .eml sin enviarlos"""
+        with st.spinner("📝 Generando vista previa de emails..."):
             try:
-                st.info("🔄 Procesando envíos...")
-                resultados = procesar_envio_emails(
-                    conn, 
-                    credenciales['email'], 
-                    credenciales['password']
-                )
-                
-                # Resetear confirmación
-                st.session_state.confirmar_envio_emails = False
+                resultados = procesar_envio_emails(conn, solo_renderizar=True)
+                render = resultados.get('render')
                 
-                # Guardar resultados en session_state para mostrarlos
-                st.session_state.resultados_envio = resultados
-                
-                # Mostrar resultados básicos
                 if resultados.get('bloqueado_por_pendientes', False):
-                    st.error("❌ Envío bloqueado por reportes pendientes")
-                    info_pendientes = resultados.get('info_pendientes')
-                    if info_pendientes:
-                        st.markdown(f"**{info_pendientes['total_reportes']}** reportes requieren revisión de **{info_pendientes['total_titulares']}** titulares")
-                else:
-                    st.success("🎉 Proceso de envío completado!")
-                    # Forzar actualización para mostrar resultados
-                    st.rerun()
-                        
+                    st.error("❌ Vista previa bloqueada por reportes pendientes")
+                elif render:
+                    st.success(f"✅ {render['renderizados']} emails generados en: {render['directorio']}")
+                    if render['errores']:
+                        st.warning(f"⚠️ {render['errores']} emails no se pudieron generar. Revisa el manifest.csv")
             except Exception as e:
-                st.session_state.confirmar_envio_emails = False
-                st.error(f"❌ Error durante el envío: {str(e)}")
-                
-                # Mostrar detalles del error si es por reportes pendientes
-                if "Pendiente" in str(e):
-                    st.info("💡 Ve a la sección 'Historial' para cambiar la importancia de los reportes pendientes.")
+                st.error(f"❌ Error generando la vista previa: {str(e)}")
     
     def _show_sending_results(self):
         """Mostrar resultados detallados del envío"""
@@ -586,11 +624,6 @@ class EmailsPage:
             with st.expander("📋 Reporte Detallado", expanded=len(resultados['exitosos']) == 0):
                 reporte = generar_reporte_envios(resultados)
                 st.text(reporte)
-            
-            # Auto-actualizar estadísticas
-            st.success("🔄 Actualizando estadísticas...")
-            time.sleep(2)
-            st.rerun()
     
     def _show_configuracion_tab(self):
         """Mostrar tab de configuración de email"""
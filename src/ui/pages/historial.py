@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import time
 import sys
 import os
@@ -7,12 +6,17 @@ import os
 # Agregar el directorio raíz al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
-from database import crear_conexion, obtener_datos
+from database import crear_conexion, contar_boletines_por_importancia
 from src.services.grid_service import GridService
 
 
-def _apply_filters(df: pd.DataFrame) -> pd.DataFrame:
-    """Aplica filtros avanzados al DataFrame"""
+def _text_filter(value: str) -> dict:
+    """Filtro de texto 'contiene' en formato filterModel de AG Grid"""
+    return {'filterType': 'text', 'type': 'contains', 'filter': value}
+
+
+def _apply_filters() -> dict:
+    """Muestra los filtros avanzados y devuelve el modelo de filtros (formato AG Grid) para la consulta SQL"""
     st.markdown("""
         <style>
         .filter-container {
@@ -31,8 +35,8 @@ def _apply_filters(df: pd.DataFrame) -> pd.DataFrame:
     # Pestañas para organizar filtros
     tab1, tab2, tab3 = st.tabs(["📋 Información General", "📊 Estados", "🏷️ Clasificación"])
     
-    # Variables para filtros
-    mask = pd.Series(True, index=df.index)
+    # Modelo de filtros por columna
+    filter_model = {}
     
     with tab1:
         col1, col2 = st.columns(2)
@@ -166,44 +170,38 @@ def _apply_filters(df: pd.DataFrame) -> pd.DataFrame:
             filtro_clases_acta = st.text_input("📄 Clases Acta", placeholder="Buscar en clases...")
 
     # Aplicar filtros
-    if filtro_titular:
-        mask &= df['titular'].str.contains(filtro_titular, case=False, na=False)
-    if filtro_boletin:
-        mask &= df['numero_boletin'].str.contains(filtro_boletin, case=False, na=False)
-    if filtro_orden:
-        mask &= df['numero_orden'].astype(str).str.contains(filtro_orden, na=False)
-    if filtro_solicitante:
-        mask &= df['solicitante'].str.contains(filtro_solicitante, case=False, na=False)
-    if filtro_agente:
-        mask &= df['agente'].str.contains(filtro_agente, case=False, na=False)
-    if filtro_expediente:
-        mask &= df['numero_expediente'].str.contains(filtro_expediente, na=False)
+    text_filters = {
+        'titular': filtro_titular,
+        'numero_boletin': filtro_boletin,
+        'numero_orden': filtro_orden,
+        'solicitante': filtro_solicitante,
+        'agente': filtro_agente,
+        'numero_expediente': filtro_expediente,
+        'clase': filtro_clase,
+        'marca_custodia': filtro_marca_custodia,
+        'marca_publicada': filtro_marca_publicada,
+        'clases_acta': filtro_clases_acta,
+    }
+    for column, value in text_filters.items():
+        if value:
+            filter_model[column] = _text_filter(value)
     
     if filtro_reporte_enviado:
-        mask &= (df['reporte_enviado'] == False)
+        filter_model['reporte_enviado'] = {'filterType': 'number', 'type': 'equals', 'filter': 0}
     if filtro_reporte_generado:
-        mask &= (df['reporte_generado'] == False)
+        filter_model['reporte_generado'] = {'filterType': 'number', 'type': 'equals', 'filter': 0}
     
     if filtro_fecha:
-        mask &= (pd.to_datetime(df['fecha_boletin']).dt.date == filtro_fecha)
+        # fecha_boletin se guarda como DD/MM/YYYY
+        filter_model['fecha_boletin'] = {'filterType': 'set', 'values': [filtro_fecha.strftime('%d/%m/%Y')]}
     
     # Aplicar filtro del slider de importancia
     if filtro_importancia_slider != "Todas":
-        mask &= (df['importancia'] == filtro_importancia_slider)
-    
-    # Aplicar filtros adicionales de clasificación
-    if 'filtro_clase' in locals() and filtro_clase:
-        mask &= df['clase'].str.contains(filtro_clase, case=False, na=False)
-    if 'filtro_marca_custodia' in locals() and filtro_marca_custodia:
-        mask &= df['marca_custodia'].str.contains(filtro_marca_custodia, case=False, na=False)
-    if 'filtro_marca_publicada' in locals() and filtro_marca_publicada:
-        mask &= df['marca_publicada'].str.contains(filtro_marca_publicada, case=False, na=False)
-    if 'filtro_clases_acta' in locals() and filtro_clases_acta:
-        mask &= df['clases_acta'].str.contains(filtro_clases_acta, case=False, na=False)
+        filter_model['importancia'] = {'filterType': 'set', 'values': [filtro_importancia_slider]}
     
     st.markdown('</div>', unsafe_allow_html=True)
     
-    return df[mask]
+    return filter_model
 
 
 def show_historial_page():
@@ -214,11 +212,12 @@ def show_historial_page():
     try:
         conn = crear_conexion()
         if conn:
-            rows, columns = obtener_datos(conn)
+            # Conteos agregados por importancia en una sola consulta (sin traer filas)
+            conteos = contar_boletines_por_importancia(conn)
             
-            if rows:
+            if conteos['Total']:
                 # Mostrar métricas
-                total_boletines = len(rows)
+                total_boletines = conteos['Total']
                 st.subheader(f"📈 Métricas Generales")
                 
                 col1, col2, col3, col4 = st.columns(4)
@@ -227,16 +226,15 @@ def show_historial_page():
                     st.metric("Total Boletines", total_boletines)
                 
                 with col2:
-                    # Contar por importancia (índice 15 en la consulta obtener_datos)
-                    alta_importancia = len([r for r in rows if len(r) > 15 and r[15] == "Alta"])
+                    alta_importancia = conteos['Alta']
                     st.metric("🔴 Alta Importancia", alta_importancia)
                 
                 with col3:
-                    media_importancia = len([r for r in rows if len(r) > 15 and r[15] == "Baja"])
+                    media_importancia = conteos['Baja']
                     st.metric("🟡 Baja Importancia", media_importancia)
                 
                 with col4:
-                    pendientes = len([r for r in rows if len(r) > 15 and r[15] == "Pendiente"])
+                    pendientes = conteos['Pendiente']
                     st.metric("⚠️ Pendientes", pendientes)
                 
                 # Mostrar advertencia si hay registros pendientes
@@ -245,38 +243,25 @@ def show_historial_page():
                 
                 st.markdown("---")
                 
-                # Convertir datos a DataFrame
-                df = pd.DataFrame(rows, columns=columns)
-                
-                # Convertir tipos de datos correctamente
-                df['reporte_enviado'] = df['reporte_enviado'].astype(bool)
-                df['reporte_generado'] = df['reporte_generado'].astype(bool)
-                
-                # Convertir booleanos a símbolos discretos para mejor presentación
-                df_display = df.copy()
-                df_display['reporte_enviado'] = df['reporte_enviado'].map({True: '●', False: '○'})
-                df_display['reporte_generado'] = df['reporte_generado'].map({True: '●', False: '○'})
-                
-                # Aplicar filtros
-                df_filtered = _apply_filters(df)
-                
-                # Aplicar la conversión visual también al DataFrame filtrado
-                df_filtered_display = df_filtered.copy()
-                df_filtered_display['reporte_enviado'] = df_filtered['reporte_enviado'].map({True: '●', False: '○'})
-                df_filtered_display['reporte_generado'] = df_filtered['reporte_generado'].map({True: '●', False: '○'})
+                # Aplicar filtros (se resuelven en SQL al pedir cada bloque)
+                filter_model = _apply_filters()
                 
                 # Actualizar métricas con datos filtrados
-                total_filtrados = len(df_filtered)
-                if total_filtrados != total_boletines:
-                    st.info(f"📊 Mostrando {total_filtrados} de {total_boletines} registros")
+                if filter_model:
+                    conteos_filtrados = contar_boletines_por_importancia(conn, filter_model)
+                    detalle = " · ".join(f"{nivel}: {conteos_filtrados[nivel]}"
+                                         for nivel in ('Alta', 'Baja', 'Pendiente') if conteos_filtrados[nivel])
+                    st.info(f"📊 Mostrando {conteos_filtrados['Total']} de {total_boletines} registros"
+                            + (f" ({detalle})" if detalle else ""))
                 
                 # Mostrar datos en grid usando el servicio de boletines
                 st.subheader("📋 Datos del Historial")
                 
-                # Usar el grid específico para boletines que incluye edición de importancia
-                GridService.show_bulletin_grid(
-                    df=df_filtered_display,
-                    key="historial_grid"
+                # Grid paginado desde la base de datos, con edición de importancia
+                GridService.show_bulletin_grid_server_side(
+                    conn,
+                    key="historial_grid",
+                    filter_model=filter_model
                 )
                 
             else:
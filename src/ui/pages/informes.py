@@ -10,7 +10,10 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 
 from database import crear_conexion, crear_tabla
+from query_cache import consulta_cacheada
+from report_catalog import leer_reporte, listar_reportes
 from report_generator import generar_informe_pdf
+from src.services.job_service import JobService
 from src.ui.components import UIComponents
 from src.utils.session_manager import SessionManager
 
@@ -22,7 +25,11 @@ class InformesPage:
         self.conn = None
     
     def _get_reports_status(self, conn):
-        """Obtener estado de reportes"""
+        """Obtener estado de reportes (cacheado hasta que cambie la tabla boletines)"""
+        return consulta_cacheada(conn, ('boletines',), ('informes_estado',), self._query_reports_status)
+    
+    def _query_reports_status(self, conn):
+        """Consulta sin caché del estado de reportes"""
         cursor = conn.cursor()
         
         # Estadísticas básicas
@@ -164,99 +171,78 @@ class InformesPage:
             st.success("✅ Todos los informes están actualizados")
     
     def _generate_all_reports(self):
-        """Generar todos los reportes pendientes usando report_generator y mostrar links de descarga"""
-        import os
-        with st.spinner("🔄 Generando informes..."):
-            try:
-                conn = crear_conexion()
-                if conn:
-                    resultado = generar_informe_pdf(conn)
-                    download_links = []
-                    # Si la función retorna nombres/rutas de archivos, mostrar links
-                    if resultado['success']:
-                        if resultado['message'] == 'no_pending':
-                            st.success("✅ No hay informes pendientes de generación")
-                        elif resultado['message'] == 'completed':
-                            if resultado['reportes_generados'] > 0:
-                                st.success(f"✅ Se generaron {resultado['reportes_generados']} informes correctamente")
-                                if resultado.get('pendientes', 0) > 0:
-                                    st.info(f"ℹ️ {resultado['pendientes']} registros permanecen como 'Pendiente' y no fueron procesados")
-                                if resultado.get('errores', 0) > 0:
-                                    st.warning(f"⚠️ {resultado['errores']} informes tuvieron errores durante la generación")
-                                # Mostrar links de descarga si existen
-                                # Buscar los archivos generados en la carpeta de informes
-                                informes_dir = "informes"
-                                if os.path.exists(informes_dir):
-                                    archivos = [f for f in os.listdir(informes_dir) if f.endswith('.pdf')]
-                                    if archivos:
-                                        st.markdown("### 📥 Descargar Informes Generados")
-                                        for archivo in archivos:
-                                            ruta = os.path.join(informes_dir, archivo)
-                                            with open(ruta, "rb") as f:
-                                                st.download_button(
-                                                    label=f"Descargar {archivo}",
-                                                    data=f.read(),
-                                                    file_name=archivo,
-                                                    mime="application/pdf"
-                                                )
-                            else:
-                                st.warning("⚠️ No se pudo generar ningún informe")
-                    else:
-                        if resultado['message'] == 'pending_only':
-                            st.warning(f"⚠️ No se generaron informes. Los {resultado['pendientes']} registros están marcados como 'Pendiente'")
-                            st.info("💡 Cambia la importancia de los registros en la sección 'Historial' para poder procesarlos")
-                        elif resultado['message'] == 'error':
-                            st.error(f"❌ Error al generar informes: {resultado.get('error', 'Error desconocido')}")
-                        else:
-                            st.error("❌ No se pudieron generar los informes")
-                    # Botón para ir al historial
-                    if st.button("📋 Ver Reportes Generados"):
-                        SessionManager.set_current_page('historial')
-                        SessionManager.set('show_db_section', True)
-                        st.rerun()
-                else:
-                    st.error("❌ No se pudo conectar a la base de datos")
-            except Exception as e:
-                st.error(f"❌ Error durante la generación: {e}")
+        """Lanzar la generación de todos los reportes pendientes como trabajo en segundo plano"""
+        JobService.start(
+            'generar_informes',
+            lambda conn, progreso: generar_informe_pdf(conn, progreso=progreso),
+            "Generación de informes"
+        )
+        st.rerun()
     
+    def _show_generation_job(self, conn):
+        """
+        Mostrar el progreso de la generación en curso o el resultado de la última lanzada
+        
+        Returns:
+            bool: True si hay una generación en curso
+        """
+        trabajo = JobService.get_tracked_job(conn, 'generar_informes')
+        if trabajo is None:
+            return False
+        if JobService.is_active(trabajo):
+            JobService.show_progress(trabajo)
+            return True
+        if trabajo['estado'] == 'error':
+            JobService.show_error(trabajo, 'generar_informes', key='cerrar_error_informes')
+            return False
+        
+        resultado = trabajo['resultado']
+        # Si la función retorna nombres/rutas de archivos, mostrar links
+        if resultado['success']:
+            if resultado['message'] == 'no_pending':
+                st.success("✅ No hay informes pendientes de generación")
+            elif resultado['message'] == 'completed':
+                if resultado['reportes_generados'] > 0:
+                    st.success(f"✅ Se generaron {resultado['reportes_generados']} informes correctamente")
+                    if resultado.get('pendientes', 0) > 0:
+                        st.info(f"ℹ️ {resultado['pendientes']} registros permanecen como 'Pendiente' y no fueron procesados")
+                    if resultado.get('errores', 0) > 0:
+                        st.warning(f"⚠️ {resultado['errores']} informes tuvieron errores durante la generación")
+                    # Mostrar links de descarga de los informes recién generados (catálogo)
+                    reportes = listar_reportes(conn, limite=resultado['reportes_generados'])
+                    if reportes:
+                        st.markdown("### 📥 Descargar Informes Generados")
+                        for reporte in reportes:
+                            self._show_report_download(reporte, f"Descargar {reporte['nombre_archivo']}",
+                                                       key=f"generado_{reporte['id']}")
+                else:
+                    st.warning("⚠️ No se pudo generar ningún informe")
+        else:
+            if resultado['message'] == 'pending_only':
+                st.warning(f"⚠️ No se generaron informes. Los {resultado['pendientes']} registros están marcados como 'Pendiente'")
+                st.info("💡 Cambia la importancia de los registros en la sección 'Historial' para poder procesarlos")
+            elif resultado['message'] == 'error':
+                st.error(f"❌ Error al generar informes: {resultado.get('error', 'Error desconocido')}")
+            else:
+                st.error("❌ No se pudieron generar los informes")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            # Botón para ir al historial
+            if st.button("📋 Ver Reportes Generados"):
+                JobService.dismiss('generar_informes')
+                SessionManager.set_current_page('historial')
+                SessionManager.set('show_db_section', True)
+                st.rerun()
+        with col2:
+            if st.button("Cerrar", key='cerrar_resultado_informes'):
+                JobService.dismiss('generar_informes')
+                st.rerun()
+        return False
     
     
     
     
-    def _show_recent_reports(self, status):
-        """Mostrar reportes generados recientemente con botón de descarga y nombre del titular"""
-        if status['ultimos_generados']:
-            with st.expander("📋 Últimos Reportes Generados", expanded=False):
-                st.markdown("### Reportes generados recientemente:")
-                informes_dir = "informes"
-                archivos_disponibles = []
-                if os.path.exists(informes_dir):
-                    archivos_disponibles = [f for f in os.listdir(informes_dir) if f.endswith('.pdf')]
-                for reporte in status['ultimos_generados']:
-                    numero, titular, fecha = reporte
-                    st.markdown(f"""
-                    <div style="background: #f8f9fa; padding: 0.8rem; margin: 0.3rem 0; border-radius: 6px; border-left: 3px solid #28a745; color: #222222;">
-                        <strong style='color:#222222;'>Boletín {numero}</strong> - <span style='color:#222222;'>{titular[:40]}...</span><br>
-                        <small style="color: #555555;">Generado: {fecha}</small>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    # Buscar archivo PDF correspondiente (por titular y boletín)
-                    archivo_pdf = None
-                    for f in archivos_disponibles:
-                        if str(numero) in f and titular[:10].replace(' ', '') in f.replace(' ', ''):
-                            archivo_pdf = f
-                            break
-                    if archivo_pdf:
-                        ruta = os.path.join(informes_dir, archivo_pdf)
-                        with open(ruta, "rb") as f:
-                            st.download_button(
-                                label=f"Descargar informe de {titular}",
-                                data=f.read(),
-                                file_name=archivo_pdf,
-                                mime="application/pdf",
-                                key=f"download_{archivo_pdf}_{numero}_{titular}"
-                            )
-                    # Si no se encuentra el PDF exacto, no mostrar ningún botón extra
     
     def show(self):
         """Mostrar la página de informes"""
@@ -268,6 +254,7 @@ class InformesPage:
         
         # Obtener estado de reportes
         conn = crear_conexion()
+        self.conn = conn
         if conn:
             try:
                 crear_tabla(conn)
@@ -279,8 +266,10 @@ class InformesPage:
                 # Mostrar desglose por importancia
                 self._show_importance_breakdown(status)
                 
-                # Mostrar opciones de generación
-                self._show_generation_options(status)
+                # Mostrar la generación en curso o el resultado de la última;
+                # mientras hay una en curso no se ofrece lanzar otra
+                if not self._show_generation_job(conn):
+                    self._show_generation_options(status)
                 
                
 
@@ -294,57 +283,59 @@ class InformesPage:
             except Exception as e:
                 st.error(f"Error: {e}")
 
+    def _show_report_download(self, reporte, label, key):
+        """
+        Botón de descarga de un informe del catálogo
+        
+        El PDF solo se lee al pedir la descarga (y se sirve desde la caché de descargas
+        recientes); mientras tanto se muestra un botón que no hace I/O.
+        """
+        preparados = st.session_state.setdefault('informes_preparados', set())
+        if reporte['id'] not in preparados:
+            if st.button(f"📄 {label}", key=f"preparar_{key}"):
+                preparados.add(reporte['id'])
+                st.rerun()
+            return
+        try:
+            st.download_button(
+                label=f"📥 {label}",
+                data=leer_reporte(reporte),
+                file_name=reporte['nombre_archivo'],
+                mime="application/pdf",
+                key=f"download_{key}"
+            )
+        except OSError as e:
+            st.caption(f"No se pudo acceder al PDF: {e}")
+    
     def _show_boletines_grid(self):
-        """Mostrar los últimos 10 informes generados en tarjetas con pandas y Streamlit"""
-        import pandas as pd
-        import sqlite3
-        import streamlit as st
-        from paths import get_db_path
-        db_path = get_db_path()
-        query = '''
-            SELECT id, titular, nombre_reporte, ruta_reporte
-            FROM boletines
-            WHERE reporte_generado = 1 AND ruta_reporte IS NOT NULL AND nombre_reporte IS NOT NULL
-            ORDER BY id DESC
-            LIMIT 10
-        '''
+        """Mostrar los últimos 10 informes generados en tarjetas (desde el catálogo de informes)"""
         try:
-            conn = sqlite3.connect(db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            reportes = listar_reportes(self.conn, limite=10)
         except Exception as e:
             st.error(f"Error al leer los informes: {e}")
             return
 
-        if df.empty:
+        if not reportes:
             st.info("No hay informes generados recientemente.")
             return
 
         st.markdown("<h3 style='margin-top:2rem;'>🗂️ Últimos informes generados</h3>", unsafe_allow_html=True)
         # Mostrar en cuadrícula (2 o 3 por fila)
-        num_cols = 3 if len(df) >= 6 else 2
+        num_cols = 3 if len(reportes) >= 6 else 2
         cols = st.columns(num_cols)
-        for idx, row in df.iterrows():
+        for idx, reporte in enumerate(reportes):
             col = cols[idx % num_cols]
             with col:
                 st.container()
+                tamano_kb = (reporte['tamano_bytes'] or 0) / 1024
                 st.markdown(f"""
                 <div style='background:#f4f6fa;padding:1.2rem;margin-bottom:1rem;border-radius:12px;box-shadow:0 2px 8px #0001;'>
-                    <span style='font-size:1.3rem;font-weight:bold;color:#222;'>{row['titular']}</span><br>
-                    <span style='font-size:1rem;color:#555;'>{row['nombre_reporte']}</span><br>
+                    <span style='font-size:1.3rem;font-weight:bold;color:#222;'>{reporte['titular']}</span><br>
+                    <span style='font-size:1rem;color:#555;'>{reporte['nombre_archivo']}</span><br>
+                    <small style='color:#777;'>{tamano_kb:.0f} KB</small>
                 </div>
                 """, unsafe_allow_html=True)
-                try:
-                    with open(row['ruta_reporte'], "rb") as f:
-                        st.download_button(
-                            label="📥 Descargar PDF",
-                            data=f.read(),
-                            file_name=row['nombre_reporte'],
-                            mime="application/pdf",
-                            key=f"download_{row['id']}"
-                        )
-                except Exception as e:
-                    st.caption(f"No se pudo acceder al PDF: {e}")
+                self._show_report_download(reporte, "Descargar PDF", key=str(reporte['id']))
     
     def _show_verificacion_reportes_section(self):
         """Muestra la sección para verificar titulares sin reportes"""
@@ -356,11 +347,19 @@ class InformesPage:
             y les envía un correo electrónico de notificación.
             """)
             
+            # Verificación manual en curso o recién terminada
+            trabajo = JobService.get_tracked_job(self.conn, 'verificacion_mensual')
+            resultado = None
+            if trabajo is not None and trabajo['estado'] == 'completado':
+                # Guardar resultado en la sesión
+                resultado = trabajo['resultado']
+                SessionManager.set('resultado_verificacion_reportes', resultado)
+                JobService.dismiss('verificacion_mensual')
+            
             col1, col2 = st.columns([1, 1])
             
             with col1:
                 # Mostrar resultado de verificación automática si existe
-                from src.utils.session_manager import SessionManager
                 resultado_verificacion = SessionManager.get('resultado_verificacion_reportes', None)
                 
                 if resultado_verificacion:
@@ -403,40 +402,35 @@ class InformesPage:
                 st.markdown("### Verificación Manual")
                 st.info("Puedes ejecutar la verificación manualmente en cualquier momento.")
                 
-                if st.button("🚨 Verificar Titulares sin Reportes", use_container_width=True):
-                    with st.spinner("Verificando titulares sin reportes..."):
-                        try:
-                            from verificar_titulares_sin_reportes import verificar_titulares_sin_reportes
-                            from database import crear_conexion
-                            
-                            conn = crear_conexion()
-                            if conn:
-                                resultado = verificar_titulares_sin_reportes(conn)
-                                conn.close()
-                                
-                                # Guardar resultado en la sesión
-                                SessionManager.set('resultado_verificacion_reportes', resultado)
-                                
-                                if resultado['estado'] == 'completado':
-                                    st.success("✅ Verificación completada con éxito")
-                                    # Mostrar mensaje UI si existe (por ejemplo: "No hay reportes para enviar")
-                                    if resultado.get('mensaje_ui'):
-                                        st.info(resultado.get('mensaje_ui'))
-                                    else:
-                                        st.info(f"Se encontraron {resultado['titulares_con_marcas_sin_reportes']} titulares con marcas sin reportes")
-                                        st.success(f"Se enviaron {resultado['emails_enviados']} correos de notificación")
-                                    
-                                    if resultado['errores'] > 0:
-                                        st.warning(f"Hubo {resultado['errores']} errores durante el envío")
-                                else:
-                                    st.error(f"❌ Error: {resultado['mensaje']}")
-                                
-                                # Forzar recarga para mostrar los resultados actualizados
-                                st.rerun()
-                            else:
-                                st.error("❌ No se pudo conectar a la base de datos")
-                        except Exception as e:
-                            st.error(f"❌ Error durante la verificación: {e}")
+                if JobService.is_active(trabajo):
+                    JobService.show_progress(trabajo)
+                elif trabajo is not None and trabajo['estado'] == 'error':
+                    JobService.show_error(trabajo, 'verificacion_mensual', key='cerrar_error_verificacion')
+                elif resultado is not None:
+                    if resultado['estado'] == 'completado':
+                        st.success("✅ Verificación completada con éxito")
+                        # Mostrar mensaje UI si existe (por ejemplo: "No hay reportes para enviar")
+                        if resultado.get('mensaje_ui'):
+                            st.info(resultado.get('mensaje_ui'))
+                        else:
+                            st.info(f"Se encontraron {resultado['titulares_con_marcas_sin_reportes']} titulares con marcas sin reportes")
+                            st.success(f"Se enviaron {resultado['emails_enviados']} correos de notificación")
+                        
+                        if resultado['errores'] > 0:
+                            st.warning(f"Hubo {resultado['errores']} errores durante el envío")
+                    else:
+                        st.error(f"❌ Error: {resultado['mensaje']}")
+                
+                if st.button("🚨 Verificar Titulares sin Reportes", use_container_width=True,
+                             disabled=JobService.is_active(trabajo)):
+                    from verificar_titulares_sin_reportes import verificar_titulares_sin_reportes
+                    
+                    JobService.start(
+                        'verificacion_mensual',
+                        lambda conn, progreso: verificar_titulares_sin_reportes(conn, progreso=progreso),
+                        "Verificación de titulares sin reportes"
+                    )
+                    st.rerun()
 
 def show_informes_page():
     """Función de compatibilidad para mostrar la página de informes"""
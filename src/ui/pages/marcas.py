@@ -39,7 +39,6 @@ def show_marcas_page():
             
             if marcas_data:
                 df_marcas = pd.DataFrame(marcas_data, columns=marcas_columns)
-                st.session_state.marcas_data = df_marcas
                 
                 # Estilos personalizados para pestañas
                 st.markdown("""
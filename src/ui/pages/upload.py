@@ -2,7 +2,6 @@
 Página de carga de datos
 """
 import streamlit as st
-import pandas as pd
 import sys
 import os
 from streamlit_extras.grid import grid
@@ -10,8 +9,10 @@ from streamlit_extras.grid import grid
 # Agregar el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 
-from database import crear_conexion, insertar_datos
-from extractor import extraer_datos_agrupados
+from database import crear_conexion
+from ingestion import importar_boletin, obtener_archivo_ingerido
+from parse_cache import leer_boletin_cacheado
+from src.services.job_service import JobService
 from src.ui.components import UIComponents
 from src.utils.session_manager import SessionManager
 
@@ -42,25 +43,22 @@ class UploadPage:
     
     def _process_file(self, archivo) -> tuple:
         """
-        Procesar el archivo Excel
+        Procesar el archivo Excel (un archivo ya leído antes se sirve desde la caché por contenido)
         
         Returns:
-            tuple: (success, data, error_message)
+            tuple: (success, data, error_message, sha256)
         """
         try:
-            # Leer el archivo Excel
-            df = pd.read_excel(archivo)
-            
-            # Extraer datos agrupados
-            datos_agrupados = extraer_datos_agrupados(df)
+            # Leer el archivo Excel y extraer los datos agrupados
+            sha256, datos_agrupados = leer_boletin_cacheado(archivo.getvalue())
             
             if not datos_agrupados:
-                return False, None, "No se pudieron extraer datos válidos del archivo"
+                return False, None, "No se pudieron extraer datos válidos del archivo", sha256
             
-            return True, datos_agrupados, None
+            return True, datos_agrupados, None, sha256
             
         except Exception as e:
-            return False, None, f"Error al procesar el archivo: {str(e)}"
+            return False, None, f"Error al procesar el archivo: {str(e)}", None
     
     def _show_file_info(self, archivo) -> None:
         """Mostrar información del archivo cargado"""
@@ -115,12 +113,12 @@ class UploadPage:
                     primer_registro = registros[0]
                     
                     # Extraer datos del registro
-                    boletin = primer_registro.get('Número de Boletín', 'N/A')
-                    marca = primer_registro.get('Marca en Custodia', 'N/A')
-                    clase = primer_registro.get('Clase', 'N/A')
-                    expediente = primer_registro.get('Expediente', 'N/A')
-                    solicitante = primer_registro.get('Solicitante', 'N/A')
-                    fecha_boletin = primer_registro.get('Fecha de Boletín', 'N/A')
+                    boletin = primer_registro.numero_boletin or 'N/A'
+                    marca = primer_registro.marca_custodia or 'N/A'
+                    clase = primer_registro.clase or 'N/A'
+                    expediente = primer_registro.numero_expediente or 'N/A'
+                    solicitante = primer_registro.solicitante or 'N/A'
+                    fecha_boletin = primer_registro.fecha_boletin or 'N/A'
                     
                     # Crear card usando componentes nativos de Streamlit
                     with st.container():
@@ -184,52 +182,67 @@ class UploadPage:
                 </div>
                 """, unsafe_allow_html=True)
     
-    def _handle_import(self, datos_agrupados: dict) -> None:
-        """Manejar la importación de datos"""
-        if st.button("🚀 Importar Datos a la Base", type="primary", use_container_width=True):
-            with st.spinner("⏳ Importando datos..."):
-                conn = crear_conexion()
-                if conn:
-                    try:
-                        # Insertar datos
-                        resultado = insertar_datos(conn, datos_agrupados)
-                        
-                        # Verificar que resultado no sea None
-                        if resultado is None:
-                            st.error("❌ Error: La función de inserción no devolvió resultado")
-                            return
-                        
-                        # Manejar resultado
-                        if resultado.get('success', False):
-                            st.success(f"✅ {resultado.get('mensaje', 'Datos importados exitosamente')}")
-                            
-                            # Limpiar estado
-                            SessionManager.set('datos_insertados', True)
-                            
-                            # Mostrar estadísticas si están disponibles
-                            if 'estadisticas' in resultado:
-                                stats = resultado['estadisticas']
-                                with st.container():
-                                    col1, col2, col3 = st.columns(3)
-                                    with col1:
-                                        st.metric("📊 Total Procesados", stats.get('total_procesados', 'N/A'))
-                                    with col2:
-                                        st.metric("✅ Insertados", stats.get('insertados', 'N/A'))
-                                    with col3:
-                                        st.metric("⚠️ Omitidos", stats.get('omitidos', 'N/A'))
-                            
-                            
-                        else:
-                            st.error(f"❌ {resultado.get('mensaje', 'Error al importar datos')}")
-                            
-                    except Exception as e:
-                        st.error(f"❌ Error durante la importación: {e}")
-                        # Log adicional para debug
-                        st.error(f"Tipo de error: {type(e).__name__}")
-                    finally:
-                        conn.close()
-                else:
-                    st.error("❌ No se pudo conectar a la base de datos")
+    def _handle_import(self, datos_agrupados: dict, sha256: str, nombre_archivo: str) -> None:
+        """Manejar la importación de datos (se ejecuta como trabajo en segundo plano)"""
+        conn = crear_conexion()
+        if not conn:
+            st.error("❌ No se pudo conectar a la base de datos")
+            return
+        try:
+            trabajo = JobService.get_tracked_job(conn, 'importar_boletines')
+            importado = obtener_archivo_ingerido(conn, sha256)
+        finally:
+            conn.close()
+        
+        # Ya importado en otra ocasión: importar de nuevo no insertaría nada
+        if importado and trabajo is None:
+            st.info(f"ℹ️ Este archivo ya se importó el {importado['fecha_ingesta']} "
+                    f"({importado['nombre_archivo']}, {importado['registros']} registros)")
+        
+        if JobService.is_active(trabajo):
+            JobService.show_progress(trabajo)
+        elif trabajo is not None and trabajo['estado'] == 'error':
+            JobService.show_error(trabajo, 'importar_boletines', key='cerrar_error_importacion')
+        elif trabajo is not None:
+            self._show_import_result(trabajo['resultado'])
+        
+        if st.button("🚀 Importar Datos a la Base", type="primary", use_container_width=True,
+                     disabled=JobService.is_active(trabajo)):
+            JobService.start(
+                'importar_boletines',
+                lambda conn, progreso: importar_boletin(conn, datos_agrupados, sha256, nombre_archivo,
+                                                        progreso=progreso),
+                "Importación de boletines"
+            )
+            st.rerun()
+    
+    def _show_import_result(self, resultado: dict) -> None:
+        """Mostrar el resultado de la última importación"""
+        # Verificar que resultado no sea None
+        if resultado is None:
+            st.error("❌ Error: La función de inserción no devolvió resultado")
+            return
+        
+        # Manejar resultado
+        if resultado.get('success', False):
+            st.success(f"✅ {resultado.get('mensaje', 'Datos importados exitosamente')}")
+            
+            # Limpiar estado
+            SessionManager.set('datos_insertados', True)
+            
+            # Mostrar estadísticas si están disponibles
+            if 'estadisticas' in resultado:
+                stats = resultado['estadisticas']
+                with st.container():
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("📊 Total Procesados", stats.get('total_procesados', 'N/A'))
+                    with col2:
+                        st.metric("✅ Insertados", stats.get('insertados', 'N/A'))
+                    with col3:
+                        st.metric("⚠️ Omitidos", stats.get('omitidos', 'N/A'))
+        else:
+            st.error(f"❌ {resultado.get('mensaje', 'Error al importar datos')}")
     
     def show(self) -> None:
         """Mostrar la página de carga"""
@@ -279,7 +292,7 @@ class UploadPage:
             
             # Procesar archivo
             with st.spinner("🔄 Procesando archivo..."):
-                success, datos_agrupados, error = self._process_file(archivo)
+                success, datos_agrupados, error, sha256 = self._process_file(archivo)
             
             if success and datos_agrupados:
                 # Mostrar vista previa
@@ -287,7 +300,7 @@ class UploadPage:
                 
                 # Botón de importación
                 st.markdown("<br>", unsafe_allow_html=True)
-                self._handle_import(datos_agrupados)
+                self._handle_import(datos_agrupados, sha256, archivo.name)
                 
             else:
                 st.error(f"❌ {error}")
@@ -0,0 +1,57 @@
+"""
+Enrutador de páginas con importación diferida
+"""
+import importlib
+from typing import Callable, Dict, Tuple
+
+
+# Página -> (módulo, función que la muestra).
+# Cada módulo (y sus dependencias pesadas: plotly, st_aggrid, pandas, fpdf...) se importa
+# la primera vez que se navega a la página, no al arrancar la aplicación.
+PAGES: Dict[str, Tuple[str, str]] = {
+    'dashboard': ('src.ui.pages.dashboard', 'show_dashboard'),
+    'upload': ('src.ui.pages.upload', 'show_upload_page'),
+    'historial': ('src.ui.pages.historial', 'show_historial_page'),
+    'clientes': ('src.ui.pages.clientes', 'show_clientes_page'),
+    'informes': ('src.ui.pages.informes', 'show_informes_page'),
+    'marcas': ('src.ui.pages.marcas', 'show_marcas_page'),
+    'emails': ('src.ui.pages.emails', 'show_emails_page'),
+    'analitica': ('src.ui.pages.analitica', 'show_analitica_page'),
+    'email_config': ('src.ui.pages.email_config', 'show_email_config_page'),
+}
+
+
+class PageRouter:
+    """Resuelve e importa bajo demanda las funciones de las páginas"""
+
+    _loaded: Dict[str, Callable[[], None]] = {}
+
+    @staticmethod
+    def get_page(name: str) -> Callable[[], None]:
+        """
+        Obtener la función que muestra una página, importando su módulo si hace falta
+
+        Args:
+            name: Nombre de la página (clave de PAGES)
+
+        Returns:
+            Función sin argumentos que muestra la página
+        """
+        page = PageRouter._loaded.get(name)
+        if page is None:
+            if name not in PAGES:
+                raise KeyError(f"Página desconocida: {name}")
+            module_name, function_name = PAGES[name]
+            page = getattr(importlib.import_module(module_name), function_name)
+            PageRouter._loaded[name] = page
+        return page
+
+    @staticmethod
+    def show(name: str) -> None:
+        """
+        Mostrar una página
+
+        Args:
+            name: Nombre de la página (clave de PAGES)
+        """
+        PageRouter.get_page(name)()
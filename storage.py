@@ -0,0 +1,530 @@
+"""
+Repositorios de boletines y clientes sobre SQLAlchemy Core, con motores con pool de conexiones.
+
+La base se elige por URL (paths.get_db_url): por defecto el mismo archivo SQLite que usa
+database.py, y con BOLETINES_DB_URL una base PostgreSQL cuando hay más usuarios o más de un
+nodo de la aplicación. Las consultas se arman con expresiones de SQLAlchemy, sin SQL propio de
+SQLite, así que el mismo código corre sobre los dos motores.
+
+Los repositorios devuelven lo mismo que las funciones equivalentes de database.py
+(contar_boletines_por_importancia, obtener_bloque_boletines, actualizar_importancias_lote,
+obtener_clientes, actualizar_clientes_lote), para que las páginas puedan pasar de una a otra
+sin cambios. Las reglas no se repiten acá: la validación de los modelos de filtro y orden del
+grid, la detección de boletines duplicados y las decisiones de la edición de clientes en lote
+son las de database.py; este módulo solo arma las consultas con SQLAlchemy. No usan query_cache: la caché depende de PRAGMA data_version, que solo existe en
+SQLite.
+
+Estado: PostgreSQL todavía no es una base soportada para correr la aplicación. Las páginas y
+los procesos (importación, informes, envíos, trabajos en segundo plano) siguen usando
+database.py sobre SQLite; este módulo es la capa de acceso hacia la que se migrarán. Su
+esquema (crear_esquema) cubre solo las tablas de los repositorios: no crea las tablas de
+resumen ni sus triggers (rollups.py), ni jobs, scheduled_jobs o archivos_ingeridos, así que
+una base PostgreSQL creada desde acá no alcanza para el resto de la aplicación.
+
+Configuración del pool (variables de entorno):
+    BOLETINES_DB_POOL: conexiones permanentes por motor (5)
+    BOLETINES_DB_POOL_EXTRA: conexiones adicionales en picos de uso (10)
+"""
+import logging
+import operator
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import (BigInteger, Boolean, CheckConstraint, Column, ForeignKey, Index, Integer, MetaData,
+                        String, Table, Text, and_, bindparam, case, create_engine, event, exists, false, func, or_,
+                        select, text)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from database import (_clave_boletin, _cuits_nuevos, _desarmar_modelo_grid, _filas_nuevas, _limpiar_cuit,
+                      _numeros_boletin, _planificar_clientes, _registrar_funciones_texto, _vincular_marcas)
+from paths import get_db_url
+from records import CAMPOS_LOTE
+
+TAMANO_POOL = int(os.getenv('BOLETINES_DB_POOL', '5'))
+MAX_DESBORDE_POOL = int(os.getenv('BOLETINES_DB_POOL_EXTRA', '10'))
+# Las conexiones de PostgreSQL se renuevan antes de que las corte un firewall o el servidor
+RECICLAR_CONEXIONES_SEGUNDOS = 1800
+# Espera ante un bloqueo de escritura de SQLite (igual que sqlite3.connect por defecto)
+ESPERA_BLOQUEO_SQLITE_SEGUNDOS = 5
+# Tamaño de los lotes de IN (...) (límite de parámetros de SQLite)
+TAMANO_LOTE = 500
+
+IMPORTANCIAS = ('Pendiente', 'Baja', 'Media', 'Alta')
+
+metadata = MetaData()
+
+# Mismo esquema que database.crear_tabla y report_catalog; las fechas se guardan como texto
+# 'AAAA-MM-DD HH:MM:SS', igual que en la base SQLite existente
+boletines = Table(
+    'boletines', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('numero_boletin', Text),
+    Column('fecha_boletin', Text),
+    Column('numero_orden', Text),
+    Column('solicitante', Text),
+    Column('agente', Text),
+    Column('numero_expediente', Text),
+    Column('clase', Text),
+    Column('marca_custodia', Text),
+    Column('marca_publicada', Text),
+    Column('clases_acta', Text),
+    Column('reporte_enviado', Boolean, server_default=false()),
+    Column('fecha_envio_reporte', Text),
+    Column('fecha_creacion_reporte', Text),
+    Column('reporte_generado', Boolean, server_default=false()),
+    Column('nombre_reporte', Text),
+    Column('ruta_reporte', Text),
+    Column('titular', Text),
+    Column('fecha_alta', Text, server_default=text('CURRENT_TIMESTAMP')),
+    Column('observaciones', Text),
+    Column('importancia', Text, server_default='Pendiente'),
+    CheckConstraint(f"importancia IN ({', '.join(repr(valor) for valor in IMPORTANCIAS)})"),
+    Index('idx_boletines', 'numero_boletin', 'numero_orden', 'titular'),
+    Index('idx_boletines_fecha_reporte', 'fecha_alta', 'reporte_generado'),
+    Index('idx_boletines_importancia', 'importancia', 'reporte_enviado', 'reporte_generado'),
+    Index('idx_boletines_fecha_boletin', 'fecha_boletin'),
+    sqlite_autoincrement=True,
+)
+
+clientes = Table(
+    'clientes', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('titular', Text, unique=True),
+    Column('email', Text),
+    Column('telefono', Text),
+    Column('direccion', Text),
+    Column('ciudad', Text),
+    Column('provincia', Text),
+    Column('fecha_alta', Text, server_default=text('CURRENT_TIMESTAMP')),
+    Column('fecha_modificacion', Text),
+    # Los CUIT tienen 11 dígitos: no entran en un INTEGER de PostgreSQL
+    Column('cuit', BigInteger, unique=True),
+    sqlite_autoincrement=True,
+)
+# Para el JOIN de boletines con clientes por titular sin distinguir mayúsculas
+Index('idx_clientes_titular_lower', func.lower(clientes.c.titular))
+
+marcas = Table(
+    'Marcas', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('codtit', Integer),
+    Column('titular', Text),
+    Column('codigo_marca', Text),
+    Column('marca', Text),
+    Column('clase', Integer),
+    Column('acta', Text),
+    Column('nrocon', Text),
+    Column('custodia', Text),
+    Column('cuit', Text),
+    Column('email', Text),
+    Column('cliente_id', Integer, ForeignKey('clientes.id')),
+    Index('idx_marcas_titular', 'titular'),
+    sqlite_autoincrement=True,
+)
+
+reportes = Table(
+    'reportes', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('nombre_archivo', Text, nullable=False),
+    Column('ruta', Text, nullable=False, unique=True),
+    Column('titular', Text),
+    Column('importancia', Text),
+    Column('clave_grupo', Text),
+    Column('periodo', Text),
+    Column('tamano_bytes', BigInteger),
+    Column('sha256', Text),
+    Column('fecha_modificacion', Text),
+    Column('fecha_creacion', Text, server_default=text('CURRENT_TIMESTAMP')),
+    Column('archivo', Text),
+    Column('miembro', Text),
+    Index('idx_reportes_titular', 'titular', 'fecha_modificacion'),
+    sqlite_autoincrement=True,
+)
+
+reportes_boletines = Table(
+    'reportes_boletines', metadata,
+    Column('reporte_id', Integer, ForeignKey('reportes.id', ondelete='CASCADE'), primary_key=True),
+    Column('boletin_id', Integer, primary_key=True),
+    Index('idx_reportes_boletines_boletin', 'boletin_id', 'reporte_id'),
+)
+
+_motores = {}
+_lock = threading.Lock()
+
+def _activar_foreign_keys(conexion_dbapi, registro):
+    cursor = conexion_dbapi.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+    # normalizar_texto() de los filtros de texto (ver _TextoNormalizado)
+    _registrar_funciones_texto(conexion_dbapi)
+
+def obtener_motor(url=None):
+    """
+    Devuelve el motor (con su pool de conexiones) de una base, creándolo la primera vez.
+
+    Args:
+        url: URL de SQLAlchemy; por defecto paths.get_db_url()
+
+    Returns:
+        sqlalchemy.engine.Engine: Motor compartido por todo el proceso
+    """
+    url = url or get_db_url()
+    with _lock:
+        motor = _motores.get(url)
+        if motor is None:
+            if url.startswith('sqlite'):
+                # Las sesiones de Streamlit corren en hilos distintos y comparten el pool
+                motor = create_engine(url, connect_args={'check_same_thread': False,
+                                                         'timeout': ESPERA_BLOQUEO_SQLITE_SEGUNDOS})
+                event.listen(motor, 'connect', _activar_foreign_keys)
+            else:
+                motor = create_engine(url, pool_size=TAMANO_POOL, max_overflow=MAX_DESBORDE_POOL,
+                                      pool_pre_ping=True, pool_recycle=RECICLAR_CONEXIONES_SEGUNDOS)
+            _motores[url] = motor
+        return motor
+
+def cerrar_motores():
+    """Cierra las conexiones de todos los motores creados (al terminar el proceso o en tests)."""
+    with _lock:
+        for motor in _motores.values():
+            motor.dispose()
+        _motores.clear()
+
+def crear_esquema(motor):
+    """
+    Crea las tablas de los repositorios que faltan en la base (las existentes no se modifican).
+    No crea el resto del esquema de la aplicación (ver el docstring del módulo).
+
+    Args:
+        motor: Motor de obtener_motor()
+    """
+    try:
+        metadata.create_all(motor)
+    except SQLAlchemyError as e:
+        logging.error(f"Error al crear el esquema: {e}")
+        raise Exception(f"Error al crear el esquema: {e}")
+
+def _ahora():
+    """Fecha y hora local en el formato de texto de las columnas de fecha."""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+# Alias de las consultas del grid (b = boletines, c = clientes), como en database.py
+_b = boletines.alias('b')
+_c = clientes.alias('c')
+_rb = reportes_boletines.alias('rb')
+_r = reportes.alias('r')
+_BOLETINES_CON_CLIENTE = _b.join(_c, func.lower(_b.c.titular) == func.lower(_c.c.titular), isouter=True)
+
+# Mismas columnas y nombres que database.COLUMNAS_GRID_BOLETINES
+COLUMNAS_GRID = {
+    **{nombre: _b.c[nombre] for nombre in (
+        'id', 'titular', 'marca_custodia', 'marca_publicada', 'numero_boletin', 'fecha_boletin', 'numero_orden',
+        'solicitante', 'agente', 'numero_expediente', 'clase', 'clases_acta', 'reporte_enviado',
+        'reporte_generado', 'fecha_alta', 'importancia')},
+    **{nombre: _c.c[nombre] for nombre in ('email', 'telefono', 'direccion', 'ciudad')},
+    # Informe más reciente del boletín según el catálogo
+    'informe': select(_r.c.nombre_archivo).where(
+        _r.c.id == select(func.max(_rb.c.reporte_id)).where(_rb.c.boletin_id == _b.c.id)
+        .correlate_except(_rb).scalar_subquery()
+    ).correlate_except(_r).scalar_subquery(),
+}
+
+_COLUMNAS_CLIENTE = {nombre for nombre, expresion in COLUMNAS_GRID.items() if getattr(expresion, 'table', None) is _c}
+
+def _origen_conteo(filter_model):
+    """FROM de los conteos: el JOIN con clientes solo hace falta si algún filtro usa sus columnas."""
+    return _BOLETINES_CON_CLIENTE if _COLUMNAS_CLIENTE.intersection(filter_model or {}) else _b
+
+_OPERADORES_NUMERO = {
+    'equals': operator.eq, 'notEqual': operator.ne,
+    'lessThan': operator.lt, 'lessThanOrEqual': operator.le,
+    'greaterThan': operator.gt, 'greaterThanOrEqual': operator.ge,
+}
+
+class _TextoNormalizado(FunctionElement):
+    """Texto en minúsculas para comparar: normalizar_texto() en SQLite, lower() en PostgreSQL (ya es Unicode)."""
+    type = Text()
+    inherit_cache = True
+
+@compiles(_TextoNormalizado)
+def _compilar_texto_normalizado(elemento, compilador, **kw):
+    return f"lower({compilador.process(elemento.clauses, **kw)})"
+
+@compiles(_TextoNormalizado, 'sqlite')
+def _compilar_texto_normalizado_sqlite(elemento, compilador, **kw):
+    return f"normalizar_texto({compilador.process(elemento.clauses, **kw)})"
+
+# Mismas claves que database._OPERADORES_TEXTO (que define los operadores aceptados)
+_OPERADORES_TEXTO = {
+    'contains': lambda columna, normalizada, valor: normalizada.contains(valor, autoescape=True),
+    'notContains': lambda columna, normalizada, valor: or_(columna.is_(None),
+                                                           ~normalizada.contains(valor, autoescape=True)),
+    'startsWith': lambda columna, normalizada, valor: normalizada.startswith(valor, autoescape=True),
+    'endsWith': lambda columna, normalizada, valor: normalizada.endswith(valor, autoescape=True),
+    'equals': lambda columna, normalizada, valor: normalizada == valor,
+    'notEqual': lambda columna, normalizada, valor: or_(columna.is_(None), normalizada != valor),
+}
+
+def _condicion_columna(columna, filtro):
+    """Arma la expresión de SQLAlchemy de un filtro ya validado (ver database._desarmar_filtro)."""
+    tipo_filtro, tipo, valores = filtro
+    es_texto = isinstance(columna.type, String)
+    if tipo == 'blank':
+        return or_(columna.is_(None), columna == '') if es_texto else columna.is_(None)
+    if tipo == 'notBlank':
+        return and_(columna.is_not(None), columna != '') if es_texto else columna.is_not(None)
+    if tipo_filtro == 'set':
+        return columna.in_(valores) if valores else false()
+    if tipo_filtro == 'text':
+        # Sin distinguir mayúsculas, también fuera de ASCII ('muñoz' encuentra 'MUÑOZ')
+        return _OPERADORES_TEXTO[tipo](columna, _TextoNormalizado(columna), valores[0])
+    if tipo == 'inRange':
+        return columna.between(*valores)
+    return _OPERADORES_NUMERO[tipo](columna, valores[0])
+
+def compilar_modelo_grid(filter_model=None, sort_model=None, columnas=None):
+    """
+    Traduce los modelos de filtro y orden de AG Grid a expresiones de SQLAlchemy.
+    La validación es la de database.compilar_modelo_grid (database._desarmar_modelo_grid):
+    acepta lo mismo y falla igual ante columnas u operadores desconocidos.
+
+    Args:
+        filter_model: {columna: {'filterType': 'text'|'number'|'set', 'type': ..., 'filter': ...}}
+        sort_model: Lista de {'colId': columna, 'sort': 'asc'|'desc'}
+        columnas: Mapa {columna del grid: expresión} (por defecto COLUMNAS_GRID)
+
+    Returns:
+        tuple: (lista de condiciones a combinar con AND, lista de criterios de orden)
+    """
+    filtros, ordenes = _desarmar_modelo_grid(filter_model, sort_model, columnas or COLUMNAS_GRID)
+    condiciones = []
+    for columna, operador, partes in filtros:
+        combinar = or_ if operador == 'OR' else and_
+        expresiones = [_condicion_columna(columna, parte) for parte in partes]
+        condiciones.append(expresiones[0] if len(expresiones) == 1 else combinar(*expresiones))
+    # Los NULL primero en orden ascendente, como en SQLite (PostgreSQL los pone al final)
+    return condiciones, [columna.desc().nulls_last() if descendente else columna.asc().nulls_first()
+                         for columna, descendente in ordenes]
+
+# Columnas de las filas de database._filas_nuevas
+_COLUMNAS_INSERCION = CAMPOS_LOTE + ('importancia',)
+
+def _lotes(valores):
+    for inicio in range(0, len(valores), TAMANO_LOTE):
+        yield valores[inicio:inicio + TAMANO_LOTE]
+
+class RepositorioBoletines:
+    """Consultas y escrituras de la tabla boletines."""
+
+    def __init__(self, motor=None):
+        self.motor = motor or obtener_motor()
+
+    def insertar(self, datos_agrupados):
+        """
+        Inserta boletines nuevos omitiendo los ya cargados (mismo boletín, orden y titular),
+        con las mismas reglas de duplicado que database.insertar_datos.
+
+        Args:
+            datos_agrupados: {titular: [records.Boletin]}
+
+        Returns:
+            dict: {'insertados': cantidad, 'omitidos': cantidad}
+        """
+        numeros_boletin = _numeros_boletin(datos_agrupados)
+        try:
+            with self.motor.begin() as conn:
+                existentes = set()
+                for lote in _lotes(numeros_boletin):
+                    resultado = conn.execute(
+                        select(boletines.c.numero_boletin, boletines.c.numero_orden, boletines.c.titular)
+                        .where(boletines.c.numero_boletin.in_(lote)))
+                    existentes.update(_clave_boletin(*fila) for fila in resultado)
+
+                nuevos, omitidos = _filas_nuevas(datos_agrupados, existentes)
+                fecha_alta = _ahora()
+                if nuevos:
+                    conn.execute(boletines.insert(), [dict(zip(_COLUMNAS_INSERCION, fila), fecha_alta=fecha_alta)
+                                                      for fila in nuevos])
+            return {'insertados': len(nuevos), 'omitidos': omitidos}
+        except SQLAlchemyError as e:
+            logging.error(f"Error al insertar datos: {e}")
+            raise Exception(f"Error al insertar datos: {e}")
+
+    def contar_por_importancia(self, filter_model=None):
+        """
+        Cuenta los boletines que cumplen el filtro agrupados por importancia.
+
+        Args:
+            filter_model: Modelo de filtros de AG Grid
+
+        Returns:
+            dict: {importancia: cantidad}, incluye la clave 'Total'
+        """
+        condiciones, _ = compilar_modelo_grid(filter_model)
+        consulta = (select(_b.c.importancia, func.count()).select_from(_origen_conteo(filter_model))
+                    .where(*condiciones).group_by(_b.c.importancia))
+        try:
+            with self.motor.connect() as conn:
+                conteos = dict.fromkeys(IMPORTANCIAS, 0)
+                conteos.update(tuple(fila) for fila in conn.execute(consulta))
+        except SQLAlchemyError as e:
+            logging.error(f"Error al contar boletines por importancia: {e}")
+            raise Exception(f"Error al contar boletines por importancia: {e}")
+        conteos['Total'] = sum(conteos.values())
+        return conteos
+
+    def obtener_bloque(self, inicio, fin, filter_model=None, sort_model=None):
+        """
+        Obtiene un bloque de filas del listado de boletines para el grid paginado.
+
+        Args:
+            inicio: Índice de la primera fila del bloque
+            fin: Índice siguiente a la última fila del bloque
+            filter_model: Modelo de filtros de AG Grid
+            sort_model: Modelo de orden de AG Grid
+
+        Returns:
+            tuple: (filas, columnas, total de filas que cumplen el filtro)
+        """
+        inicio = max(int(inicio), 0)
+        limite = max(int(fin) - inicio, 0)
+        condiciones, ordenes = compilar_modelo_grid(filter_model, sort_model)
+        # El id desempata para que las páginas sean estables
+        consulta = (select(*[expresion.label(nombre) for nombre, expresion in COLUMNAS_GRID.items()])
+                    .select_from(_BOLETINES_CON_CLIENTE).where(*condiciones)
+                    .order_by(*ordenes, _b.c.id).limit(limite).offset(inicio))
+        try:
+            with self.motor.connect() as conn:
+                total = conn.execute(
+                    select(func.count()).select_from(_origen_conteo(filter_model)).where(*condiciones)).scalar_one()
+                resultado = conn.execute(consulta)
+                columnas = list(resultado.keys())
+                filas = [tuple(fila) for fila in resultado]
+        except SQLAlchemyError as e:
+            logging.error(f"Error al consultar bloque de boletines: {e}")
+            raise Exception(f"Error al consultar bloque de boletines: {e}")
+        return filas, columnas, total
+
+    def actualizar_importancias(self, cambios):
+        """
+        Actualiza la importancia de varios boletines en una única transacción.
+
+        Args:
+            cambios: Diccionario {boletin_id: importancia}
+
+        Returns:
+            int: Cantidad de registros actualizados
+        """
+        ids_por_importancia = {}
+        for boletin_id, importancia in cambios.items():
+            ids_por_importancia.setdefault(importancia, []).append(int(boletin_id))
+        try:
+            actualizados = 0
+            with self.motor.begin() as conn:
+                for importancia, ids in ids_por_importancia.items():
+                    for lote in _lotes(ids):
+                        actualizados += conn.execute(
+                            boletines.update().where(boletines.c.id.in_(lote)).values(importancia=importancia)
+                        ).rowcount
+            return actualizados
+        except SQLAlchemyError as e:
+            logging.error(f"Error al actualizar importancias: {e}")
+            raise Exception(f"Error al actualizar importancias: {e}")
+
+def _valor_cuit(cuit):
+    """CUIT tal como se guarda en clientes: entero si son solo dígitos, None si está vacío."""
+    cuit_limpio = _limpiar_cuit(cuit)
+    if not cuit_limpio:
+        return None
+    return int(cuit_limpio) if cuit_limpio.isdigit() else cuit
+
+class RepositorioClientes:
+    """Consultas y escrituras de la tabla clientes y su vínculo con Marcas."""
+
+    def __init__(self, motor=None):
+        self.motor = motor or obtener_motor()
+
+    def obtener(self):
+        """
+        Obtiene todos los clientes ordenados por titular con el indicador tiene_marcas
+        (1 si tiene marcas asignadas por cliente_id).
+
+        Returns:
+            tuple: (list de filas, list de nombres de columnas), como database.obtener_clientes
+        """
+        tiene_marcas = exists().where(marcas.c.cliente_id == clientes.c.id)
+        consulta = select(
+            clientes.c.id, clientes.c.titular, clientes.c.email, clientes.c.telefono, clientes.c.direccion,
+            clientes.c.ciudad, clientes.c.provincia, clientes.c.cuit.label('CUIT'),
+            case((tiene_marcas, 1), else_=0).label('tiene_marcas'),
+        ).order_by(clientes.c.titular)
+        try:
+            with self.motor.connect() as conn:
+                resultado = conn.execute(consulta)
+                columnas = list(resultado.keys())
+                return [list(fila) for fila in resultado], columnas
+        except SQLAlchemyError as e:
+            logging.error(f"Error al consultar clientes: {e}")
+            raise Exception(f"Error al consultar clientes: {e}")
+
+    def actualizar_lote(self, cambios):
+        """
+        Actualiza varios clientes en una única transacción y vincula las marcas sin asignar
+        cuyos CUIT coinciden con los clientes editados, con las reglas de
+        database.actualizar_clientes_lote (si el CUIT cambió y existe en Marcas se usa el titular de Marcas).
+
+        Args:
+            cambios: Lista de diccionarios con id, titular, email, telefono, direccion,
+                     ciudad, provincia y cuit de cada cliente modificado
+
+        Returns:
+            dict: {'actualizados': clientes actualizados, 'marcas_vinculadas': marcas vinculadas}
+        """
+        if not cambios:
+            return {'actualizados': 0, 'marcas_vinculadas': 0}
+        cambios_por_id = {int(cambio['id']): cambio for cambio in cambios}
+        try:
+            with self.motor.begin() as conn:
+                cuits_antiguos = {}
+                for lote in _lotes(list(cambios_por_id)):
+                    for cliente_id, cuit in conn.execute(
+                            select(clientes.c.id, clientes.c.cuit).where(clientes.c.id.in_(lote))):
+                        cuits_antiguos[cliente_id] = '' if cuit is None else str(cuit)
+
+                # Titular registrado en Marcas para los CUIT nuevos
+                titulares_marcas = {}
+                for lote in _lotes(_cuits_nuevos(cambios_por_id, cuits_antiguos)):
+                    for cuit, titular in conn.execute(
+                            select(marcas.c.cuit, marcas.c.titular)
+                            .where(marcas.c.cuit.in_(lote), marcas.c.titular.is_not(None), marcas.c.titular != '')):
+                        titulares_marcas.setdefault(str(cuit), titular)
+
+                actualizaciones, clientes_por_cuit = _planificar_clientes(cambios_por_id, cuits_antiguos,
+                                                                          titulares_marcas)
+                fecha_modificacion = _ahora()
+                filas = [{'b_id': cliente_id, 'titular': titular, 'email': cambio['email'],
+                          'telefono': cambio['telefono'], 'direccion': cambio['direccion'],
+                          'ciudad': cambio['ciudad'], 'provincia': cambio['provincia'],
+                          'cuit': _valor_cuit(cambio['cuit']), 'fecha_modificacion': fecha_modificacion}
+                         for cliente_id, titular, cambio in actualizaciones]
+                if filas:
+                    conn.execute(clientes.update().where(clientes.c.id == bindparam('b_id')), filas)
+
+                # Una sola pasada por las marcas sin asignar para todos los CUIT afectados
+                vinculaciones = []
+                if clientes_por_cuit:
+                    vinculaciones = _vincular_marcas(conn.execute(
+                        select(marcas.c.id, marcas.c.cuit)
+                        .where(marcas.c.cliente_id.is_(None), marcas.c.cuit.is_not(None))), clientes_por_cuit)
+                    if vinculaciones:
+                        conn.execute(marcas.update().where(marcas.c.id == bindparam('b_id')),
+                                     [{'b_id': marca_id, 'cliente_id': cliente_id}
+                                      for cliente_id, marca_id in vinculaciones])
+            logging.info(f"Clientes actualizados en lote: {len(filas)}, marcas vinculadas: {len(vinculaciones)}")
+            return {'actualizados': len(filas), 'marcas_vinculadas': len(vinculaciones)}
+        except SQLAlchemyError as e:
+            logging.error(f"Error al actualizar clientes: {e}")
+            raise Exception(f"Error al actualizar clientes: {e}")
@@ -0,0 +1,93 @@
+import unittest
+import importlib.util
+import sqlite3
+import sys
+import os
+import tempfile
+import threading
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DUCKDB_DISPONIBLE = all(importlib.util.find_spec(paquete) is not None for paquete in ('duckdb', 'pyarrow', 'faker'))
+
+if DUCKDB_DISPONIBLE:
+    import analytics
+    from benchmarks.datos_sinteticos import crear_base_sintetica
+
+@unittest.skipUnless(DUCKDB_DISPONIBLE, "duckdb, pyarrow o Faker no están instalados")
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        self.directorio = os.path.join(self.tmpdir.name, 'analitica')
+        crear_base_sintetica(self.ruta_db, escala=0.02, semilla=7)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _contar(self, sql):
+        conn = sqlite3.connect(self.ruta_db)
+        try:
+            return conn.execute(sql).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_totales_coinciden_con_sqlite(self):
+        """Las agregaciones sobre la instantánea cuentan lo mismo que la base operativa"""
+        motor = analytics.MotorAnalitico(self.ruta_db, self.directorio)
+        self.assertEqual(motor.manifiesto['filas']['boletines'], self._contar("SELECT COUNT(*) FROM boletines"))
+
+        tendencia = motor.tendencia_mensual(meses=None)
+        self.assertEqual(int(tendencia['boletines'].sum()), self._contar("SELECT COUNT(*) FROM boletines"))
+        self.assertEqual(int(tendencia['enviados'].sum()),
+                         self._contar("SELECT COUNT(*) FROM boletines WHERE reporte_enviado = 1"))
+
+        por_titular = motor.boletines_por_mes_y_titular(meses=None, top_titulares=3)
+        self.assertEqual(int(por_titular['boletines'].sum()), int(tendencia['boletines'].sum()))
+        self.assertLessEqual(len(set(por_titular['titular']) - {'Otros'}), 3)
+
+        envios = motor.tasa_exito_envios()
+        self.assertEqual(int(envios['envios'].sum()), self._contar("SELECT COUNT(*) FROM envios_log"))
+        self.assertEqual(int(envios['exitosos'].sum()),
+                         self._contar("SELECT COUNT(*) FROM envios_log WHERE estado = 'exitoso'"))
+        self.assertTrue(((envios['tasa_exito'] >= 0) & (envios['tasa_exito'] <= 1)).all())
+
+        demoras = motor.demora_clasificacion(meses=None)
+        self.assertNotIn('Pendiente', set(demoras['importancia']))
+
+    def test_instantanea_se_renueva_solo_si_cambia_la_base(self):
+        """Sin cambios se reutiliza la instantánea; con cambios se renueva al vencer max_edad"""
+        primera = analytics.actualizar_instantanea(self.ruta_db, self.directorio, max_edad=0)
+        self.assertEqual(analytics.actualizar_instantanea(self.ruta_db, self.directorio, max_edad=0), primera)
+
+        conn = sqlite3.connect(self.ruta_db)
+        try:
+            conn.execute("DELETE FROM envios_log")
+            conn.commit()
+        finally:
+            conn.close()
+        # Dentro del intervalo se sigue usando la instantánea anterior
+        self.assertEqual(analytics.actualizar_instantanea(self.ruta_db, self.directorio, max_edad=3600), primera)
+
+        motor = analytics.MotorAnalitico(self.ruta_db, self.directorio, max_edad=0)
+        self.assertNotEqual(motor.manifiesto['firma'], primera['firma'])
+        self.assertEqual(motor.manifiesto['filas']['envios_log'], 0)
+        # Los envíos purgados del log siguen contados en el resumen mensual
+        self.assertEqual(int(motor.tasa_exito_envios()['envios'].sum()),
+                         primera['filas']['envios_log'])
+
+    def test_motor_compartido(self):
+        """obtener_motor_analitico crea el motor una vez por base sin quedar bloqueado"""
+        motores = []
+        hilo = threading.Thread(target=lambda: motores.extend(
+            analytics.obtener_motor_analitico(self.ruta_db, self.directorio) for _ in range(2)), daemon=True)
+        hilo.start()
+        hilo.join(timeout=30)
+        self.assertFalse(hilo.is_alive(), "obtener_motor_analitico quedó bloqueado")
+        analytics._motores.pop((self.ruta_db, self.directorio), None)
+        self.assertIs(motores[0], motores[1])
+        self.assertEqual(motores[0].manifiesto['filas']['boletines'], self._contar("SELECT COUNT(*) FROM boletines"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sqlite3
+import sys
+import os
+import tempfile
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import casos, medicion
+from benchmarks.datos_sinteticos import crear_base_sintetica
+
+class TestBenchmarks(unittest.TestCase):
+    def test_cobertura_de_funciones_publicas(self):
+        """Toda función pública de la capa de datos tiene caso o exclusión con motivo"""
+        self.assertEqual(casos.verificar_cobertura(), ([], []))
+
+    def test_base_sintetica(self):
+        """La base tiene las cantidades pedidas, es reproducible y respeta las reglas del flujo"""
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'a.db')
+            contexto = crear_base_sintetica(ruta, escala=0.02, semilla=3)
+            self.assertEqual(crear_base_sintetica(os.path.join(directorio, 'b.db'), escala=0.02, semilla=3)['titulares'],
+                             contexto['titulares'])
+            with self.assertRaises(FileExistsError):
+                crear_base_sintetica(ruta)
+
+            conn = sqlite3.connect(ruta)
+            try:
+                for tabla, cantidad in contexto['cantidades'].items():
+                    tabla = 'Marcas' if tabla == 'marcas' else tabla
+                    self.assertEqual(conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0], cantidad)
+                # Los 'Pendiente' nunca tienen informe generado
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM boletines WHERE importancia = 'Pendiente' "
+                                              "AND reporte_generado = 1").fetchone()[0], 0)
+                # Distribución despareja: el titular con más boletines supera con holgura a la media
+                por_titular = [fila[0] for fila in conn.execute(
+                    "SELECT COUNT(*) FROM boletines GROUP BY titular ORDER BY 1 DESC")]
+                self.assertGreater(por_titular[0], 3 * sum(por_titular) / len(por_titular))
+                self.assertGreater(conn.execute("SELECT COUNT(*) FROM reportes_boletines").fetchone()[0], 0)
+            finally:
+                conn.close()
+
+    def test_medir_y_comparar(self):
+        """Los casos corren sobre la base temporal y la comparación marca regresiones y errores nuevos"""
+        resultado = medicion.medir(escala=0.01, repeticiones=1, patron=r'obtener_datos|insertar_datos|registros_pendientes')
+        self.assertEqual(set(resultado['casos']), {'database.obtener_datos', 'database.insertar_datos',
+                                                   'email_sender.obtener_registros_pendientes_envio'})
+        self.assertTrue(all('mediana_ms' in r for r in resultado['casos'].values()))
+
+        base = {'metadatos': dict(resultado['metadatos']), 'casos': {
+            'database.obtener_datos': {'mediana_ms': 5.0},
+            'database.insertar_datos': {'mediana_ms': 1000.0},
+        }}
+        actual = {'metadatos': resultado['metadatos'], 'casos': dict(resultado['casos'])}
+        actual['casos']['database.obtener_datos'] = {'mediana_ms': 10.0}
+        actual['casos']['database.insertar_datos'] = {'error': 'falla'}
+        estados = {fila['nombre']: fila['estado'] for fila in medicion.comparar(actual, base, tolerancia=0.25)}
+        self.assertEqual(estados, {'database.obtener_datos': 'regresion', 'database.insertar_datos': 'error',
+                                   'email_sender.obtener_registros_pendientes_envio': 'nuevo'})
+
+        base['metadatos']['escala'] = 1.0
+        with self.assertRaises(ValueError):
+            medicion.comparar(actual, base)
+
+if __name__ == '__main__':
+    unittest.main()
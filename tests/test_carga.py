@@ -0,0 +1,59 @@
+import unittest
+import sqlite3
+import sys
+import os
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import database
+import paths
+from benchmarks import carga
+
+class TestCarga(unittest.TestCase):
+    def test_resumir(self):
+        """Percentiles sobre las operaciones sin error y conteo de bloqueos, rechazos y errores"""
+        registros = [('dashboard', float(ms), 'ok', None) for ms in range(1, 101)]
+        registros += [('dashboard', 5000.0, 'bloqueo', 'database is locked'),
+                      ('generar_informes', 1.0, 'rechazada', None),
+                      ('generar_informes', 2.0, 'error', 'falla')]
+        resumen = carga.resumir(registros, segundos=10)
+        dashboard = resumen['secuencias']['dashboard']
+        self.assertEqual((dashboard['p50_ms'], dashboard['p95_ms'], dashboard['p99_ms'], dashboard['max_ms']),
+                         (50.0, 95.0, 99.0, 100.0))
+        self.assertEqual(dashboard['bloqueos'], 1)
+        self.assertEqual(resumen['secuencias']['generar_informes']['ejemplos_error'], ['falla'])
+        self.assertNotIn('p50_ms', resumen['secuencias']['generar_informes'])
+        self.assertEqual((resumen['total']['operaciones'], resumen['total']['rechazadas'],
+                          resumen['total']['operaciones_por_segundo']), (103, 1, 10.3))
+
+    def test_es_bloqueo(self):
+        """Reconoce el bloqueo de SQLite también cuando la capa de datos lo envuelve en Exception"""
+        self.assertTrue(carga.es_bloqueo(sqlite3.OperationalError('database is locked')))
+        self.assertTrue(carga.es_bloqueo(Exception('Error al actualizar importancias: database is locked')))
+        self.assertFalse(carga.es_bloqueo(Exception('no such table: boletines')))
+
+    def test_base_redirigida(self):
+        """La copia la ven también los módulos que importaron get_db_path de paths"""
+        ruta_real = paths.get_db_path()
+        ruta_copia = os.path.abspath('copia_carga.db')
+        with carga.base_redirigida(ruta_copia):
+            self.assertEqual(paths.get_db_path(), ruta_copia)
+            self.assertEqual(analytics.get_db_path(), ruta_copia)
+            self.assertEqual(database.get_db_path(), ruta_copia)
+        self.assertEqual(paths.get_db_path(), ruta_real)
+        self.assertNotIn('BOLETINES_DB_PATH', os.environ)
+
+    def test_ejecutar_carga(self):
+        """Las sesiones corren todas las secuencias sobre la copia y la base real queda como estaba"""
+        resultado = carga.ejecutar_carga(sesiones=2, duracion=1.5, escala=0.01, pausa=0, wal=True)
+        self.assertNotIn('BOLETINES_DB_PATH', os.environ)
+        self.assertEqual(resultado['total']['errores'], 0, resultado['secuencias'])
+        self.assertGreater(resultado['total']['operaciones'], 0)
+        self.assertLessEqual(set(resultado['secuencias']), set(carga.SECUENCIAS))
+        with self.assertRaises(ValueError):
+            carga.ejecutar_carga(mezcla={'inexistente': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sqlite3
+import sys
+import os
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import crear_tabla
+from src.services.dashboard_service import DashboardService
+
+def _hoy_utc():
+    # Las consultas calculan los días con date('now'), que es UTC
+    return datetime.now(timezone.utc).date()
+
+class TestDashboardService(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+
+        def fecha(dias):
+            return (_hoy_utc() - timedelta(days=dias)).strftime('%d/%m/%Y')
+
+        # (titular, fecha_boletin, generado, enviado)
+        boletines = [
+            ('ACME', fecha(5), 0, 0),      # en curso
+            ('ACME', fecha(25), 1, 0),     # en curso y próximo a vencer
+            ('ACME', fecha(40), 1, 0),     # vencido
+            ('BETA', fecha(45), 1, 1),     # enviado: no cuenta en los tramos
+            ('BETA', '', 0, 0),            # sin fecha
+            ('GAMMA', fecha(30), 0, 0),    # último día: en curso y próximo a vencer
+        ]
+        self.conn.executemany("""
+            INSERT INTO boletines (numero_boletin, numero_orden, titular, fecha_boletin, reporte_generado, reporte_enviado)
+            VALUES ('1', ?, ?, ?, ?, ?)
+        """, [(str(i), *fila) for i, fila in enumerate(boletines)])
+        self.conn.execute("UPDATE boletines SET fecha_alta = datetime('now', '-60 days') WHERE titular = 'GAMMA'")
+        self.conn.execute("INSERT INTO clientes (titular, cuit) VALUES ('ACME', '1')")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_contadores_en_una_consulta(self):
+        """Los contadores coinciden con las consultas individuales anteriores"""
+        data = DashboardService.get_dashboard_data(self.conn)
+        self.assertEqual(data['total_boletines'], 6)
+        self.assertEqual(data['reportes_generados'], 3)
+        self.assertEqual(data['reportes_enviados'], 1)
+        self.assertEqual(data['total_clientes'], 1)
+        self.assertEqual(data['reportes_en_curso'], 3)
+        self.assertEqual(data['proximos_vencer'], 2)
+        self.assertEqual(data['reportes_vencidos'], 1)
+        self.assertEqual(data['top_titulares'], [('ACME', 3), ('BETA', 2), ('GAMMA', 1)])
+        self.assertEqual(data['datos_timeline'], [(_hoy_utc().isoformat(), 5)])
+
+    def test_detalles_por_tramo(self):
+        """Los listados de detalle se consultan por separado"""
+        vencidos = DashboardService.get_deadline_details(self.conn, 'vencidos')
+        self.assertEqual([(fila[1], fila[3]) for fila in vencidos], [('ACME', 10)])
+        proximos = DashboardService.get_deadline_details(self.conn, 'proximos_vencer')
+        self.assertEqual([(fila[1], fila[3]) for fila in proximos], [('GAMMA', 0), ('ACME', 5)])
+        en_curso = DashboardService.get_deadline_details(self.conn, 'en_curso')
+        self.assertEqual([fila[3] for fila in en_curso], [5, 25, 30])
+        with self.assertRaises(ValueError):
+            DashboardService.get_deadline_details(self.conn, 'otro')
+
+    def test_clave_de_cache_por_dia_utc(self):
+        """La clave de la caché usa el día UTC, el mismo que date('now') en las consultas"""
+        with mock.patch('src.services.dashboard_service.consulta_cacheada') as cacheada, \
+                mock.patch('src.services.dashboard_service.datetime') as reloj:
+            reloj.now.return_value = datetime(2026, 3, 2, 0, 30, tzinfo=timezone.utc)
+            DashboardService.get_dashboard_data(self.conn)
+            DashboardService.get_deadline_details(self.conn, 'vencidos')
+        reloj.now.assert_called_with(timezone.utc)
+        claves = [llamada.args[2] for llamada in cacheada.call_args_list]
+        self.assertEqual(claves, [('dashboard', date(2026, 3, 2)), ('dashboard_detalle', 'vencidos', date(2026, 3, 2))])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import unittest
+import sqlite3
+import sys
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import (crear_tabla, actualizar_importancias_lote, actualizar_clientes_lote,
+                      obtener_bloque_boletines, compilar_modelo_grid, contar_boletines_por_importancia)
+from db_utils import initialize_db
+from src.services.grid_service import GridService
+
+class TestCambiosImportancia(unittest.TestCase):
+    def test_diff_solo_celdas_modificadas(self):
+        """El diff devuelve solo los ids cuya importancia cambió"""
+        snapshot = pd.DataFrame({'id': [1, 2, 3], 'importancia': ['Pendiente', 'Baja', 'Alta'],
+                                 'titular': ['A', 'B', 'C']})
+        # El grid devuelve los datos ordenados/filtrados y con ids como texto
+        grid = pd.DataFrame({'id': ['3', '1'], 'importancia': ['Alta', 'Media'], 'titular': ['C', 'A']})
+        self.assertEqual(GridService._diff_importances(snapshot, grid), {1: 'Media'})
+
+    def test_actualizacion_en_lote(self):
+        """Los cambios se aplican en una transacción agrupados por importancia"""
+        conn = sqlite3.connect(':memory:')
+        crear_tabla(conn)
+        conn.executemany("INSERT INTO boletines (numero_boletin, numero_orden, titular) VALUES (?, ?, ?)",
+                         [('1', str(i), 'T') for i in range(1, 5)])
+        conn.commit()
+
+        actualizados = actualizar_importancias_lote(conn, {1: 'Alta', 2: 'Alta', 4: 'Baja'})
+
+        self.assertEqual(actualizados, 3)
+        filas = dict(conn.execute("SELECT id, importancia FROM boletines").fetchall())
+        self.assertEqual(filas, {1: 'Alta', 2: 'Alta', 3: 'Pendiente', 4: 'Baja'})
+        conn.close()
+
+class TestCambiosClientes(unittest.TestCase):
+    def test_diff_detecta_todas_las_celdas(self):
+        """El diff devuelve todas las filas editadas con sus columnas cambiadas"""
+        snapshot = pd.DataFrame({'id': [1, 2, 3], 'titular': ['A', 'B', 'C'], 'email': ['a@x.com', None, 'c@x.com'],
+                                 'telefono': ['', '', ''], 'direccion': ['', '', ''], 'ciudad': ['', '', ''],
+                                 'provincia': [None, None, None], 'cuit': ['1', '2', '3'], 'tiene_marcas': [0, 1, 0]})
+        grid = snapshot.copy()
+        grid['id'] = grid['id'].astype(str)
+        grid.loc[0, 'email'] = 'nuevo@x.com'
+        grid.loc[0, 'ciudad'] = 'Rosario'
+        grid.loc[2, 'cuit'] = '30712353569'
+        grid['provincia'] = ''
+        cambios = GridService._diff_clients(snapshot, grid)
+        self.assertEqual(cambios['id'].tolist(), [1, 3])
+        self.assertEqual(cambios['campos_cambiados'].tolist(), [['email', 'ciudad'], ['cuit']])
+
+    def test_actualizacion_en_lote_vincula_marcas(self):
+        """Los clientes se actualizan juntos y se vinculan las marcas de los CUIT afectados"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ruta_db = os.path.join(tmpdir, 'boletines.db')
+            initialize_db(ruta_db)
+            conn = sqlite3.connect(ruta_db)
+            crear_tabla(conn)
+            conn.executemany("INSERT INTO clientes (titular, email, cuit) VALUES (?, ?, ?)",
+                             [('A', 'a@x.com', '1'), ('B', 'b@x.com', '2')])
+            conn.executemany("INSERT INTO Marcas (marca, cuit, titular) VALUES (?, ?, ?)",
+                             [('M1', '30-71235356-9', 'ACME SA'), ('M2', '20123456789', 'B')])
+            conn.commit()
+            base = {'telefono': '', 'direccion': '', 'ciudad': '', 'provincia': ''}
+            resultado = actualizar_clientes_lote(conn, [
+                dict(base, id=1, titular='A', email='a@x.com', cuit='30712353569'),
+                dict(base, id=2, titular='B', email='nuevo@x.com', cuit='2'),
+            ])
+            self.assertEqual(resultado, {'actualizados': 2, 'marcas_vinculadas': 1})
+            clientes = conn.execute("SELECT id, titular, email FROM clientes ORDER BY id").fetchall()
+            self.assertEqual(clientes, [(1, 'A', 'a@x.com'), (2, 'B', 'nuevo@x.com')])
+            marcas = dict(conn.execute("SELECT marca, cliente_id FROM Marcas").fetchall())
+            self.assertEqual(marcas, {'M1': 1, 'M2': None})
+            conn.close()
+
+class TestGridPorBloques(unittest.TestCase):
+    def test_bloque_de_dataframe(self):
+        """Solo se envía el bloque visible, acotado si la página filtró filas"""
+        df = pd.DataFrame({'id': range(250)})
+        bloque, estado, inicio, filas = GridService._dataframe_block(df, 'test_bloques')
+        self.assertEqual((len(bloque), inicio, filas), (100, 0, 100))
+
+        estado['block'] = 5
+        bloque, estado, inicio, _ = GridService._dataframe_block(df, 'test_bloques')
+        self.assertEqual((estado['block'], inicio, len(bloque), bloque['id'].iloc[0]), (2, 200, 50, 200))
+
+    def test_sin_filtros_de_encabezado(self):
+        """Los filtros y el orden del encabezado se desactivan también en las columnas tipadas"""
+        opciones = {'defaultColDef': {'filterable': True},
+                    'columnDefs': [{'field': 'id', 'type': ['numericColumn', 'numberColumnFilter']}]}
+        GridService._disable_block_filters(opciones)
+        for definicion in [opciones['defaultColDef']] + opciones['columnDefs']:
+            self.assertFalse(definicion['filter'])
+            self.assertFalse(definicion['sortable'])
+
+class TestModeloFilasPaginado(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+        self.conn.executemany(
+            "INSERT INTO boletines (numero_boletin, numero_orden, titular, importancia, reporte_enviado) VALUES (?, ?, ?, ?, ?)",
+            [('1', str(i), f'Titular {i % 3}', 'Alta' if i % 2 else 'Baja', i % 4 == 0) for i in range(1, 251)])
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_bloque_con_filtro_y_orden(self):
+        """Se devuelve solo el bloque pedido y el total que cumple el filtro"""
+        filtros = {'titular': {'filterType': 'text', 'type': 'contains', 'filter': 'titular 1'},
+                   'importancia': {'filterType': 'set', 'values': ['Alta']}}
+        filas, columnas, total = obtener_bloque_boletines(
+            self.conn, 10, 20, filtros, [{'colId': 'id', 'sort': 'desc'}])
+        self.assertEqual(total, 42)
+        self.assertEqual(len(filas), 10)
+        ids = [fila[columnas.index('id')] for fila in filas]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertTrue(all(fila[columnas.index('importancia')] == 'Alta' for fila in filas))
+
+    def test_columnas_fuera_de_lista_blanca(self):
+        """Los modelos no pueden referenciar columnas arbitrarias"""
+        with self.assertRaises(ValueError):
+            compilar_modelo_grid(sort_model=[{'colId': 'id; DROP TABLE boletines', 'sort': 'asc'}])
+        with self.assertRaises(ValueError):
+            compilar_modelo_grid({'observaciones': {'filterType': 'text', 'type': 'contains', 'filter': 'x'}})
+
+    def test_conteos_por_importancia_con_filtro(self):
+        """Los conteos se agregan en SQL con el mismo filtro que el bloque"""
+        self.assertEqual(contar_boletines_por_importancia(self.conn),
+                         {'Pendiente': 0, 'Baja': 125, 'Media': 0, 'Alta': 125, 'Total': 250})
+        filtros = {'reporte_enviado': {'filterType': 'number', 'type': 'equals', 'filter': 0}}
+        conteos = contar_boletines_por_importancia(self.conn, filtros)
+        self.assertEqual((conteos['Alta'], conteos['Baja'], conteos['Total']), (125, 63, 188))
+
+    def test_like_escapa_comodines(self):
+        """Los comodines del texto buscado se tratan como literales"""
+        where_sql, parametros, _ = compilar_modelo_grid({'titular': {'filterType': 'text', 'type': 'contains', 'filter': '50%_'}})
+        self.assertIn('LIKE ?', where_sql)
+        self.assertEqual(parametros, ['%50\\%\\_%'])
+        _, _, total = obtener_bloque_boletines(self.conn, 0, 10, {'titular': {'filterType': 'text', 'type': 'contains', 'filter': '%'}})
+        self.assertEqual(total, 0)
+
+    def test_texto_sin_distinguir_mayusculas_fuera_de_ascii(self):
+        """'muñoz' encuentra 'MUÑOZ' (el LIKE de SQLite solo ignora mayúsculas en ASCII)"""
+        self.conn.executemany("INSERT INTO boletines (numero_boletin, numero_orden, titular) VALUES ('2', ?, ?)",
+                              [('1', 'MUÑOZ Y ASOCIADOS'), ('2', 'Gómez Hnos'), ('3', 'MUNOZ SA')])
+        self.conn.commit()
+        contiene = {'titular': {'filterType': 'text', 'type': 'contains', 'filter': 'muñoz'}}
+        filas, columnas, total = obtener_bloque_boletines(self.conn, 0, 10, contiene)
+        self.assertEqual([fila[columnas.index('titular')] for fila in filas], ['MUÑOZ Y ASOCIADOS'])
+        igual = {'titular': {'filterType': 'text', 'type': 'equals', 'filter': 'GÓMEZ HNOS'}}
+        self.assertEqual(contar_boletines_por_importancia(self.conn, igual)['Total'], 1)
+
+class TestModeloFilasVolumen(unittest.TestCase):
+    """Bloques y conteos sobre 100k boletines y 2k clientes: el JOIN por titular usa índice."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = sqlite3.connect(':memory:')
+        crear_tabla(cls.conn)
+        cls.conn.executemany("INSERT INTO clientes (titular, email, CUIT) VALUES (?, ?, ?)",
+                             [(f"Cliente {i}", f"cliente{i}@ejemplo.com", 30_000_000_000 + i) for i in range(2000)])
+        # Los boletines traen el titular en mayúsculas; un tercio no es cliente
+        cls.conn.executemany(
+            "INSERT INTO boletines (numero_boletin, numero_orden, titular, importancia) VALUES (?, ?, ?, ?)",
+            [(str(i // 400), str(i), f"CLIENTE {i % 3000}", ('Pendiente', 'Baja', 'Media', 'Alta')[i % 4])
+             for i in range(100_000)])
+        cls.conn.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def _medir(self, funcion, *args):
+        inicio = time.perf_counter()
+        resultado = funcion(self.conn, *args)
+        return resultado, time.perf_counter() - inicio
+
+    def test_join_por_indice(self):
+        """El JOIN con clientes busca por idx_clientes_titular_lower en lugar de recorrer la tabla"""
+        plan = ' '.join(fila[3] for fila in self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT c.email FROM boletines b "
+            "LEFT JOIN clientes c ON LOWER(b.titular) = LOWER(c.titular)"))
+        self.assertIn('idx_clientes_titular_lower', plan)
+
+    def test_bloque_y_conteos_en_tiempo_acotado(self):
+        """Un bloque de 50 filas y los conteos no dependen de filas × clientes"""
+        (filas, columnas, total), segundos = self._medir(
+            obtener_bloque_boletines, 50_000, 50_050, None, [{'colId': 'email', 'sort': 'desc'}])
+        self.assertEqual((len(filas), total), (50, 100_000))
+        self.assertLess(segundos, 2)
+        (filas, columnas, _), segundos = self._medir(obtener_bloque_boletines, 0, 50)
+        # El cliente se encuentra sin distinguir mayúsculas
+        self.assertEqual(filas[1][columnas.index('email')], 'cliente1@ejemplo.com')
+        self.assertLess(segundos, 0.5)
+
+        filtro = {'titular': {'filterType': 'text', 'type': 'startsWith', 'filter': 'cliente 1'}}
+        conteos, segundos = self._medir(contar_boletines_por_importancia, filtro)
+        self.assertEqual(conteos['Total'], sum(1 for i in range(100_000) if str(i % 3000).startswith('1')))
+        self.assertLess(segundos, 2)
+        conteos, _ = self._medir(contar_boletines_por_importancia,
+                                 {'email': {'filterType': 'text', 'type': 'notBlank'}})
+        self.assertEqual(conteos['Total'], sum(1 for i in range(100_000) if i % 3000 < 2000))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+
+# Añadir el directorio raíz al path de Python
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+# Presupuesto de arranque en frío (milisegundos acumulados según python -X importtime).
+# Se puede ajustar en máquinas lentas con la variable de entorno IMPORT_BUDGET_FACTOR.
+PRESUPUESTO_MS = {
+    'app_refactored': 2500,
+    'database': 400,
+}
+
+# Módulos que la app no debe cargar antes de la primera pintura (login)
+MODULOS_PESADOS = ('pandas', 'plotly.graph_objects', 'plotly.express', 'st_aggrid', 'fpdf', 'database')
+
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$')
+
+def medir_importacion(modulo):
+    """
+    Importa el módulo en un intérprete nuevo con -X importtime.
+
+    Returns:
+        dict: {nombre de módulo: tiempo acumulado en milisegundos}
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ, capture_output=True, text=True, timeout=120
+    )
+    if resultado.returncode != 0:
+        raise AssertionError(f"Error al importar {modulo}:\n{resultado.stderr[-2000:]}")
+    tiempos = {}
+    for linea in resultado.stderr.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        if coincidencia:
+            tiempos[coincidencia.group(4)] = int(coincidencia.group(2)) / 1000
+    return tiempos
+
+def presupuesto(modulo):
+    return PRESUPUESTO_MS[modulo] * float(os.getenv('IMPORT_BUDGET_FACTOR', '1'))
+
+class TestTiempoImportacion(unittest.TestCase):
+    @unittest.skipUnless(importlib.util.find_spec('streamlit'), "streamlit no está instalado")
+    def test_arranque_app(self):
+        """La app no importa páginas ni librerías pesadas antes del login y respeta el presupuesto"""
+        tiempos = medir_importacion('app_refactored')
+        # Lo que ya carga el propio streamlit (p. ej. stubs de plotly) no cuenta
+        propios = set(tiempos) - set(medir_importacion('streamlit'))
+        cargados = [modulo for modulo in MODULOS_PESADOS if modulo in propios]
+        self.assertEqual(cargados, [], f"Importados al arrancar: {cargados}")
+        self.assertLess(tiempos['app_refactored'], presupuesto('app_refactored'))
+
+    def test_importar_database(self):
+        """Importar database no trae pandas ni supera su presupuesto"""
+        tiempos = medir_importacion('database')
+        self.assertNotIn('pandas', tiempos)
+        self.assertLess(tiempos['database'], presupuesto('database'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import ingestion
+import jobs
+from test_pipeline import _escribir_boletin
+
+class TestBandejaBoletines(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        self.bandeja = os.path.join(self.tmpdir.name, 'bandeja')
+        os.makedirs(self.bandeja)
+        self.patcher = mock.patch.object(database, 'get_db_path', return_value=self.ruta_db)
+        self.patcher.start()
+        # La caché de lectura también va al directorio temporal (variable heredada por los procesos)
+        self.entorno = mock.patch.dict(os.environ, {'BOLETINES_CACHE_DIR': os.path.join(self.tmpdir.name, 'cache')})
+        self.entorno.start()
+
+    def tearDown(self):
+        for modulo in (database, jobs, ingestion):
+            modulo._esquemas_verificados.discard(self.ruta_db)
+        self.entorno.stop()
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _dejar(self, nombre, numero_boletin, titulares, antiguedad=60):
+        ruta = os.path.join(self.bandeja, nombre)
+        _escribir_boletin(ruta, numero_boletin, titulares)
+        instante = time.time() - antiguedad
+        os.utime(ruta, (instante, instante))
+        return ruta
+
+    def _archivos(self, subdirectorio):
+        base = os.path.join(self.bandeja, subdirectorio)
+        return sorted(nombre for _, _, nombres in os.walk(base) for nombre in nombres)
+
+    def _boletines(self):
+        conn = database.crear_conexion()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM boletines").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_solo_toma_archivos_estables(self):
+        """Un archivo recién escrito o que cambió desde el sondeo anterior se deja para después"""
+        viejo = self._dejar('a.xlsx', '100', ['ACME'])
+        self._dejar('b.xlsx', '101', ['BETA'], antiguedad=0)
+        open(os.path.join(self.bandeja, '~$a.xlsx'), 'w').close()
+
+        self.assertEqual(ingestion.buscar_archivos_estables(self.bandeja), [viejo])
+        observaciones = {}
+        # Primer sondeo: todavía no hay con qué comparar
+        self.assertEqual(ingestion.buscar_archivos_estables(self.bandeja, observaciones), [])
+        self.assertEqual(ingestion.buscar_archivos_estables(self.bandeja, observaciones), [viejo])
+        with open(viejo, 'ab') as f:
+            f.write(b'0')
+        os.utime(viejo, (time.time() - 60, time.time() - 60))
+        self.assertEqual(ingestion.buscar_archivos_estables(self.bandeja, observaciones), [])
+
+    def test_importa_lote_y_omite_ya_vistos(self):
+        """El lote se importa, se archiva con su hash y un archivo repetido no se vuelve a leer"""
+        primero = self._dejar('boletin100.xlsx', '100', ['ACME', 'BETA'])
+        copia = os.path.join(self.tmpdir.name, 'copia.xlsx')
+        shutil.copy(primero, copia)
+        self._dejar('boletin101.xlsx', '101', ['ACME'])
+
+        resumen = ingestion.procesar_bandeja(self.bandeja, workers=2)
+        self.assertEqual(sorted(resumen['importados']), ['boletin100.xlsx', 'boletin101.xlsx'])
+        self.assertEqual(resumen['insertados'], 3)
+        self.assertEqual(self._boletines(), 3)
+        self.assertEqual(os.listdir(self.bandeja), ['procesados'])
+        sha = ingestion.hash_archivo(copia)
+        self.assertIn(f"{sha[:12]}-boletin100.xlsx", self._archivos('procesados'))
+
+        # Volver a dejar el mismo contenido con otro nombre: no se importa de nuevo
+        shutil.copy(copia, os.path.join(self.bandeja, 'reenviado.xlsx'))
+        os.utime(os.path.join(self.bandeja, 'reenviado.xlsx'), (time.time() - 60, time.time() - 60))
+        with mock.patch.object(ingestion, 'leer_boletin') as leer:
+            resumen = ingestion.procesar_bandeja(self.bandeja, workers=1)
+        leer.assert_not_called()
+        self.assertEqual((resumen['importados'], resumen['duplicados']), ([], ['reenviado.xlsx']))
+        self.assertEqual(self._archivos('duplicados'), [f"{sha[:12]}-reenviado.xlsx"])
+        self.assertIsNone(ingestion.procesar_bandeja(self.bandeja))
+
+    def test_archivo_invalido_va_a_errores(self):
+        """Un archivo que no se puede leer se aparta sin frenar al resto del lote"""
+        ruta = os.path.join(self.bandeja, 'roto.xlsx')
+        with open(ruta, 'wb') as f:
+            f.write(b'no es un xlsx')
+        os.utime(ruta, (time.time() - 60, time.time() - 60))
+        self._dejar('bueno.xlsx', '100', ['ACME'])
+
+        resumen = ingestion.procesar_bandeja(self.bandeja, workers=2)
+        self.assertEqual(resumen['importados'], ['bueno.xlsx'])
+        self.assertEqual([e['archivo'] for e in resumen['errores']], ['roto.xlsx'])
+        self.assertEqual(len(self._archivos('errores')), 1)
+
+    def test_pospone_si_hay_importacion_en_curso(self):
+        """Con una importación manual en curso los archivos quedan en la bandeja"""
+        self._dejar('boletin100.xlsx', '100', ['ACME'])
+        conn = database.crear_conexion()
+        try:
+            jobs.reservar_trabajo(conn, ingestion.TIPO_TRABAJO)
+        finally:
+            conn.close()
+        self.assertIsNone(ingestion.procesar_bandeja(self.bandeja))
+        self.assertEqual(os.listdir(self.bandeja), ['boletin100.xlsx'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import jobs
+
+class TestTrabajos(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        self.patcher = mock.patch.object(database, 'get_db_path', return_value=self.ruta_db)
+        self.patcher.start()
+        self.conn = database.crear_conexion()
+
+    def tearDown(self):
+        self.conn.close()
+        jobs._esquemas_verificados.discard(self.ruta_db)
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _esperar(self, trabajo_id, limite=10):
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            trabajo = jobs.obtener_trabajo(self.conn, trabajo_id)
+            if trabajo['estado'] not in jobs.ESTADOS_ACTIVOS:
+                return trabajo
+            time.sleep(0.05)
+        self.fail(f"El trabajo {trabajo_id} no terminó")
+
+    def test_completa_con_progreso_y_resultado(self):
+        """El trabajo corre en segundo plano y deja progreso y resultado en la tabla"""
+        def funcion(conn, progreso):
+            for i in range(3):
+                progreso(i, 3, f"paso {i}")
+            progreso(3, 3)
+            return {'procesados': 3}
+
+        trabajo_id = jobs.encolar_trabajo('prueba', funcion, "Prueba")
+        trabajo = self._esperar(trabajo_id)
+        self.assertEqual(trabajo['estado'], 'completado')
+        self.assertEqual(trabajo['resultado'], {'procesados': 3})
+        self.assertEqual((trabajo['progreso_actual'], trabajo['progreso_total']), (3, 3))
+        self.assertIsNotNone(trabajo['fecha_fin'])
+
+    def test_error_queda_registrado(self):
+        """Una excepción del trabajo lo deja en estado error y libera el tipo"""
+        def funcion(conn, progreso):
+            raise ValueError("falló")
+
+        trabajo = self._esperar(jobs.encolar_trabajo('prueba', funcion))
+        self.assertEqual(trabajo['estado'], 'error')
+        self.assertEqual(trabajo['error'], "falló")
+        self.assertIsNone(jobs.obtener_trabajo_activo(self.conn, 'prueba'))
+
+    def test_un_solo_trabajo_activo_por_tipo(self):
+        """Lanzar un tipo que ya está en curso se rechaza; otro tipo sí se admite"""
+        liberar = threading.Event()
+
+        def funcion(conn, progreso):
+            liberar.wait(5)
+            return None
+
+        primero = jobs.encolar_trabajo('prueba', funcion)
+        try:
+            with self.assertRaises(jobs.TrabajoEnCurso) as contexto:
+                jobs.encolar_trabajo('prueba', funcion)
+            self.assertEqual(contexto.exception.trabajo['id'], primero)
+            otro = jobs.encolar_trabajo('otro', lambda conn, progreso: None)
+        finally:
+            liberar.set()
+        self.assertEqual(self._esperar(primero)['estado'], 'completado')
+        self.assertEqual(self._esperar(otro)['estado'], 'completado')
+        # Terminado el anterior, el tipo vuelve a estar libre
+        self.assertEqual(self._esperar(jobs.encolar_trabajo('prueba', funcion))['estado'], 'completado')
+
+    def test_libera_trabajos_abandonados(self):
+        """Un trabajo sin latido reciente se marca como abandonado al reservar otro"""
+        abandonado = jobs.reservar_trabajo(self.conn, 'prueba')
+        self.conn.execute("UPDATE jobs SET latido = datetime('now', '-1 day') WHERE id = ?", (abandonado,))
+        self.conn.commit()
+        nuevo = jobs.reservar_trabajo(self.conn, 'prueba')
+        self.assertNotEqual(nuevo, abandonado)
+        self.assertEqual(jobs.obtener_trabajo(self.conn, abandonado)['estado'], 'error')
+        self.assertEqual(jobs.obtener_trabajo_activo(self.conn, 'prueba')['id'], nuevo)
+
+    def test_trabajo_en_espera_en_el_pool_no_se_abandona(self):
+        """Un trabajo encolado detrás de otros largos mantiene su latido y no se libera"""
+        liberar = threading.Event()
+        largos = [jobs.encolar_trabajo(f"largo_{i}", lambda conn, progreso: liberar.wait(5))
+                  for i in range(jobs.MAX_TRABAJOS_SIMULTANEOS)]
+        try:
+            en_espera = jobs.encolar_trabajo('prueba', lambda conn, progreso: 'hecho')
+            self.assertEqual(jobs.obtener_trabajo(self.conn, en_espera)['estado'], 'en_cola')
+            self.conn.execute("UPDATE jobs SET latido = datetime('now', '-1 day') WHERE id = ?", (en_espera,))
+            self.conn.commit()
+            jobs._actualizar_latidos()
+            with self.assertRaises(jobs.TrabajoEnCurso):
+                jobs.reservar_trabajo(self.conn, 'prueba')
+        finally:
+            liberar.set()
+        for trabajo_id in largos:
+            self._esperar(trabajo_id)
+        self.assertEqual(self._esperar(en_espera)['resultado'], 'hecho')
+
+    def test_falla_fuera_de_la_funcion_queda_registrada(self):
+        """Si ejecutar_trabajo() falla antes de correr la función, el error se registra y el tipo se libera"""
+        with mock.patch.object(jobs, 'ejecutar_trabajo', side_effect=RuntimeError("sin base")):
+            with self.assertLogs(level='ERROR') as registros:
+                trabajo = self._esperar(jobs.encolar_trabajo('prueba', lambda conn, progreso: None))
+        self.assertEqual((trabajo['estado'], trabajo['error']), ('error', 'sin base'))
+        self.assertTrue(any('sin base' in linea for linea in registros.output))
+        self.assertNotIn(trabajo['id'], jobs._trabajos_locales)
+
+if __name__ == '__main__':
+    unittest.main()
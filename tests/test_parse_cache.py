@@ -0,0 +1,107 @@
+import unittest
+import sqlite3
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion
+import parse_cache
+from database import crear_tabla, insertar_datos
+from records import Boletin, LoteBoletines
+from test_pipeline import _escribir_boletin
+
+def _registro(numero_boletin, numero_orden, marca='MARCA', titular='ACME'):
+    return Boletin(titular, numero_boletin, "01/02/2026", numero_orden, "S", "A", "E", "35", marca, marca, "35")
+
+class TestCacheLectura(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.tmpdir.name, 'cache')
+        os.makedirs(self.cache)
+        self.ruta = os.path.join(self.tmpdir.name, 'boletin.xlsx')
+        _escribir_boletin(self.ruta, '100', ['ACME', 'BETA', 'ACME'])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_acierto_no_vuelve_a_leer_el_xlsx(self):
+        """La segunda lectura del mismo contenido sale del parquet con los mismos datos"""
+        sha256, datos = parse_cache.leer_boletin_cacheado(self.ruta, directorio=self.cache)
+        self.assertEqual(os.listdir(self.cache), [f"{sha256}.v{parse_cache.VERSION_CACHE}.parquet"])
+        self.assertEqual({t: len(r) for t, r in datos.items()}, {'ACME': 2, 'BETA': 1})
+        # Todo texto: el orden numérico 1 pasa a '1'
+        self.assertEqual(datos['ACME'][0].numero_orden, '1')
+        self.assertEqual(datos['ACME'][0].numero_expediente, 'EXP-1')
+
+        with open(self.ruta, 'rb') as f:
+            contenido = f.read()
+        with mock.patch('extractor.extraer_datos_agrupados') as extraer:
+            self.assertEqual(parse_cache.leer_boletin_cacheado(contenido, directorio=self.cache), (sha256, datos))
+            self.assertEqual(parse_cache.leer_boletin_cacheado(self.ruta, sha256, self.cache), (sha256, datos))
+        extraer.assert_not_called()
+
+    def test_normaliza_nulos(self):
+        """NaN y None quedan como None; los números como su texto"""
+        datos = parse_cache.normalizar({'ACME': [_registro(100, 1.0)._replace(agente=float('nan'), clase=None)]})
+        registro = datos['ACME'][0]
+        self.assertEqual((registro.numero_boletin, registro.numero_orden), ('100', '1.0'))
+        self.assertIsNone(registro.agente)
+        self.assertIsNone(registro.clase)
+
+    def test_descarta_los_menos_usados(self):
+        """La caché conserva solo los MAX_ARCHIVOS_CACHE archivos usados más recientemente"""
+        datos = LoteBoletines.desde_agrupados(parse_cache.normalizar({'ACME': [_registro(100, 1)]}))
+        with mock.patch.object(parse_cache, 'MAX_ARCHIVOS_CACHE', 2):
+            for i in range(3):
+                parse_cache.guardar(f"{i:064d}", datos, self.cache)
+                os.utime(parse_cache._ruta(f"{i:064d}", self.cache), (1000 + i, 1000 + i))
+            parse_cache.guardar('f' * 64, datos, self.cache)
+        self.assertEqual(sorted(os.listdir(self.cache)),
+                         [os.path.basename(parse_cache._ruta(sha256, self.cache)) for sha256 in (f"{2:064d}", 'f' * 64)])
+        self.assertEqual(parse_cache.obtener('f' * 64, self.cache), datos)
+
+    def test_version_en_la_clave(self):
+        """Cambiar VERSION_CACHE invalida lo guardado con la versión anterior"""
+        datos = LoteBoletines.desde_agrupados(parse_cache.normalizar({'ACME': [_registro(100, 1)]}))
+        parse_cache.guardar('a' * 64, datos, self.cache)
+        with mock.patch.object(parse_cache, 'VERSION_CACHE', parse_cache.VERSION_CACHE + 1):
+            self.assertIsNone(parse_cache.obtener('a' * 64, self.cache))
+        self.assertEqual(parse_cache.obtener('a' * 64, self.cache), datos)
+
+class TestInsercionPorLote(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_omite_existentes_y_repetidos_del_lote(self):
+        """Los duplicados se detectan igual que con la consulta por registro (texto contra texto)"""
+        self.assertEqual(insertar_datos(self.conn, {'ACME': [_registro(100, 1)]})['estadisticas']['insertados'], 1)
+        resultado = insertar_datos(self.conn, {
+            'ACME': [_registro('100', '1'), _registro(100, 2), _registro(100, 2), _registro(100, None)],
+            'BETA': [_registro(100, 1, titular='BETA')],
+        })
+        self.assertEqual(resultado['estadisticas'], {'total_procesados': 5, 'insertados': 3, 'omitidos': 2})
+        # Sin número de orden no hay clave: se inserta siempre, como antes
+        self.assertEqual(insertar_datos(self.conn, {'ACME': [_registro(100, None)]})['estadisticas']['insertados'], 1)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM boletines").fetchone()[0], 5)
+
+    def test_archivo_ya_importado_no_toca_la_base(self):
+        """Con el hash en el registro de importaciones, la inserción se omite por completo"""
+        datos = {'ACME': [_registro(100, 1), _registro(100, 2)]}
+        primero = ingestion.importar_boletin(self.conn, datos, 'a' * 64, 'boletin.xlsx')
+        self.assertEqual(primero['estadisticas']['insertados'], 2)
+        with mock.patch.object(ingestion, 'insertar_datos') as insertar:
+            segundo = ingestion.importar_boletin(self.conn, datos, 'a' * 64, 'otro_nombre.xlsx')
+        insertar.assert_not_called()
+        self.assertTrue(segundo['ya_importado'])
+        self.assertEqual(segundo['estadisticas'], {'total_procesados': 2, 'insertados': 0, 'omitidos': 2})
+
+if __name__ == '__main__':
+    unittest.main()
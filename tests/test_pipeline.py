@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+import pandas as pd
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import jobs
+import pipeline
+
+def _escribir_boletin(ruta, numero_boletin, titulares):
+    """XLSX con el formato que espera extractor.extraer_datos_agrupados (un bloque por titular)."""
+    filas = [['encabezado'] + [''] * 5]
+    filas.append(['', '', f"BOLETIN NRO. {numero_boletin} del 01/02/2026", '', '', ''])
+    for orden, titular in enumerate(titulares, 1):
+        filas.append(['', orden, '', '', '', ''])
+        filas.append(['', '', '', '', 'Solicitante SA (País: AR)', 'Agente'])
+        filas.append([''] * 6)
+        filas.append([f"EXP-{orden}", 35, 'MARCA', '', 'MARCA PUB', '35'])
+        filas.append(['', 'Titular', f"{titular}. Acta: {orden}", '', '', ''])
+    pd.DataFrame(filas).to_excel(ruta, header=False, index=False)
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        self.patcher = mock.patch.object(database, 'get_db_path', return_value=self.ruta_db)
+        self.patcher.start()
+        # La caché de lectura también va al directorio temporal (variable heredada por los procesos)
+        self.entorno = mock.patch.dict(os.environ, {'BOLETINES_CACHE_DIR': os.path.join(self.tmpdir.name, 'cache')})
+        self.entorno.start()
+        self.archivos = []
+        for numero, titulares in (('100', ['ACME', 'BETA']), ('101', ['ACME'])):
+            ruta = os.path.join(self.tmpdir.name, f"boletin{numero}.xlsx")
+            _escribir_boletin(ruta, numero, titulares)
+            self.archivos.append(ruta)
+
+    def tearDown(self):
+        jobs._esquemas_verificados.discard(self.ruta_db)
+        database._esquemas_verificados.discard(self.ruta_db)
+        self.entorno.stop()
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _boletines(self):
+        conn = database.crear_conexion()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM boletines").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_lectura_en_paralelo_combina_archivos(self):
+        """Leer con varios procesos da lo mismo que leer en serie"""
+        serie = pipeline.leer_boletines(self.archivos, workers=1)
+        paralelo = pipeline.leer_boletines(self.archivos, workers=2)
+        self.assertEqual(serie, paralelo)
+        self.assertEqual({t: len(r) for t, r in serie.items()}, {'ACME': 2, 'BETA': 1})
+
+    def test_ingest_con_tiempos_y_dry_run(self):
+        """ingest registra filas y duración por etapa; --dry-run no escribe y generate cuenta lo listo"""
+        with mock.patch('metrics.iniciar_servidor_metricas') as iniciar_metricas:
+            self.assertEqual(pipeline.main(['--dry-run', '--json', 'ingest', *self.archivos]), 0)
+        iniciar_metricas.assert_called_once_with()
+        # Ni siquiera se crea el esquema
+        conn = database.crear_conexion()
+        try:
+            self.assertIsNone(conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'boletines'").fetchone())
+        finally:
+            conn.close()
+        cache = os.environ['BOLETINES_CACHE_DIR']
+        self.assertFalse(os.path.isdir(cache) and os.listdir(cache))
+
+        etapas, opciones = pipeline._parsear_argumentos(['--workers', '1', 'ingest', *self.archivos, 'generate'])
+        self.assertEqual(etapas, ['ingest', 'generate'])
+        opciones.dry_run = True
+        resumen = pipeline.ejecutar_pipeline(['ingest'], opciones)
+        self.assertTrue(resumen['ok'])
+        self.assertEqual(resumen['etapas'][0]['filas'], 3)
+
+        opciones.dry_run = False
+        resumen = pipeline.ejecutar_pipeline(['ingest'], opciones)
+        etapa = resumen['etapas'][0]
+        self.assertTrue(etapa['ok'])
+        self.assertEqual(etapa['resultado']['estadisticas']['insertados'], 3)
+        self.assertGreaterEqual(etapa['segundos'], 0)
+        self.assertEqual(self._boletines(), 3)
+        conn = database.crear_conexion()
+        try:
+            self.assertEqual(jobs.obtener_trabajo(conn, etapa['trabajo_id'])['tipo'], 'importar_boletines')
+            conn.execute("UPDATE boletines SET importancia = 'Alta' WHERE titular = 'ACME'")
+            conn.commit()
+        finally:
+            conn.close()
+
+        opciones.dry_run = True
+        generate = pipeline.ejecutar_pipeline(['generate'], opciones)['etapas'][0]
+        self.assertEqual((generate['filas'], generate['resultado']['total_titulares']), (2, 1))
+
+    def test_etapa_fallida_detiene_las_siguientes(self):
+        """Si una etapa falla, las siguientes no se ejecutan y el código de salida es 1"""
+        with mock.patch('ingestion.insertar_datos', side_effect=Exception("disco lleno")):
+            self.assertEqual(pipeline.main(['--workers', '1', 'ingest', self.archivos[0], 'generate']), 1)
+            etapas, opciones = pipeline._parsear_argumentos(['--workers', '1', 'ingest', self.archivos[0], 'generate'])
+            resumen = pipeline.ejecutar_pipeline(etapas, opciones)
+        self.assertFalse(resumen['ok'])
+        self.assertEqual([e['etapa'] for e in resumen['etapas']], ['ingest'])
+        self.assertEqual(resumen['etapas'][0]['error'], "disco lleno")
+
+    def test_argumentos_invalidos(self):
+        for argv in (['publish'], ['ingest'], ['generate', 'generate'], ['ingest', 'no_existe.xlsx']):
+            with self.assertRaises(SystemExit):
+                pipeline._parsear_argumentos(argv)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sqlite3
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import query_cache
+from db_utils import initialize_db
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        self.patcher = mock.patch.object(database, 'get_db_path', return_value=self.ruta_db)
+        self.patcher.start()
+        initialize_db(self.ruta_db)
+        self.conn = database.crear_conexion()
+        database.crear_tabla(self.conn)
+        query_cache.limpiar_cache()
+
+    def tearDown(self):
+        self.conn.close()
+        vigia = query_cache._vigias.pop(self.ruta_db, None)
+        if vigia:
+            vigia[0].close()
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _consultar(self, llamadas):
+        def cargar(conn):
+            llamadas.append(1)
+            return conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+        return query_cache.consulta_cacheada(self.conn, ('clientes',), ('contar_clientes',), cargar)
+
+    def test_repite_sin_consultar(self):
+        """La segunda lectura sale de la caché"""
+        llamadas = []
+        self.assertEqual(self._consultar(llamadas), 0)
+        self.assertEqual(self._consultar(llamadas), 0)
+        self.assertEqual(len(llamadas), 1)
+
+    def test_invalidacion_por_escritura(self):
+        """Las escrituras de database.py invalidan la entrada"""
+        llamadas = []
+        self._consultar(llamadas)
+        database.insertar_cliente(self.conn, 'ACME', 'a@example.com', '', '', '', '', '20123456789')
+        self.assertEqual(self._consultar(llamadas), 1)
+        self.assertEqual(len(llamadas), 2)
+
+    def test_invalidacion_por_escritura_externa(self):
+        """Un commit de otra conexión se detecta con PRAGMA data_version"""
+        llamadas = []
+        self._consultar(llamadas)
+        externa = sqlite3.connect(self.ruta_db)
+        externa.execute("INSERT INTO clientes (titular) VALUES ('EXTERNO')")
+        externa.commit()
+        externa.close()
+        self.assertEqual(self._consultar(llamadas), 1)
+        self.assertEqual(len(llamadas), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import pickle
+import sqlite3
+import sys
+import os
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import crear_tabla
+from records import Boletin, LoteBoletines, fabrica_de_filas
+
+def _boletin(titular, numero_orden, fecha='01/02/2026'):
+    return Boletin(titular, '100', fecha, numero_orden, 'S', 'A', 'E', '35', 'MARCA', 'MARCA', '35')
+
+class TestRegistros(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_fabrica_de_filas(self):
+        """El cursor arma Boletin por nombre de columna; los campos opcionales no consultados quedan en None"""
+        self.conn.execute("INSERT INTO boletines (titular, numero_boletin, fecha_boletin, numero_orden, importancia) "
+                          "VALUES ('ACME', '100', '01/02/2026', '1', 'Alta')")
+        cursor = self.conn.cursor()
+        cursor.row_factory = fabrica_de_filas(Boletin)
+        registro = cursor.execute("""
+            SELECT titular, numero_boletin, fecha_boletin, numero_orden, solicitante, agente, numero_expediente,
+                   clase, marca_custodia, marca_publicada, clases_acta, importancia
+            FROM boletines
+        """).fetchone()
+        self.assertEqual(registro, Boletin('ACME', '100', '01/02/2026', '1', *[None] * 7, 'Alta'))
+        self.assertIsNone(registro.id)
+        self.assertEqual((registro.boletin_texto, registro.boletin_corto), ("BOLETÍN NRO. 100 DEL 01/02/2026", "Nº 100"))
+        self.assertEqual(registro._replace(fecha_boletin=None).boletin_corto, "")
+        with self.assertRaises(ValueError):
+            cursor.execute("SELECT numero_boletin, titular FROM boletines").fetchone()
+
+    def test_lote_por_columnas(self):
+        """El lote guarda una lista por campo y devuelve los mismos registros agrupados"""
+        datos = {'ACME': [_boletin('ACME', '1'), _boletin('ACME', '2')], 'BETA': [_boletin('BETA', '1')]}
+        lote = LoteBoletines.desde_agrupados(datos)
+        self.assertEqual(len(lote), 3)
+        self.assertEqual(lote.columnas['numero_orden'], ['1', '2', '1'])
+        self.assertEqual(lote.agrupados(), datos)
+        self.assertEqual(pickle.loads(pickle.dumps(lote)), lote)
+        self.assertEqual(len(LoteBoletines.desde_agrupados({})), 0)
+        self.assertEqual(datos['BETA'][0].como_registro()["Número de Orden"], '1')
+
+if __name__ == '__main__':
+    unittest.main()
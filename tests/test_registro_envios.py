@@ -0,0 +1,120 @@
+import unittest
+import sqlite3
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import crear_tabla
+import email_sender
+from email_sender import BufferRegistroEnvios
+
+class TestBufferRegistroEnvios(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+        cursor = self.conn.cursor()
+        cursor.executemany("""
+            INSERT INTO boletines (numero_boletin, numero_orden, titular, reporte_generado, reporte_enviado)
+            VALUES (?, ?, ?, 1, 0)
+        """, [('100', str(i), f'TITULAR {i}') for i in range(1, 6)])
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _contar(self, sql):
+        cursor = self.conn.cursor()
+        cursor.execute(sql)
+        return cursor.fetchone()[0]
+
+    def test_flush_por_cantidad(self):
+        """Se escribe en la base recién al completar el lote, también los envíos exitosos"""
+        buffer = BufferRegistroEnvios(self.conn, max_envios=2, intervalo_segundos=3600)
+        buffer.registrar('TITULAR 1', 'a@example.com', 'exitoso', None, '100', 'Alta', boletines_ids=[1])
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM envios_log"), 0)
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM boletines WHERE reporte_enviado = 1"), 0)
+
+        buffer.registrar('TITULAR 2', 'b@example.com', 'exitoso', None, '100', 'Media', boletines_ids=[2, 3])
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM envios_log"), 2)
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM boletines WHERE reporte_enviado = 1"), 3)
+
+    def test_falla_de_escritura_conserva_el_lote(self):
+        """Si la escritura falla, registrar() no lanza y el lote se reintenta en el flush final"""
+        buffer = BufferRegistroEnvios(self.conn, max_envios=2, intervalo_segundos=3600)
+        buffer.registrar('TITULAR 1', 'a@example.com', 'exitoso', None, '100', 'Alta', boletines_ids=[1])
+        with patch('email_sender.registrar_envios_lote', side_effect=Exception("disco lleno")) as registrar:
+            self.assertFalse(buffer.registrar('TITULAR 2', 'N/A', 'sin_email', 'Cliente sin email registrado',
+                                              'N/A', 'Baja'))
+            # El siguiente envío no reintenta hasta completar otro lote
+            self.assertTrue(buffer.registrar('TITULAR 3', 'c@example.com', 'exitoso', None, '100', 'Alta',
+                                             boletines_ids=[3]))
+        self.assertEqual(registrar.call_count, 1)
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM envios_log"), 0)
+
+        self.assertTrue(buffer.flush(final=True))
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM envios_log"), 3)
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM boletines WHERE reporte_enviado = 1"), 2)
+
+    def test_falla_final_informa_envios_sin_registrar(self):
+        """Si el flush final falla, se informan los emails que salieron sin quedar registrados"""
+        buffer = BufferRegistroEnvios(self.conn, max_envios=100, intervalo_segundos=3600)
+        buffer.registrar('TITULAR 1', 'a@example.com', 'exitoso', None, '100', 'Alta', boletines_ids=[1])
+        with patch('email_sender.registrar_envios_lote', side_effect=Exception("disco lleno")):
+            with self.assertLogs('email_events', level='ERROR') as registro:
+                self.assertFalse(buffer.flush(final=True))
+        self.assertIn('TITULAR 1', registro.output[0])
+
+    def test_flush_final(self):
+        """flush() escribe lo pendiente y deja el buffer vacío"""
+        buffer = BufferRegistroEnvios(self.conn, max_envios=100, intervalo_segundos=3600)
+        buffer.registrar('TITULAR 4', 'N/A', 'sin_email', 'Cliente sin email registrado', 'N/A', 'Baja')
+        buffer.flush()
+        buffer.flush()
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM envios_log WHERE estado = 'sin_email'"), 1)
+        self.assertEqual(self._contar("SELECT COUNT(*) FROM boletines WHERE reporte_enviado = 1"), 0)
+
+class TestSoloRenderizar(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        informe = os.path.join(self.tmpdir.name, 'informe_acme.pdf')
+        with open(informe, 'wb') as f:
+            f.write(b'%PDF-1.4')
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+        self.conn.executemany("""
+            INSERT INTO boletines (numero_boletin, numero_orden, titular, importancia, reporte_generado,
+                                   reporte_enviado, nombre_reporte, ruta_reporte)
+            VALUES (?, ?, ?, ?, 1, 0, ?, ?)
+        """, [('100', '1', 'ACME', 'Alta', 'informe_acme.pdf', informe),
+              ('100', '2', 'ACME', 'Baja', 'informe_acme.pdf', informe),
+              ('100', '3', 'BETA', 'Alta', None, None)])
+        self.conn.executemany("INSERT INTO clientes (titular, email) VALUES (?, ?)",
+                              [('ACME', 'acme@example.com'), ('BETA', 'beta@example.com')])
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_escribe_eml_sin_enviar_ni_registrar(self):
+        """Con solo_renderizar se escriben .eml sin abrir SMTP ni tocar reporte_enviado/envios_log"""
+        directorio = os.path.join(self.tmpdir.name, 'render')
+        with patch.object(email_sender.smtplib, 'SMTP', side_effect=AssertionError("no debe abrir SMTP")) as smtp:
+            resultado = email_sender.procesar_envio_emails(self.conn, 'yo@example.com', 'clave',
+                                                           solo_renderizar=True, directorio_render=directorio)
+        smtp.assert_not_called()
+
+        render = resultado['render']
+        emls = [f for f in os.listdir(render['directorio']) if f.endswith('.eml')]
+        self.assertEqual((render['renderizados'], len(emls)), (2, 2))
+        self.assertEqual(resultado['sin_archivo'], ['BETA (Alta)'])
+        self.assertEqual(resultado['exitosos'], [])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM boletines WHERE reporte_enviado = 1").fetchone()[0], 0)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM envios_log").fetchone()[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
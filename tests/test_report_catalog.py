@@ -0,0 +1,200 @@
+import unittest
+import sqlite3
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import report_catalog
+from database import crear_tabla
+from email_sender import obtener_archivo_reporte, obtener_registros_pendientes_envio
+from report_generator import ReportGenerator
+
+def _archivos(directorio):
+    return [os.path.join(raiz, nombre) for raiz, _, nombres in os.walk(directorio) for nombre in nombres]
+
+class TestCatalogoReportes(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+        report_catalog.limpiar_cache_descargas()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def _crear_pdf(self, nombre, contenido=b'%PDF-1.4 prueba'):
+        ruta = os.path.join(self.tmpdir.name, nombre)
+        with open(ruta, 'wb') as f:
+            f.write(contenido)
+        return ruta
+
+    def test_incorpora_informes_existentes(self):
+        """Los informes ya referenciados en boletines se incorporan sin recorrer el directorio"""
+        nombre = "Marzo-2026 - Informe ACME - Alta - 123456.pdf"
+        ruta = self._crear_pdf(nombre)
+        self.conn.executemany("""
+            INSERT INTO boletines (numero_boletin, numero_orden, titular, importancia, reporte_generado, nombre_reporte, ruta_reporte)
+            VALUES ('1', ?, 'ACME', 'Alta', 1, ?, ?)
+        """, [('1', nombre, ruta), ('2', nombre, ruta), ('3', 'falta.pdf', os.path.join(self.tmpdir.name, 'falta.pdf'))])
+        self.conn.commit()
+
+        reportes = report_catalog.listar_reportes(self.conn)
+        self.assertEqual(len(reportes), 1)
+        self.assertEqual((reportes[0]['titular'], reportes[0]['importancia'], reportes[0]['periodo']),
+                         ('ACME', 'Alta', 'Marzo-2026'))
+        self.assertEqual(reportes[0]['tamano_bytes'], len(b'%PDF-1.4 prueba'))
+
+    def test_registrar_y_buscar(self):
+        """Registrar un informe lo deja ubicable por titular y por fecha"""
+        ruta = self._crear_pdf("Abril-2026 - Informe BETA - Media - 000001.pdf")
+        reporte_id = report_catalog.registrar_reporte(self.conn, ruta, 'BETA', 'Media')
+        # Registrar de nuevo la misma ruta actualiza en lugar de duplicar
+        self.assertEqual(report_catalog.registrar_reporte(self.conn, ruta, 'BETA', 'Media'), reporte_id)
+
+        reporte = report_catalog.buscar_reporte_titular(self.conn, 'BETA')
+        self.assertEqual(reporte['id'], reporte_id)
+        self.assertEqual(report_catalog.obtener_reporte(self.conn, reporte_id)['ruta'], ruta)
+        self.assertIsNone(report_catalog.buscar_reporte_titular(self.conn, 'BETA', '2000-01-01 10:00:00'))
+        self.assertIsNone(report_catalog.buscar_reporte_titular(self.conn, 'OTRO'))
+
+    def test_lectura_con_cache_acotada(self):
+        """Las descargas se leen una vez y la caché no supera su tope de bytes"""
+        reportes = []
+        for i in range(3):
+            ruta = self._crear_pdf(f"informe{i}.pdf", bytes([i]) * 100)
+            reportes.append(report_catalog.obtener_reporte(
+                self.conn, report_catalog.registrar_reporte(self.conn, ruta, f'T{i}')))
+
+        with mock.patch.object(report_catalog, 'MAX_BYTES_CACHE_DESCARGAS', 250):
+            self.assertEqual(report_catalog.leer_reporte(reportes[0]), bytes([0]) * 100)
+            os.remove(reportes[0]['ruta'])
+            # Servido desde la caché aunque el archivo ya no esté
+            self.assertEqual(report_catalog.leer_reporte(reportes[0]), bytes([0]) * 100)
+            report_catalog.leer_reporte(reportes[1])
+            report_catalog.leer_reporte(reportes[2])
+            self.assertLessEqual(report_catalog._bytes_descargas, 250)
+            with self.assertRaises(OSError):
+                report_catalog.leer_reporte(reportes[0])
+
+    def test_archiva_informes_vencidos(self):
+        """Los informes fuera de retención pasan al zip mensual y se siguen descargando"""
+        ruta_vieja = self._crear_pdf("viejo.pdf", b'%PDF viejo')
+        ruta_nueva = self._crear_pdf("nuevo.pdf", b'%PDF nuevo')
+        ruta_pendiente = self._crear_pdf("pendiente.pdf", b'%PDF pendiente')
+        self.conn.execute("INSERT INTO boletines (numero_boletin, numero_orden, titular, reporte_enviado) VALUES ('1', '1', 'P', 0)")
+        ids = {
+            'viejo': report_catalog.registrar_reporte(self.conn, ruta_vieja, 'V'),
+            'nuevo': report_catalog.registrar_reporte(self.conn, ruta_nueva, 'N'),
+            # Un informe cuyos boletines no se enviaron todavía no se archiva
+            'pendiente': report_catalog.registrar_reporte(self.conn, ruta_pendiente, 'P', boletin_ids=[1]),
+        }
+        self.conn.execute("UPDATE reportes SET fecha_modificacion = '2024-03-10 09:00:00' WHERE id IN (?, ?)",
+                          (ids['viejo'], ids['pendiente']))
+        self.conn.commit()
+
+        resultado = report_catalog.archivar_informes(self.conn, dias_retencion=30, base_dir=self.tmpdir.name)
+        self.assertEqual(resultado['archivados'], 1)
+        self.assertEqual(resultado['archivos'], [os.path.join(self.tmpdir.name, 'archivo', '2024-03.zip')])
+        self.assertFalse(os.path.exists(ruta_vieja))
+        self.assertTrue(os.path.exists(ruta_nueva) and os.path.exists(ruta_pendiente))
+
+        reporte = report_catalog.obtener_reporte(self.conn, ids['viejo'])
+        self.assertEqual(reporte['miembro'], 'viejo.pdf')
+        report_catalog.limpiar_cache_descargas()
+        self.assertEqual(report_catalog.leer_reporte(reporte), b'%PDF viejo')
+        # Una segunda pasada no encuentra nada nuevo
+        self.assertEqual(report_catalog.archivar_informes(self.conn, 30, self.tmpdir.name)['archivados'], 0)
+
+    def test_ruta_pdf_de_informe_archivado(self):
+        """obtener_ruta_reporte_pdf extrae del zip mensual los informes archivados"""
+        import database
+        ruta = self._crear_pdf("viejo.pdf", b'%PDF viejo')
+        report_catalog.registrar_reporte(self.conn, ruta, 'V')
+        self.conn.execute("UPDATE reportes SET fecha_modificacion = '2024-03-10 09:00:00'")
+        self.conn.commit()
+        report_catalog.archivar_informes(self.conn, dias_retencion=30, base_dir=self.tmpdir.name)
+
+        temporal = os.path.join(self.tmpdir.name, 'temp')
+        with mock.patch('database.crear_conexion', return_value=mock.Mock(wraps=self.conn, close=mock.Mock())), \
+                mock.patch('database.get_temp_dir', return_value=temporal):
+            ruta_pdf = database.obtener_ruta_reporte_pdf('V')
+        self.assertTrue(ruta_pdf.startswith(temporal))
+        with open(ruta_pdf, 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF viejo')
+
+class TestRegistroAlGenerar(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+        self.conn.executemany("""
+            INSERT INTO boletines (numero_boletin, numero_orden, titular, fecha_boletin, importancia)
+            VALUES ('1', ?, 'ACME', '01/01/2026', 'Alta')
+        """, [('1',), ('2',)])
+        self.conn.execute("INSERT INTO clientes (titular, email) VALUES ('ACME', 'acme@example.com')")
+        self.conn.commit()
+        self.generador = ReportGenerator(None, output_dir=self.tmpdir.name)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_informe_catalogado_con_sus_boletines(self):
+        """El informe queda en el catálogo con grupo, hash y boletines, y el envío lo resuelve por ahí"""
+        resultado = self.generador.generate_reports(self.conn)
+        self.assertEqual(resultado['reportes_generados'], 1)
+
+        reporte = report_catalog.listar_reportes(self.conn)[0]
+        self.assertEqual(reporte['clave_grupo'], 'ACME|Alta')
+        self.assertEqual(len(reporte['sha256']), 64)
+        self.assertEqual(reporte['tamano_bytes'], os.path.getsize(reporte['ruta']))
+        # Repartido en <año>/<mes>/<hash del titular>/
+        self.assertEqual(len(os.path.relpath(reporte['ruta'], self.tmpdir.name).split(os.sep)), 4)
+        self.assertEqual(_archivos(self.tmpdir.name), [reporte['ruta']])
+        ids = [fila[0] for fila in self.conn.execute("SELECT id FROM boletines")]
+        self.assertEqual(report_catalog.obtener_reporte_de_boletines(self.conn, ids)['id'], reporte['id'])
+
+        grupos = obtener_registros_pendientes_envio(self.conn)
+        boletines = grupos['ACME|Alta']['boletines']
+        self.assertTrue(all(b.reporte_id == reporte['id'] for b in boletines))
+        self.assertEqual(obtener_archivo_reporte(boletines), (reporte['ruta'], reporte['nombre_archivo']))
+
+    def test_solo_marca_los_boletines_del_pdf(self):
+        """Un boletín importado mientras se escribe el PDF queda pendiente y fuera del catálogo"""
+        generar_original = self.generador._generate_single_report
+
+        def generar_e_importar(*args, **kwargs):
+            resultado = generar_original(*args, **kwargs)
+            self.conn.execute("""
+                INSERT INTO boletines (numero_boletin, numero_orden, titular, fecha_boletin, importancia)
+                VALUES ('2', '3', 'ACME', '01/02/2026', 'Alta')
+            """)
+            self.conn.commit()
+            return resultado
+
+        with mock.patch.object(self.generador, '_generate_single_report', side_effect=generar_e_importar):
+            self.assertEqual(self.generador.generate_reports(self.conn)['reportes_generados'], 1)
+
+        nuevo = self.conn.execute("SELECT id, reporte_generado FROM boletines WHERE numero_orden = '3'").fetchone()
+        self.assertEqual(nuevo[1], 0)
+        vinculados = [fila[0] for fila in self.conn.execute("SELECT boletin_id FROM reportes_boletines ORDER BY 1")]
+        self.assertEqual(len(vinculados), 2)
+        self.assertNotIn(nuevo[0], vinculados)
+
+    def test_fallo_al_registrar_no_deja_rastros(self):
+        """Si el registro en la base falla, ni los boletines ni el PDF quedan a medias"""
+        with mock.patch('report_generator.registrar_reporte', side_effect=Exception("falla")):
+            resultado = self.generador.generate_reports(self.conn)
+        self.assertEqual(resultado['errores'], 1)
+        self.assertEqual(_archivos(self.tmpdir.name), [])
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+        self.assertEqual(self.conn.execute("SELECT SUM(reporte_generado) FROM boletines").fetchone()[0], 0)
+        self.assertEqual(report_catalog.listar_reportes(self.conn), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sqlite3
+import sys
+import os
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rollups
+from database import crear_tabla
+
+class TestRollups(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+        self.conn.executemany("""
+            INSERT INTO boletines (numero_boletin, numero_orden, titular, fecha_boletin, fecha_alta, importancia,
+                                   reporte_generado, reporte_enviado)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            ('100', '1', 'ACME', '05/09/2026', '2026-09-06 10:00:00', 'Alta', 1, 1),
+            ('100', '2', 'ACME', '05/09/2026', '2026-09-06 10:00:00', 'Pendiente', 0, 0),
+            ('101', '1', 'BETA', '01/10/2026', '2026-10-02 09:00:00', 'Media', 1, 0),
+            ('101', '2', None, '', '2026-10-02 09:00:00', 'Pendiente', 0, 0),
+        ])
+        self.conn.executemany("""
+            INSERT INTO envios_log (titular, email, fecha_envio, estado, importancia) VALUES (?, ?, ?, ?, ?)
+        """, [
+            ('ACME', 'a@ejemplo.com', '2026-09-10 08:00:00', 'exitoso', 'Alta'),
+            ('ACME', 'a@ejemplo.com', '2026-09-10 08:05:00', 'fallido', 'Alta'),
+            ('BETA', None, '2026-10-03 08:00:00', 'sin_email', 'Media'),
+        ])
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _resumenes(self):
+        return {tabla: sorted(self.conn.execute(f"SELECT * FROM {tabla}").fetchall()) for tabla in rollups.RESUMENES}
+
+    def test_triggers_mantienen_los_resumenes(self):
+        """Altas, cambios de importancia/estado/titular y bajas dejan lo mismo que la reconstrucción"""
+        self.assertEqual(self._resumenes()['resumen_boletines_mensual'], [
+            ('2026-09', 'ACME', 'Alta', 1, 1, 1),
+            ('2026-09', 'ACME', 'Pendiente', 1, 0, 0),
+            ('2026-10', '', 'Pendiente', 1, 0, 0),
+            ('2026-10', 'BETA', 'Media', 1, 1, 0),
+        ])
+        self.conn.execute("UPDATE boletines SET importancia = 'Baja', reporte_generado = 1 WHERE numero_orden = '2'")
+        self.conn.execute("UPDATE boletines SET titular = 'GAMMA', fecha_boletin = '30/08/2026' WHERE titular IS NULL")
+        self.conn.execute("UPDATE boletines SET reporte_enviado = 1 WHERE titular = 'BETA'")
+        self.conn.execute("DELETE FROM boletines WHERE titular = 'ACME' AND importancia = 'Alta'")
+        self.conn.commit()
+        mantenidos = self._resumenes()
+        self.assertNotIn('Alta', [fila[2] for fila in mantenidos['resumen_boletines_diario']])
+        self.assertIn(('2026-08', 'GAMMA', 'Baja', 1, 1, 0), mantenidos['resumen_boletines_mensual'])
+
+        rollups.reconstruir_resumenes(self.conn, completo=True)
+        self.assertEqual(self._resumenes(), mantenidos)
+
+    def test_envios_purgados_se_conservan(self):
+        """Purgar envios_log no descuenta; la reconstrucción completa sí recalcula desde el log"""
+        self.conn.execute("DELETE FROM envios_log WHERE fecha_envio < '2026-10-01'")
+        self.conn.commit()
+        esperado = [('2026-09', 'ACME', 'Alta', 'exitoso', 1), ('2026-09', 'ACME', 'Alta', 'fallido', 1),
+                    ('2026-10', 'BETA', 'Media', 'sin_email', 1)]
+        self.assertEqual(self._resumenes()['resumen_envios_mensual'], esperado)
+        rollups.reconstruir_resumenes(self.conn)
+        self.assertEqual(self._resumenes()['resumen_envios_mensual'], esperado)
+        rollups.reconstruir_resumenes(self.conn, completo=True)
+        self.assertEqual(self._resumenes()['resumen_envios_mensual'], esperado[2:])
+
+    def test_base_existente_se_completa(self):
+        """En una base sin resúmenes, asegurar_resumenes los crea con la historia ya cargada"""
+        esperado = self._resumenes()
+        for tabla in rollups.RESUMENES:
+            self.conn.execute(f"DROP TABLE {tabla}")
+        for (trigger,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            self.conn.execute(f"DROP TRIGGER {trigger}")
+        self.conn.commit()
+        rollups.asegurar_resumenes(self.conn)
+        self.assertEqual(self._resumenes(), esperado)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from datetime import datetime
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import jobs
+import scheduler
+
+class TestSiguienteEjecucion(unittest.TestCase):
+    def test_mensual(self):
+        """El primer día del mes a las 8 salta al mes siguiente una vez pasado"""
+        self.assertEqual(scheduler.siguiente_ejecucion('0 8 1 * *', datetime(2026, 1, 15, 10, 0)),
+                         datetime(2026, 2, 1, 8, 0))
+        self.assertEqual(scheduler.siguiente_ejecucion('0 8 1 * *', datetime(2026, 12, 1, 8, 0)),
+                         datetime(2027, 1, 1, 8, 0))
+
+    def test_listas_rangos_y_pasos(self):
+        """Se admiten listas, rangos, pasos y día de la semana (domingo = 0 o 7)"""
+        self.assertEqual(scheduler.siguiente_ejecucion('*/15 9-17 * * 1-5', datetime(2026, 10, 16, 17, 50)),
+                         datetime(2026, 10, 19, 9, 0))
+        self.assertEqual(scheduler.siguiente_ejecucion('30 3 * * 7', datetime(2026, 10, 19, 0, 0)),
+                         datetime(2026, 10, 25, 3, 30))
+
+    def test_spec_invalida(self):
+        for spec in ('0 8 1 *', '60 * * * *', '* * 0 * *'):
+            with self.assertRaises(ValueError):
+                scheduler.parsear_spec(spec)
+
+class TestPlanificador(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        self.patcher = mock.patch.object(database, 'get_db_path', return_value=self.ruta_db)
+        self.patcher.start()
+        self.tareas = mock.patch.dict(scheduler._tareas, clear=True)
+        self.tareas.start()
+        self.conn = database.crear_conexion()
+        self.ejecuciones = []
+        scheduler.registrar_tarea('prueba', '0 8 1 * *', self._tarea)
+
+    def tearDown(self):
+        self.conn.close()
+        jobs._esquemas_verificados.discard(self.ruta_db)
+        scheduler._esquemas_verificados.discard(self.ruta_db)
+        self.tareas.stop()
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def _tarea(self, conn, progreso):
+        self.ejecuciones.append(datetime.now())
+        return {'ok': True}
+
+    def _tarea_db(self):
+        return {t['nombre']: t for t in scheduler.listar_tareas(self.conn)}['prueba']
+
+    def test_recupera_ejecucion_perdida(self):
+        """Un vencimiento ocurrido con todo apagado se ejecuta una sola vez al volver"""
+        scheduler.sincronizar_tareas(self.conn, datetime(2026, 1, 15, 10, 0))
+        self.assertEqual(self._tarea_db()['proxima_ejecucion'], '2026-02-01 08:00:00')
+        self.assertEqual(scheduler.ejecutar_pendientes(self.conn, datetime(2026, 1, 31, 9, 0)), [])
+
+        # Pasaron dos vencimientos (febrero y marzo) sin ningún proceso en marcha
+        resultados = scheduler.ejecutar_pendientes(self.conn, datetime(2026, 3, 10, 9, 0))
+        self.assertEqual([r['estado'] for r in resultados], ['completado'])
+        self.assertEqual(len(self.ejecuciones), 1)
+        tarea = self._tarea_db()
+        self.assertEqual(tarea['ultima_ejecucion'], '2026-03-10 09:00:00')
+        self.assertEqual(tarea['ultimo_estado'], 'completado')
+        self.assertIsNone(tarea['lease_propietario'])
+        self.assertGreater(tarea['proxima_ejecucion'], '2026-03-10 09:00:00')
+        self.assertEqual(jobs.obtener_trabajo(self.conn, tarea['ultimo_trabajo_id'])['resultado'], {'ok': True})
+
+    def test_lease_impide_ejecucion_doble(self):
+        """Mientras otro proceso tiene la concesión vigente la tarea no se ejecuta aquí"""
+        scheduler.sincronizar_tareas(self.conn, datetime(2026, 1, 15, 10, 0))
+        ahora = datetime(2026, 2, 1, 8, 5)
+        self.conn.execute("UPDATE scheduled_jobs SET lease_propietario = 'otro', lease_hasta = '2026-02-01 08:10:00'")
+        self.conn.commit()
+        self.assertEqual(scheduler.ejecutar_pendientes(self.conn, ahora), [])
+        # Vencida la concesión (el otro proceso murió) la ejecución se retoma
+        resultados = scheduler.ejecutar_pendientes(self.conn, datetime(2026, 2, 1, 8, 15))
+        self.assertEqual([r['estado'] for r in resultados], ['completado'])
+
+    def test_una_sola_ejecucion_entre_hilos(self):
+        """Varios planificadores concurrentes ejecutan cada vencimiento una sola vez"""
+        scheduler.sincronizar_tareas(self.conn, datetime(2026, 1, 15, 10, 0))
+        errores = []
+
+        def correr():
+            conn = database.crear_conexion()
+            try:
+                scheduler.ejecutar_pendientes(conn, datetime(2026, 2, 1, 8, 1))
+            except Exception as e:
+                errores.append(e)
+            finally:
+                conn.close()
+
+        hilos = [threading.Thread(target=correr) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(10)
+        self.assertEqual(errores, [])
+        self.assertEqual(len(self.ejecuciones), 1)
+
+    def test_pospone_si_ya_esta_en_curso(self):
+        """Si la misma tarea se lanzó a mano y sigue en curso, el vencimiento se reintenta luego"""
+        scheduler.sincronizar_tareas(self.conn, datetime(2026, 1, 15, 10, 0))
+        jobs.reservar_trabajo(self.conn, 'prueba')
+        resultados = scheduler.ejecutar_pendientes(self.conn, datetime(2026, 2, 1, 8, 0))
+        self.assertEqual([r['estado'] for r in resultados], ['pospuesta'])
+        self.assertEqual(self.ejecuciones, [])
+        self.assertEqual(self._tarea_db()['proxima_ejecucion'], '2026-02-01 08:05:00')
+
+class TestVerificacionManual(unittest.TestCase):
+    """La verificación lanzada desde el panel pasa por la tabla jobs como la programada"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        self.patcher = mock.patch.object(database, 'get_db_path', return_value=self.ruta_db)
+        self.patcher.start()
+        self.conn = database.crear_conexion()
+        import verificador_programado
+        self.verificador = verificador_programado
+        self.st = mock.patch.object(verificador_programado, 'st', session_state=mock.Mock())
+        self.st.start()
+
+    def tearDown(self):
+        self.st.stop()
+        self.conn.close()
+        jobs._esquemas_verificados.discard(self.ruta_db)
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def test_registra_trabajo(self):
+        with mock.patch.object(self.verificador, 'verificar_titulares_sin_reportes',
+                               return_value={'estado': 'ok'}) as verificar:
+            self.assertEqual(self.verificador.ejecutar_verificacion(), {'estado': 'ok'})
+        self.assertEqual(verificar.call_count, 1)
+        trabajo = self.conn.execute("SELECT tipo, estado FROM jobs").fetchall()
+        self.assertEqual([tuple(fila) for fila in trabajo], [('verificacion_mensual', 'completado')])
+
+    def test_no_corre_si_ya_esta_en_curso(self):
+        jobs.reservar_trabajo(self.conn, 'verificacion_mensual')
+        with mock.patch.object(self.verificador, 'verificar_titulares_sin_reportes') as verificar:
+            self.assertIsNone(self.verificador.ejecutar_verificacion())
+        verificar.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
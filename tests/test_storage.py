@@ -0,0 +1,185 @@
+import unittest
+import importlib.util
+import sqlite3
+import sys
+import os
+import tempfile
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import Boletin
+
+SQLALCHEMY_DISPONIBLE = importlib.util.find_spec('sqlalchemy') is not None
+# Base PostgreSQL local para correr los mismos tests (se borran sus tablas al terminar)
+URL_POSTGRES = os.getenv('BOLETINES_TEST_POSTGRES_URL')
+
+if SQLALCHEMY_DISPONIBLE:
+    import storage
+
+def _boletin(titular, numero_boletin, numero_orden, marca='MARCA'):
+    return Boletin(titular, numero_boletin, '01/10/2026', numero_orden, 'Solicitante', 'Agente',
+                   f"{numero_boletin}{numero_orden}", '35', marca, marca, '35')
+
+class _CasosRepositorios:
+    """Tests comunes a todos los motores; las subclases definen crear_motor()."""
+
+    def setUp(self):
+        self.motor = self.crear_motor()
+        storage.crear_esquema(self.motor)
+        self.boletines = storage.RepositorioBoletines(self.motor)
+        self.clientes = storage.RepositorioClientes(self.motor)
+        with self.motor.begin() as conn:
+            conn.execute(storage.clientes.insert(), [
+                {'titular': 'ACME SA', 'email': 'acme@ejemplo.com', 'cuit': 30111111111},
+                {'titular': 'Beta SRL', 'email': None, 'cuit': None},
+            ])
+            conn.execute(storage.marcas.insert(), [
+                {'marca': 'ACME', 'titular': 'ACME S.A.', 'cuit': '30-22222222-2'},
+                {'marca': 'OTRA', 'titular': 'Otra', 'cuit': '30333333333'},
+            ])
+
+    def test_insertar_omite_duplicados(self):
+        """Los boletines ya cargados (mismo boletín, orden y titular) se omiten y los nuevos quedan 'Pendiente'"""
+        datos = {'ACME SA': [_boletin('ACME SA', '100', '1'), _boletin('ACME SA', '100', '2')],
+                 'Gamma': [_boletin('Gamma', '100', '1')]}
+        self.assertEqual(self.boletines.insertar(datos), {'insertados': 3, 'omitidos': 0})
+        datos['ACME SA'].append(_boletin('ACME SA', '101', '1'))
+        self.assertEqual(self.boletines.insertar(datos), {'insertados': 1, 'omitidos': 3})
+        self.assertEqual(self.boletines.contar_por_importancia(),
+                         {'Pendiente': 4, 'Baja': 0, 'Media': 0, 'Alta': 0, 'Total': 4})
+
+    def test_filtros_orden_e_importancias(self):
+        """Filtros y orden del grid, el cliente del titular, el informe del catálogo y la edición de importancia"""
+        self.boletines.insertar({
+            'ACME SA': [_boletin('ACME SA', '100', str(orden), f"MARCA_{orden}%") for orden in range(1, 4)],
+            'Gamma': [_boletin('Gamma', '100', '9')],
+        })
+        filas, columnas, total = self.boletines.obtener_bloque(0, 10, sort_model=[{'colId': 'numero_orden', 'sort': 'desc'}])
+        self.assertEqual(total, 4)
+        self.assertEqual(columnas[:2], ['id', 'titular'])
+        por_nombre = [dict(zip(columnas, fila)) for fila in filas]
+        self.assertEqual([fila['numero_orden'] for fila in por_nombre], ['9', '3', '2', '1'])
+        self.assertEqual(por_nombre[1]['email'], 'acme@ejemplo.com')
+        self.assertIsNone(por_nombre[0]['email'])
+
+        ids = {fila['numero_orden']: fila['id'] for fila in por_nombre}
+        self.assertEqual(self.boletines.actualizar_importancias({ids['1']: 'Alta', ids['2']: 'Alta', ids['9']: 'Baja'}), 3)
+        filtro = {'titular': {'filterType': 'text', 'type': 'contains', 'filter': 'acme'},
+                  'importancia': {'filterType': 'set', 'values': ['Alta']}}
+        self.assertEqual(self.boletines.contar_por_importancia(filtro),
+                         {'Pendiente': 0, 'Baja': 0, 'Media': 0, 'Alta': 2, 'Total': 2})
+        # Los comodines de LIKE se buscan como texto literal
+        filas, _, total = self.boletines.obtener_bloque(0, 10, {'marca_publicada': {
+            'filterType': 'text', 'type': 'endsWith', 'filter': '_3%'}})
+        self.assertEqual(total, 1)
+        self.assertEqual(self.boletines.obtener_bloque(1, 2)[0][0][0], ids['2'])
+        with self.assertRaises(ValueError):
+            self.boletines.obtener_bloque(0, 10, {'inexistente': {'filterType': 'text', 'type': 'contains'}})
+        # Sin distinguir mayúsculas también fuera de ASCII
+        self.boletines.insertar({'MUÑOZ SRL': [_boletin('MUÑOZ SRL', '102', '1')]})
+        self.assertEqual(self.boletines.contar_por_importancia(
+            {'titular': {'filterType': 'text', 'type': 'contains', 'filter': 'muñoz'}})['Total'], 1)
+
+        with self.motor.begin() as conn:
+            reporte_id = conn.execute(storage.reportes.insert().values(
+                nombre_archivo='acme.pdf', ruta='/informes/acme.pdf')).inserted_primary_key[0]
+            conn.execute(storage.reportes_boletines.insert().values(reporte_id=reporte_id, boletin_id=ids['1']))
+        filas, columnas, _ = self.boletines.obtener_bloque(0, 10, {'informe': {'filterType': 'text', 'type': 'notBlank'}})
+        self.assertEqual([(fila[0], fila[columnas.index('informe')]) for fila in filas], [(ids['1'], 'acme.pdf')])
+
+    def test_clientes(self):
+        """Edición en lote: titular de Marcas al cambiar el CUIT y vínculo de las marcas sin asignar"""
+        filas, columnas = self.clientes.obtener()
+        self.assertEqual(columnas, ['id', 'titular', 'email', 'telefono', 'direccion', 'ciudad', 'provincia',
+                                    'CUIT', 'tiene_marcas'])
+        clientes = {fila[1]: dict(zip([columna.lower() for columna in columnas], fila)) for fila in filas}
+        self.assertEqual(clientes['ACME SA']['tiene_marcas'], 0)
+
+        cambio_acme = dict(clientes['ACME SA'], cuit='30-22222222-2', telefono='4444-5555')
+        cambio_beta = dict(clientes['Beta SRL'], email='beta@ejemplo.com', cuit='')
+        resultado = self.clientes.actualizar_lote([cambio_acme, cambio_beta, dict(cambio_beta, id=9999)])
+        self.assertEqual(resultado, {'actualizados': 2, 'marcas_vinculadas': 1})
+
+        filas, columnas = self.clientes.obtener()
+        clientes = {fila[0]: dict(zip(columnas, fila)) for fila in filas}
+        acme = clientes[cambio_acme['id']]
+        self.assertEqual((acme['titular'], acme['CUIT'], acme['telefono'], acme['tiene_marcas']),
+                         ('ACME S.A.', 30222222222, '4444-5555', 1))
+        self.assertEqual(clientes[cambio_beta['id']]['email'], 'beta@ejemplo.com')
+        self.assertEqual(self.clientes.actualizar_lote([]), {'actualizados': 0, 'marcas_vinculadas': 0})
+
+@unittest.skipUnless(SQLALCHEMY_DISPONIBLE, "SQLAlchemy no está instalado")
+class TestRepositoriosSQLite(_CasosRepositorios, unittest.TestCase):
+    def crear_motor(self):
+        # Base creada por la aplicación: los repositorios tienen que funcionar sobre su esquema
+        import database
+        from report_catalog import asegurar_tabla_reportes
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ruta_db = os.path.join(self.tmpdir.name, 'boletines.db')
+        conn = sqlite3.connect(self.ruta_db)
+        try:
+            database.crear_tabla(conn)
+            asegurar_tabla_reportes(conn)
+        finally:
+            conn.close()
+        return storage.obtener_motor(f"sqlite:///{self.ruta_db}")
+
+    def tearDown(self):
+        storage.cerrar_motores()
+        self.tmpdir.cleanup()
+
+    def test_mismos_resultados_que_database(self):
+        """Sobre la misma base, los repositorios devuelven lo mismo que las funciones de database.py"""
+        import database
+        self.boletines.insertar({'ACME SA': [_boletin('ACME SA', '100', str(orden)) for orden in range(1, 6)],
+                                 'Gamma': [_boletin('Gamma', '101', '1')]})
+        filtro = {'titular': {'filterType': 'text', 'type': 'startsWith', 'filter': 'ac'}}
+        orden = [{'colId': 'email', 'sort': 'asc'}, {'colId': 'numero_orden', 'sort': 'desc'}]
+        conn = sqlite3.connect(self.ruta_db)
+        try:
+            self.assertEqual(self.boletines.obtener_bloque(1, 4, filtro, orden),
+                             database.obtener_bloque_boletines(conn, 1, 4, filtro, orden))
+            self.assertEqual(self.boletines.obtener_bloque(0, 10, sort_model=orden),
+                             database.obtener_bloque_boletines(conn, 0, 10, sort_model=orden))
+            self.assertEqual(self.boletines.contar_por_importancia(filtro),
+                             database.contar_boletines_por_importancia(conn, filtro))
+            self.assertEqual(self.clientes.obtener(), database.obtener_clientes(conn))
+        finally:
+            conn.close()
+
+    def test_operadores_de_database(self):
+        """Los filtros aceptan los operadores de database.py y fallan igual ante los desconocidos"""
+        import database
+        self.assertEqual(set(storage._OPERADORES_TEXTO), set(database._OPERADORES_TEXTO))
+        self.assertEqual(set(storage._OPERADORES_NUMERO), set(database._OPERADORES_NUMERO))
+        for modelo in ({'titular': {'filterType': 'text', 'type': 'regex', 'filter': 'a'}},
+                       {'inexistente': {'filterType': 'text', 'type': 'contains', 'filter': 'a'}}):
+            with self.assertRaises(ValueError) as esperado:
+                database.compilar_modelo_grid(modelo)
+            with self.assertRaisesRegex(ValueError, str(esperado.exception)):
+                storage.compilar_modelo_grid(modelo)
+
+    def test_url_por_defecto(self):
+        """Sin BOLETINES_DB_URL se usa el archivo SQLite de siempre"""
+        from unittest import mock
+        import paths
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('BOLETINES_DB_URL', None)
+            self.assertEqual(paths.get_db_url(), f"sqlite:///{paths.get_db_path()}")
+        with mock.patch.dict(os.environ, {'BOLETINES_DB_URL': 'postgresql+psycopg2://u:c@localhost/marcas'}):
+            self.assertEqual(paths.get_db_url(), 'postgresql+psycopg2://u:c@localhost/marcas')
+
+@unittest.skipUnless(SQLALCHEMY_DISPONIBLE and URL_POSTGRES, "Sin BOLETINES_TEST_POSTGRES_URL")
+class TestRepositoriosPostgres(_CasosRepositorios, unittest.TestCase):
+    def crear_motor(self):
+        motor = storage.obtener_motor(URL_POSTGRES)
+        storage.metadata.drop_all(motor)
+        return motor
+
+    def tearDown(self):
+        storage.metadata.drop_all(self.motor)
+        storage.cerrar_motores()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import csv
+import sqlite3
+import tempfile
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Añadir el directorio raíz al path de Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import crear_tabla
+import verificar_titulares_sin_reportes as vt
+
+class TestVerificarTitularesSinReportes(unittest.TestCase):
+    def setUp(self):
+        """Crear una base en memoria con titulares, marcas y boletines del mes anterior"""
+        self.conn = sqlite3.connect(':memory:')
+        crear_tabla(self.conn)
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE Marcas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, codtit INTEGER, titular TEXT, codigo_marca TEXT,
+                marca TEXT, clase INTEGER, acta TEXT, nrocon TEXT, custodia TEXT, cuit TEXT,
+                email TEXT, cliente_id INTEGER
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE emails_enviados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, destinatario TEXT NOT NULL, asunto TEXT,
+                mensaje TEXT, fecha_envio TEXT, status TEXT, tipo_email TEXT, titular TEXT,
+                periodo_notificacion TEXT, marcas_sin_reportes TEXT
+            )
+        """)
+        for titular in ('ACME', 'BETA', 'GAMMA'):
+            cursor.execute("INSERT INTO clientes (titular, email) VALUES (?, ?)",
+                           (titular, f"{titular.lower()}@example.com"))
+        cursor.executemany("INSERT INTO Marcas (titular, codigo_marca, marca, clase) VALUES (?, ?, ?, ?)", [
+            ('ACME', '1', 'Acme Uno', 9),
+            ('ACME', '2', 'Acme Dos', 35),
+            ('BETA', '3', 'Beta', 25),
+            ('GAMMA', '4', 'Gamma', 5),
+        ])
+
+        primer_dia_mes_pasado = (datetime.now().replace(day=1) - timedelta(days=1)).replace(day=1)
+        self.periodo = primer_dia_mes_pasado.strftime("%m-%Y")
+        fecha_alta = (primer_dia_mes_pasado + timedelta(days=2)).strftime("%Y-%m-%d")
+        # "acme uno " coincide con "Acme Uno" tras normalizar
+        cursor.execute("""
+            INSERT INTO boletines (numero_boletin, numero_orden, titular, marca_custodia, marca_publicada,
+                                   reporte_generado, fecha_alta)
+            VALUES ('100', '1', 'ACME', 'acme uno ', 'Otra', 1, ?)
+        """, (fecha_alta,))
+        # BETA ya fue notificado para el periodo
+        cursor.execute("""
+            INSERT INTO emails_enviados (destinatario, tipo_email, titular, periodo_notificacion)
+            VALUES ('beta@example.com', 'notificacion_marcas', 'BETA', ?)
+        """, (self.periodo,))
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_marcas_sin_reportes_excluye_notificados(self):
+        """Las marcas con reporte y los titulares ya notificados quedan fuera"""
+        primer_dia = datetime.strptime("01-" + self.periodo, "%d-%m-%Y")
+        ultimo_dia = datetime.now().replace(day=1) - timedelta(days=1)
+        pendientes, total, ya_notificados = vt.obtener_marcas_sin_reportes(
+            self.conn, primer_dia.strftime("%Y-%m-%d"), ultimo_dia.strftime("%Y-%m-%d"), self.periodo
+        )
+        self.assertEqual(total, 3)
+        self.assertEqual(ya_notificados, 1)
+        self.assertEqual(sorted(pendientes), ['ACME', 'GAMMA'])
+        self.assertEqual([m[1] for m in pendientes['ACME']['marcas']], ['Acme Dos'])
+
+    def test_una_sola_sesion_smtp(self):
+        """Todos los envíos comparten una única sesión SMTP"""
+        credenciales = ('remitente@example.com', 'secreto', 'smtp.example.com', 587)
+        with mock.patch.object(vt, 'obtener_credenciales_email', return_value=credenciales) as creds, \
+             mock.patch.object(vt.smtplib, 'SMTP') as smtp:
+            resultado = vt.verificar_titulares_sin_reportes(self.conn)
+
+        self.assertEqual(resultado['estado'], 'completado')
+        self.assertEqual(resultado['emails_enviados'], 2)
+        self.assertEqual(resultado['ya_notificados'], 1)
+        self.assertEqual(creds.call_count, 1)
+        self.assertEqual(smtp.call_count, 1)
+        self.assertEqual(smtp.return_value.sendmail.call_count, 2)
+
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM emails_enviados WHERE periodo_notificacion = ?", (self.periodo,))
+        self.assertEqual(cursor.fetchone()[0], 3)
+
+    def test_solo_renderizar(self):
+        """En modo render se escriben .eml y manifest sin abrir SMTP ni registrar envíos"""
+        with tempfile.TemporaryDirectory() as directorio, \
+             mock.patch.object(vt, 'obtener_credenciales_email', return_value=(None, None, None, None)), \
+             mock.patch.object(vt.smtplib, 'SMTP') as smtp:
+            resultado = vt.verificar_titulares_sin_reportes(self.conn, solo_renderizar=True,
+                                                            directorio_render=directorio)
+            render = resultado['render']
+            emls = sorted(f for f in os.listdir(render['directorio']) if f.endswith('.eml'))
+            with open(render['manifest'], encoding='utf-8') as f:
+                filas = list(csv.DictReader(f))
+
+        smtp.assert_not_called()
+        self.assertEqual(render['renderizados'], 2)
+        self.assertEqual(len(emls), 2)
+        self.assertEqual(sorted(fila['titular'] for fila in filas), ['ACME', 'GAMMA'])
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM emails_enviados")
+        self.assertEqual(cursor.fetchone()[0], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,35 +3,18 @@
 
 """
 Componente para añadir a la aplicación Streamlit que verifica
-periódicamente si debe ejecutarse la validación de titulares sin reportes
+periódicamente si debe ejecutarse la validación de titulares sin reportes.
+La programación la lleva scheduler.py (tabla scheduled_jobs), compartida con
+ejecucion_programada.py.
 """
 
 import streamlit as st
-import threading
-import time
-import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
-from verificar_titulares_sin_reportes import ejecutar_verificacion_periodica
+from verificar_titulares_sin_reportes import verificar_titulares_sin_reportes
 from database import crear_conexion
-
-# Importar schedule con manejo de excepciones
-try:
-    import schedule
-except ImportError:
-    st.error("""
-    El módulo 'schedule' no está instalado. 
-    
-    Por favor, ejecuta el siguiente comando para instalarlo:
-    ```
-    pip install schedule
-    ```
-    
-    O ejecuta el script de configuración automática:
-    ```
-    python setup_automatizacion.py
-    ```
-    """)
+import jobs
+import scheduler
 
 # Configurar logging
 logging.basicConfig(
@@ -45,95 +28,58 @@ logging.basicConfig(
 
 logger = logging.getLogger('verificador_programado')
 
-# Variable global para controlar el hilo de ejecución
-_thread_running = False
-_verificador_thread = None
-
-def ejecutar_verificacion_si_primer_dia_mes():
-    """Ejecuta la verificación solo si es el primer día del mes"""
-    today = datetime.now()
-    if today.day == 1:  # Es el primer día del mes
-        return ejecutar_verificacion()
-    else:
-        logger.info("No es el primer día del mes, omitiendo verificación programada")
-        return None
-
 def ejecutar_verificacion():
-    """Ejecutar la verificación programada"""
+    """
+    Ejecutar la verificación a pedido desde la interfaz.
+    Se llama en el hilo de la sesión, por eso puede dejar el mensaje en st.session_state.
+    Reserva un trabajo 'verificacion_mensual' como la tarea programada, así no corre a la
+    vez que ella ni que otra verificación lanzada desde otra sesión o proceso.
+    """
     try:
-        logger.info("Iniciando verificación programada...")
-        # Realizar la verificación
-        resumen = verificar_automaticamente()
+        logger.info("Iniciando verificación manual...")
+        conn = crear_conexion()
+        try:
+            try:
+                trabajo_id = jobs.reservar_trabajo(conn, 'verificacion_mensual',
+                                                   "Verificación de titulares sin reportes")
+            except jobs.TrabajoEnCurso as e:
+                logger.info(f"Verificación manual omitida: {e}")
+                st.session_state.verificacion_mensaje = "⏳ Ya hay una verificación en curso"
+                return None
+            jobs.ejecutar_trabajo(trabajo_id, lambda conn_trabajo, progreso: verificar_titulares_sin_reportes(
+                conn_trabajo, progreso=progreso))
+            trabajo = jobs.obtener_trabajo(conn, trabajo_id)
+        finally:
+            conn.close()
+        if trabajo['estado'] == 'error':
+            raise Exception(trabajo['error'])
+        resumen = trabajo['resultado']
         
         # Actualizar el mensaje para mostrar en la interfaz
         st.session_state.verificacion_mensaje = f"✅ Verificación realizada: {resumen}"
         
         return resumen
     except Exception as e:
-        logger.error(f"Error en verificación programada: {e}")
+        logger.error(f"Error en verificación manual: {e}")
         st.session_state.verificacion_mensaje = f"❌ Error durante la verificación: {str(e)}"
 
-def verificador_thread():
-    """Función que se ejecuta en un hilo separado para programar tareas"""
-    global _thread_running
-    
-    logger.info("Hilo verificador iniciado")
-    
-    # Programar la verificación para el primer día de cada mes a las 8:00 AM
-    schedule.every().day.at("08:00").do(ejecutar_verificacion_si_primer_dia_mes)
-    
-    # Para pruebas, también podemos programarla para que se ejecute cada día a cierta hora
-    #schedule.every().day.at("20:00").do(ejecutar_verificacion)
-    
-    # Loop principal del hilo
-    while _thread_running:
-        schedule.run_pending()
-        time.sleep(60)  # Verificar cada minuto si hay tareas pendientes
-    
-    logger.info("Hilo verificador detenido")
-
 def iniciar_verificador():
-    """Inicia el hilo verificador si no está ya en ejecución"""
-    global _thread_running, _verificador_thread
-    
-    if _thread_running:
-        return
-    
-    _thread_running = True
-    _verificador_thread = threading.Thread(target=verificador_thread, daemon=True)
-    _verificador_thread.start()
+    """
+    Inicia el planificador persistente de este proceso (ver scheduler.py).
+    Aunque haya varios procesos, cada vencimiento lo ejecuta uno solo.
+    """
+    scheduler.iniciar_planificador()
     logger.info("Verificador programado iniciado")
 
 def detener_verificador():
-    """Detiene el hilo verificador"""
-    global _thread_running
-    
-    if not _thread_running:
-        return
-    
-    _thread_running = False
+    """Detiene el planificador de este proceso"""
+    scheduler.detener_planificador()
     logger.info("Señal de detención enviada al verificador programado")
 
 def mostrar_panel_verificacion():
     """Muestra un panel de control para la verificación programada en Streamlit"""
     st.subheader("⏰ Verificación Programada de Titulares sin Reportes")
     
-    # Verificar si schedule está disponible
-    try:
-        import schedule
-        schedule_disponible = True
-    except ImportError:
-        schedule_disponible = False
-        st.warning("""
-        ⚠️ El módulo 'schedule' no está instalado. La verificación automática dentro de la aplicación
-        no estará disponible, pero el cron job del sistema seguirá funcionando.
-        
-        Para habilitar la verificación automática dentro de la aplicación, ejecute:
-        ```
-        pip install schedule
-        ```
-        """)
-    
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -142,10 +88,20 @@ def mostrar_panel_verificacion():
         el primer día de cada mes a las 8:00 AM y envía notificaciones por email.
         """)
         
-        # Mostrar próxima ejecución
-        proximo_mes = datetime.now().replace(day=1) + timedelta(days=32)
-        proximo_mes = proximo_mes.replace(day=1, hour=8, minute=0, second=0, microsecond=0)
-        st.write(f"📅 **Próxima verificación programada:** {proximo_mes.strftime('%d/%m/%Y %H:%M')}")
+        # Mostrar última y próxima ejecución registradas por el planificador
+        conn = crear_conexion()
+        try:
+            scheduler.registrar_tareas_predeterminadas()
+            scheduler.sincronizar_tareas(conn)
+            tareas = {t['nombre']: t for t in scheduler.listar_tareas(conn)}
+        finally:
+            conn.close()
+        tarea = tareas.get('verificacion_mensual')
+        if tarea:
+            proxima = datetime.strptime(tarea['proxima_ejecucion'], '%Y-%m-%d %H:%M:%S')
+            st.write(f"📅 **Próxima verificación programada:** {proxima.strftime('%d/%m/%Y %H:%M')}")
+            if tarea['ultima_ejecucion']:
+                st.write(f"🕒 **Última verificación programada:** {tarea['ultima_ejecucion']} ({tarea['ultimo_estado']})")
         
         # Verificar si hay tareas cron configuradas
         try:
@@ -187,37 +143,16 @@ def mostrar_panel_verificacion():
             # Opcionalmente, podemos limpiar el mensaje después de mostrarlo una vez
             # para que no persista indefinidamente
             # del st.session_state.verificacion_mensaje
-        
-        # Botón para ejecutar el script de configuración
-        if not schedule_disponible:
-            if st.button("⚙️ Configurar automatización", use_container_width=True):
-                st.info("Ejecutando configuración en segundo plano...")
-                try:
-                    import subprocess
-                    subprocess.Popen([sys.executable, "setup_automatizacion.py"],
-                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                    st.success("✅ Configuración iniciada en segundo plano")
-                except Exception as e:
-                    st.error(f"❌ Error al iniciar configuración: {e}")
 
 def inicializar_verificador_en_app():
     """
     Función principal para inicializar el verificador en la aplicación Streamlit.
     Debe llamarse al inicio de la aplicación.
     """
-    # Verificar si schedule está disponible
-    try:
-        import schedule
-        
-        # Iniciar el hilo verificador cuando la aplicación carga
-        if "verificador_iniciado" not in st.session_state:
-            iniciar_verificador()
-            st.session_state.verificador_iniciado = True
-            
-    except ImportError:
-        # Si schedule no está disponible, registrar pero no bloquear la app
-        logging.warning("No se pudo iniciar el verificador programado: módulo 'schedule' no disponible")
-        # No bloqueamos la aplicación, simplemente no inicializamos el verificador
+    # El planificador es único por proceso; iniciarlo varias veces no tiene efecto
+    if "verificador_iniciado" not in st.session_state:
+        iniciar_verificador()
+        st.session_state.verificador_iniciado = True
 
 # Ejemplo de uso en una página de administración
 if __name__ == "__main__":
@@ -7,11 +7,13 @@ import sqlite3
 import logging
 import os
 import json
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from datetime import datetime
 import calendar
 from datetime import timedelta
+from functools import partial
 
 # Función para obtener credenciales de email utilizando email_utils.py
 def obtener_credenciales_email():
@@ -83,404 +85,525 @@ def obtener_nombre_mes(numero_mes):
     # Ajustamos el índice ya que los meses van de 1-12 pero los índices de 0-11
     return nombres_meses[numero_mes - 1]
 
-def verificar_titulares_sin_reportes(conn):
+def _normalizar_marca(nombre):
+    """Normaliza el nombre de una marca para comparaciones (sin espacios extremos, en minúsculas)"""
+    return nombre.strip().lower() if nombre and isinstance(nombre, str) else ''
+
+# Marcas de cada titular (con email) que no aparecen en ningún boletín con reporte
+# generado dentro del periodo. El filtro sobre boletines usa idx_boletines_fecha_reporte
+# y la comparación de nombres se hace sobre la forma normalizada (norm_marca).
+SQL_MARCAS_SIN_REPORTE = """
+    WITH marcas_con_reporte AS (
+        SELECT norm_marca(marca_publicada) AS marca_norm
+        FROM boletines
+        WHERE fecha_alta BETWEEN ? AND ? AND reporte_generado = 1
+        UNION
+        SELECT norm_marca(marca_custodia)
+        FROM boletines
+        WHERE fecha_alta BETWEEN ? AND ? AND reporte_generado = 1
+    ),
+    marcas_sin_reporte AS (
+        SELECT m.titular, c.email, m.codigo_marca, m.marca, m.clase
+        FROM Marcas m
+        JOIN clientes c ON m.titular = c.titular
+        WHERE c.email IS NOT NULL AND c.email != ''
+        AND norm_marca(m.marca) NOT IN (SELECT marca_norm FROM marcas_con_reporte)
+    )
+"""
+
+# Anti-join contra las notificaciones ya registradas para el periodo
+SQL_NO_NOTIFICADO = """
+    NOT EXISTS (
+        SELECT 1 FROM emails_enviados e
+        WHERE e.tipo_email = 'notificacion_marcas'
+        AND e.titular = s.titular
+        AND e.periodo_notificacion = ?
+    )
+"""
+
+def _asegurar_esquema_verificacion(conn):
+    """
+    Crea el índice de boletines por (fecha_alta, reporte_generado) y agrega a
+    emails_enviados las columnas periodo_notificacion y marcas_sin_reportes si faltan.
+
+    Returns:
+        tuple: (tiene_columna_periodo, tiene_columna_marcas)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_boletines_fecha_reporte
+            ON boletines (fecha_alta, reporte_generado)
+        """)
+        conn.commit()
+    except Exception as e:
+        logger.warning(f"No se pudo crear el índice idx_boletines_fecha_reporte: {e}")
+
+    cursor.execute("PRAGMA table_info(emails_enviados)")
+    columnas = [col[1] for col in cursor.fetchall()]
+    tiene_columna_periodo = 'periodo_notificacion' in columnas
+    tiene_columna_marcas = 'marcas_sin_reportes' in columnas
+
+    if not tiene_columna_periodo:
+        logger.warning("La tabla emails_enviados no tiene la columna periodo_notificacion. Se intentará agregarla.")
+        try:
+            cursor.execute("""
+                ALTER TABLE emails_enviados
+                ADD COLUMN periodo_notificacion TEXT DEFAULT NULL
+            """)
+            conn.commit()
+            tiene_columna_periodo = True
+            logger.info("Columna periodo_notificacion agregada correctamente")
+        except Exception as e:
+            logger.error(f"No se pudo agregar la columna periodo_notificacion: {e}")
+
+    if not tiene_columna_marcas:
+        logger.warning("La tabla emails_enviados no tiene la columna marcas_sin_reportes. Se intentará agregarla.")
+        try:
+            cursor.execute("""
+                ALTER TABLE emails_enviados
+                ADD COLUMN marcas_sin_reportes TEXT DEFAULT NULL
+            """)
+            conn.commit()
+            tiene_columna_marcas = True
+            logger.info("Columna marcas_sin_reportes agregada correctamente")
+        except Exception as e:
+            logger.error(f"No se pudo agregar la columna marcas_sin_reportes: {e}")
+
+    cursor.close()
+    return tiene_columna_periodo, tiene_columna_marcas
+
+def obtener_marcas_sin_reportes(conn, primer_dia, ultimo_dia, periodo_reporte=None):
+    """
+    Calcula en un único recorrido las marcas sin reportes del periodo, agrupadas por titular.
+
+    Args:
+        conn: Conexión a la base de datos SQLite
+        primer_dia: Inicio del periodo (YYYY-MM-DD)
+        ultimo_dia: Fin del periodo (YYYY-MM-DD)
+        periodo_reporte: Periodo (MM-YYYY). Si se indica, se excluyen los titulares
+            ya notificados para ese periodo mediante un anti-join sobre emails_enviados.
+
+    Returns:
+        tuple: (pendientes, total_titulares, ya_notificados) donde pendientes es un dict
+            {titular: {'email': str, 'marcas': [(codigo_marca, marca, clase), ...]}}
+    """
+    conn.create_function("norm_marca", 1, _normalizar_marca, deterministic=True)
+    cursor = conn.cursor()
+    try:
+        params_periodo = [primer_dia, ultimo_dia, primer_dia, ultimo_dia]
+
+        # Totales: titulares con marcas sin reporte y cuántos de ellos ya fueron notificados
+        if periodo_reporte:
+            cursor.execute(SQL_MARCAS_SIN_REPORTE + f"""
+                SELECT COUNT(*), COALESCE(SUM(CASE WHEN {SQL_NO_NOTIFICADO} THEN 0 ELSE 1 END), 0)
+                FROM (SELECT DISTINCT titular FROM marcas_sin_reporte) s
+            """, params_periodo + [periodo_reporte])
+        else:
+            cursor.execute(SQL_MARCAS_SIN_REPORTE + """
+                SELECT COUNT(DISTINCT titular), 0 FROM marcas_sin_reporte
+            """, params_periodo)
+        total_titulares, ya_notificados = cursor.fetchone()
+
+        # Detalle solo de los titulares pendientes de notificar
+        query = SQL_MARCAS_SIN_REPORTE + """
+            SELECT s.titular, s.email, s.codigo_marca, s.marca, s.clase
+            FROM marcas_sin_reporte s
+        """
+        params = list(params_periodo)
+        if periodo_reporte:
+            query += f" WHERE {SQL_NO_NOTIFICADO}"
+            params.append(periodo_reporte)
+        query += " ORDER BY s.titular"
+        cursor.execute(query, params)
+
+        pendientes = {}
+        for titular, email, codigo_marca, marca, clase in cursor.fetchall():
+            grupo = pendientes.setdefault(titular, {'email': email, 'marcas': []})
+            grupo['marcas'].append((codigo_marca, marca, clase))
+
+        return pendientes, total_titulares, ya_notificados
+    finally:
+        cursor.close()
+
+def _cargar_logo():
+    """
+    Lee el logo que se embebe en las notificaciones.
+
+    Returns:
+        tuple: (bytes, subtipo MIME) o (None, None) si no se encuentra
+    """
+    from paths import get_assets_dir
+    import mimetypes
+
+    logo_path = os.path.join(get_assets_dir(), 'Logo.png')
+    # Buscar también en otras ubicaciones posibles si no existe en assets
+    if not os.path.exists(logo_path):
+        alt_paths = [
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo.png'),
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo1.png'),
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Logo.png')
+        ]
+        for path in alt_paths:
+            if os.path.exists(path):
+                logo_path = path
+                break
+
+    if not os.path.exists(logo_path):
+        logger.warning(f"No se encontró el archivo de logo en ninguna ruta esperada. Buscado: {logo_path}")
+        return None, None
+
+    try:
+        with open(logo_path, 'rb') as img_file:
+            img_data = img_file.read()
+        # Intentar detectar tipo MIME por extensión
+        mime_type, _ = mimetypes.guess_type(logo_path)
+        if mime_type and mime_type.startswith('image/'):
+            subtype = mime_type.split('/')[1]
+        else:
+            ext = os.path.splitext(logo_path)[1].lstrip('.').lower()
+            subtype = ext if ext else 'png'
+        return img_data, subtype
+    except Exception as e:
+        logger.warning(f"Error al leer logo: {e}")
+        return None, None
+
+def construir_mensaje_notificacion(email_user, email, titular, marcas_sin_reportes, nombre_mes, anio_reporte,
+                                   logo=(None, None)):
+    """
+    Construye el mensaje multipart/related de notificación de marcas sin reportes.
+
+    Args:
+        email_user: Email remitente (el mismo que se usa para autenticar)
+        email: Email del destinatario
+        titular: Nombre del titular
+        marcas_sin_reportes: Lista de tuplas (codigo_marca, marca, clase)
+        nombre_mes: Nombre del mes del periodo en español
+        anio_reporte: Año del periodo
+        logo: Tupla (bytes, subtipo) devuelta por _cargar_logo()
+
+    Returns:
+        MIMEMultipart: Mensaje listo para enviar
+    """
+    from email_templates import get_html_template
+    from email.mime.image import MIMEImage
+
+    # Estructura: multipart/related
+    #               |- multipart/alternative (plain, html)
+    #               |- image (Content-ID)
+    msg_root = MIMEMultipart('related')
+    # Importante: usar EXACTAMENTE el mismo email que se usa para autenticar
+    msg_root['From'] = f"Estudio de Marcas y Patentes <{email_user}>"
+    msg_root['To'] = email
+    msg_root['Subject'] = f"Notificación: CUSTODIA DE MARCAS - {nombre_mes} {anio_reporte}"
+
+    # Crear lista HTML de marcas sin reportes
+    lista_marcas_html = ""
+    for codigo_marca, marca, clase in marcas_sin_reportes:
+        lista_marcas_html += f"<li><span class=\"highlight\">{marca}</span> (Clase {clase}, Código {codigo_marca})</li>"
+
+    # Crear versión texto plano como fallback
+    text_body = f"""Estimado {titular},
+
+Le informamos que durante el mes de {nombre_mes} {anio_reporte} las siguientes marcas de su titularidad no han tenido reportes generados:
+
+{', '.join([f"{m[1]} (Clase {m[2]})" for m in marcas_sin_reportes])}
+
+Si cree que esto es un error o requiere información adicional, por favor contáctenos.
+
+Saludos cordiales,
+Sistema de Gestión de Marcas"""
+
+    # Contenido específico para este tipo de notificación
+    contenido_especifico = f"""
+    <p>Estimado/a <span class="highlight">{titular}</span>,</p>
+
+    <p> En virtud del servicio de custodia oportunamente contratado sobre sus marcas, nos complace informarle que hemos realizado el control mensual comparativo de presentaciones ante el INPI <span class="highlight">{nombre_mes} {anio_reporte}</span>. Como resultado, <span class="highlight"> nuestro sistema no ha detectado marcas similares que pudieran afectar los derechos que estamos protegiendo sobre sus registros.</span></p>
+    <ul style="margin-left: 25px; margin-bottom: 20px;">
+        {lista_marcas_html}
+    </ul>
+
+    <p>Esta notificación es informativa y podría indicar que no se han detectado novedades relevantes para estas marcas durante el período mencionado.</p>
+
+    <p>Si considera que debería haber recibido información sobre estas marcas o requiere cualquier aclaración adicional, no dude en contactarnos.</p>
+
+    <p>Saludos cordiales,<br>
+    Equipo de Gestión de Marcas</p>
+    """
+
+    # Obtener plantilla HTML y reemplazar el contenido
+    html_template = get_html_template()
+    html_content = html_template.replace('<!-- El contenido del mensaje se insertará aquí -->', contenido_especifico)
+
+    # Crear la parte alternative y adjuntar texto y html
+    msg_alternative = MIMEMultipart('alternative')
+    msg_alternative.attach(MIMEText(text_body, 'plain', 'utf-8'))
+    msg_alternative.attach(MIMEText(html_content, 'html', 'utf-8'))
+    msg_root.attach(msg_alternative)
+
+    # Agregar logo si existe
+    img_data, subtype = logo
+    if img_data:
+        img = MIMEImage(img_data, _subtype=subtype)
+        # Asegurarse de que el Content-ID coincida exactamente con cid:logo usado en la plantilla
+        img.add_header('Content-ID', '<logo>')
+        img.add_header('Content-Disposition', 'inline; filename="Logo.png"')
+        msg_root.attach(img)
+
+    return msg_root
+
+def _abrir_sesion_smtp(email_host, email_port, email_user, email_password):
+    """Abre y autentica una sesión SMTP (método que funciona en email_verification_system.py)"""
+    from metrics import SMTP_CONEXION_SEGUNDOS
+
+    port = int(email_port) if isinstance(email_port, str) else email_port
+    inicio = time.perf_counter()
+    server = smtplib.SMTP(email_host, port)
+    server.ehlo()  # Identificarse con el servidor
+    server.starttls()
+    server.ehlo()  # Identificarse nuevamente después de TLS
+    server.login(email_user, email_password)
+    SMTP_CONEXION_SEGUNDOS.observe(time.perf_counter() - inicio)
+    return server
+
+def _registrar_notificacion(cursor, email, asunto, titular, marcas_sin_reportes, nombre_mes, anio_reporte,
+                            periodo_reporte, tiene_columna_periodo, tiene_columna_marcas):
+    """Inserta el registro de la notificación enviada en emails_enviados (sin commit)"""
+    # Crear un resumen del mensaje en lugar de almacenar todo el HTML
+    resumen_mensaje = f"Notificación: Marcas sin reportes para {nombre_mes} {anio_reporte}"
+    fecha_envio = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    if tiene_columna_periodo and tiene_columna_marcas:
+        # Crear un string con las marcas sin reportes
+        marcas_str = ", ".join([f"{m[1]} (Clase {m[2]})" for m in marcas_sin_reportes])
+        cursor.execute("""
+            INSERT INTO emails_enviados
+            (destinatario, asunto, mensaje, fecha_envio, status, tipo_email, titular, periodo_notificacion, marcas_sin_reportes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (email, asunto, resumen_mensaje, fecha_envio,
+              "enviado", "notificacion_marcas", titular, periodo_reporte, marcas_str))
+    elif tiene_columna_periodo:
+        cursor.execute("""
+            INSERT INTO emails_enviados
+            (destinatario, asunto, mensaje, fecha_envio, status, tipo_email, titular, periodo_notificacion)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (email, asunto, resumen_mensaje, fecha_envio,
+              "enviado", "notificacion_marcas", titular, periodo_reporte))
+    else:
+        # Inserción básica si no existen las columnas adicionales
+        cursor.execute("""
+            INSERT INTO emails_enviados
+            (destinatario, asunto, mensaje, fecha_envio, status, tipo_email, titular)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (email, asunto, resumen_mensaje, fecha_envio,
+              "enviado", "notificacion_marcas", titular))
+
+def renderizar_notificaciones(pendientes, total_titulares, ya_notificados, email_user, nombre_mes,
+                              anio_reporte, directorio_render=None):
+    """
+    Escribe las notificaciones pendientes como .eml (sin SMTP ni registro en la base).
+
+    Returns:
+        dict: Resultado con la misma forma que verificar_titulares_sin_reportes más la clave 'render'
     """
-    Verifica las marcas que no tienen reportes generados durante el mes en curso
+    from email_render import crear_directorio_render, nombre_archivo_eml, renderizar_emails
+
+    logo = _cargar_logo()
+    trabajos = []
+    for titular, datos in pendientes.items():
+        trabajos.append({
+            'archivo': nombre_archivo_eml(len(trabajos) + 1, titular),
+            'construir': partial(construir_mensaje_notificacion, email_user or '', datos['email'], titular,
+                                 datos['marcas'], nombre_mes, anio_reporte, logo),
+            'titular': titular,
+            'destinatario': datos['email'],
+            'asunto': f"Notificación: CUSTODIA DE MARCAS - {nombre_mes} {anio_reporte}"
+        })
+
+    render = renderizar_emails(trabajos, crear_directorio_render('notificaciones', directorio_render))
+    return {
+        "estado": "completado",
+        "titulares_con_marcas_sin_reportes": total_titulares,
+        "emails_enviados": 0,
+        "ya_notificados": ya_notificados,
+        "errores": render['errores'],
+        "mensaje_ui": f"Se renderizaron {render['renderizados']} notificaciones en {render['directorio']} (sin envío).",
+        "fecha_verificacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "render": render
+    }
+
+def verificar_titulares_sin_reportes(conn, solo_renderizar=False, directorio_render=None, progreso=None):
+    """
+    Verifica las marcas que no tienen reportes generados durante el mes anterior
     y envía un correo electrónico de notificación al titular listando todas las marcas afectadas.
-    
+
+    Las marcas sin reportes se calculan para todos los titulares con una consulta de conjunto,
+    los titulares ya notificados se excluyen con un anti-join y todos los envíos comparten
+    una única sesión SMTP.
+
     Args:
         conn: Conexión a la base de datos SQLite
-    
+        solo_renderizar: Si es True no se envía ni se registra nada; las notificaciones se
+            escriben como .eml en una carpeta con marca de tiempo junto con un manifest.csv
+        directorio_render: Directorio base para los .eml (por defecto get_emails_render_dir())
+        progreso: Callable opcional progreso(actual, total, mensaje) llamado por titular notificado
+            (ver jobs.ProgresoTrabajo)
+
     Returns:
         dict: Un diccionario con información sobre el resultado de la verificación y envío
     """
     try:
         # Obtener el mes y año actual
         fecha_actual = datetime.now()
-        mes_actual = fecha_actual.month
-        anio_actual = fecha_actual.year
-        
+
         # Calcular el primer y último día del mes pasado
         primer_dia_mes_pasado = (fecha_actual.replace(day=1) - timedelta(days=1)).replace(day=1)
         ultimo_dia_mes_pasado = fecha_actual.replace(day=1) - timedelta(days=1)
-        
+
         # Usar el mes y año del mes pasado para el reporte
         mes_reporte = primer_dia_mes_pasado.month
         anio_reporte = primer_dia_mes_pasado.year
         nombre_mes = obtener_nombre_mes(mes_reporte)
-        
+
         # Definir el periodo del reporte (mes pasado) como string (formato: MM-YYYY)
         periodo_reporte = f"{mes_reporte:02d}-{anio_reporte}"
 
         primer_dia = primer_dia_mes_pasado.strftime("%Y-%m-%d")
         ultimo_dia = ultimo_dia_mes_pasado.strftime("%Y-%m-%d")
-        
+
         logger.info(f"Verificando marcas sin reportes entre {primer_dia} y {ultimo_dia}")
-        
-        cursor = conn.cursor()
 
-        # Obtener credenciales SMTP UNA SOLA VEZ (se usará para notificaciones y envíos)
+        # Obtener credenciales SMTP UNA SOLA VEZ (se usará para todos los envíos)
         email_user, email_password, email_host, email_port = obtener_credenciales_email()
-        if not all([email_user, email_password, email_host, email_port]):
+        if not solo_renderizar and not all([email_user, email_password, email_host, email_port]):
             logger.error("No se encontraron credenciales de email configuradas. Abortando envíos.")
             return {"estado": "error", "mensaje": "Credenciales de email no configuradas"}
-        
-        # Obtener todos los titulares únicos con sus emails
+
+        cursor = conn.cursor()
         cursor.execute("""
-            SELECT DISTINCT m.titular, c.email 
-            FROM Marcas m
-            JOIN clientes c ON m.titular = c.titular
-            WHERE c.email IS NOT NULL AND c.email != ''
+            SELECT COUNT(*) FROM clientes
+            WHERE email IS NOT NULL AND email != ''
+            AND titular IN (SELECT titular FROM Marcas)
         """)
-        
-        titulares = cursor.fetchall()
-        
-        if not titulares:
+        if cursor.fetchone()[0] == 0:
             logger.warning("No se encontraron titulares con emails registrados")
             return {"estado": "error", "mensaje": "No hay titulares con emails registrados"}
-        
+
+        tiene_columna_periodo, tiene_columna_marcas = _asegurar_esquema_verificacion(conn)
+
+        pendientes, total_titulares, ya_notificados = obtener_marcas_sin_reportes(
+            conn, primer_dia, ultimo_dia, periodo_reporte if tiene_columna_periodo else None
+        )
+
+        if solo_renderizar:
+            return renderizar_notificaciones(pendientes, total_titulares, ya_notificados, email_user,
+                                             nombre_mes, anio_reporte, directorio_render)
+
         # Inicializar contadores
-        titulares_con_marcas_sin_reportes = []
         emails_enviados = 0
-        ya_notificados = 0
         errores = 0
-        # Mensaje para la UI cuando no se envían emails
-        mensaje_ui = ''
-        
-        # Verificar si existen las columnas necesarias en la tabla emails_enviados
-        cursor.execute("PRAGMA table_info(emails_enviados)")
-        columnas = [col[1] for col in cursor.fetchall()]
-        tiene_columna_periodo = 'periodo_notificacion' in columnas
-        tiene_columna_marcas = 'marcas_sin_reportes' in columnas
-        
-        if not tiene_columna_periodo:
-            logger.warning("La tabla emails_enviados no tiene la columna periodo_notificacion. Se intentará agregarla.")
-            try:
-                cursor.execute("""
-                    ALTER TABLE emails_enviados 
-                    ADD COLUMN periodo_notificacion TEXT DEFAULT NULL
-                """)
-                conn.commit()
-                tiene_columna_periodo = True
-                logger.info("Columna periodo_notificacion agregada correctamente")
-            except Exception as e:
-                logger.error(f"No se pudo agregar la columna periodo_notificacion: {e}")
-        
-        if not tiene_columna_marcas:
-            logger.warning("La tabla emails_enviados no tiene la columna marcas_sin_reportes. Se intentará agregarla.")
-            try:
-                cursor.execute("""
-                    ALTER TABLE emails_enviados 
-                    ADD COLUMN marcas_sin_reportes TEXT DEFAULT NULL
-                """)
-                conn.commit()
-                tiene_columna_marcas = True
-                logger.info("Columna marcas_sin_reportes agregada correctamente")
-            except Exception as e:
-                logger.error(f"No se pudo agregar la columna marcas_sin_reportes: {e}")
-        
-        for titular, email in titulares:
-            # Obtener todas las marcas del titular
-            cursor.execute("""
-                SELECT codigo_marca, marca, clase 
-                FROM Marcas 
-                WHERE titular = ?
-            """, (titular,))
-            
-            marcas = cursor.fetchall()
-            
-            if not marcas:
-                logger.info(f"El titular '{titular}' no tiene marcas registradas")
-                continue
-            
-            # Verificar qué marcas no tienen reportes en el mes del reporte
-            marcas_sin_reportes = []
-            # Normalizar nombres para comparación
-            def norm(s):
-                return s.strip().lower() if s and isinstance(s, str) else ''
-
-            marca_names = [marca for _, marca, _ in marcas]
-            normalized_to_original = {norm(m): m for m in marca_names}
-
-            if marca_names:
-                # Construir placeholders para la consulta IN
-                placeholders = ','.join('?' for _ in marca_names)
-                params = marca_names + marca_names + [primer_dia, ultimo_dia]
-                query = f"""
-                    SELECT DISTINCT COALESCE(marca_publicada, marca_custodia) as marca
-                    FROM boletines
-                    WHERE (marca_publicada IN ({placeholders}) OR marca_custodia IN ({placeholders}))
-                    AND reporte_generado = 1
-                    AND fecha_alta BETWEEN ? AND ?
-                """
-                try:
-                    cursor.execute(query, params)
-                    filas = cursor.fetchall()
-                    marcas_con_reportes_norm = set()
-                    for (m,) in filas:
-                        marcas_con_reportes_norm.add(norm(m))
-
-                    # Determinar marcas sin reportes comparando normalizado
-                    for codigo_marca, marca, clase in marcas:
-                        if norm(marca) not in marcas_con_reportes_norm:
-                            marcas_sin_reportes.append((codigo_marca, marca, clase))
-                except Exception as e:
-                    logger.warning(f"Error al consultar boletines para titular {titular}: {e}")
-                    # Fallback: conservar comportamiento original por marca
-                    for codigo_marca, marca, clase in marcas:
-                        try:
-                            cursor.execute("""
-                                SELECT COUNT(*) FROM boletines 
-                                WHERE (marca_publicada = ? OR marca_custodia = ?)
-                                AND reporte_generado = 1
-                                AND fecha_alta BETWEEN ? AND ?
-                            """, (marca, marca, primer_dia, ultimo_dia))
-                            tiene_reportes = cursor.fetchone()[0] > 0
-                            if not tiene_reportes:
-                                marcas_sin_reportes.append((codigo_marca, marca, clase))
-                        except Exception:
-                            marcas_sin_reportes.append((codigo_marca, marca, clase))
-            
-            # Si todas las marcas tuvieron reportes, no enviar nada
-            if not marcas_sin_reportes:
-                logger.info(f"Todas las marcas del titular '{titular}' tienen reportes en el mes actual")
-                continue
-                
-            logger.info(f"El titular '{titular}' tiene {len(marcas_sin_reportes)} marcas sin reportes en el mes actual")
-            titulares_con_marcas_sin_reportes.append(titular)
-            
-            # Verificar si ya se ha enviado una notificación para este titular en este periodo
-            ya_notificado = False
-            if tiene_columna_periodo:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM emails_enviados 
-                    WHERE tipo_email = 'notificacion_marcas' 
-                    AND titular = ? 
-                    AND periodo_notificacion = ?
-                """, (titular, periodo_reporte))
-                ya_notificado = cursor.fetchone()[0] > 0
-            
-            if ya_notificado:
-                logger.info(f"Ya se ha enviado una notificación a '{titular}' para el periodo {periodo_reporte}")
-                ya_notificados += 1
-                continue
-            
-                # Intentar enviar email de notificación
-            try:
-                # Obtener credenciales de email (usando una función independiente de streamlit)
-                email_user, email_password, email_host, email_port = obtener_credenciales_email()
-                
-                
-                
-                if not email_user or not email_password:
-                    logger.error("No se encontraron credenciales de email configuradas")
-                    errores += 1
-                    continue                # Importar plantillas HTML
-                from email_templates import get_html_template
-                from email.mime.multipart import MIMEMultipart
-                from email.mime.text import MIMEText
-                from email.mime.image import MIMEImage
-                import os
-                
-                # Crear mensaje como multipart/related (html + imágenes embebidas)
-                # Estructura: multipart/related
-                #               |- multipart/alternative (plain, html)
-                #               |- image (Content-ID)
-                import mimetypes
-                msg_root = MIMEMultipart('related')
-                # Importante: usar EXACTAMENTE el mismo email que se usa para autenticar
-                msg_root['From'] = f"Estudio de Marcas y Patentes <{email_user}>"
-                msg_root['To'] = email
-                msg_root['Subject'] = f"Notificación: CUSTODIA DE MARCAS - {nombre_mes} {anio_reporte}"
-
-                # Crear lista HTML de marcas sin reportes
-                lista_marcas_html = ""
-                for codigo_marca, marca, clase in marcas_sin_reportes:
-                    lista_marcas_html += f"<li><span class=\"highlight\">{marca}</span> (Clase {clase}, Código {codigo_marca})</li>"
-
-                # Crear versión texto plano como fallback
-                text_body = f"""Estimado {titular},
-
-Le informamos que durante el mes de {nombre_mes} {anio_reporte} las siguientes marcas de su titularidad no han tenido reportes generados:
 
-{', '.join([f"{m[1]} (Clase {m[2]})" for m in marcas_sin_reportes])}
+        if pendientes:
+            logo = _cargar_logo()
+            server = None
+            try:
+                for indice, (titular, datos) in enumerate(pendientes.items()):
+                    if progreso:
+                        progreso(indice, len(pendientes), titular)
+                    email = datos['email']
+                    marcas_sin_reportes = datos['marcas']
+                    logger.info(f"El titular '{titular}' tiene {len(marcas_sin_reportes)} marcas sin reportes en el periodo")
 
-Si cree que esto es un error o requiere información adicional, por favor contáctenos.
+                    try:
+                        msg_root = construir_mensaje_notificacion(
+                            email_user, email, titular, marcas_sin_reportes, nombre_mes, anio_reporte, logo
+                        )
+                        msg_content = msg_root.as_string()
 
-Saludos cordiales,
-Sistema de Gestión de Marcas"""
+                        # Sesión SMTP compartida; se reabre una vez si el servidor la cerró
+                        if server is None:
+                            server = _abrir_sesion_smtp(email_host, email_port, email_user, email_password)
+                        try:
+                            # Usar sendmail en lugar de send_message (importante para evitar el error de relay)
+                            server.sendmail(email_user, [email], msg_content)
+                        except smtplib.SMTPServerDisconnected:
+                            server = _abrir_sesion_smtp(email_host, email_port, email_user, email_password)
+                            server.sendmail(email_user, [email], msg_content)
+                    except Exception as e:
+                        logger.error(f"Error al enviar email a {email} ({titular}): {e}")
+                        errores += 1
+                        continue
 
-                # Contenido específico para este tipo de notificación
-                contenido_especifico = f"""
-                <p>Estimado/a <span class="highlight">{titular}</span>,</p>
-                
-                <p> En virtud del servicio de custodia oportunamente contratado sobre sus marcas, nos complace informarle que hemos realizado el control mensual comparativo de presentaciones ante el INPI <span class="highlight">{nombre_mes} {anio_reporte}</span>. Como resultado, <span class="highlight"> nuestro sistema no ha detectado marcas similares que pudieran afectar los derechos que estamos protegiendo sobre sus registros.</span></p>
-                <ul style="margin-left: 25px; margin-bottom: 20px;">
-                    {lista_marcas_html}
-                </ul>
-                
-                <p>Esta notificación es informativa y podría indicar que no se han detectado novedades relevantes para estas marcas durante el período mencionado.</p>
-                
-                <p>Si considera que debería haber recibido información sobre estas marcas o requiere cualquier aclaración adicional, no dude en contactarnos.</p>
-                
-                <p>Saludos cordiales,<br>
-                Equipo de Gestión de Marcas</p>
-                """
-
-                # Obtener plantilla HTML y reemplazar el contenido
-                html_template = get_html_template()
-                html_content = html_template.replace('<!-- El contenido del mensaje se insertará aquí -->', contenido_especifico)
-
-                # Crear la parte alternative y adjuntar texto y html
-                msg_alternative = MIMEMultipart('alternative')
-                msg_alternative.attach(MIMEText(text_body, 'plain', 'utf-8'))
-                msg_alternative.attach(MIMEText(html_content, 'html', 'utf-8'))
-
-                # Adjuntar la parte alternative al root
-                msg_root.attach(msg_alternative)
-
-                # Agregar logo si existe
-                from paths import get_assets_dir
-                logo_path = os.path.join(get_assets_dir(), 'Logo.png')
-                # Buscar también en otras ubicaciones posibles si no existe en assets
-                if not os.path.exists(logo_path):
-                    alt_paths = [
-                        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo.png'),
-                        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imagenes', 'Logo1.png'),
-                        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Logo.png')
-                    ]
-                    for path in alt_paths:
-                        if os.path.exists(path):
-                            logo_path = path
-                            break
-
-                if os.path.exists(logo_path):
+                    # Registrar envío en la tabla emails_enviados
                     try:
-                        with open(logo_path, 'rb') as img_file:
-                            img_data = img_file.read()
-                            # Intentar detectar tipo MIME por extensión
-                            mime_type, _ = mimetypes.guess_type(logo_path)
-                            if mime_type and mime_type.startswith('image/'):
-                                subtype = mime_type.split('/')[1]
-                            else:
-                                ext = os.path.splitext(logo_path)[1].lstrip('.').lower()
-                                subtype = ext if ext else 'png'
-                            img = MIMEImage(img_data, _subtype=subtype)
-                            # Asegurarse de que el Content-ID coincida exactamente con cid:logo usado en la plantilla
-                            img.add_header('Content-ID', '<logo>')
-                            img.add_header('Content-Disposition', 'inline; filename="Logo.png"')
-                            msg_root.attach(img)
-                            logger.info(f"Logo adjuntado desde {logo_path} con Content-ID <logo>")
+                        _registrar_notificacion(
+                            cursor, email, msg_root['Subject'], titular, marcas_sin_reportes, nombre_mes,
+                            anio_reporte, periodo_reporte, tiene_columna_periodo, tiene_columna_marcas
+                        )
+                        conn.commit()
                     except Exception as e:
-                        logger.warning(f"Error al adjuntar logo: {e}")
-                else:
-                    logger.warning(f"No se encontró el archivo de logo en ninguna ruta esperada. Buscado: {logo_path}")
-                    
-                # Enviar email - usando el método exacto que funciona en email_verification_system.py
-                port = int(email_port) if isinstance(email_port, str) else email_port
-                server = smtplib.SMTP(email_host, port)
-                server.ehlo()  # Identificarse con el servidor
-                server.starttls()
-                server.ehlo()  # Identificarse nuevamente después de TLS
-                server.login(email_user, email_password)
-                
-                # Usar sendmail en lugar de send_message (importante para evitar el error de relay)
-                msg_content = msg_root.as_string()
-                server.sendmail(email_user, [email], msg_content)
-                server.quit()
-                
-                # Registrar envío en la tabla emails_enviados
-                try:
-                    # Crear un resumen del mensaje en lugar de almacenar todo el HTML
-                    resumen_mensaje = f"Notificación: Marcas sin reportes para {nombre_mes} {anio_reporte}"
-                    
-                    # Crear un string con las marcas sin reportes
-                    marcas_str = ", ".join([f"{m[1]} (Clase {m[2]})" for m in marcas_sin_reportes])
-                    
-                    if tiene_columna_periodo and tiene_columna_marcas:
-                        cursor.execute("""
-                            INSERT INTO emails_enviados 
-                            (destinatario, asunto, mensaje, fecha_envio, status, tipo_email, titular, periodo_notificacion, marcas_sin_reportes)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (email, msg_root['Subject'], resumen_mensaje, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
-                            "enviado", "notificacion_marcas", titular, periodo_reporte, marcas_str))
-                    elif tiene_columna_periodo:
-                        cursor.execute("""
-                            INSERT INTO emails_enviados 
-                            (destinatario, asunto, mensaje, fecha_envio, status, tipo_email, titular, periodo_notificacion)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (email, msg_root['Subject'], resumen_mensaje, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
-                            "enviado", "notificacion_marcas", titular, periodo_reporte))
-                    else:
-                        # Inserción básica si no existen las columnas adicionales
-                        cursor.execute("""
-                            INSERT INTO emails_enviados 
-                            (destinatario, asunto, mensaje, fecha_envio, status, tipo_email, titular)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (email, msg_root['Subject'], resumen_mensaje, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
-                            "enviado", "notificacion_marcas", titular))
-                    
-                    conn.commit()
-                    logger.info(f"Registro de envío guardado en la base de datos")
-                except Exception as e:
-                    logger.warning(f"No se pudo registrar el envío en la base de datos: {e}")
-                
-                logger.info(f"Email de notificación enviado a {email} ({titular})")
-                emails_enviados += 1
-                
-            except Exception as e:
-                logger.error(f"Error al enviar email a {email} ({titular}): {e}")
-                errores += 1
-        
+                        logger.warning(f"No se pudo registrar el envío en la base de datos: {e}")
+
+                    logger.info(f"Email de notificación enviado a {email} ({titular})")
+                    emails_enviados += 1
+                if progreso:
+                    progreso(len(pendientes), len(pendientes))
+            finally:
+                if server is not None:
+                    try:
+                        server.quit()
+                    except Exception:
+                        pass
+
         # Resumen de la operación
-        logger.info(f"Verificación completada: {len(titulares_con_marcas_sin_reportes)} titulares con marcas sin reportes, {emails_enviados} emails enviados, {ya_notificados} ya notificados, {errores} errores")
+        logger.info(f"Verificación completada: {total_titulares} titulares con marcas sin reportes, {emails_enviados} emails enviados, {ya_notificados} ya notificados, {errores} errores")
 
         # Construir un mensaje claro para la UI según el resultado
         mensaje_ui = ''
         if emails_enviados == 0:
-            if len(titulares_con_marcas_sin_reportes) == 0:
+            if total_titulares == 0:
                 # No hay titulares con marcas sin reportes
                 mensaje_ui = f"No hay reportes para enviar para el periodo {periodo_reporte}."
             else:
                 # Hay titulares detectados pero no se enviaron emails: distinguir causas
-                if ya_notificados >= len(titulares_con_marcas_sin_reportes) and ya_notificados > 0:
+                if ya_notificados >= total_titulares and ya_notificados > 0:
                     # Todos los detectados ya habían sido notificados en este periodo
                     mensaje_ui = (
-                        f"Se detectaron {len(titulares_con_marcas_sin_reportes)} titulares con marcas sin reportes, "
+                        f"Se detectaron {total_titulares} titulares con marcas sin reportes, "
                         f"pero ya se habían notificado previamente en este periodo ({periodo_reporte}). No se enviaron nuevos emails."
                     )
                 elif ya_notificados > 0:
                     # Algunos ya habían sido notificados, otros no se enviaron por errores u otra razón
                     mensaje_ui = (
-                        f"Se detectaron {len(titulares_con_marcas_sin_reportes)} titulares con marcas sin reportes; "
+                        f"Se detectaron {total_titulares} titulares con marcas sin reportes; "
                         f"{ya_notificados} ya habían sido notificados previamente para el periodo {periodo_reporte}. "
                         f"No se enviaron nuevos emails. Errores: {errores}. Revisa el log si corresponde."
                     )
                 elif errores > 0:
                     # No se enviaron por errores
                     mensaje_ui = (
-                        f"Se detectaron {len(titulares_con_marcas_sin_reportes)} titulares con marcas sin reportes, "
+                        f"Se detectaron {total_titulares} titulares con marcas sin reportes, "
                         f"pero no se pudieron enviar los emails debido a {errores} error(es). Revisa el log."
                     )
                 else:
                     # Caso genérico: no se enviaron y no hay errores ni notificaciones previas detectadas
                     mensaje_ui = (
-                        f"Se detectaron {len(titulares_con_marcas_sin_reportes)} titulares con marcas sin reportes, "
+                        f"Se detectaron {total_titulares} titulares con marcas sin reportes, "
                         f"pero no se enviaron emails. Errores: {errores}. Revisa el log."
                     )
 
         logger.info('Mensaje para UI: %s', mensaje_ui)
-        
+
         return {
             "estado": "completado",
-            "titulares_con_marcas_sin_reportes": len(titulares_con_marcas_sin_reportes),
+            "titulares_con_marcas_sin_reportes": total_titulares,
             "emails_enviados": emails_enviados,
             "ya_notificados": ya_notificados,
             "errores": errores,
             "mensaje_ui": mensaje_ui,
             "fecha_verificacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-    
+
     except Exception as e:
         logger.error(f"Error durante la verificación de titulares sin reportes: {e}")
         return {"estado": "error", "mensaje": str(e)}
@@ -512,9 +635,14 @@ if __name__ == "__main__":
     # Ejecutar verificación al llamar el script directamente
     from database import crear_conexion
     
+    import sys
+    from metrics import iniciar_servidor_metricas
+
+    iniciar_servidor_metricas()
     conn = crear_conexion()
     if conn:
-        resultado = verificar_titulares_sin_reportes(conn)
+        # --renderizar: escribe las notificaciones como .eml sin enviarlas
+        resultado = verificar_titulares_sin_reportes(conn, solo_renderizar='--renderizar' in sys.argv)
         conn.close()
         
         print("Resultado de la verificación:")